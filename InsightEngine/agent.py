@@ -3,14 +3,17 @@ Deep Search Agent主类
 整合所有模块，实现完整的深度搜索流程
 """
 
+import contextvars
+import hashlib
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, Callable
 from loguru import logger
 
-from .llms import LLMClient
+from .llms import LLMClient, LLMResponseCache
 from .nodes import (
     ReportStructureNode,
     FirstSearchNode, 
@@ -19,15 +22,23 @@ from .nodes import (
     ReflectionSummaryNode,
     ReportFormattingNode
 )
-from .state import State
+from .state import State, StateJournal
+# utils目录已由 .llms 加入 sys.path
+from run_metrics import RunMetrics, metrics_run, span, increment, start_prometheus_server
 from .tools import MediaCrawlerDB, DBResponse, keyword_optimizer, multilingual_sentiment_analyzer
 from .utils.config import settings, Settings
-from .utils import format_search_results_for_prompt
+from .utils import format_search_results_for_prompt, collapse_near_duplicates, rank_results
 
 
 class DeepSearchAgent:
     """Deep Search Agent主类"""
     
+    # 当前研究的检查点日志，仅在research()中按配置创建
+    _journal: Optional[StateJournal] = None
+    
+    # 当前研究的耗时与用量统计，仅在research()中创建
+    _run_metrics: Optional[RunMetrics] = None
+    
     def __init__(self, config: Optional[Settings] = None):
         """
         初始化Deep Search Agent
@@ -52,10 +63,16 @@ class DeepSearchAgent:
         
         # 状态
         self.state = State()
+
+        # 预生成的各段落首次搜索输出（段落索引 -> 搜索输出）
+        self._initial_search_outputs: Dict[int, Dict[str, Any]] = {}
         
         # 确保输出目录存在
         os.makedirs(self.config.OUTPUT_DIR, exist_ok=True)
         
+        # 可选的Prometheus指标端点（进程内只启动一次）
+        start_prometheus_server(self.config.METRICS_PROMETHEUS_PORT)
+        
         logger.info(f"Insight Agent已初始化")
         logger.info(f"使用LLM: {self.llm_client.get_model_info()}")
         logger.info(f"搜索工具集: MediaCrawlerDB (支持5种本地数据库查询工具)")
@@ -67,6 +84,22 @@ class DeepSearchAgent:
             api_key=self.config.INSIGHT_ENGINE_API_KEY,
             model_name=self.config.INSIGHT_ENGINE_MODEL_NAME,
             base_url=self.config.INSIGHT_ENGINE_BASE_URL,
+            max_concurrency=self.config.LLM_MAX_CONCURRENT_REQUESTS,
+            requests_per_minute=self.config.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=self.config.LLM_TOKENS_PER_MINUTE,
+            cache=self._initialize_llm_cache(),
+            cache_nodes=[node.strip() for node in self.config.LLM_CACHE_NODES.split(",") if node.strip()],
+            stream_include_usage=self.config.LLM_STREAM_INCLUDE_USAGE,
+        )
+    
+    def _initialize_llm_cache(self) -> Optional["LLMResponseCache"]:
+        """按配置创建LLM响应缓存，未启用时返回None"""
+        if not self.config.LLM_CACHE_ENABLED or LLMResponseCache is None:
+            return None
+        return LLMResponseCache(
+            ttl_seconds=self.config.LLM_CACHE_TTL,
+            max_entries=self.config.LLM_CACHE_MAX_ENTRIES,
+            sqlite_path=self.config.LLM_CACHE_SQLITE_PATH,
         )
     
     def _initialize_nodes(self):
@@ -113,6 +146,8 @@ class DeepSearchAgent:
                 - "search_topic_by_date": 按日期搜索话题
                 - "get_comments_for_topic": 获取话题评论
                 - "search_topic_on_platform": 平台定向搜索
+                - "search_topic_semantically": 语义话题搜索
+                - "get_topic_trend": 话题趋势（预汇总的数值时间序列）
                 - "analyze_sentiment": 对查询结果进行情感分析
             query: 搜索关键词/话题
             **kwargs: 额外参数（如start_date, end_date, platform, limit, enable_sentiment等）
@@ -133,7 +168,7 @@ class DeepSearchAgent:
             enable_sentiment = kwargs.get("enable_sentiment", True)
             if enable_sentiment and response.results and len(response.results) > 0:
                 logger.info(f"  🎭 开始对热点内容进行情感分析...")
-                sentiment_analysis = self._perform_sentiment_analysis(response.results)
+                sentiment_analysis = self._perform_sentiment_analysis(self._results_for_llm(response.results))
                 if sentiment_analysis:
                     # 将情感分析结果添加到响应的parameters中
                     response.parameters["sentiment_analysis"] = sentiment_analysis
@@ -141,6 +176,38 @@ class DeepSearchAgent:
             
             return response
         
+        # 话题趋势直接读取汇总表，返回的是数值序列而非原始文本，不需要关键词优化和情感分析
+        if tool_name == "get_topic_trend":
+            return self.search_agency.get_topic_trend(
+                topic=query,
+                granularity=kwargs.get("granularity", "day"),
+                start_date=kwargs.get("start_date"),
+                end_date=kwargs.get("end_date"),
+                platform=kwargs.get("platform"),
+            )
+        
+        # 语义搜索直接使用原始查询（向量相似度已覆盖同义表达，不需要关键词优化），结果已按相似度排序
+        if tool_name == "search_topic_semantically":
+            limit = kwargs.get("limit", self.config.DEFAULT_SEARCH_TOPIC_SEMANTICALLY_LIMIT)
+            response = self.search_agency.search_topic_semantically(topic=query, limit=limit)
+            if response.error_message:
+                logger.warning(f"  语义搜索不可用（{response.error_message}），改用全局搜索")
+                return self.execute_search_tool("search_topic_globally", query, **kwargs)
+            
+            response.results = self._deduplicate_results(response.results)
+            response.results_count = len(response.results)
+            logger.info(f"  语义搜索找到 {response.results_count} 条结果")
+            
+            enable_sentiment = kwargs.get("enable_sentiment", True)
+            if enable_sentiment and response.results:
+                logger.info(f"  🎭 开始对搜索结果进行情感分析...")
+                sentiment_analysis = self._perform_sentiment_analysis(self._results_for_llm(response.results))
+                if sentiment_analysis:
+                    response.parameters["sentiment_analysis"] = sentiment_analysis
+                    logger.info(f"  ✅ 情感分析完成")
+            
+            return response
+        
         # 独立情感分析工具
         if tool_name == "analyze_sentiment":
             texts = kwargs.get("texts", query)  # 可以通过texts参数传递，或使用query
@@ -222,6 +289,18 @@ class DeepSearchAgent:
         unique_results = self._deduplicate_results(all_results)
         logger.info(f"  总计找到 {total_count} 条结果，去重后 {len(unique_results)} 条")
         
+        # 本地排序：相关度、互动热度与时效性加权，使截断后送入LLM的是最有价值的结果
+        if self.config.RANKING_ENABLED:
+            unique_results = rank_results(
+                unique_results,
+                query,
+                optimized_response.optimized_keywords,
+                bm25_weight=self.config.RANKING_BM25_WEIGHT,
+                engagement_weight=self.config.RANKING_ENGAGEMENT_WEIGHT,
+                recency_weight=self.config.RANKING_RECENCY_WEIGHT,
+                half_life_days=self.config.RANKING_RECENCY_HALF_LIFE_DAYS,
+            )
+        
         # 构建整合后的响应
         integrated_response = DBResponse(
             tool_name=f"{tool_name}_optimized",
@@ -239,7 +318,7 @@ class DeepSearchAgent:
         enable_sentiment = kwargs.get("enable_sentiment", True)
         if enable_sentiment and unique_results and len(unique_results) > 0:
             logger.info(f"  🎭 开始对搜索结果进行情感分析...")
-            sentiment_analysis = self._perform_sentiment_analysis(unique_results)
+            sentiment_analysis = self._perform_sentiment_analysis(self._results_for_llm(unique_results))
             if sentiment_analysis:
                 # 将情感分析结果添加到响应的parameters中
                 integrated_response.parameters["sentiment_analysis"] = sentiment_analysis
@@ -247,9 +326,15 @@ class DeepSearchAgent:
         
         return integrated_response
     
+    def _results_for_llm(self, results: List) -> List:
+        """按 MAX_SEARCH_RESULTS_FOR_LLM 截取最终会送入LLM的结果，0表示不限制"""
+        if self.config.MAX_SEARCH_RESULTS_FOR_LLM > 0:
+            return results[:self.config.MAX_SEARCH_RESULTS_FOR_LLM]
+        return results
+    
     def _deduplicate_results(self, results: List) -> List:
         """
-        去重搜索结果
+        去重搜索结果：先按URL或内容前缀精确去重，再合并转发、搬运等近似重复内容
         """
         seen = set()
         unique_results = []
@@ -261,6 +346,12 @@ class DeepSearchAgent:
                 seen.add(identifier)
                 unique_results.append(result)
         
+        if self.config.NEAR_DUPLICATE_ENABLED and len(unique_results) > 1:
+            collapsed = collapse_near_duplicates(unique_results, self.config.NEAR_DUPLICATE_THRESHOLD)
+            if len(collapsed) < len(unique_results):
+                logger.info(f"  合并近似重复内容: {len(unique_results)} -> {len(collapsed)} 条")
+            unique_results = collapsed
+        
         return unique_results
     
     def _perform_sentiment_analysis(self, results: List) -> Optional[Dict[str, Any]]:
@@ -274,8 +365,13 @@ class DeepSearchAgent:
             情感分析结果字典，如果失败则返回None
         """
         try:
+            # 全部结果都已有预计算情感时无需加载模型
+            needs_model = any(getattr(result, "sentiment_label", None) is None for result in results)
+
             # 初始化情感分析器（如果尚未初始化且未被禁用）
-            if not self.sentiment_analyzer.is_initialized and not self.sentiment_analyzer.is_disabled:
+            if not needs_model:
+                logger.info("    使用预计算的情感结果，跳过模型加载")
+            elif not self.sentiment_analyzer.is_initialized and not self.sentiment_analyzer.is_disabled:
                 logger.info("    初始化情感分析模型...")
                 if not self.sentiment_analyzer.initialize():
                     logger.info("     情感分析模型初始化失败，将直接透传原始文本")
@@ -290,16 +386,19 @@ class DeepSearchAgent:
                     "platform": result.platform,
                     "author": result.author_nickname,
                     "url": result.url,
-                    "publish_time": str(result.publish_time) if result.publish_time else None
+                    "publish_time": str(result.publish_time) if result.publish_time else None,
+                    "sentiment_label": getattr(result, "sentiment_label", None),
+                    "sentiment_confidence": getattr(result, "sentiment_confidence", None)
                 }
                 results_dict.append(result_dict)
             
             # 执行情感分析
-            sentiment_analysis = self.sentiment_analyzer.analyze_query_results(
-                query_results=results_dict,
-                text_field="content",
-                min_confidence=0.5
-            )
+            with span("sentiment.analyze"):
+                sentiment_analysis = self.sentiment_analyzer.analyze_query_results(
+                    query_results=results_dict,
+                    text_field="content",
+                    min_confidence=0.5
+                )
             
             return sentiment_analysis.get("sentiment_analysis")
             
@@ -369,13 +468,19 @@ class DeepSearchAgent:
                 "results": []
             }
     
-    def research(self, query: str, save_report: bool = True) -> str:
+    def research(self, query: str, save_report: bool = True, resume: bool = False,
+                 progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
         """
         执行深度研究
         
+        开启 CHECKPOINT_ENABLED 时，每次节点修改状态后都会写入检查点日志；
+        resume=True 时从同一查询的日志恢复，已完成的搜索与总结不会重新计算。
+        
         Args:
             query: 研究查询
             save_report: 是否保存报告到文件
+            resume: 是否从上次中断处继续
+            progress_callback: 段落进度回调 (已完成数, 总数)，在调用线程中执行
             
         Returns:
             最终报告内容
@@ -384,27 +489,82 @@ class DeepSearchAgent:
         logger.info(f"开始深度研究: {query}")
         logger.info(f"{'='*60}")
         
-        try:
-            # Step 1: 生成报告结构
-            self._generate_report_structure(query)
-            
-            # Step 2: 处理每个段落
-            self._process_paragraphs()
-            
-            # Step 3: 生成最终报告
-            final_report = self._generate_final_report()
-            
-            # Step 4: 保存报告
-            if save_report:
-                self._save_report(final_report)
+        self.llm_client.reset_cache_stats()
+        self.llm_client.reset_usage_stats()
+        
+        with metrics_run(query) as run_metrics:
+            self._run_metrics = run_metrics
+            try:
+                resumed = self._start_checkpoint(query, resume)
+                
+                # Step 1: 生成报告结构
+                if not resumed:
+                    with span("agent.report_structure"):
+                        self._generate_report_structure(query)
+                
+                # Step 2: 处理每个段落
+                with span("agent.paragraphs"):
+                    self._process_paragraphs(progress_callback)
+                
+                # Step 3: 生成最终报告
+                if self.state.is_completed and self.state.final_report:
+                    logger.info("检查点中已有最终报告，跳过生成")
+                    final_report = self.state.final_report
+                else:
+                    with span("agent.final_report"):
+                        final_report = self._generate_final_report()
+                
+                # Step 4: 保存报告
+                if save_report:
+                    self._save_report(final_report)
 
-            logger.info("深度研究完成！")
-            
-            return final_report
-            
-        except Exception as e:
-            logger.exception(f"研究过程中发生错误: {str(e)}")
-            raise e
+                logger.info("深度研究完成！")
+                
+                return final_report
+                
+            except Exception as e:
+                logger.exception(f"研究过程中发生错误: {str(e)}")
+                raise e
+    
+    def _checkpoint_path(self, query: str) -> str:
+        """同一查询的检查点日志路径"""
+        query_safe = "".join(c for c in query if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        query_safe = query_safe.replace(' ', '_')[:30]
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.config.OUTPUT_DIR, "checkpoints", f"{query_safe}_{digest}.jsonl")
+    
+    def _start_checkpoint(self, query: str, resume: bool) -> bool:
+        """
+        准备检查点日志
+        
+        Returns:
+            是否已从日志恢复出报告结构（恢复后跳过结构生成）
+        """
+        if not self.config.CHECKPOINT_ENABLED:
+            self._journal = None
+            return False
+        
+        self._journal = StateJournal(self._checkpoint_path(query))
+        if resume:
+            state = self._journal.load()
+            if state is not None and state.query == query and state.paragraphs:
+                self.state = state
+                completed = state.get_completed_paragraphs_count()
+                logger.info(
+                    f"从检查点恢复研究: {self._journal.path}，"
+                    f"已完成 {completed}/{len(state.paragraphs)} 个段落"
+                )
+                return True
+            logger.info("未找到可用的检查点，从头开始研究")
+        
+        self.state = State()
+        self._journal.reset()
+        return False
+    
+    def _checkpoint_paragraph(self, paragraph_index: int):
+        """段落研究状态变化后写入检查点"""
+        if self._journal is not None:
+            self._journal.record_paragraph(self.state, paragraph_index)
     
     def _generate_report_structure(self, query: str):
         """生成报告结构"""
@@ -420,26 +580,116 @@ class DeepSearchAgent:
         for i, paragraph in enumerate(self.state.paragraphs, 1):
             _message += f"\n  {i}. {paragraph.title}"
         logger.info(_message)
+        
+        if self._journal is not None:
+            self._journal.record_structure(self.state)
     
-    def _process_paragraphs(self):
-        """处理所有段落"""
+    def _prepare_initial_searches(self, executor: Optional[ThreadPoolExecutor] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        预先为所有段落生成首次搜索查询，并一次性批量优化关键词，
+        使关键词优化不再出现在每个段落的关键路径上
+
+        Args:
+            executor: 段落线程池；提供时各段落的首次搜索查询并行生成，全部完成后再批量优化关键词
+        """
+        targets = [
+            i for i, paragraph in enumerate(self.state.paragraphs)
+            if not paragraph.research.is_completed and not paragraph.research.latest_summary
+        ]
+
+        def first_search(i: int) -> Dict[str, Any]:
+            paragraph = self.state.paragraphs[i]
+            return self.first_search_node.run({
+                "title": paragraph.title,
+                "content": paragraph.content
+            })
+
+        if executor is not None:
+            outcomes = {i: executor.submit(contextvars.copy_context().run, first_search, i) for i in targets}
+        else:
+            outcomes = {i: None for i in targets}
+
+        search_outputs = {}
+        for i, future in outcomes.items():
+            try:
+                search_outputs[i] = future.result() if future is not None else first_search(i)
+            except Exception as e:
+                logger.warning(f"  段落 {i + 1} 的搜索查询预生成失败，将在处理时重试: {str(e)}")
+
+        queries = [
+            (output["search_query"], f"使用{output.get('search_tool', 'search_topic_globally')}工具进行查询")
+            for output in search_outputs.values()
+            if output.get("search_query") and output.get("search_tool") not in ("search_hot_content", "search_topic_semantically", "get_topic_trend")
+        ]
+        if queries:
+            keyword_optimizer.optimize_keywords_batch(queries)
+        return search_outputs
+
+    def _process_paragraphs(self, progress_callback: Optional[Callable[[int, int], None]] = None):
+        """
+        处理所有段落
+        
+        段落之间相互独立，最多 MAX_CONCURRENT_PARAGRAPHS 个段落在线程池中并行研究。
+        
+        Args:
+            progress_callback: 每完成一个段落时在调用线程中回调 (已完成数, 段落总数)
+        """
         total_paragraphs = len(self.state.paragraphs)
+        # 从检查点恢复时跳过已完成的段落
+        pending = [i for i, paragraph in enumerate(self.state.paragraphs) if not paragraph.research.is_completed]
+        done = total_paragraphs - len(pending)
+        if done:
+            logger.info(f"跳过已完成的 {done} 个段落")
+        max_workers = max(1, min(self.config.MAX_CONCURRENT_PARAGRAPHS, len(pending)))
+        if max_workers == 1:
+            self._initial_search_outputs = self._prepare_initial_searches()
+            for completed, i in enumerate(pending, done + 1):
+                self._process_paragraph(i)
+                self._report_paragraph_progress(completed, total_paragraphs, progress_callback)
+            return
         
-        for i in range(total_paragraphs):
-            logger.info(f"\n[步骤 2.{i+1}] 处理段落: {self.state.paragraphs[i].title}")
-            logger.info("-" * 50)
-            
-            # 初始搜索和总结
-            self._initial_search_and_summary(i)
-            
-            # 反思循环
-            self._reflection_loop(i)
-            
-            # 标记段落完成
-            self.state.paragraphs[i].research.mark_completed()
-            
-            progress = (i + 1) / total_paragraphs * 100
-            logger.info(f"段落处理完成 ({progress:.1f}%)")
+        logger.info(f"并行研究 {len(pending)} 个段落，最大并发数 {max_workers}")
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="paragraph") as executor:
+            # 首次搜索查询在同一线程池中并行生成，避免N次LLM往返串行出现在关键路径上
+            self._initial_search_outputs = self._prepare_initial_searches(executor)
+            # 复制上下文使工作线程中的耗时计入本次研究
+            futures = [executor.submit(contextvars.copy_context().run, self._process_paragraph, i) for i in pending]
+            try:
+                for completed, future in enumerate(as_completed(futures), done + 1):
+                    future.result()
+                    self._report_paragraph_progress(completed, total_paragraphs, progress_callback)
+            except Exception:
+                # 与串行模式一致：任一段落失败即中止研究，取消尚未开始的段落
+                for future in futures:
+                    future.cancel()
+                raise
+    
+    def _process_paragraph(self, paragraph_index: int):
+        """处理单个段落；只修改该段落自己的研究状态，可在工作线程中并行执行"""
+        paragraph = self.state.paragraphs[paragraph_index]
+        logger.info(f"\n[步骤 2.{paragraph_index + 1}] 处理段落: {paragraph.title}")
+        logger.info("-" * 50)
+        
+        # 初始搜索和总结（从检查点恢复且已有总结时跳过）
+        if not paragraph.research.latest_summary:
+            with span("agent.initial_search_and_summary"):
+                self._initial_search_and_summary(paragraph_index)
+        
+        # 反思循环
+        with span("agent.reflection_loop"):
+            self._reflection_loop(paragraph_index)
+        
+        # 标记段落完成
+        paragraph.research.mark_completed()
+        self._checkpoint_paragraph(paragraph_index)
+        logger.info(f"段落处理完成: {paragraph.title}")
+    
+    @staticmethod
+    def _report_paragraph_progress(completed: int, total: int, progress_callback: Optional[Callable[[int, int], None]]):
+        progress = completed / total * 100
+        logger.info(f"段落进度: {completed}/{total} ({progress:.1f}%)")
+        if progress_callback:
+            progress_callback(completed, total)
     
     def _initial_search_and_summary(self, paragraph_index: int):
         """执行初始搜索和总结"""
@@ -451,9 +701,11 @@ class DeepSearchAgent:
             "content": paragraph.content
         }
         
-        # 生成搜索查询和工具选择
+        # 生成搜索查询和工具选择（优先使用预生成的结果）
         logger.info("  - 生成搜索查询...")
-        search_output = self.first_search_node.run(search_input)
+        search_output = self._initial_search_outputs.pop(paragraph_index, None)
+        if search_output is None:
+            search_output = self.first_search_node.run(search_input)
         search_query = search_output["search_query"]
         search_tool = search_output.get("search_tool", "search_topic_globally")  # 默认工具
         reasoning = search_output["reasoning"]
@@ -469,7 +721,7 @@ class DeepSearchAgent:
         search_kwargs = {}
         
         # 处理需要日期的工具
-        if search_tool in ["search_topic_by_date", "search_topic_on_platform"]:
+        if search_tool in ["search_topic_by_date", "search_topic_on_platform", "get_topic_trend"]:
             start_date = search_output.get("start_date")
             end_date = search_output.get("end_date")
             
@@ -497,6 +749,12 @@ class DeepSearchAgent:
                 logger.warning(f"    search_topic_on_platform工具缺少平台参数，改用全局搜索")
                 search_tool = "search_topic_globally"
         
+        # 话题趋势的粒度与可选平台
+        if search_tool == "get_topic_trend":
+            search_kwargs["granularity"] = search_output.get("granularity") or "day"
+            if search_output.get("platform"):
+                search_kwargs["platform"] = search_output.get("platform")
+        
         # 处理限制参数，使用配置文件中的默认值而不是agent提供的参数
         if search_tool == "search_hot_content":
             time_period = search_output.get("time_period", "week")
@@ -509,14 +767,17 @@ class DeepSearchAgent:
             else:  # search_topic_by_date
                 limit_per_table = self.config.DEFAULT_SEARCH_TOPIC_BY_DATE_LIMIT_PER_TABLE
             search_kwargs["limit_per_table"] = limit_per_table
-        elif search_tool in ["get_comments_for_topic", "search_topic_on_platform"]:
+        elif search_tool in ["get_comments_for_topic", "search_topic_on_platform", "search_topic_semantically"]:
             if search_tool == "get_comments_for_topic":
                 limit = self.config.DEFAULT_GET_COMMENTS_FOR_TOPIC_LIMIT
+            elif search_tool == "search_topic_semantically":
+                limit = self.config.DEFAULT_SEARCH_TOPIC_SEMANTICALLY_LIMIT
             else:  # search_topic_on_platform
                 limit = self.config.DEFAULT_SEARCH_TOPIC_ON_PLATFORM_LIMIT
             search_kwargs["limit"] = limit
         
-        search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
+        with span("search.tool", tool=search_tool):
+            search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
         
         # 转换为兼容格式
         search_results = []
@@ -537,7 +798,8 @@ class DeepSearchAgent:
                     'platform': result.platform,
                     'content_type': result.content_type,
                     'author': result.author_nickname,
-                    'engagement': result.engagement
+                    'engagement': result.engagement,
+                    'duplicate_count': result.duplicate_count
                 })
         
         if search_results:
@@ -559,7 +821,7 @@ class DeepSearchAgent:
             "content": paragraph.content,
             "search_query": search_query,
             "search_results": format_search_results_for_prompt(
-                search_results, self.config.MAX_CONTENT_LENGTH
+                search_results, self.config.MAX_CONTENT_LENGTH, self.config.FIRST_SUMMARY_TOKEN_BUDGET
             )
         }
         
@@ -567,6 +829,7 @@ class DeepSearchAgent:
         self.state = self.first_summary_node.mutate_state(
             summary_input, self.state, paragraph_index
         )
+        self._checkpoint_paragraph(paragraph_index)
         
         logger.info("  - 初始总结完成")
     
@@ -574,8 +837,13 @@ class DeepSearchAgent:
         """执行反思循环"""
         paragraph = self.state.paragraphs[paragraph_index]
         
-        for reflection_i in range(self.config.MAX_REFLECTIONS):
+        # 从检查点恢复时，已提前结束的段落不再反思，其余从已完成的轮次之后继续
+        if any(stats.get("early_exit") for stats in paragraph.research.novelty_stats):
+            return
+        
+        for reflection_i in range(paragraph.research.reflection_iteration, self.config.MAX_REFLECTIONS):
             logger.info(f"  - 反思 {reflection_i + 1}/{self.config.MAX_REFLECTIONS}...")
+            increment("agent.reflection_rounds")
             
             # 准备反思输入
             reflection_input = {
@@ -599,7 +867,7 @@ class DeepSearchAgent:
             search_kwargs = {}
             
             # 处理需要日期的工具
-            if search_tool in ["search_topic_by_date", "search_topic_on_platform"]:
+            if search_tool in ["search_topic_by_date", "search_topic_on_platform", "get_topic_trend"]:
                 start_date = reflection_output.get("start_date")
                 end_date = reflection_output.get("end_date")
                 
@@ -627,6 +895,12 @@ class DeepSearchAgent:
                     logger.warning(f"      search_topic_on_platform工具缺少平台参数，改用全局搜索")
                     search_tool = "search_topic_globally"
             
+            # 话题趋势的粒度与可选平台
+            if search_tool == "get_topic_trend":
+                search_kwargs["granularity"] = reflection_output.get("granularity") or "day"
+                if reflection_output.get("platform"):
+                    search_kwargs["platform"] = reflection_output.get("platform")
+            
             # 处理限制参数
             if search_tool == "search_hot_content":
                 time_period = reflection_output.get("time_period", "week")
@@ -641,15 +915,18 @@ class DeepSearchAgent:
                 else:  # search_topic_by_date
                     limit_per_table = self.config.DEFAULT_SEARCH_TOPIC_BY_DATE_LIMIT_PER_TABLE
                 search_kwargs["limit_per_table"] = limit_per_table
-            elif search_tool in ["get_comments_for_topic", "search_topic_on_platform"]:
+            elif search_tool in ["get_comments_for_topic", "search_topic_on_platform", "search_topic_semantically"]:
                 # 使用配置文件中的默认值，不允许agent控制limit参数
                 if search_tool == "get_comments_for_topic":
                     limit = self.config.DEFAULT_GET_COMMENTS_FOR_TOPIC_LIMIT
+                elif search_tool == "search_topic_semantically":
+                    limit = self.config.DEFAULT_SEARCH_TOPIC_SEMANTICALLY_LIMIT
                 else:  # search_topic_on_platform
                     limit = self.config.DEFAULT_SEARCH_TOPIC_ON_PLATFORM_LIMIT
                 search_kwargs["limit"] = limit
             
-            search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
+            with span("search.tool", tool=search_tool):
+                search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
             
             # 转换为兼容格式
             search_results = []
@@ -670,7 +947,8 @@ class DeepSearchAgent:
                         'platform': result.platform,
                         'content_type': result.content_type,
                         'author': result.author_nickname,
-                        'engagement': result.engagement
+                        'engagement': result.engagement,
+                        'duplicate_count': result.duplicate_count
                     })
             
             if search_results:
@@ -682,16 +960,33 @@ class DeepSearchAgent:
             else:
                 logger.info("    未找到反思搜索结果")
             
+            # 统计本轮带来的新内容（按URL或内容哈希与该段落已使用的结果比对）
+            new_count = paragraph.research.count_new_results(search_results)
+            novelty_stats = paragraph.research.record_novelty(
+                reflection_i + 1,
+                len(search_results),
+                new_count,
+                early_exit=self._should_stop_reflecting(search_results, new_count)
+            )
+            
             # 更新搜索历史
             paragraph.research.add_search_results(search_query, search_results)
             
+            if novelty_stats["early_exit"]:
+                logger.info(
+                    f"    反思搜索新内容 {new_count}/{len(search_results)} 条，"
+                    f"低于阈值 {self.config.REFLECTION_NOVELTY_THRESHOLD:.0%}，提前结束反思"
+                )
+                self._checkpoint_paragraph(paragraph_index)
+                break
+            
             # 生成反思总结
             reflection_summary_input = {
                 "title": paragraph.title,
                 "content": paragraph.content,
                 "search_query": search_query,
                 "search_results": format_search_results_for_prompt(
-                    search_results, self.config.MAX_CONTENT_LENGTH
+                    search_results, self.config.MAX_CONTENT_LENGTH, self.config.REFLECTION_SUMMARY_TOKEN_BUDGET
                 ),
                 "paragraph_latest_state": paragraph.research.latest_summary
             }
@@ -700,9 +995,18 @@ class DeepSearchAgent:
             self.state = self.reflection_summary_node.mutate_state(
                 reflection_summary_input, self.state, paragraph_index
             )
+            self._checkpoint_paragraph(paragraph_index)
             
             logger.info(f"    反思 {reflection_i + 1} 完成")
     
+    def _should_stop_reflecting(self, search_results: List[Dict[str, Any]], new_count: int) -> bool:
+        """本轮反思搜索的新内容占比低于 REFLECTION_NOVELTY_THRESHOLD 时停止反思，0表示不提前结束"""
+        threshold = self.config.REFLECTION_NOVELTY_THRESHOLD
+        if threshold <= 0:
+            return False
+        novelty = new_count / len(search_results) if search_results else 0.0
+        return novelty < threshold
+    
     def _generate_final_report(self) -> str:
         """生成最终报告"""
         logger.info(f"\n[步骤 3] 生成最终报告...")
@@ -726,7 +1030,11 @@ class DeepSearchAgent:
         
         # 更新状态
         self.state.final_report = final_report
+        self.state.metadata["llm_cache"] = self.llm_client.get_cache_stats()
+        self.state.metadata["llm_usage"] = self.llm_client.get_usage_stats()
         self.state.mark_completed()
+        if self._journal is not None:
+            self._journal.record_final_report(self.state)
         
         logger.info("最终报告生成完成")
         return final_report
@@ -747,6 +1055,12 @@ class DeepSearchAgent:
         
         logger.info(f"报告已保存到: {filepath}")
         
+        # 保存本次研究的耗时与用量摘要
+        if self._run_metrics is not None:
+            metrics_filepath = os.path.join(self.config.OUTPUT_DIR, f"metrics_{query_safe}_{timestamp}.json")
+            self._run_metrics.save(metrics_filepath)
+            logger.info(f"耗时统计已保存到: {metrics_filepath}")
+        
         # 保存状态（如果配置允许）
         if self.config.SAVE_INTERMEDIATE_STATES:
             state_filename = f"state_{query_safe}_{timestamp}.json"
@@ -2,13 +2,19 @@
 Unified OpenAI-compatible LLM client for the Insight Engine, with retry support.
 """
 
+import asyncio
 import os
 import sys
+import threading
+import time
+import weakref
 from datetime import datetime
-from typing import Any, Dict, Optional, Iterator, Generator
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Generator, Tuple
 from loguru import logger
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from ..utils.text_processing import estimate_tokens
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
@@ -17,20 +23,86 @@ if utils_dir not in sys.path:
     sys.path.append(utils_dir)
 
 try:
-    from retry_helper import with_retry, LLM_RETRY_CONFIG
+    from retry_helper import (
+        with_retry,
+        with_async_retry,
+        LLM_RETRY_CONFIG,
+        provider_slot,
+        async_provider_slot,
+        get_provider_guard,
+    )
 except ImportError:
-    def with_retry(config=None):
+    from contextlib import nullcontext
+
+    def with_retry(config=None, **kwargs):
         def decorator(func):
             return func
         return decorator
 
+    def get_provider_guard(*args, **kwargs):
+        return None
+
+    with_async_retry = with_retry
+
+    def provider_slot(provider_key, limit):
+        return nullcontext()
+
+    async_provider_slot = provider_slot
+
     LLM_RETRY_CONFIG = None
 
+try:
+    from http_pool import get_sync_http_client, get_async_http_client
+except ImportError:
+    def get_sync_http_client():
+        return None
+
+    def get_async_http_client():
+        return None
+
+try:
+    from llm_cache import LLMResponseCache
+except ImportError:
+    LLMResponseCache = None
+
+try:
+    from run_metrics import span, observe, increment
+except ImportError:
+    from contextlib import nullcontext
+
+    def span(name, **labels):
+        return nullcontext()
+
+    def observe(name, seconds, **labels):
+        pass
+
+    def increment(name, value=1, **labels):
+        pass
+
+
+def _client_guard(client: "LLMClient", *args, **kwargs):
+    return client.guard
+
+
+def _prompt_tokens(client: "LLMClient", system_prompt: str = "", user_prompt: str = "", **kwargs) -> int:
+    return estimate_tokens(system_prompt or "") + estimate_tokens(user_prompt or "")
+
 
 class LLMClient:
     """Minimal wrapper around the OpenAI-compatible chat completion API."""
 
-    def __init__(self, api_key: str, model_name: str, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 0,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        cache: Optional[Any] = None,
+        cache_nodes: Iterable[str] = (),
+        stream_include_usage: bool = True,
+    ):
         if not api_key:
             raise ValueError("Insight Engine INSIGHT_ENGINE_API_KEY is required.")
         if not model_name:
@@ -40,6 +112,20 @@ class LLMClient:
         self.base_url = base_url
         self.model_name = model_name
         self.provider = model_name
+        # 同一服务商（BaseUrl）在进程内共享的最大并发请求数，0表示不限制
+        self.max_concurrency = max_concurrency
+        # 同一服务商与模型在进程内共享的限流与熔断状态（每分钟请求数/token数，0表示不限制）
+        self.guard = get_provider_guard(
+            f"{base_url or 'default'}|{model_name}", requests_per_minute, tokens_per_minute
+        )
+        # 可选的响应缓存（utils/llm_cache.LLMResponseCache），仅对cache_nodes中的节点生效
+        self.cache = cache
+        self.cache_nodes = frozenset(cache_nodes)
+        self._cache_stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+        # 流式请求时要求服务商在最后一个分块返回用量（含前缀缓存命中的token数）
+        self.stream_include_usage = stream_include_usage
+        self._usage_totals = {"calls": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0}
         timeout_fallback = os.getenv("LLM_REQUEST_TIMEOUT") or os.getenv("INSIGHT_ENGINE_REQUEST_TIMEOUT") or "1800"
         try:
             self.timeout = float(timeout_fallback)
@@ -52,37 +138,225 @@ class LLMClient:
         }
         if base_url:
             client_kwargs["base_url"] = base_url
-        self.client = OpenAI(**client_kwargs)
+        self._client_kwargs = client_kwargs
+        # 同步与异步客户端都复用进程内共享的连接池
+        self.client = OpenAI(**client_kwargs, http_client=get_sync_http_client())
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        """获取当前事件循环上的AsyncOpenAI客户端（需在协程中调用）"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(**self._client_kwargs, http_client=get_async_http_client())
+            self._async_clients[loop] = client
+        return client
 
-    @with_retry(LLM_RETRY_CONFIG)
-    def invoke(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+    @property
+    def _provider_key(self) -> str:
+        return self.base_url or "default"
+
+    @staticmethod
+    def _build_messages(system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
+        # 当前时间每分钟变化，放在用户消息末尾，使系统提示词和用户消息的静态部分
+        # 构成字节稳定的前缀，命中服务商的提示词前缀缓存
         current_time = datetime.now().strftime("%Y年%m月%d日%H时%M分")
-        time_prefix = f"今天的实际时间是{current_time}"
+        time_note = f"今天的实际时间是{current_time}"
         if user_prompt:
-            user_prompt = f"{time_prefix}\n{user_prompt}"
+            user_prompt = f"{user_prompt}\n\n{time_note}"
         else:
-            user_prompt = time_prefix
-        messages = [
+            user_prompt = time_note
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
 
-        allowed_keys = {"temperature", "top_p", "presence_penalty", "frequency_penalty", "stream"}
-        extra_params = {key: value for key, value in kwargs.items() if key in allowed_keys and value is not None}
+    @staticmethod
+    def _sampling_params(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        allowed_keys = {"temperature", "top_p", "presence_penalty", "frequency_penalty"}
+        return {key: value for key, value in kwargs.items() if key in allowed_keys and value is not None}
 
-        timeout = kwargs.pop("timeout", self.timeout)
+    def _prepare_request(self, system_prompt: str, user_prompt: str, stream: bool, **kwargs) -> Dict[str, Any]:
+        """构造chat.completions.create的参数"""
+        extra_params = self._sampling_params(kwargs)
+        if stream:
+            # 强制使用流式
+            extra_params["stream"] = True
+            if self.stream_include_usage:
+                extra_params["stream_options"] = {"include_usage": True}
+        elif kwargs.get("stream") is not None:
+            extra_params["stream"] = kwargs["stream"]
 
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=messages,
-            timeout=timeout,
+        return {
+            "model": self.model_name,
+            "messages": self._build_messages(system_prompt, user_prompt),
+            "timeout": kwargs.get("timeout", self.timeout),
             **extra_params,
+        }
+
+    def _cache_lookup(
+        self, cache_node: Optional[str], system_prompt: str, user_prompt: str, kwargs: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        查询响应缓存
+        
+        缓存键使用调用方传入的原始user_prompt，不含_build_messages附加的时间前缀。
+        
+        Returns:
+            (缓存键, 命中的响应)；该节点未启用缓存时缓存键为None
+        """
+        if self.cache is None or not cache_node or cache_node not in self.cache_nodes:
+            return None, None
+        key = self.cache.make_key(self.model_name, system_prompt, user_prompt, self._sampling_params(kwargs))
+        cached = self.cache.get(key)
+        with self._stats_lock:
+            stats = self._cache_stats.setdefault(cache_node, {"hits": 0, "misses": 0})
+            stats["hits" if cached is not None else "misses"] += 1
+        if cached is not None:
+            logger.info(f"[{cache_node}] 命中LLM响应缓存")
+        return key, cached
+
+    def _cache_store(self, key: Optional[str], response: str):
+        if key is not None and response:
+            self.cache.set(key, response)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取本客户端的响应缓存命中统计（按节点），用于写入运行元数据"""
+        with self._stats_lock:
+            nodes = {node: dict(stats) for node, stats in self._cache_stats.items()}
+        return {
+            "enabled": self.cache is not None,
+            "hits": sum(stats["hits"] for stats in nodes.values()),
+            "misses": sum(stats["misses"] for stats in nodes.values()),
+            "nodes": nodes,
+        }
+
+    def reset_cache_stats(self):
+        """清零响应缓存命中统计（每次研究开始时调用）"""
+        with self._stats_lock:
+            self._cache_stats.clear()
+
+    def get_usage_stats(self) -> Dict[str, int]:
+        """获取本客户端累计的token用量（含前缀缓存命中的输入token数），用于写入运行元数据"""
+        with self._stats_lock:
+            return dict(self._usage_totals)
+
+    def reset_usage_stats(self):
+        """清零累计用量（每次研究开始时调用）"""
+        with self._stats_lock:
+            for key in self._usage_totals:
+                self._usage_totals[key] = 0
+
+    @staticmethod
+    def _cached_prompt_tokens(usage: Any) -> int:
+        """
+        读取命中服务商前缀缓存的输入token数
+        
+        OpenAI/Qwen 使用 prompt_tokens_details.cached_tokens，DeepSeek 使用 prompt_cache_hit_tokens，
+        Kimi 使用 cached_tokens。
+        """
+        details = getattr(usage, "prompt_tokens_details", None)
+        for value in (
+            getattr(details, "cached_tokens", None),
+            getattr(usage, "prompt_cache_hit_tokens", None),
+            getattr(usage, "cached_tokens", None),
+        ):
+            if isinstance(value, int):
+                return value
+        return 0
+
+    def _record_usage(self, response: Any, node: Optional[str] = None):
+        """记录本次调用的用量（按节点计入运行统计），并按输出token数补扣该服务商的token配额"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        cached_tokens = self._cached_prompt_tokens(usage)
+        with self._stats_lock:
+            self._usage_totals["calls"] += 1
+            self._usage_totals["prompt_tokens"] += prompt_tokens
+            self._usage_totals["cached_prompt_tokens"] += cached_tokens
+            self._usage_totals["completion_tokens"] += completion_tokens
+        labels = {"node": node, "model": self.model_name}
+        increment("llm.requests", 1, **labels)
+        increment("llm.prompt_tokens", prompt_tokens, **labels)
+        increment("llm.cached_prompt_tokens", cached_tokens, **labels)
+        increment("llm.completion_tokens", completion_tokens, **labels)
+        logger.info(
+            f"LLM用量: 输入 {prompt_tokens} tokens（前缀缓存命中 {cached_tokens}），输出 {completion_tokens} tokens"
         )
+        if self.guard is not None:
+            self.guard.record_usage(completion_tokens)
 
+    def _parse_response(self, response: Any) -> str:
         if response.choices and response.choices[0].message:
             return self.validate_response(response.choices[0].message.content)
         return ""
 
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        if chunk.choices and len(chunk.choices) > 0:
+            delta = chunk.choices[0].delta
+            if delta and delta.content:
+                return delta.content
+        return ""
+
+    @staticmethod
+    def _join_chunks(chunks: List[str]) -> str:
+        # 以字节形式拼接后一次性解码，避免UTF-8多字节字符截断
+        if chunks:
+            return b''.join(chunk.encode('utf-8') for chunk in chunks).decode('utf-8', errors='replace')
+        return ""
+
+    def invoke(self, system_prompt: str, user_prompt: str, cache_node: Optional[str] = None, **kwargs) -> str:
+        key, cached = self._cache_lookup(cache_node, system_prompt, user_prompt, kwargs)
+        if cached is not None:
+            return cached
+        response = self._invoke(system_prompt, user_prompt, node=cache_node, **kwargs)
+        self._cache_store(key, response)
+        return response
+
+    @with_retry(LLM_RETRY_CONFIG, guard=_client_guard, cost=_prompt_tokens)
+    def _invoke(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        request = self._prepare_request(system_prompt, user_prompt, stream=False, **kwargs)
+        node = kwargs.get("node")
+        with provider_slot(self._provider_key, self.max_concurrency):
+            with span("llm.generate", node=node, model=self.model_name):
+                response = self.client.chat.completions.create(**request)
+        self._record_usage(response, node)
+        return self._parse_response(response)
+
+    async def ainvoke(self, system_prompt: str, user_prompt: str, cache_node: Optional[str] = None, **kwargs) -> str:
+        """
+        异步调用LLM，等待响应期间不阻塞事件循环
+        
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            cache_node: 调用方节点名，该节点启用缓存时先查询响应缓存
+            **kwargs: 额外参数（temperature, top_p等）
+            
+        Returns:
+            响应内容
+        """
+        key, cached = self._cache_lookup(cache_node, system_prompt, user_prompt, kwargs)
+        if cached is not None:
+            return cached
+        response = await self._ainvoke(system_prompt, user_prompt, node=cache_node, **kwargs)
+        self._cache_store(key, response)
+        return response
+
+    @with_async_retry(LLM_RETRY_CONFIG, guard=_client_guard, cost=_prompt_tokens)
+    async def _ainvoke(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        request = self._prepare_request(system_prompt, user_prompt, stream=False, **kwargs)
+        node = kwargs.get("node")
+        async with async_provider_slot(self._provider_key, self.max_concurrency):
+            with span("llm.generate", node=node, model=self.model_name):
+                response = await self._get_async_client().chat.completions.create(**request)
+        self._record_usage(response, node)
+        return self._parse_response(response)
+
     def stream_invoke(self, system_prompt: str, user_prompt: str, **kwargs) -> Generator[str, None, None]:
         """
         流式调用LLM，逐步返回响应内容
@@ -90,68 +364,100 @@ class LLMClient:
         Args:
             system_prompt: 系统提示词
             user_prompt: 用户提示词
-            **kwargs: 额外参数（temperature, top_p等）
+            **kwargs: 额外参数（temperature, top_p等；node为调用方节点名，用于耗时与用量统计）
             
         Yields:
             响应文本块（str）
         """
-        current_time = datetime.now().strftime("%Y年%m月%d日%H时%M分")
-        time_prefix = f"今天的实际时间是{current_time}"
-        if user_prompt:
-            user_prompt = f"{time_prefix}\n{user_prompt}"
-        else:
-            user_prompt = time_prefix
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-
-        allowed_keys = {"temperature", "top_p", "presence_penalty", "frequency_penalty"}
-        extra_params = {key: value for key, value in kwargs.items() if key in allowed_keys and value is not None}
-        # 强制使用流式
-        extra_params["stream"] = True
-
-        timeout = kwargs.pop("timeout", self.timeout)
-
+        request = self._prepare_request(system_prompt, user_prompt, stream=True, **kwargs)
+        node = kwargs.get("node")
         try:
-            stream = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                timeout=timeout,
-                **extra_params,
-            )
+            with provider_slot(self._provider_key, self.max_concurrency):
+                with span("llm.generate", node=node, model=self.model_name):
+                    start = time.perf_counter()
+                    first_token = True
+                    stream = self.client.chat.completions.create(**request)
+                    for chunk in stream:
+                        self._record_usage(chunk, node)
+                        text = self._chunk_text(chunk)
+                        if text:
+                            if first_token:
+                                first_token = False
+                                observe("llm.ttft", time.perf_counter() - start, node=node, model=self.model_name)
+                            yield text
+        except Exception as e:
+            logger.error(f"流式请求失败: {str(e)}")
+            raise e
+
+    async def astream_invoke(self, system_prompt: str, user_prompt: str, **kwargs) -> AsyncGenerator[str, None]:
+        """
+        异步流式调用LLM，逐步返回响应内容
+        
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            **kwargs: 额外参数（temperature, top_p等；node为调用方节点名，用于耗时与用量统计）
             
-            for chunk in stream:
-                if chunk.choices and len(chunk.choices) > 0:
-                    delta = chunk.choices[0].delta
-                    if delta and delta.content:
-                        yield delta.content
+        Yields:
+            响应文本块（str）
+        """
+        request = self._prepare_request(system_prompt, user_prompt, stream=True, **kwargs)
+        node = kwargs.get("node")
+        try:
+            async with async_provider_slot(self._provider_key, self.max_concurrency):
+                with span("llm.generate", node=node, model=self.model_name):
+                    start = time.perf_counter()
+                    first_token = True
+                    stream = await self._get_async_client().chat.completions.create(**request)
+                    async for chunk in stream:
+                        self._record_usage(chunk, node)
+                        text = self._chunk_text(chunk)
+                        if text:
+                            if first_token:
+                                first_token = False
+                                observe("llm.ttft", time.perf_counter() - start, node=node, model=self.model_name)
+                            yield text
         except Exception as e:
             logger.error(f"流式请求失败: {str(e)}")
             raise e
     
-    @with_retry(LLM_RETRY_CONFIG)
-    def stream_invoke_to_string(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+    def stream_invoke_to_string(self, system_prompt: str, user_prompt: str, cache_node: Optional[str] = None, **kwargs) -> str:
         """
         流式调用LLM并安全地拼接为完整字符串（避免UTF-8多字节字符截断）
         
         Args:
             system_prompt: 系统提示词
             user_prompt: 用户提示词
+            cache_node: 调用方节点名，该节点启用缓存时先查询响应缓存
             **kwargs: 额外参数（temperature, top_p等）
             
         Returns:
             完整的响应字符串
         """
-        # 以字节形式收集所有块
-        byte_chunks = []
-        for chunk in self.stream_invoke(system_prompt, user_prompt, **kwargs):
-            byte_chunks.append(chunk.encode('utf-8'))
-        
-        # 拼接所有字节，然后一次性解码
-        if byte_chunks:
-            return b''.join(byte_chunks).decode('utf-8', errors='replace')
-        return ""
+        key, cached = self._cache_lookup(cache_node, system_prompt, user_prompt, kwargs)
+        if cached is not None:
+            return cached
+        response = self._stream_invoke_to_string(system_prompt, user_prompt, node=cache_node, **kwargs)
+        self._cache_store(key, response)
+        return response
+
+    @with_retry(LLM_RETRY_CONFIG, guard=_client_guard, cost=_prompt_tokens)
+    def _stream_invoke_to_string(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        return self._join_chunks(list(self.stream_invoke(system_prompt, user_prompt, **kwargs)))
+
+    async def astream_invoke_to_string(self, system_prompt: str, user_prompt: str, cache_node: Optional[str] = None, **kwargs) -> str:
+        """stream_invoke_to_string的异步版本"""
+        key, cached = self._cache_lookup(cache_node, system_prompt, user_prompt, kwargs)
+        if cached is not None:
+            return cached
+        response = await self._astream_invoke_to_string(system_prompt, user_prompt, node=cache_node, **kwargs)
+        self._cache_store(key, response)
+        return response
+
+    @with_async_retry(LLM_RETRY_CONFIG, guard=_client_guard, cost=_prompt_tokens)
+    async def _astream_invoke_to_string(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        chunks = [chunk async for chunk in self.astream_invoke(system_prompt, user_prompt, **kwargs)]
+        return self._join_chunks(chunks)
 
     @staticmethod
     def validate_response(response: Optional[str]) -> str:
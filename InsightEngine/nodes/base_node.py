@@ -3,13 +3,23 @@
 定义所有处理节点的基础接口
 """
 
+import functools
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
 from loguru import logger
-from ..llms.base import LLMClient
+from ..llms.base import LLMClient, span
 from ..state.state import State
 
 
+def _timed_run(run):
+    """包装节点的run方法，按节点名记录耗时"""
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        with span("node.run", node=self.node_name):
+            return run(self, *args, **kwargs)
+    return wrapper
+
+
 class BaseNode(ABC):
     """节点基类"""
     
@@ -24,6 +34,13 @@ class BaseNode(ABC):
         self.llm_client = llm_client
         self.node_name = node_name or self.__class__.__name__
     
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 子类实现的run自动计入运行耗时统计
+        run = cls.__dict__.get("run")
+        if run is not None and not getattr(run, "__isabstractmethod__", False):
+            cls.run = _timed_run(run)
+    
     @abstractmethod
     def run(self, input_data: Any, **kwargs) -> Any:
         """
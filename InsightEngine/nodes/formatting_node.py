@@ -11,7 +11,8 @@ from .base_node import BaseNode
 from ..prompts import SYSTEM_PROMPT_REPORT_FORMATTING
 from ..utils.text_processing import (
     remove_reasoning_from_output,
-    clean_markdown_tags
+    clean_markdown_tags,
+    to_prompt_json
 )
 
 
@@ -66,7 +67,7 @@ class ReportFormattingNode(BaseNode):
             if isinstance(input_data, str):
                 message = input_data
             else:
-                message = json.dumps(input_data, ensure_ascii=False)
+                message = to_prompt_json(input_data)
             
             logger.info("正在格式化最终报告")
             
@@ -74,6 +75,7 @@ class ReportFormattingNode(BaseNode):
             response = self.llm_client.stream_invoke_to_string(
                 SYSTEM_PROMPT_REPORT_FORMATTING,
                 message,
+                cache_node=self.node_name,
             )
             
             # 处理响应
@@ -14,7 +14,8 @@ from ..utils.text_processing import (
     remove_reasoning_from_output,
     clean_json_tags,
     extract_clean_response,
-    fix_incomplete_json
+    fix_incomplete_json,
+    to_prompt_json
 )
 
 
@@ -61,12 +62,12 @@ class FirstSearchNode(BaseNode):
             if isinstance(input_data, str):
                 message = input_data
             else:
-                message = json.dumps(input_data, ensure_ascii=False)
+                message = to_prompt_json(input_data)
             
             logger.info("正在生成首次搜索查询")
             
             # 调用LLM（流式，安全拼接UTF-8）
-            response = self.llm_client.stream_invoke_to_string(SYSTEM_PROMPT_FIRST_SEARCH, message)
+            response = self.llm_client.stream_invoke_to_string(SYSTEM_PROMPT_FIRST_SEARCH, message, cache_node=self.node_name)
             
             # 处理响应
             processed_response = self.process_output(response)
@@ -196,12 +197,12 @@ class ReflectionNode(BaseNode):
             if isinstance(input_data, str):
                 message = input_data
             else:
-                message = json.dumps(input_data, ensure_ascii=False)
+                message = to_prompt_json(input_data)
             
             logger.info("正在进行反思并生成新搜索查询")
             
             # 调用LLM（流式，安全拼接UTF-8）
-            response = self.llm_client.stream_invoke_to_string(SYSTEM_PROMPT_REFLECTION, message)
+            response = self.llm_client.stream_invoke_to_string(SYSTEM_PROMPT_REFLECTION, message, cache_node=self.node_name)
             
             # 处理响应
             processed_response = self.process_output(response)
@@ -35,10 +35,11 @@ output_schema_first_search = {
         "search_query": {"type": "string"},
         "search_tool": {"type": "string"},
         "reasoning": {"type": "string"},
-        "start_date": {"type": "string", "description": "开始日期，格式YYYY-MM-DD，search_topic_by_date和search_topic_on_platform工具可能需要"},
-        "end_date": {"type": "string", "description": "结束日期，格式YYYY-MM-DD，search_topic_by_date和search_topic_on_platform工具可能需要"},
-        "platform": {"type": "string", "description": "平台名称，search_topic_on_platform工具必需，可选值：bilibili, weibo, douyin, kuaishou, xhs, zhihu, tieba"},
+        "start_date": {"type": "string", "description": "开始日期，格式YYYY-MM-DD，search_topic_by_date、search_topic_on_platform和get_topic_trend工具可能需要"},
+        "end_date": {"type": "string", "description": "结束日期，格式YYYY-MM-DD，search_topic_by_date、search_topic_on_platform和get_topic_trend工具可能需要"},
+        "platform": {"type": "string", "description": "平台名称，search_topic_on_platform工具必需、get_topic_trend工具可选，可选值：bilibili, weibo, douyin, kuaishou, xhs, zhihu, tieba"},
         "time_period": {"type": "string", "description": "时间周期，search_hot_content工具可选，可选值：24h, week, year"},
+        "granularity": {"type": "string", "description": "时间粒度，get_topic_trend工具可选，可选值：hour, day"},
         "enable_sentiment": {"type": "boolean", "description": "是否启用自动情感分析，默认为true，适用于除analyze_sentiment外的所有搜索工具"},
         "texts": {"type": "array", "items": {"type": "string"}, "description": "文本列表，仅用于analyze_sentiment工具"}
     },
@@ -84,10 +85,11 @@ output_schema_reflection = {
         "search_query": {"type": "string"},
         "search_tool": {"type": "string"},
         "reasoning": {"type": "string"},
-        "start_date": {"type": "string", "description": "开始日期，格式YYYY-MM-DD，search_topic_by_date和search_topic_on_platform工具可能需要"},
-        "end_date": {"type": "string", "description": "结束日期，格式YYYY-MM-DD，search_topic_by_date和search_topic_on_platform工具可能需要"},
-        "platform": {"type": "string", "description": "平台名称，search_topic_on_platform工具必需，可选值：bilibili, weibo, douyin, kuaishou, xhs, zhihu, tieba"},
+        "start_date": {"type": "string", "description": "开始日期，格式YYYY-MM-DD，search_topic_by_date、search_topic_on_platform和get_topic_trend工具可能需要"},
+        "end_date": {"type": "string", "description": "结束日期，格式YYYY-MM-DD，search_topic_by_date、search_topic_on_platform和get_topic_trend工具可能需要"},
+        "platform": {"type": "string", "description": "平台名称，search_topic_on_platform工具必需、get_topic_trend工具可选，可选值：bilibili, weibo, douyin, kuaishou, xhs, zhihu, tieba"},
         "time_period": {"type": "string", "description": "时间周期，search_hot_content工具可选，可选值：24h, week, year"},
+        "granularity": {"type": "string", "description": "时间粒度，get_topic_trend工具可选，可选值：hour, day"},
         "enable_sentiment": {"type": "boolean", "description": "是否启用自动情感分析，默认为true，适用于除analyze_sentiment外的所有搜索工具"},
         "texts": {"type": "array", "items": {"type": "string"}, "description": "文本列表，仅用于analyze_sentiment工具"}
     },
@@ -174,7 +176,7 @@ SYSTEM_PROMPT_FIRST_SEARCH = f"""
 {json.dumps(input_schema_first_search, indent=2, ensure_ascii=False)}
 </INPUT JSON SCHEMA>
 
-你可以使用以下6种专业的本地舆情数据库查询工具来挖掘真实的民意和公众观点：
+你可以使用以下8种专业的本地舆情数据库查询工具来挖掘真实的民意和公众观点：
 
 1. **search_hot_content** - 查找热点内容工具
    - 适用于：挖掘当前最受关注的舆情事件和话题
@@ -203,7 +205,17 @@ SYSTEM_PROMPT_FIRST_SEARCH = f"""
    - 特殊要求：需要提供platform参数，可选start_date和end_date
    - 参数：platform（必须），start_date, end_date（可选），limit（数量限制），enable_sentiment（是否启用情感分析，默认True）
 
-6. **analyze_sentiment** - 多语言情感分析工具
+6. **search_topic_semantically** - 语义话题搜索工具
+   - 适用于：话题说法多样、关键词难以穷举时，找出意思相近但措辞不同的讨论
+   - 特点：按语义相似度在本地向量索引中检索内容和评论，直接使用完整的自然语言描述作为search_query，自动进行情感分析
+   - 参数：limit（数量限制），enable_sentiment（是否启用情感分析，默认True）
+
+7. **get_topic_trend** - 话题趋势工具
+   - 适用于：分析话题的声量、互动和情绪在一段时间内如何变化（如"这一周讨论是升温还是降温"）
+   - 特点：直接读取按小时/天预汇总的统计，返回每个时间段的内容数、评论数、点赞/分享/播放合计与正面/中性/负面条数，不返回原始帖子
+   - 参数：granularity（'hour' 或 'day'，默认day），start_date, end_date（可选，格式YYYY-MM-DD），platform（可选）
+
+8. **analyze_sentiment** - 多语言情感分析工具
    - 适用于：对文本内容进行专门的情感倾向分析
    - 特点：支持中文、英文、西班牙文、阿拉伯文、日文、韩文等22种语言的情感分析，输出5级情感等级（非常负面、负面、中性、正面、非常正面）
    - 参数：texts（文本或文本列表），query也可用作单个文本输入
@@ -354,14 +366,16 @@ SYSTEM_PROMPT_REFLECTION = f"""
 {json.dumps(input_schema_reflection, indent=2, ensure_ascii=False)}
 </INPUT JSON SCHEMA>
 
-你可以使用以下6种专业的本地舆情数据库查询工具来深度挖掘民意：
+你可以使用以下8种专业的本地舆情数据库查询工具来深度挖掘民意：
 
 1. **search_hot_content** - 查找热点内容工具（自动情感分析）
 2. **search_topic_globally** - 全局话题搜索工具（自动情感分析）
 3. **search_topic_by_date** - 按日期搜索话题工具（自动情感分析）
 4. **get_comments_for_topic** - 获取话题评论工具（自动情感分析）
 5. **search_topic_on_platform** - 平台定向搜索工具（自动情感分析）
-6. **analyze_sentiment** - 多语言情感分析工具（专门的情感分析）
+6. **search_topic_semantically** - 语义话题搜索工具，按语义相似度查找措辞不同的相关讨论（自动情感分析）
+7. **get_topic_trend** - 话题趋势工具，按小时/天返回声量、互动与情感分布的数值序列
+8. **analyze_sentiment** - 多语言情感分析工具（专门的情感分析）
 
 **反思的核心目标：让报告更有人情味和真实感**
 
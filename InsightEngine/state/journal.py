@@ -0,0 +1,201 @@
+"""
+研究状态检查点日志
+每次节点修改状态后向日志追加一条增量记录，进程中断后可按日志重建状态继续研究。
+
+每条记录占一行: "<类型> <字节数> <紧凑JSON>"，字节数用于识别进程中断留下的不完整记录。
+
+- structure: 报告结构（查询、标题、段落规划）
+- searches: 段落新增的搜索记录（按查询分组，每条结果存为数组）
+- paragraph: 段落研究的增量（新增搜索记录条数与新内容统计、最新总结、反思次数、是否完成）
+- final_report: 最终报告与运行元数据
+
+加载时只解析轻量记录，searches 记录仅记下文件偏移，在首次访问段落的搜索记录时才读取解析，
+因此长研究的保存与恢复开销都与本次变化量相关，而不是与整个状态的大小相关。
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .state import State, Search
+
+
+def _encode_record(op: str, payload: Any) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return op.encode("ascii") + b" " + str(len(body)).encode("ascii") + b" " + body + b"\n"
+
+
+def _decode_header(line: bytes) -> Optional[Tuple[str, bytes]]:
+    """解析记录头并校验长度，不完整的记录返回None"""
+    parts = line.rstrip(b"\n").split(b" ", 2)
+    if len(parts) != 3 or not line.endswith(b"\n"):
+        return None
+    try:
+        length = int(parts[1])
+    except ValueError:
+        return None
+    if len(parts[2]) != length:
+        return None
+    return parts[0].decode("ascii"), parts[2]
+
+
+def _group_searches(searches: List[Search]) -> List[List[Any]]:
+    """按连续的相同查询分组：[[查询, [[url, title, content, score, timestamp], ...]], ...]"""
+    groups: List[List[Any]] = []
+    for search in searches:
+        if not groups or groups[-1][0] != search.query:
+            groups.append([search.query, []])
+        groups[-1][1].append([search.url, search.title, search.content, search.score, search.timestamp])
+    return groups
+
+
+def _ungroup_searches(groups: List[List[Any]]) -> List[Search]:
+    return [
+        Search(query=query, url=url, title=title, content=content, score=score, timestamp=timestamp)
+        for query, rows in groups
+        for url, title, content, score, timestamp in rows
+    ]
+
+
+class StateJournal:
+    """研究状态的追加式检查点日志（线程安全，段落可并行写入）"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 日志文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # 每个段落已写入日志的搜索记录数与新内容统计数，用于只写增量
+        self._recorded: Dict[int, Tuple[int, int]] = {}
+
+    def exists(self) -> bool:
+        """日志文件是否存在且非空"""
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def reset(self):
+        """清空日志，开始新的研究"""
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            open(self.path, "wb").close()
+            self._recorded.clear()
+
+    def _append(self, *records: bytes):
+        # 同一次变化的多条记录一起写入，并行段落的记录不会交错
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(b"".join(records))
+                f.flush()
+
+    def record_structure(self, state: State):
+        """记录报告结构"""
+        self._append(_encode_record("structure", {
+            "query": state.query,
+            "report_title": state.report_title,
+            "paragraphs": [{"title": p.title, "content": p.content} for p in state.paragraphs],
+        }))
+
+    def record_paragraph(self, state: State, paragraph_index: int):
+        """记录段落研究自上次记录以来的变化"""
+        research = state.paragraphs[paragraph_index].research
+        with self._lock:
+            searches_done, novelty_done = self._recorded.get(paragraph_index, (0, 0))
+            self._recorded[paragraph_index] = (research.get_search_count(), len(research.novelty_stats))
+
+        new_searches = research.searches_since(searches_done)
+        records = []
+        if new_searches:
+            records.append(_encode_record("searches", _group_searches(new_searches)))
+        records.append(_encode_record("paragraph", {
+            "index": paragraph_index,
+            "searches": len(new_searches),
+            "novelty_stats": research.novelty_stats[novelty_done:],
+            "latest_summary": research.latest_summary,
+            "reflection_iteration": research.reflection_iteration,
+            "is_completed": research.is_completed,
+        }))
+        self._append(*records)
+
+    def record_final_report(self, state: State):
+        """记录最终报告"""
+        self._append(_encode_record("final_report", {
+            "final_report": state.final_report,
+            "metadata": state.metadata,
+        }))
+
+    def _read_searches(self, offset: int) -> List[Search]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            _, body = _decode_header(f.readline())
+        return _ungroup_searches(json.loads(body))
+
+    def load(self) -> Optional[State]:
+        """
+        按日志重放出研究状态（搜索记录延迟加载）
+
+        末尾因进程中断而不完整的记录会被忽略。
+
+        Returns:
+            重建的状态，日志不存在或没有报告结构时返回None
+        """
+        if not self.exists():
+            return None
+
+        state: Optional[State] = None
+        searches_offset: Optional[int] = None
+        with open(self.path, "rb") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                record = _decode_header(line)
+                if record is None:
+                    logger.warning(f"检查点日志在偏移 {offset} 处的记录不完整，忽略其后的记录")
+                    break
+                op, body = record
+                if op == "searches":
+                    # 只记下位置，等对应的paragraph记录出现后再挂到段落上
+                    searches_offset = offset
+                    continue
+                state = self._apply(state, op, json.loads(body), searches_offset)
+                searches_offset = None
+
+        with self._lock:
+            self._recorded.clear()
+            if state is not None:
+                for index, paragraph in enumerate(state.paragraphs):
+                    research = paragraph.research
+                    self._recorded[index] = (research.get_search_count(), len(research.novelty_stats))
+        return state
+
+    def _apply(self, state: Optional[State], op: str, entry: Dict[str, Any],
+               searches_offset: Optional[int]) -> Optional[State]:
+        if op == "structure":
+            state = State(query=entry.get("query", ""), report_title=entry.get("report_title", ""))
+            for paragraph in entry.get("paragraphs", []):
+                state.add_paragraph(paragraph.get("title", ""), paragraph.get("content", ""))
+            return state
+        if state is None:
+            return None
+
+        if op == "paragraph":
+            research = state.paragraphs[entry["index"]].research
+            count = entry.get("searches", 0)
+            if count and searches_offset is not None:
+                research.add_lazy_searches(lambda offset=searches_offset: self._read_searches(offset), count)
+            research.novelty_stats.extend(entry.get("novelty_stats", []))
+            research.latest_summary = entry.get("latest_summary", research.latest_summary)
+            research.reflection_iteration = entry.get("reflection_iteration", research.reflection_iteration)
+            research.is_completed = entry.get("is_completed", research.is_completed)
+        elif op == "final_report":
+            state.final_report = entry.get("final_report", "")
+            state.metadata = entry.get("metadata", {})
+            state.mark_completed()
+        state.update_timestamp()
+        return state
@@ -9,6 +9,15 @@ from .search import (
     DBResponse,
     print_response_summary
 )
+from .search_cache import (
+    SearchResultCache,
+    get_search_cache
+)
+from .sentiment_cache import (
+    SentimentCache,
+    CachedSentiment
+)
+from .keyword_cache import KeywordCache
 from .keyword_optimizer import (
     KeywordOptimizer,
     KeywordOptimizationResponse,
@@ -21,12 +30,31 @@ from .sentiment_analyzer import (
     multilingual_sentiment_analyzer,
     analyze_sentiment
 )
+from .sentiment_scorer import (
+    SentimentScorer,
+    SCORED_TABLES
+)
+from .semantic_index import (
+    VectorIndex,
+    Qwen3TextEmbedder,
+    SemanticIndexer
+)
+from .topic_rollup import TopicRollupService
+from .change_feed import (
+    ChangeFeed,
+    ChangeBatch
+)
 
 __all__ = [
     "MediaCrawlerDB",
     "QueryResult",
     "DBResponse",
     "print_response_summary",
+    "SearchResultCache",
+    "get_search_cache",
+    "SentimentCache",
+    "CachedSentiment",
+    "KeywordCache",
     "KeywordOptimizer",
     "KeywordOptimizationResponse",
     "keyword_optimizer",
@@ -34,5 +62,13 @@ __all__ = [
     "SentimentResult",
     "BatchSentimentResult",
     "multilingual_sentiment_analyzer",
-    "analyze_sentiment"
+    "analyze_sentiment",
+    "SentimentScorer",
+    "SCORED_TABLES",
+    "VectorIndex",
+    "Qwen3TextEmbedder",
+    "SemanticIndexer",
+    "TopicRollupService",
+    "ChangeFeed",
+    "ChangeBatch"
 ]
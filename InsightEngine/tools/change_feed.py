@@ -0,0 +1,244 @@
+"""
+爬虫入库变更流
+MediaCrawler 开启 ENABLE_CRAWL_OUTBOX（MindSpider 配置 CRAWL_OUTBOX_ENABLED）后，每次插入或更新
+记录都会在同一事务中向 crawl_outbox 表追加一行 (表名, 记录ID, 操作类型, 时间戳)。
+本模块按消费者读取这些变更，并在 crawl_outbox_cursor 表中保存各消费者已处理到的变更ID。
+
+后台情感打分、语义索引、趋势汇总服务在开启 CHANGE_FEED_ENABLED 后改为消费变更流，
+每轮只按ID读取发生变化的记录，不再按 (add_ts, id) 水位线扫描各表。
+
+- 变更ID按写入顺序递增；并发事务可能乱序提交，因此只读取早于 CHANGE_FEED_SAFETY_LAG 秒的变更，
+  并在第一条尚未满足该条件的变更处截断本批
+- 同一批中同一条记录的多次变更合并为一条，只要其中有一次插入即视为插入
+- 消费者写入处理结果后（或在同一事务中）才推进游标，中断后重跑不会漏掉变更
+- 开启前已入库的数据不在变更表中，应先用水位线模式处理完积压再切换
+
+用法:
+    python -m InsightEngine.tools.change_feed             # 查看各消费者的积压
+    python -m InsightEngine.tools.change_feed --prune     # 删除所有消费者都已处理的变更记录
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from InsightEngine.utils.config import settings
+from InsightEngine.utils.db import execute, execute_transaction, fetch_all, get_dialect_name
+
+__all__ = [
+    "OUTBOX_TABLE",
+    "CURSOR_TABLE",
+    "OP_INSERT",
+    "OP_UPDATE",
+    "ChangeBatch",
+    "ChangeFeed",
+    "id_in_clause",
+    "consumer_lag",
+    "prune_outbox",
+]
+
+OUTBOX_TABLE = "crawl_outbox"
+CURSOR_TABLE = "crawl_outbox_cursor"
+
+OP_INSERT = "insert"
+OP_UPDATE = "update"
+
+
+def _quote(name: str) -> str:
+    """根据数据库方言包装标识符"""
+    return f'`{name}`' if get_dialect_name() == "mysql" else f'"{name}"'
+
+
+def id_in_clause(column: str, ids: Sequence[int], prefix: str = "id") -> Tuple[str, Dict[str, int]]:
+    """
+    生成 column IN (...) 条件及其参数
+
+    Args:
+        column: 已按方言包装的列名
+        ids: 记录ID
+        prefix: 参数名前缀
+
+    Returns:
+        (SQL条件, 参数)
+    """
+    params = {f"{prefix}_{i}": int(value) for i, value in enumerate(ids)}
+    placeholders = ", ".join(f":{name}" for name in params)
+    return f"{column} IN ({placeholders})", params
+
+
+@dataclass
+class ChangeBatch:
+    """一批变更记录"""
+    changes: Dict[str, List[int]] = field(default_factory=dict)  # 表名 -> 按变更顺序去重后的记录ID
+    last_id: int = 0  # 本批读到的最大变更ID，处理完成后游标推进到这里
+    scanned: int = 0  # 本批从变更表读取的行数（含被过滤掉的表和操作）
+
+    @property
+    def count(self) -> int:
+        return sum(len(ids) for ids in self.changes.values())
+
+
+class ChangeFeed:
+    """带检查点的变更流读取器"""
+
+    def __init__(
+        self,
+        consumer: str,
+        tables: Optional[Sequence[str]] = None,
+        ops: Optional[Sequence[str]] = None,
+        batch_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            consumer: 消费者名称，各消费者的游标相互独立
+            tables: 只关心的表，默认为全部表
+            ops: 只关心的操作类型，默认为插入和更新
+            batch_size: 每批读取的变更记录数
+        """
+        self.consumer = consumer
+        self.tables = set(tables) if tables else None
+        self.ops = set(ops or (OP_INSERT, OP_UPDATE))
+        self.batch_size = max(1, batch_size or settings.CHANGE_FEED_BATCH_SIZE)
+
+    async def position(self) -> int:
+        """消费者已处理到的变更ID"""
+        rows = await fetch_all(
+            f"SELECT last_id FROM {_quote(CURSOR_TABLE)} WHERE consumer = :consumer",
+            {"consumer": self.consumer},
+        )
+        return int(rows[0]["last_id"]) if rows else 0
+
+    async def read(self, after_id: int) -> ChangeBatch:
+        """
+        读取变更ID大于 after_id 的一批变更
+
+        Args:
+            after_id: 已处理到的变更ID
+
+        Returns:
+            ChangeBatch；scanned 为0表示暂无可读的变更
+        """
+        rows = await fetch_all(
+            f"SELECT id, source_table, source_id, op, ts FROM {_quote(OUTBOX_TABLE)} "
+            f"WHERE id > :after_id ORDER BY id LIMIT :limit",
+            {"after_id": int(after_id), "limit": self.batch_size},
+        )
+        visible_before = int((time.time() - settings.CHANGE_FEED_SAFETY_LAG) * 1000)
+        batch = ChangeBatch(last_id=int(after_id))
+        seen: Dict[Tuple[str, int], str] = {}
+        for row in rows:
+            if int(row["ts"]) > visible_before:
+                break
+            batch.last_id = int(row["id"])
+            batch.scanned += 1
+            table, op = row["source_table"], row["op"]
+            if self.tables is not None and table not in self.tables:
+                continue
+            key = (table, int(row["source_id"]))
+            if key in seen:
+                seen[key] = OP_INSERT if OP_INSERT in (seen[key], op) else op
+            else:
+                seen[key] = op
+        for (table, source_id), op in seen.items():
+            if op in self.ops:
+                batch.changes.setdefault(table, []).append(source_id)
+        return batch
+
+    def checkpoint_statement(self, last_id: int) -> Tuple[str, Dict[str, Any]]:
+        """推进游标的语句，可与处理结果放在同一个事务中执行"""
+        q = _quote
+        insert = (f"INSERT INTO {q(CURSOR_TABLE)} ({q('consumer')}, {q('last_id')}, {q('last_modify_ts')}) "
+                  f"VALUES (:consumer, :last_id, :last_modify_ts)")
+        if get_dialect_name() in ("postgresql", "sqlite"):
+            sql = (f"{insert} ON CONFLICT ({q('consumer')}) DO UPDATE SET "
+                   f"{q('last_id')} = EXCLUDED.{q('last_id')}, {q('last_modify_ts')} = EXCLUDED.{q('last_modify_ts')}")
+        else:
+            sql = (f"{insert} ON DUPLICATE KEY UPDATE "
+                   f"{q('last_id')} = VALUES({q('last_id')}), {q('last_modify_ts')} = VALUES({q('last_modify_ts')})")
+        return sql, {"consumer": self.consumer, "last_id": int(last_id), "last_modify_ts": int(time.time() * 1000)}
+
+    async def checkpoint(self, last_id: int):
+        """把游标推进到 last_id"""
+        await execute(*self.checkpoint_statement(last_id))
+
+    async def drain(self, handler: Callable[[ChangeBatch], Awaitable[Optional[List[tuple]]]]) -> int:
+        """
+        处理游标之后的全部变更
+
+        Args:
+            handler: 处理一批变更的协程；返回的 (SQL, 参数) 列表与推进游标在同一个事务中执行
+
+        Returns:
+            本次处理的记录数
+        """
+        position = await self.position()
+        total = 0
+        while True:
+            batch = await self.read(position)
+            if not batch.scanned:
+                break
+            statements = (await handler(batch) or []) if batch.changes else []
+            await execute_transaction([*statements, self.checkpoint_statement(batch.last_id)])
+            total += batch.count
+            position = batch.last_id
+            if batch.scanned < self.batch_size:
+                break
+        return total
+
+
+async def consumer_lag() -> Dict[str, Dict[str, int]]:
+    """各消费者的游标位置与尚未处理的变更数"""
+    head_rows = await fetch_all(f"SELECT COALESCE(MAX(id), 0) AS head FROM {_quote(OUTBOX_TABLE)}")
+    head = int(head_rows[0]["head"]) if head_rows else 0
+    cursors = await fetch_all(f"SELECT consumer, last_id FROM {_quote(CURSOR_TABLE)} ORDER BY consumer")
+    lag = {}
+    for row in cursors:
+        pending = await fetch_all(
+            f"SELECT COUNT(*) AS pending FROM {_quote(OUTBOX_TABLE)} WHERE id > :last_id",
+            {"last_id": int(row["last_id"])},
+        )
+        lag[row["consumer"]] = {"last_id": int(row["last_id"]), "pending": int(pending[0]["pending"]), "head": head}
+    return lag
+
+
+async def prune_outbox(keep_seconds: float = 86400) -> int:
+    """
+    删除所有已登记的消费者都已处理、且早于保留期的变更记录
+
+    Args:
+        keep_seconds: 至少保留最近多少秒内的变更
+
+    Returns:
+        删除前可删除的变更数
+    """
+    rows = await fetch_all(f"SELECT MIN(last_id) AS low FROM {_quote(CURSOR_TABLE)}")
+    low = rows[0]["low"] if rows else None
+    if low is None:
+        return 0
+    params = {"low": int(low), "before": int((time.time() - keep_seconds) * 1000)}
+    where = "id <= :low AND ts < :before"
+    count = await fetch_all(f"SELECT COUNT(*) AS n FROM {_quote(OUTBOX_TABLE)} WHERE {where}", params)
+    await execute(f"DELETE FROM {_quote(OUTBOX_TABLE)} WHERE {where}", params)
+    return int(count[0]["n"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="爬虫入库变更流")
+    parser.add_argument("--prune", action="store_true", help="删除所有消费者都已处理的变更记录")
+    parser.add_argument("--keep-hours", type=float, default=24.0, help="删除时至少保留最近多少小时的变更")
+    args = parser.parse_args()
+
+    if args.prune:
+        removed = asyncio.run(prune_outbox(args.keep_hours * 3600))
+        logger.info(f"已删除 {removed} 条已处理的变更记录")
+        return
+    for consumer, state in asyncio.run(consumer_lag()).items():
+        logger.info(f"{consumer}: 已处理到 {state['last_id']}，最新 {state['head']}，积压 {state['pending']} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+关键词优化结果缓存
+同一话题在不同段落、反思轮次和会话中会反复生成相同或近似的查询，
+缓存关键词优化结果以避免重复的LLM调用：
+
+- 缓存键: 规范化后的查询与上下文（小写、去标点、合并空白、词序无关）
+- 过期: 按TTL过期
+- 存储: 进程内LRU，可选SQLite持久化（跨会话复用），见 utils/persistent_cache.py
+"""
+
+import hashlib
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+# 添加utils目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(os.path.dirname(current_dir))
+utils_dir = os.path.join(root_dir, 'utils')
+if utils_dir not in sys.path:
+    sys.path.append(utils_dir)
+
+from persistent_cache import PersistentCache
+
+
+_PUNCTUATION_PATTERN = re.compile(r"[\s,，.。!！?？;；:：、\"'“”‘’()（）\[\]【】《》<>]+")
+
+
+class KeywordCache(PersistentCache):
+    """关键词优化结果缓存（内存LRU + TTL + 可选SQLite）"""
+
+    table_name = "keyword_cache"
+    label = "关键词缓存"
+
+    def __init__(self, ttl_seconds: float = 86400.0, max_entries: int = 1024, sqlite_path: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            ttl_seconds: 缓存有效期（秒）
+            max_entries: 内存中保留的最大条目数
+            sqlite_path: SQLite缓存文件路径，为空则只使用内存缓存
+        """
+        super().__init__(max_entries=max_entries, sqlite_path=sqlite_path, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """规范化文本：小写、按空白和标点切分后排序去重，使近似查询得到相同结果"""
+        tokens = [t for t in _PUNCTUATION_PATTERN.split((text or "").lower()) if t]
+        return " ".join(sorted(set(tokens)))
+
+    @classmethod
+    def make_key(cls, query: str, context: str = "") -> str:
+        """根据查询和上下文计算缓存键"""
+        raw = f"{cls.normalize(query)}\x00{cls.normalize(context)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def copy(self, value: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(value, keywords=list(value["keywords"]))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            命中时返回 {"keywords": [...], "reasoning": "..."}，未命中或已过期返回None
+        """
+        return super().get(key)
+
+    def set(self, key: str, keywords: List[str], reasoning: str = ""):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            keywords: 优化后的关键词
+            reasoning: 优化理由
+        """
+        super().set(key, {"keywords": list(keywords), "reasoning": reasoning})
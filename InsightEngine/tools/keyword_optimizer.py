@@ -7,7 +7,8 @@ from openai import OpenAI
 import json
 import sys
 import os
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
 # 添加项目根目录到Python路径以导入config
@@ -23,6 +24,8 @@ if utils_dir not in sys.path:
     sys.path.append(utils_dir)
 
 from retry_helper import with_graceful_retry, SEARCH_API_RETRY_CONFIG
+from run_metrics import span
+from .keyword_cache import KeywordCache
 
 @dataclass
 class KeywordOptimizationResponse:
@@ -39,13 +42,14 @@ class KeywordOptimizer:
     使用硅基流动的Qwen3模型将Agent生成的搜索词优化为更贴近真实舆情的关键词
     """
     
-    def __init__(self, api_key: str = None, base_url: str = None, model_name: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, model_name: str = None, cache: Optional[KeywordCache] = None):
         """
         初始化关键词优化器
         
         Args:
             api_key: 硅基流动API密钥，如果不提供则从配置文件读取
             base_url: 接口基础地址，默认使用配置文件提供的SiliconFlow地址
+            cache: 关键词优化结果缓存，不提供时按配置创建
         """
         self.api_key = api_key or settings.KEYWORD_OPTIMIZER_API_KEY
 
@@ -59,6 +63,34 @@ class KeywordOptimizer:
             base_url=self.base_url
         )
         self.model = model_name or settings.KEYWORD_OPTIMIZER_MODEL_NAME
+
+        if cache is None and settings.KEYWORD_CACHE_ENABLED:
+            cache = KeywordCache(
+                ttl_seconds=settings.KEYWORD_CACHE_TTL,
+                max_entries=settings.KEYWORD_CACHE_MAX_ENTRIES,
+                sqlite_path=settings.KEYWORD_CACHE_SQLITE_PATH,
+            )
+        self.cache = cache
+
+    def _get_cached(self, original_query: str, context: str) -> Optional[KeywordOptimizationResponse]:
+        """查询缓存，命中时返回优化结果"""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.cache.make_key(original_query, context))
+        if cached is None:
+            return None
+        logger.info(f"🔍 关键词优化缓存命中: '{original_query}' -> {len(cached['keywords'])}个关键词")
+        return KeywordOptimizationResponse(
+            original_query=original_query,
+            optimized_keywords=cached["keywords"],
+            reasoning=cached["reasoning"],
+            success=True
+        )
+
+    def _store_cached(self, original_query: str, context: str, keywords: List[str], reasoning: str):
+        """只缓存由LLM成功生成的结果，备用方案的结果不缓存"""
+        if self.cache is not None and keywords:
+            self.cache.set(self.cache.make_key(original_query, context), keywords, reasoning)
     
     def optimize_keywords(self, original_query: str, context: str = "") -> KeywordOptimizationResponse:
         """
@@ -71,6 +103,10 @@ class KeywordOptimizer:
         Returns:
             KeywordOptimizationResponse: 优化后的关键词列表
         """
+        cached = self._get_cached(original_query, context)
+        if cached is not None:
+            return cached
+
         logger.info(f"🔍 关键词优化中间件: 处理查询 '{original_query}'")
         
         try:
@@ -105,7 +141,7 @@ class KeywordOptimizer:
                     )
                         
                     
-                    
+                    self._store_cached(original_query, context, validated_keywords, reasoning)
                     return KeywordOptimizationResponse(
                         original_query=original_query,
                         optimized_keywords=validated_keywords,
@@ -147,6 +183,90 @@ class KeywordOptimizer:
                 error_message=str(e)
             )
     
+    def optimize_keywords_batch(self, queries: Sequence[Tuple[str, str]]) -> List[KeywordOptimizationResponse]:
+        """
+        批量优化搜索关键词：未命中缓存的查询合并为一次LLM请求
+        
+        Args:
+            queries: (原始查询, 上下文) 列表
+            
+        Returns:
+            与输入顺序一致的KeywordOptimizationResponse列表
+        """
+        responses: List[Optional[KeywordOptimizationResponse]] = [
+            self._get_cached(query, context) for query, context in queries
+        ]
+        pending = [i for i, response in enumerate(responses) if response is None]
+
+        if len(pending) > 1:
+            logger.info(f"🔍 关键词优化中间件: 批量处理 {len(pending)} 个查询")
+            response = self._call_qwen_api(
+                self._build_system_prompt() + self._build_batch_format_prompt(),
+                self._build_batch_user_prompt([queries[i] for i in pending])
+            )
+            if response["success"]:
+                try:
+                    parsed = self._parse_batch_response(response["content"])
+                    for position, index in enumerate(pending, 1):
+                        item = parsed.get(position)
+                        if not item:
+                            continue
+                        keywords = self._validate_keywords(item.get("keywords", []))
+                        if not keywords:
+                            continue
+                        query, context = queries[index]
+                        reasoning = item.get("reasoning", "")
+                        self._store_cached(query, context, keywords, reasoning)
+                        responses[index] = KeywordOptimizationResponse(
+                            original_query=query,
+                            optimized_keywords=keywords,
+                            reasoning=reasoning,
+                            success=True
+                        )
+                except Exception as e:
+                    logger.warning(f"⚠️ 批量关键词优化响应解析失败，改为逐条优化: {str(e)}")
+            else:
+                logger.warning(f"⚠️ 批量关键词优化失败，改为逐条优化: {response['error']}")
+
+        # 批量请求未覆盖的查询逐条优化
+        for index, response in enumerate(responses):
+            if response is None:
+                responses[index] = self.optimize_keywords(*queries[index])
+        return responses
+
+    def _build_batch_format_prompt(self) -> str:
+        """批量优化时追加的输出格式说明"""
+        return """
+
+**批量模式**：
+本次会给出多个编号的查询，请分别为每个查询给出关键词，并以如下JSON格式返回：
+{
+    "results": [
+        {"index": 1, "keywords": ["关键词1", "关键词2"], "reasoning": "理由"},
+        {"index": 2, "keywords": ["关键词1", "关键词2"], "reasoning": "理由"}
+    ]
+}"""
+
+    def _build_batch_user_prompt(self, queries: Sequence[Tuple[str, str]]) -> str:
+        """构建批量优化的用户prompt"""
+        lines = ["请将以下每个搜索查询分别优化为适合舆情数据库查询的关键词："]
+        for i, (query, context) in enumerate(queries, 1):
+            lines.append(f"\n{i}. 原始查询：{query}")
+            if context:
+                lines.append(f"   上下文信息：{context}")
+        lines.append("\n请记住：要使用网民在社交媒体上真实使用的词汇，避免官方术语和专业词汇。")
+        return "\n".join(lines)
+
+    def _parse_batch_response(self, content: str) -> Dict[int, Dict[str, Any]]:
+        """解析批量优化响应，返回 编号 -> {keywords, reasoning}"""
+        content = re.sub(r"^```(?:json)?|```$", "", content.strip()).strip()
+        parsed = json.loads(content)
+        return {
+            int(item["index"]): item
+            for item in parsed.get("results", [])
+            if isinstance(item, dict) and "index" in item
+        }
+
     def _build_system_prompt(self) -> str:
         """构建系统prompt"""
         return """你是一位专业的舆情数据挖掘专家。你的任务是将用户提供的搜索查询优化为更适合在社交媒体舆情数据库中查找的关键词。
@@ -192,14 +312,15 @@ class KeywordOptimizer:
     def _call_qwen_api(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
         """调用Qwen API"""
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-            )
+            with span("keyword_optimizer.api", model=self.model):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.7,
+                )
 
             if response.choices:
                 content = response.choices[0].message.content
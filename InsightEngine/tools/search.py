@@ -24,14 +24,28 @@ V3.0 核心更新:
 """
 
 import os
+import sys
 import json
+import time
+import threading
 from loguru import logger
-import asyncio
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Optional, Literal, Tuple
 from dataclasses import dataclass, field
-from ..utils.db import fetch_all
+from ..utils.db import fetch_all, get_dialect_name, run_sync
 from datetime import datetime, timedelta, date
 from InsightEngine.utils.config import settings
+from .search_cache import SearchResultCache, get_search_cache
+from .semantic_index import VectorIndex, get_semantic_index, get_text_embedder
+from .topic_rollup import GRANULARITIES, ROLLUP_SOURCES, ROLLUP_TABLE, bucket_start
+
+# 添加utils目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(os.path.dirname(current_dir))
+utils_dir = os.path.join(root_dir, 'utils')
+if utils_dir not in sys.path:
+    sys.path.append(utils_dir)
+
+from run_metrics import span, increment
 
 # --- 1. 数据结构定义 ---
 
@@ -48,6 +62,11 @@ class QueryResult:
     source_keyword: Optional[str] = None
     hotness_score: float = 0.0
     source_table: str = ""
+    source_id: Optional[int] = None
+    sentiment_label: Optional[str] = None
+    sentiment_confidence: Optional[float] = None
+    duplicate_count: int = 0
+    relevance_score: float = 0.0
 
 @dataclass
 class DBResponse:
@@ -57,6 +76,7 @@ class DBResponse:
     results: List[QueryResult] = field(default_factory=list)
     results_count: int = 0
     error_message: Optional[str] = None
+    failed_queries: int = 0  # 执行失败的子查询数；大于0时结果不完整，不写入缓存
 
 # --- 2. 核心客户端与专用工具集 ---
 
@@ -68,32 +88,57 @@ class MediaCrawlerDB:
     W_SHARE = 10.0  # 分享/转发/收藏/投币等高价值互动
     W_VIEW = 0.1
     W_DANMAKU = 0.5
+    # 语义检索结果中非评论表的内容类型（其余为 video）
+    SEMANTIC_CONTENT_TYPES = {'daily_news': 'news', 'weibo_note': 'note', 'xhs_note': 'note', 'tieba_note': 'note', 'zhihu_content': 'content'}
 
-    def __init__(self):
+    def __init__(self, cache: Optional[SearchResultCache] = None, semantic_index: Optional[VectorIndex] = None, embedder: Optional[Any] = None):
         """
         初始化客户端。
+
+        Args:
+            cache: 查询结果缓存，不提供时按配置使用进程内共享缓存
+            semantic_index: 语义检索向量索引，不提供时使用 SEMANTIC_INDEX_DIR 下的共享索引
+            embedder: 查询文本嵌入模型，不提供时使用共享的 Qwen3TextEmbedder
         """
-        pass
+        if cache is None and settings.SEARCH_CACHE_ENABLED:
+            cache = get_search_cache(
+                max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+                sqlite_path=settings.SEARCH_CACHE_SQLITE_PATH,
+            )
+        self.cache = cache
+        self.semantic_index = semantic_index
+        self.embedder = embedder
+        self._watermarks: Dict[str, Tuple[float, Tuple[Any, Any]]] = {}
+        self._watermark_lock = threading.Lock()
+        # 各线程当前工具调用中失败的子查询数（并行段落共用同一个客户端）
+        self._local = threading.local()
         
     def _execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         try:
-            # 获取或创建event loop
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            # 直接运行协程
-            return loop.run_until_complete(fetch_all(query, params))
+            if isinstance(params, (tuple, list)):
+                query, params = self._bind_positional_params(query, params)
+
+            # 在数据库事件循环中执行，工作线程不需要自己的事件循环
+            with span("db.query"):
+                return run_sync(fetch_all(query, params, replica=True))
         
         except Exception as e:
+            increment("db.errors")
+            self._local.failed_queries = getattr(self._local, "failed_queries", 0) + 1
             logger.exception(f"数据库查询时发生错误: {e}")
             return []
 
+    @staticmethod
+    def _bind_positional_params(query: str, params: Tuple[Any, ...]) -> Tuple[str, Dict[str, Any]]:
+        """将 %s 占位符与位置参数转换为 text() 所需的命名参数"""
+        parts = query.split("%s")
+        if len(parts) - 1 != len(params):
+            raise ValueError(f"占位符数量({len(parts) - 1})与参数数量({len(params)})不一致")
+        bound = [parts[0]]
+        for index, part in enumerate(parts[1:]):
+            bound.append(f":p{index}{part}")
+        return "".join(bound), {f"p{index}": value for index, value in enumerate(params)}
+
     @staticmethod
     def _to_datetime(ts: Any) -> Optional[datetime]:
         if not ts: return None
@@ -109,12 +154,135 @@ class MediaCrawlerDB:
 
     _table_columns_cache = {}
     def _get_table_columns(self, table_name: str) -> List[str]:
-        if table_name in self._table_columns_cache: return self._table_columns_cache[table_name]
-        results = self._execute_query(f"SHOW COLUMNS FROM `{table_name}`")
-        columns = [row['Field'] for row in results] if results else []
-        self._table_columns_cache[table_name] = columns
+        dialect = get_dialect_name()
+        cache_key = (dialect, table_name)
+        if cache_key in self._table_columns_cache: return self._table_columns_cache[cache_key]
+        if dialect == 'sqlite':
+            results = self._execute_query(f'PRAGMA table_info("{table_name}")')
+            columns = [row['name'] for row in results]
+        elif dialect == 'postgresql':
+            results = self._execute_query("SELECT column_name FROM information_schema.columns WHERE table_name = :tbl ORDER BY ordinal_position", {'tbl': table_name})
+            columns = [row['column_name'] for row in results]
+        else:
+            results = self._execute_query(f"SHOW COLUMNS FROM `{table_name}`")
+            columns = [row['Field'] for row in results]
+        # 表不存在或查询失败时不缓存，建表后可重新读取
+        if columns: self._table_columns_cache[cache_key] = columns
         return columns
 
+    @staticmethod
+    def _union_all(queries: List[str]) -> str:
+        """拼接 UNION ALL 子查询（SQLite 不支持带括号的复合查询成员）"""
+        if get_dialect_name() == 'sqlite':
+            return " UNION ALL ".join(queries)
+        return f"({' ) UNION ALL ( '.join(queries)})"
+
+    def _topic_filter(self, table: str, fields: List[str], topic: str, param_dict: Dict[str, Any], prefix: str = "") -> str:
+        """
+        构造话题匹配条件，参数写入 param_dict。
+        SQLite 下若存在覆盖这些字段的 FTS5 三元组索引（{table}_fts，见 MindSpider/schema/sqlite_fts.py），
+        用 MATCH 代替逐行 LIKE 扫描；三元组索引无法匹配不足3个字符的话题，此时仍使用 LIKE。
+        """
+        fts_table = f"{table}_fts"
+        if (settings.SQLITE_FTS_ENABLED and len(topic) >= 3 and get_dialect_name() == 'sqlite'
+                and set(fields) <= set(self._get_table_columns(fts_table))):
+            phrase = topic.replace('"', '""')
+            param_dict[f"{prefix}fts"] = f'{{{" ".join(fields)}}} : "{phrase}"'
+            return f'"id" IN (SELECT rowid FROM "{fts_table}" WHERE "{fts_table}" MATCH :{prefix}fts)'
+        where_clauses = []
+        for idx, field in enumerate(fields):
+            pname = f"{prefix}term_{idx}"
+            where_clauses.append(f'{self._wrap_query_field_with_dialect(field)} LIKE :{pname}')
+            param_dict[pname] = f"%{topic}%"
+        return f"({' OR '.join(where_clauses)})"
+
+    def _get_tables_watermark(self, tables: List[str]) -> Optional[Tuple[Any, ...]]:
+        """
+        读取相关表的数据水位线 (MAX(add_ts), MAX(last_modify_ts))。
+        在 SEARCH_CACHE_WATERMARK_INTERVAL 秒内复用上次读取的结果，避免每次查询都扫描大表。
+        读取失败时返回None，此时不使用缓存。
+        """
+        now = time.monotonic()
+        interval = settings.SEARCH_CACHE_WATERMARK_INTERVAL
+        with self._watermark_lock:
+            stale = [t for t in tables if t not in self._watermarks or now - self._watermarks[t][0] >= interval]
+        if stale:
+            sub_queries = [
+                f"SELECT '{table}' AS tbl, MAX({self._wrap_query_field_with_dialect('add_ts')}) AS max_add_ts, "
+                f"MAX({self._wrap_query_field_with_dialect('last_modify_ts')}) AS max_modify_ts "
+                f"FROM {self._wrap_query_field_with_dialect(table)}"
+                for table in stale
+            ]
+            rows = self._execute_query(" UNION ALL ".join(sub_queries))
+            if not rows:
+                return None
+            with self._watermark_lock:
+                for row in rows:
+                    self._watermarks[row['tbl']] = (now, (row.get('max_add_ts'), row.get('max_modify_ts')))
+        with self._watermark_lock:
+            if any(t not in self._watermarks for t in tables):
+                return None
+            return tuple((t, *self._watermarks[t][1]) for t in sorted(tables))
+
+    def _cache_lookup(self, tool_name: str, params: Dict[str, Any], tables: List[str]) -> Tuple[Optional[str], Optional[Tuple[Any, ...]], Optional[DBResponse]]:
+        """查询缓存，返回 (缓存键, 水位线, 命中的响应)；同时开始统计本次工具调用中失败的子查询"""
+        self._local.failed_queries = 0
+        if self.cache is None:
+            return None, None, None
+        if settings.SENTIMENT_PRECOMPUTED_ENABLED:
+            # 后台打分写入新结果后，缓存中的情感字段也需要刷新
+            tables = tables + ['content_sentiment']
+        watermark = self._get_tables_watermark(tables)
+        if watermark is None:
+            return None, None, None
+        key = self.cache.make_key(tool_name, params)
+        cached = self.cache.get(key, watermark)
+        if cached is not None:
+            logger.info(f"--- CACHE HIT: {tool_name} (params: {params}) ---")
+        return key, watermark, cached
+
+    def _cache_store(self, key: Optional[str], watermark: Optional[Tuple[Any, ...]], response: DBResponse) -> DBResponse:
+        """
+        写入缓存（使用查询前读取的水位线，保证查询期间新写入的数据会使缓存失效）。
+        有子查询失败时结果不完整，标记 failed_queries 且不写入缓存，下次调用重新查询数据库。
+        """
+        response.failed_queries = getattr(self._local, "failed_queries", 0)
+        if response.failed_queries:
+            logger.warning(f"工具 '{response.tool_name}' 有 {response.failed_queries} 个子查询失败，结果不完整且不写入缓存")
+        elif self.cache is not None and key is not None and watermark is not None and not response.error_message:
+            self.cache.set(key, watermark, response)
+        return response
+
+    def _attach_stored_sentiment(self, results: List[QueryResult]) -> List[QueryResult]:
+        """为结果附加后台情感打分服务写入 content_sentiment 表的预计算情感"""
+        if not settings.SENTIMENT_PRECOMPUTED_ENABLED or not results:
+            return results
+        ids_by_table: Dict[str, List[int]] = {}
+        for result in results:
+            if result.source_id is not None and result.source_table:
+                ids_by_table.setdefault(result.source_table, []).append(int(result.source_id))
+
+        stored: Dict[Tuple[str, int], Tuple[str, float]] = {}
+        for table, ids in ids_by_table.items():
+            unique_ids = list(dict.fromkeys(ids))
+            for start in range(0, len(unique_ids), 1000):
+                chunk = unique_ids[start:start + 1000]
+                param_dict: Dict[str, Any] = {f"id_{i}": source_id for i, source_id in enumerate(chunk)}
+                param_dict['tbl'] = table
+                placeholders = ", ".join(f":id_{i}" for i in range(len(chunk)))
+                query = (f"SELECT source_id, sentiment_label, confidence FROM {self._wrap_query_field_with_dialect('content_sentiment')} "
+                         f"WHERE source_table = :tbl AND source_id IN ({placeholders})")
+                for row in self._execute_query(query, param_dict):
+                    stored[(table, int(row['source_id']))] = (row['sentiment_label'], float(row['confidence']))
+
+        for result in results:
+            if result.source_id is None:
+                continue
+            sentiment = stored.get((result.source_table, int(result.source_id)))
+            if sentiment:
+                result.sentiment_label, result.sentiment_confidence = sentiment
+        return results
+
     def _extract_engagement(self, row: Dict[str, Any]) -> Dict[str, int]:
         """从数据行中提取并统一互动指标"""
         engagement = {}
@@ -158,16 +326,22 @@ class MediaCrawlerDB:
             'zhihu_content':  f"(COALESCE(CAST(voteup_count AS UNSIGNED), 0) * {self.W_LIKE} + COALESCE(CAST(comment_count AS UNSIGNED), 0) * {self.W_COMMENT})",
         }
 
+        # 时间窗口随当前时间滑动，缓存键按小时分桶，避免旧窗口的结果被长期复用
+        cache_params = {**params_for_log, 'window_end': now.strftime('%Y-%m-%d %H')}
+        cache_key, watermark, cached = self._cache_lookup("search_hot_content", cache_params, list(hotness_formulas))
+        if cached is not None:
+            return cached
+
         all_queries, params = [], []
         for table, formula in hotness_formulas.items():
             time_filter_sql, time_filter_param = "", None
             if table == 'weibo_note': time_filter_sql, time_filter_param = "`create_date_time` >= %s", start_time.strftime('%Y-%m-%d %H:%M:%S')
             elif table in ['kuaishou_video', 'xhs_note', 'douyin_aweme']: time_col = 'time' if table == 'xhs_note' else 'create_time'; time_filter_sql, time_filter_param = f"`{time_col}` >= %s", str(int(start_time.timestamp() * 1000))
-            elif table == 'zhihu_content': time_filter_sql, time_filter_param = "CAST(`created_time` AS UNSIGNED) >= %s", str(int(start_time.timestamp()))
+            elif table == 'zhihu_content': time_filter_sql, time_filter_param = "CAST(`created_time` AS UNSIGNED) >= %s", int(start_time.timestamp())
             else: time_filter_sql, time_filter_param = "`create_time` >= %s", str(int(start_time.timestamp()))
 
             content_type = 'note' if table in ['weibo_note', 'xhs_note'] else 'content' if table == 'zhihu_content' else 'video'
-            query_template = "SELECT '{platform}' as p, '{type}' as t, {title} as title, {author} as author, {url} as url, {ts} as ts, {formula} as hotness_score, source_keyword, '{tbl}' as tbl FROM `{tbl}` WHERE {time_filter}"
+            query_template = "SELECT '{platform}' as p, '{type}' as t, {title} as title, {author} as author, {url} as url, {ts} as ts, {formula} as hotness_score, source_keyword, '{tbl}' as tbl, id as source_id FROM `{tbl}` WHERE {time_filter}"
             
             field_subs = {'platform': table.split('_')[0], 'type': content_type, 'title': 'title', 'author': 'nickname', 'url': 'video_url', 'ts': 'create_time', 'formula': formula, 'tbl': table, 'time_filter': time_filter_sql}
             if table == 'weibo_note': field_subs.update({'title': 'content', 'url': 'note_url', 'ts': 'create_date_time'})
@@ -178,17 +352,18 @@ class MediaCrawlerDB:
             all_queries.append(query_template.format(**field_subs))
             params.append(time_filter_param)
         
-        final_query = f"({' ) UNION ALL ( '.join(all_queries)}) ORDER BY hotness_score DESC LIMIT %s"
+        final_query = f"{self._union_all(all_queries)} ORDER BY hotness_score DESC LIMIT %s"
         raw_results = self._execute_query(final_query, tuple(params) + (limit,))
 
-        formatted_results = [QueryResult(platform=r['p'], content_type=r['t'], title_or_content=r['title'], author_nickname=r.get('author'), url=r['url'], publish_time=self._to_datetime(r['ts']), engagement=self._extract_engagement(r), hotness_score=r.get('hotness_score', 0.0), source_keyword=r.get('source_keyword'), source_table=r['tbl']) for r in raw_results]
-        return DBResponse("search_hot_content", params_for_log, results=formatted_results, results_count=len(formatted_results))    
+        formatted_results = [QueryResult(platform=r['p'], content_type=r['t'], title_or_content=r['title'], author_nickname=r.get('author'), url=r['url'], publish_time=self._to_datetime(r['ts']), engagement=self._extract_engagement(r), hotness_score=r.get('hotness_score', 0.0), source_keyword=r.get('source_keyword'), source_table=r['tbl'], source_id=r.get('source_id')) for r in raw_results]
+        self._attach_stored_sentiment(formatted_results)
+        return self._cache_store(cache_key, watermark, DBResponse("search_hot_content", params_for_log, results=formatted_results, results_count=len(formatted_results)))
 
     def _wrap_query_field_with_dialect(self, field: str) -> str:
         """根据数据库方言包装SQL查询"""
-        if settings.DB_DIALECT == 'postgresql':
-            return f'"{field}"'
-        return f'`{field}`'
+        if get_dialect_name() == 'mysql':
+            return f'`{field}`'
+        return f'"{field}"'
 
     def search_topic_globally(self, topic: str, limit_per_table: int = 100) -> DBResponse:
         """
@@ -204,18 +379,16 @@ class MediaCrawlerDB:
         params_for_log = {'topic': topic, 'limit_per_table': limit_per_table}
         logger.info(f"--- TOOL: 全局话题搜索 (params: {params_for_log}) ---")
         
-        search_term, all_results = f"%{topic}%", []
+        all_results = []
         search_configs = { 'bilibili_video': {'fields': ['title', 'desc', 'source_keyword'], 'type': 'video'}, 'bilibili_video_comment': {'fields': ['content'], 'type': 'comment'}, 'douyin_aweme': {'fields': ['title', 'desc', 'source_keyword'], 'type': 'video'}, 'douyin_aweme_comment': {'fields': ['content'], 'type': 'comment'}, 'kuaishou_video': {'fields': ['title', 'desc', 'source_keyword'], 'type': 'video'}, 'kuaishou_video_comment': {'fields': ['content'], 'type': 'comment'}, 'weibo_note': {'fields': ['content', 'source_keyword'], 'type': 'note'}, 'weibo_note_comment': {'fields': ['content'], 'type': 'comment'}, 'xhs_note': {'fields': ['title', 'desc', 'tag_list', 'source_keyword'], 'type': 'note'}, 'xhs_note_comment': {'fields': ['content'], 'type': 'comment'}, 'zhihu_content': {'fields': ['title', 'desc', 'content_text', 'source_keyword'], 'type': 'content'}, 'zhihu_comment': {'fields': ['content'], 'type': 'comment'}, 'tieba_note': {'fields': ['title', 'desc', 'source_keyword'], 'type': 'note'}, 'tieba_comment': {'fields': ['content'], 'type': 'comment'}, 'daily_news': {'fields': ['title'], 'type': 'news'}, }
+
+        cache_key, watermark, cached = self._cache_lookup("search_topic_globally", params_for_log, list(search_configs))
+        if cached is not None:
+            return cached
         
         for table, config in search_configs.items():
-            param_dict = {}
-            where_clauses = []
-            for idx, field in enumerate(config['fields']):
-                pname = f"term_{idx}"
-                where_clauses.append(f'{self._wrap_query_field_with_dialect(field)} LIKE :{pname}')
-                param_dict[pname] = search_term
-            param_dict['limit'] = limit_per_table
-            where_clause = " OR ".join(where_clauses)
+            param_dict = {'limit': limit_per_table}
+            where_clause = self._topic_filter(table, config['fields'], topic, param_dict)
             query = f'SELECT * FROM {self._wrap_query_field_with_dialect(table)} WHERE {where_clause} ORDER BY id DESC LIMIT :limit'
             raw_results = self._execute_query(query, param_dict)
             for row in raw_results:
@@ -229,9 +402,11 @@ class MediaCrawlerDB:
                     publish_time=self._to_datetime(time_key),
                     engagement=self._extract_engagement(row),
                     source_keyword=row.get('source_keyword'),
-                    source_table=table
+                    source_table=table,
+                    source_id=row.get('id')
                 ))
-        return DBResponse("search_topic_globally", params_for_log, results=all_results, results_count=len(all_results))
+        self._attach_stored_sentiment(all_results)
+        return self._cache_store(cache_key, watermark, DBResponse("search_topic_globally", params_for_log, results=all_results, results_count=len(all_results)))
 
     def search_topic_by_date(self, topic: str, start_date: str, end_date: str, limit_per_table: int = 100) -> DBResponse:
         """
@@ -254,7 +429,7 @@ class MediaCrawlerDB:
         except ValueError:
             return DBResponse("search_topic_by_date", params_for_log, error_message="日期格式错误，请使用 'YYYY-MM-DD' 格式。")
         
-        search_term, all_results = f"%{topic}%", []
+        all_results = []
         search_configs = {
             'bilibili_video': {'fields': ['title', 'desc', 'source_keyword'], 'type': 'video', 'time_col': 'create_time', 'time_type': 'sec'}, 'douyin_aweme': {'fields': ['title', 'desc', 'source_keyword'], 'type': 'video', 'time_col': 'create_time', 'time_type': 'ms'},
             'kuaishou_video': {'fields': ['title', 'desc', 'source_keyword'], 'type': 'video', 'time_col': 'create_time', 'time_type': 'ms'}, 'weibo_note': {'fields': ['content', 'source_keyword'], 'type': 'note', 'time_col': 'create_date_time', 'time_type': 'str'},
@@ -262,15 +437,13 @@ class MediaCrawlerDB:
             'tieba_note': {'fields': ['title', 'desc', 'source_keyword'], 'type': 'note', 'time_col': 'publish_time', 'time_type': 'str'}, 'daily_news': {'fields': ['title'], 'type': 'news', 'time_col': 'crawl_date', 'time_type': 'date_str'},
         }
 
+        cache_key, watermark, cached = self._cache_lookup("search_topic_by_date", params_for_log, list(search_configs))
+        if cached is not None:
+            return cached
+
         for table, config in search_configs.items():
-            param_dict = {}
-            where_clauses = []
-            for idx, field in enumerate(config['fields']):
-                pname = f"term_{idx}"
-                where_clauses.append(f'{self._wrap_query_field_with_dialect(field)} LIKE :{pname}')
-                param_dict[pname] = search_term
-            param_dict['limit'] = limit_per_table
-            where_clause = ' OR '.join(where_clauses)
+            param_dict = {'limit': limit_per_table}
+            where_clause = self._topic_filter(table, config['fields'], topic, param_dict)
             query = f'SELECT * FROM {self._wrap_query_field_with_dialect(table)} WHERE {where_clause} ORDER BY id DESC LIMIT :limit'
             raw_results = self._execute_query(query, param_dict)
             for row in raw_results:
@@ -284,9 +457,11 @@ class MediaCrawlerDB:
                     publish_time=self._to_datetime(time_key),
                     engagement=self._extract_engagement(row),
                     source_keyword=row.get('source_keyword'),
-                    source_table=table
+                    source_table=table,
+                    source_id=row.get('id')
                 ))
-        return DBResponse("search_topic_by_date", params_for_log, results=all_results, results_count=len(all_results))
+        self._attach_stored_sentiment(all_results)
+        return self._cache_store(cache_key, watermark, DBResponse("search_topic_by_date", params_for_log, results=all_results, results_count=len(all_results)))
         
     def get_comments_for_topic(self, topic: str, limit: int = 500) -> DBResponse:
         """
@@ -302,28 +477,33 @@ class MediaCrawlerDB:
         params_for_log = {'topic': topic, 'limit': limit}
         logger.info(f"--- TOOL: 获取话题评论 (params: {params_for_log}) ---")
         
-        search_term = f"%{topic}%"
         comment_tables = ['bilibili_video_comment', 'douyin_aweme_comment', 'kuaishou_video_comment', 'weibo_note_comment', 'xhs_note_comment', 'zhihu_comment', 'tieba_comment']
+
+        cache_key, watermark, cached = self._cache_lookup("get_comments_for_topic", params_for_log, comment_tables)
+        if cached is not None:
+            return cached
         
-        all_queries = []
-        for table in comment_tables:
+        all_queries, param_dict = [], {'limit': limit}
+        quote = self._wrap_query_field_with_dialect
+        for idx, table in enumerate(comment_tables):
             cols = self._get_table_columns(table)
             author_col = 'user_nickname' if 'user_nickname' in cols else 'nickname'
             like_col = 'comment_like_count' if 'comment_like_count' in cols else 'like_count' if 'like_count' in cols else None
             time_col = 'publish_time' if 'publish_time' in cols else 'create_date_time' if 'create_date_time' in cols else 'create_time'
-            like_select = f"`{like_col}` as likes" if like_col else "'0' as likes"
+            like_select = f"{quote(like_col)} as likes" if like_col else "'0' as likes"
+            topic_clause = self._topic_filter(table, ['content'], topic, param_dict, prefix=f"t{idx}_")
             
-            query = (f"SELECT '{table.split('_')[0]}' as platform, `content`, `{author_col}` as author, "
-                     f"`{time_col}` as ts, {like_select}, '{table}' as source_table "
-                     f"FROM `{table}` WHERE `content` LIKE %s")
+            query = (f"SELECT '{table.split('_')[0]}' as platform, {quote('content')}, {quote(author_col)} as author, "
+                     f"{quote(time_col)} as ts, {like_select}, '{table}' as source_table, {quote('id')} as source_id "
+                     f"FROM {quote(table)} WHERE {topic_clause}")
             all_queries.append(query)
 
-        final_query = f"({' ) UNION ALL ( '.join(all_queries)}) ORDER BY ts DESC LIMIT %s"
-        params = (search_term,) * len(comment_tables) + (limit,)
-        raw_results = self._execute_query(final_query, params)
+        final_query = f"{self._union_all(all_queries)} ORDER BY ts DESC LIMIT :limit"
+        raw_results = self._execute_query(final_query, param_dict)
         
-        formatted = [QueryResult(platform=r['platform'], content_type='comment', title_or_content=r['content'], author_nickname=r['author'], publish_time=self._to_datetime(r['ts']), engagement={'likes': int(r['likes']) if str(r['likes']).isdigit() else 0}, source_table=r['source_table']) for r in raw_results]
-        return DBResponse("get_comments_for_topic", params_for_log, results=formatted, results_count=len(formatted))
+        formatted = [QueryResult(platform=r['platform'], content_type='comment', title_or_content=r['content'], author_nickname=r['author'], publish_time=self._to_datetime(r['ts']), engagement={'likes': int(r['likes']) if str(r['likes']).isdigit() else 0}, source_table=r['source_table'], source_id=r.get('source_id')) for r in raw_results]
+        self._attach_stored_sentiment(formatted)
+        return self._cache_store(cache_key, watermark, DBResponse("get_comments_for_topic", params_for_log, results=formatted, results_count=len(formatted)))
 
     def search_topic_on_platform(
         self,
@@ -354,7 +534,7 @@ class MediaCrawlerDB:
         if platform not in all_configs:
             return DBResponse("search_topic_on_platform", params_for_log, error_message=f"不支持的平台: {platform}")
 
-        search_term, all_results = f"%{topic}%", []
+        all_results = []
         platform_configs = all_configs[platform]
 
         time_clause, time_params_tuple = "", ()
@@ -366,35 +546,178 @@ class MediaCrawlerDB:
         else:
             start_dt, end_dt = None, None
 
+        cache_key, watermark, cached = self._cache_lookup("search_topic_on_platform", params_for_log, [c['table'] for c in platform_configs])
+        if cached is not None:
+            return cached
+
+        quote = self._wrap_query_field_with_dialect
         for config in platform_configs:
             table = config['table']
-            topic_clause = " OR ".join([f"`{field}` LIKE %s" for field in config['fields']])
-            query = f"SELECT * FROM `{table}` WHERE {topic_clause}"
-            params = [search_term] * len(config['fields'])
+            param_dict = {'limit': limit}
+            topic_clause = self._topic_filter(table, config['fields'], topic, param_dict)
+            query = f"SELECT * FROM {quote(table)} WHERE {topic_clause}"
 
             if start_dt and end_dt and 'time_col' in config:
                 time_col, time_type = config['time_col'], config['time_type']
                 if time_type == 'sec': t_params = (int(start_dt.timestamp()), int(end_dt.timestamp()))
                 elif time_type == 'ms': t_params = (int(start_dt.timestamp() * 1000), int(end_dt.timestamp() * 1000))
                 elif time_type in ['str', 'date_str']: t_params = (start_dt.strftime('%Y-%m-%d'), end_dt.strftime('%Y-%m-%d'))
-                else: t_params = (str(int(start_dt.timestamp())), str(int(end_dt.timestamp())))
+                else: t_params = (int(start_dt.timestamp()), int(end_dt.timestamp()))  # 与 CAST 后的整数比较
                 
-                t_clause = f"`{time_col}` >= %s AND `{time_col}` < %s"
-                if table == 'zhihu_content': t_clause = f"CAST(`{time_col}` AS UNSIGNED) >= %s AND CAST(`{time_col}` AS UNSIGNED) < %s"
+                t_clause = f"{quote(time_col)} >= :t_start AND {quote(time_col)} < :t_end"
+                if table == 'zhihu_content': t_clause = f"CAST({quote(time_col)} AS UNSIGNED) >= :t_start AND CAST({quote(time_col)} AS UNSIGNED) < :t_end"
                 
                 query += f" AND ({t_clause})"
-                params.extend(t_params)
+                param_dict['t_start'], param_dict['t_end'] = t_params
 
-            query += f" ORDER BY id DESC LIMIT %s"
-            params.append(limit)
+            query += f" ORDER BY id DESC LIMIT :limit"
 
-            raw_results = self._execute_query(query, tuple(params))
+            raw_results = self._execute_query(query, param_dict)
             for row in raw_results:
                 content = (row.get('title') or row.get('content') or row.get('desc') or row.get('content_text', ''))
                 time_key = config.get('time_col') and row.get(config.get('time_col'))
-                all_results.append(QueryResult(platform=platform, content_type=config['type'], title_or_content=content if content else '', author_nickname=row.get('nickname') or row.get('user_nickname'), url=row.get('video_url') or row.get('note_url') or row.get('content_url') or row.get('url') or row.get('aweme_url'), publish_time=self._to_datetime(time_key), engagement=self._extract_engagement(row), source_keyword=row.get('source_keyword'), source_table=table))
+                all_results.append(QueryResult(platform=platform, content_type=config['type'], title_or_content=content if content else '', author_nickname=row.get('nickname') or row.get('user_nickname'), url=row.get('video_url') or row.get('note_url') or row.get('content_url') or row.get('url') or row.get('aweme_url'), publish_time=self._to_datetime(time_key), engagement=self._extract_engagement(row), source_keyword=row.get('source_keyword'), source_table=table, source_id=row.get('id')))
         
-        return DBResponse("search_topic_on_platform", params_for_log, results=all_results, results_count=len(all_results))
+        self._attach_stored_sentiment(all_results)
+        return self._cache_store(cache_key, watermark, DBResponse("search_topic_on_platform", params_for_log, results=all_results, results_count=len(all_results)))
+
+    def search_topic_semantically(self, topic: str, limit: int = 50) -> DBResponse:
+        """
+        【工具】语义话题搜索: 在本地向量索引中按语义相似度查找与话题相关的内容和评论，
+        能找到措辞不同、未包含话题关键词但意思相近的讨论。
+
+        Args:
+            topic (str): 要搜索的话题，可以是一句自然语言描述。
+            limit (int): 返回结果的最大数量，默认为 50。
+
+        Returns:
+            DBResponse: 按语义相似度从高到低排列的结果列表，relevance_score 为余弦相似度。
+        """
+        params_for_log = {'topic': topic, 'limit': limit}
+        logger.info(f"--- TOOL: 语义话题搜索 (params: {params_for_log}) ---")
+
+        index = self.semantic_index or get_semantic_index()
+        if index is None:
+            return DBResponse("search_topic_semantically", params_for_log, error_message="语义索引尚未建立，请先运行 python -m InsightEngine.tools.semantic_index")
+        try:
+            with span("semantic.embed"):
+                query_vector = (self.embedder or get_text_embedder()).encode([topic], is_query=True)[0]
+            with span("semantic.search"):
+                hits = index.search(query_vector, limit, settings.SEMANTIC_SEARCH_NPROBE)
+        except Exception as e:
+            logger.exception(f"语义检索失败: {e}")
+            return DBResponse("search_topic_semantically", params_for_log, error_message=f"语义检索失败: {e}")
+
+        ids_by_table: Dict[str, List[int]] = {}
+        for table, source_id, _ in hits:
+            ids_by_table.setdefault(table, []).append(source_id)
+        rows: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        for table, ids in ids_by_table.items():
+            for start in range(0, len(ids), 1000):
+                chunk = ids[start:start + 1000]
+                param_dict: Dict[str, Any] = {f"id_{i}": source_id for i, source_id in enumerate(chunk)}
+                placeholders = ", ".join(f":id_{i}" for i in range(len(chunk)))
+                query = f"SELECT * FROM {self._wrap_query_field_with_dialect(table)} WHERE id IN ({placeholders})"
+                for row in self._execute_query(query, param_dict):
+                    rows[(table, int(row['id']))] = row
+
+        all_results = []
+        for table, source_id, score in hits:
+            row = rows.get((table, source_id))
+            if row is None:  # 建索引后已删除的记录
+                continue
+            content_type = 'comment' if table.endswith('comment') else self.SEMANTIC_CONTENT_TYPES.get(table, 'video')
+            content = (row.get('title') or row.get('content') or row.get('desc') or row.get('content_text', ''))
+            time_key = row.get('create_time') or row.get('time') or row.get('created_time') or row.get('publish_time') or row.get('crawl_date')
+            all_results.append(QueryResult(
+                platform=table.split('_')[0], content_type=content_type,
+                title_or_content=content if content else '',
+                author_nickname=row.get('nickname') or row.get('user_nickname') or row.get('user_name'),
+                url=row.get('video_url') or row.get('note_url') or row.get('content_url') or row.get('url') or row.get('aweme_url'),
+                publish_time=self._to_datetime(time_key),
+                engagement=self._extract_engagement(row),
+                source_keyword=row.get('source_keyword'),
+                source_table=table,
+                source_id=source_id,
+                relevance_score=score
+            ))
+        self._attach_stored_sentiment(all_results)
+        return DBResponse("search_topic_semantically", params_for_log, results=all_results, results_count=len(all_results))
+
+    def get_topic_trend(
+        self,
+        topic: str,
+        granularity: Literal['hour', 'day'] = 'day',
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        platform: Optional[str] = None
+    ) -> DBResponse:
+        """
+        【工具】话题趋势: 从预汇总的趋势表中读取话题每小时或每天的内容量、评论量、互动量与情感分布，
+        返回紧凑的数值时间序列，而不是原始帖子文本。
+
+        Args:
+            topic (str): 话题关键词，匹配包含该词的来源关键词（source_keyword）。
+            granularity (Literal['hour', 'day']): 时间粒度，默认为 'day'。
+            start_date (Optional[str]): 开始日期，格式 'YYYY-MM-DD'。默认为最近72小时（hour）或30天（day）。
+            end_date (Optional[str]): 结束日期，格式 'YYYY-MM-DD'。默认为当前时间。
+            platform (Optional[str]): 只统计指定平台，默认为None（全部平台）。
+
+        Returns:
+            DBResponse: 每个时间桶一条结果，按时间升序排列；engagement 中为该时间桶的各项数值。
+        """
+        params_for_log = {'topic': topic, 'granularity': granularity, 'start_date': start_date, 'end_date': end_date, 'platform': platform}
+        logger.info(f"--- TOOL: 话题趋势 (params: {params_for_log}) ---")
+
+        if granularity not in GRANULARITIES:
+            return DBResponse("get_topic_trend", params_for_log, error_message=f"不支持的时间粒度: {granularity}，可选 {list(GRANULARITIES)}")
+        platforms = {config['platform'] for config in ROLLUP_SOURCES.values()}
+        if platform and platform not in platforms:
+            return DBResponse("get_topic_trend", params_for_log, error_message=f"不支持的平台: {platform}")
+        try:
+            end_dt = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else datetime.now()
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d') if start_date else end_dt - (timedelta(hours=72) if granularity == 'hour' else timedelta(days=30))
+        except ValueError:
+            return DBResponse("get_topic_trend", params_for_log, error_message="日期格式错误，请使用 'YYYY-MM-DD' 格式。")
+
+        quote = self._wrap_query_field_with_dialect
+        param_dict: Dict[str, Any] = {
+            'granularity': granularity,
+            'start': bucket_start(int(start_dt.timestamp()), granularity),
+            'end': int(end_dt.timestamp()),
+            'keyword': f"%{topic}%",
+        }
+        platform_clause = ""
+        if platform:
+            platform_clause = f" AND {quote('platform')} = :platform"
+            param_dict['platform'] = platform
+        sums = ", ".join(f"SUM({quote(c)}) AS {c}" for c in ['likes', 'comments', 'shares', 'views', 'sentiment_positive', 'sentiment_neutral', 'sentiment_negative'])
+        query = (f"SELECT {quote('bucket_ts')} AS bucket_ts, "
+                 f"SUM(CASE WHEN {quote('content_type')} = 'comment' THEN 0 ELSE {quote('item_count')} END) AS posts, "
+                 f"SUM(CASE WHEN {quote('content_type')} = 'comment' THEN {quote('item_count')} ELSE 0 END) AS comment_rows, {sums} "
+                 f"FROM {quote(ROLLUP_TABLE)} WHERE {quote('granularity')} = :granularity "
+                 f"AND {quote('bucket_ts')} >= :start AND {quote('bucket_ts')} < :end AND {quote('source_keyword')} LIKE :keyword{platform_clause} "
+                 f"GROUP BY {quote('bucket_ts')} ORDER BY {quote('bucket_ts')}")
+        raw_results = self._execute_query(query, param_dict)
+
+        label_format = '%Y-%m-%d %H:00' if granularity == 'hour' else '%Y-%m-%d'
+        all_results = []
+        for row in raw_results:
+            values = {key: int(row[key] or 0) for key in row if key != 'bucket_ts'}
+            bucket_time = datetime.fromtimestamp(int(row['bucket_ts']))
+            line = (f"{bucket_time.strftime(label_format)} | 内容 {values['posts']} 条, 评论 {values['comment_rows']} 条 | "
+                    f"点赞 {values['likes']}, 评论数 {values['comments']}, 分享 {values['shares']}, 播放 {values['views']}")
+            if values['sentiment_positive'] or values['sentiment_neutral'] or values['sentiment_negative']:
+                line += f" | 情感 正面 {values['sentiment_positive']} / 中性 {values['sentiment_neutral']} / 负面 {values['sentiment_negative']}"
+            all_results.append(QueryResult(
+                platform=platform or 'all', content_type='trend',
+                title_or_content=line,
+                publish_time=bucket_time,
+                engagement=values,
+                source_keyword=topic,
+                source_table=ROLLUP_TABLE
+            ))
+        return DBResponse("get_topic_trend", params_for_log, results=all_results, results_count=len(all_results))
 
 # --- 3. 测试与使用示例 ---
 def print_response_summary(response: DBResponse):
@@ -406,6 +729,8 @@ def print_response_summary(response: DBResponse):
     params_str = ", ".join(f"{k}='{v}'" for k, v in response.parameters.items())
     logger.info(f"查询: 工具='{response.tool_name}', 参数=[{params_str}]")
     logger.info(f"找到 {response.results_count} 条相关记录。")
+    if response.failed_queries:
+        logger.info(f"其中 {response.failed_queries} 个子查询失败，结果可能不完整。")
     
     # 统一为一个消息输出
     output_lines = []
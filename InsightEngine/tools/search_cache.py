@@ -0,0 +1,142 @@
+"""
+搜索结果缓存
+为MediaCrawlerDB的各个查询工具提供结果缓存：
+
+- 缓存键: 由工具名与规范化后的参数（去首尾空白、合并空格）计算得到；保留大小写，
+  因为 PostgreSQL 的 LIKE 区分大小写，SQLite 的 LIKE 只对ASCII字符忽略大小写
+- 存储: 进程内LRU，可选SQLite持久化（跨会话复用），见 utils/persistent_cache.py
+- 失效: 每条缓存记录都附带写入时相关表的 MAX(add_ts) / MAX(last_modify_ts) 水位线，
+  水位线前移（有新爬取或更新的数据）时缓存自动失效
+"""
+
+import copy
+import hashlib
+import json
+import os
+import sys
+import threading
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# 添加utils目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(os.path.dirname(current_dir))
+utils_dir = os.path.join(root_dir, 'utils')
+if utils_dir not in sys.path:
+    sys.path.append(utils_dir)
+
+from persistent_cache import PersistentCache
+
+
+Watermark = Tuple[Any, ...]
+
+
+class SearchResultCache(PersistentCache):
+    """MediaCrawlerDB查询结果缓存（内存LRU + 可选SQLite）"""
+
+    table_name = "search_cache"
+    label = "搜索缓存"
+
+    def __init__(self, max_entries: int = 256, sqlite_path: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 内存中保留的最大条目数
+            sqlite_path: SQLite缓存文件路径，为空则只使用内存缓存
+        """
+        super().__init__(max_entries=max_entries, sqlite_path=sqlite_path)
+
+    @staticmethod
+    def _normalize(value: Any) -> Any:
+        """规范化参数值，使语义相同的查询得到相同的键"""
+        if isinstance(value, str):
+            return " ".join(value.split())
+        if isinstance(value, dict):
+            return {k: SearchResultCache._normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [SearchResultCache._normalize(v) for v in value]
+        return value
+
+    @classmethod
+    def make_key(cls, tool_name: str, params: Dict[str, Any]) -> str:
+        """根据工具名和参数计算缓存键"""
+        normalized = cls._normalize(params)
+        raw = json.dumps([tool_name, normalized], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _watermark_to_str(watermark: Watermark) -> str:
+        return json.dumps(list(watermark), ensure_ascii=False, default=str)
+
+    def encode(self, value: Any) -> str:
+        return json.dumps(asdict(value), ensure_ascii=False, default=_json_default)
+
+    def decode(self, payload: str) -> Any:
+        return _response_from_dict(json.loads(payload))
+
+    def copy(self, value: Any) -> Any:
+        return copy.deepcopy(value)
+
+    def get(self, key: str, watermark: Watermark) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+            watermark: 当前相关表的水位线，水位线前移（数据已更新）的条目视为失效
+
+        Returns:
+            命中时返回DBResponse副本，未命中或已失效返回None
+        """
+        return super().get(key, self._watermark_to_str(watermark))
+
+    def set(self, key: str, watermark: Watermark, response: Any):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            watermark: 执行查询前读取的水位线
+            response: DBResponse对象
+        """
+        super().set(key, response, self._watermark_to_str(watermark))
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _response_from_dict(data: Dict[str, Any]) -> Any:
+    """从SQLite中的JSON还原DBResponse"""
+    from .search import DBResponse, QueryResult
+
+    results = []
+    for item in data.get("results", []):
+        item = dict(item)
+        if item.get("publish_time"):
+            item["publish_time"] = datetime.fromisoformat(item["publish_time"])
+        results.append(QueryResult(**item))
+    return DBResponse(
+        tool_name=data["tool_name"],
+        parameters=data.get("parameters", {}),
+        results=results,
+        results_count=data.get("results_count", len(results)),
+        error_message=data.get("error_message"),
+    )
+
+
+_default_cache: Optional[SearchResultCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_search_cache(max_entries: int = 256, sqlite_path: Optional[str] = None) -> SearchResultCache:
+    """获取进程内共享的搜索缓存实例（首次调用时创建）"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SearchResultCache(max_entries=max_entries, sqlite_path=sqlite_path)
+        return _default_cache
@@ -0,0 +1,596 @@
+"""
+语义向量检索索引
+为MediaCrawler内容表和评论表的文本建立本地嵌入向量索引，MediaCrawlerDB.search_topic_semantically
+按语义相似度查找话题相关内容，能召回关键词LIKE匹配不到的同义、转述表达。
+
+- 嵌入模型：Qwen3-Embedding（与 SentimentAnalysisModel/WeiboSentiment_SmallQwen 同一系列），
+  末位token池化，按 SEMANTIC_EMBEDDING_DIM 截断后归一化
+- 存储：int8 量化向量与每行缩放系数保存为内存映射的 .npy 文件，查询时按需从磁盘读取
+- 检索：IVF 倒排（球面k-means聚类中心），只精确计算距离查询最近的 nprobe 个簇内的向量；
+  数据量不足以训练聚类时全量扫描
+- 增量：按 (add_ts, id) 水位线读取新记录追加到索引，数据量每增长4倍重新训练聚类中心；
+  开启 CHANGE_FEED_ENABLED 后爬虫表改为消费 crawl_outbox 变更流中新插入的记录，
+  变更流位置与向量一起写入清单文件
+
+用法:
+    python -m InsightEngine.tools.semantic_index            # 持续增量建索引
+    python -m InsightEngine.tools.semantic_index --once     # 处理完当前积压后退出
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+try:
+    import torch
+
+    TORCH_AVAILABLE = True
+except ImportError:
+    torch = None  # type: ignore
+    TORCH_AVAILABLE = False
+
+try:
+    from transformers import AutoModel, AutoTokenizer
+
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    AutoModel = None  # type: ignore
+    AutoTokenizer = None  # type: ignore
+    TRANSFORMERS_AVAILABLE = False
+
+from InsightEngine.utils.config import settings
+from InsightEngine.utils.db import fetch_all, get_dialect_name
+from InsightEngine.tools.sentiment_scorer import CRAWLED_TABLES, SCORED_TABLES
+from InsightEngine.tools.change_feed import OP_INSERT, OUTBOX_TABLE, ChangeFeed, id_in_clause
+
+__all__ = [
+    "VectorIndex",
+    "Qwen3TextEmbedder",
+    "SemanticIndexer",
+    "get_semantic_index",
+    "get_text_embedder",
+]
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 与 qwen3_embedding_universal.py 相同的本地模型目录（models/qwen3-embedding-0.6b 等）
+qwen_model_dir = os.path.join(project_root, "SentimentAnalysisModel", "WeiboSentiment_SmallQwen", "models")
+
+# 每条记录用于嵌入的最大字符数
+MAX_TEXT_CHARS = 512
+
+
+class VectorIndex:
+    """
+    内存映射的 int8 向量索引（IVF倒排）
+
+    目录结构:
+        manifest.json   维度、条数、容量、聚类数与各表的水位线（最后原子替换，读者据此确定可见的条数）
+        vectors.npy     (容量, 维度) int8 量化向量
+        scales.npy      (容量,) float32 每行的反量化系数
+        refs.npy        (容量, 2) int64 [表序号, 源记录id]
+        lists.npy       (容量,) int32 所属聚类，未训练时为-1
+        centroids.npy   (聚类数, 维度) float32 聚类中心
+    """
+
+    MANIFEST = "manifest.json"
+    ARRAYS = {
+        "vectors": np.int8,
+        "scales": np.float32,
+        "refs": np.int64,
+        "lists": np.int32,
+    }
+    MIN_TRAIN_SIZE = 4096
+    RETRAIN_GROWTH = 4
+    KMEANS_ITERATIONS = 10
+    KMEANS_SAMPLES_PER_LIST = 64
+    SCAN_CHUNK = 65536
+
+    def __init__(self, path: str, dim: Optional[int] = None, model: str = "", writable: bool = False):
+        """
+        打开或创建索引
+
+        Args:
+            path: 索引目录
+            dim: 向量维度，创建新索引时必需；打开已有索引时用于校验
+            model: 嵌入模型名称，打开已有索引时用于校验
+            writable: 是否以可写方式打开（建索引进程使用）
+        """
+        self.path = path
+        self.writable = writable
+        self._lock = threading.RLock()
+        self._manifest_mtime: Optional[int] = None
+        self._arrays: Dict[str, Any] = {}
+        self.centroids: Optional[np.ndarray] = None
+        self._inverted: Optional[Tuple[int, np.ndarray, np.ndarray]] = None
+
+        if os.path.exists(self._file(self.MANIFEST)):
+            self._load()
+            if dim is not None and dim != self.dim or model and model != self.manifest["model"]:
+                raise ValueError(
+                    f"索引 {path} 由 {self.manifest['model']}({self.dim}维) 生成，与当前配置 {model}({dim}维) 不一致，请删除索引目录后重建"
+                )
+        elif dim is None or not writable:
+            raise FileNotFoundError(f"语义索引不存在: {path}")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.manifest = {
+                "version": 1, "dim": int(dim), "model": model, "count": 0, "capacity": 0,
+                "nlist": 0, "trained_count": 0, "tables": [], "watermarks": {},
+            }
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return os.path.exists(os.path.join(path, cls.MANIFEST))
+
+    @property
+    def dim(self) -> int:
+        return self.manifest["dim"]
+
+    @property
+    def count(self) -> int:
+        return self.manifest["count"]
+
+    def watermark(self, table: str) -> Tuple[int, int]:
+        """表已写入索引的 (add_ts, id)"""
+        add_ts, last_id = self.manifest["watermarks"].get(table, (0, 0))
+        return int(add_ts), int(last_id)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        """读取清单并重新映射数组文件"""
+        manifest_path = self._file(self.MANIFEST)
+        self._manifest_mtime = os.stat(manifest_path).st_mtime_ns
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        mode = "r+" if self.writable else "r"
+        self._arrays = {}
+        if self.manifest["capacity"]:
+            for name in self.ARRAYS:
+                self._arrays[name] = np.load(self._file(f"{name}.npy"), mmap_mode=mode)
+        self.centroids = None
+        if self.manifest["nlist"]:
+            self.centroids = np.load(self._file("centroids.npy"))
+        self._inverted = None
+
+    def refresh(self) -> bool:
+        """建索引进程提交新数据后重新加载（只读打开时使用），返回是否有更新"""
+        try:
+            mtime = os.stat(self._file(self.MANIFEST)).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            if mtime == self._manifest_mtime:
+                return False
+            self._load()
+            return True
+
+    def _ensure_capacity(self, extra: int):
+        """容量不足时按倍数扩容（写入新文件后替换）"""
+        needed = self.count + extra
+        capacity = self.manifest["capacity"]
+        if needed <= capacity:
+            return
+        new_capacity = max(capacity * 2, needed, 1024)
+        for name, dtype in self.ARRAYS.items():
+            shape = (new_capacity, self.dim) if name == "vectors" else (new_capacity, 2) if name == "refs" else (new_capacity,)
+            tmp_path = self._file(f"{name}.npy.tmp")
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+            if name == "lists":
+                grown[:] = -1
+            if self.count:
+                grown[:self.count] = self._arrays[name][:self.count]
+            grown.flush()
+            del grown
+            self._arrays.pop(name, None)
+            os.replace(tmp_path, self._file(f"{name}.npy"))
+            self._arrays[name] = np.load(self._file(f"{name}.npy"), mmap_mode="r+")
+        self.manifest["capacity"] = new_capacity
+
+    @staticmethod
+    def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """按行对称量化为int8"""
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+
+    def _dequantize(self, rows: Any) -> np.ndarray:
+        return self._arrays["vectors"][rows].astype(np.float32) * self._arrays["scales"][rows][:, None]
+
+    def _table_code(self, table: str) -> int:
+        tables = self.manifest["tables"]
+        if table not in tables:
+            tables.append(table)
+        return tables.index(table)
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """最近的聚类中心（按块计算，避免大矩阵占用内存）"""
+        assignment = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 8192):
+            assignment[start:start + 8192] = np.argmax(vectors[start:start + 8192] @ self.centroids.T, axis=1)
+        return assignment
+
+    def add(self, table: str, source_ids: Sequence[int], vectors: np.ndarray):
+        """
+        追加一批向量（调用 commit 后对读者可见）
+
+        Args:
+            table: 源表名
+            source_ids: 源记录id
+            vectors: (n, dim) 已归一化的float32向量
+        """
+        if not self.writable:
+            raise RuntimeError("索引以只读方式打开")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim or len(vectors) != len(source_ids):
+            raise ValueError(f"向量形状 {vectors.shape} 与索引维度 {self.dim} 或id数量 {len(source_ids)} 不一致")
+        if not len(vectors):
+            return
+        with self._lock:
+            self._ensure_capacity(len(vectors))
+            start, end = self.count, self.count + len(vectors)
+            quantized, scales = self._quantize(vectors)
+            self._arrays["vectors"][start:end] = quantized
+            self._arrays["scales"][start:end] = scales
+            self._arrays["refs"][start:end, 0] = self._table_code(table)
+            self._arrays["refs"][start:end, 1] = np.asarray(source_ids, dtype=np.int64)
+            if self.centroids is not None:
+                self._arrays["lists"][start:end] = self._assign(vectors)
+            self.manifest["count"] = end
+            self._inverted = None
+
+    def commit(self, watermarks: Optional[Dict[str, Tuple[int, int]]] = None):
+        """落盘新增的向量并更新水位线；数据量增长到需要时重新训练聚类"""
+        with self._lock:
+            self.manifest["watermarks"].update({t: [int(a), int(i)] for t, (a, i) in (watermarks or {}).items()})
+            trained = self.manifest["trained_count"]
+            if self.count >= self.MIN_TRAIN_SIZE and (not trained or self.count >= self.RETRAIN_GROWTH * trained):
+                self.train()
+            for array in self._arrays.values():
+                array.flush()
+            tmp_path = self._file(f"{self.MANIFEST}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, self._file(self.MANIFEST))
+            self._manifest_mtime = os.stat(self._file(self.MANIFEST)).st_mtime_ns
+
+    def train(self, nlist: Optional[int] = None, seed: int = 0):
+        """在采样数据上训练球面k-means聚类中心，并重新分配全部向量"""
+        with self._lock:
+            count = self.count
+            nlist = nlist or max(16, int(math.sqrt(count)))
+            nlist = min(nlist, count)
+            rng = np.random.default_rng(seed)
+            sample_size = min(count, nlist * self.KMEANS_SAMPLES_PER_LIST)
+            sample = self._dequantize(np.sort(rng.choice(count, sample_size, replace=False)))
+            sample /= np.linalg.norm(sample, axis=1, keepdims=True) + 1e-12
+
+            centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+            for _ in range(self.KMEANS_ITERATIONS):
+                self.centroids = centroids
+                assignment = self._assign(sample)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, sample)
+                norms = np.linalg.norm(sums, axis=1)
+                empty = norms == 0
+                # 空簇重新取样本点作为中心
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+                norms[empty] = 1.0
+                centroids = sums / norms[:, None]
+            self.centroids = centroids.astype(np.float32)
+
+            lists = self._arrays["lists"]
+            for start in range(0, count, self.SCAN_CHUNK):
+                end = min(start + self.SCAN_CHUNK, count)
+                lists[start:end] = self._assign(self._dequantize(slice(start, end)))
+            tmp_path = self._file("centroids.npy.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, self.centroids)
+            os.replace(tmp_path, self._file("centroids.npy"))
+            self.manifest["nlist"] = nlist
+            self.manifest["trained_count"] = count
+            self._inverted = None
+            logger.info(f"语义索引聚类训练完成: {count} 条向量, {nlist} 个聚类")
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """按聚类排序的行号与每个聚类的起始偏移"""
+        count = self.count
+        if self._inverted is None or self._inverted[0] != count:
+            lists = np.asarray(self._arrays["lists"][:count])
+            order = np.argsort(lists, kind="stable").astype(np.int64)
+            offsets = np.searchsorted(lists[order], np.arange(self.manifest["nlist"] + 1))
+            self._inverted = (count, order, offsets)
+        return self._inverted[1], self._inverted[2]
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 16) -> List[Tuple[str, int, float]]:
+        """
+        查找最相似的向量
+
+        Args:
+            query: 已归一化的查询向量
+            k: 返回数量
+            nprobe: 搜索的聚类数，越大召回越全、越慢
+
+        Returns:
+            [(表名, 源记录id, 余弦相似度)]，按相似度从高到低排列
+        """
+        if not self.writable:
+            self.refresh()
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.dim:
+            raise ValueError(f"查询向量维度 {query.shape[0]} 与索引维度 {self.dim} 不一致")
+        with self._lock:
+            count = self.count
+            if not count or k <= 0:
+                return []
+            vectors, scales = self._arrays["vectors"], self._arrays["scales"]
+            if self.centroids is not None:
+                order, offsets = self._inverted_lists()
+                probe = np.argsort(-(self.centroids @ query))[:max(1, nprobe)]
+                candidates = np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe]))
+                scores = (vectors[candidates].astype(np.float32) @ query) * scales[candidates]
+            else:
+                candidates = np.arange(count)
+                scores = np.concatenate([
+                    (vectors[start:min(start + self.SCAN_CHUNK, count)].astype(np.float32) @ query)
+                    * scales[start:min(start + self.SCAN_CHUNK, count)]
+                    for start in range(0, count, self.SCAN_CHUNK)
+                ])
+            if not len(scores):
+                return []
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            refs = self._arrays["refs"][candidates[top]]
+            tables = self.manifest["tables"]
+            return [(tables[int(code)], int(source_id), float(score)) for (code, source_id), score in zip(refs, scores[top])]
+
+
+class Qwen3TextEmbedder:
+    """Qwen3-Embedding 文本嵌入（末位token池化，按MRL截断维度）"""
+
+    QUERY_INSTRUCTION = "Given a topic about public opinion, retrieve social media posts and comments that discuss it"
+
+    def __init__(self, model_name: Optional[str] = None, dim: Optional[int] = None, batch_size: int = 16, max_length: int = 256):
+        self.model_name = model_name or settings.SEMANTIC_EMBEDDING_MODEL
+        self.dim = dim or settings.SEMANTIC_EMBEDDING_DIM
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = None
+        self.model = None
+        self.device = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.model is not None:
+            return
+        with self._lock:
+            if self.model is not None:
+                return
+            if not (TORCH_AVAILABLE and TRANSFORMERS_AVAILABLE):
+                raise RuntimeError("语义检索需要安装 PyTorch 与 Transformers")
+            local_model_path = os.path.join(qwen_model_dir, self.model_name.split("/")[-1].lower())
+            source = local_model_path if os.path.exists(os.path.join(local_model_path, "config.json")) else self.model_name
+            logger.info(f"加载嵌入模型: {source}")
+            tokenizer = AutoTokenizer.from_pretrained(source, padding_side="left")
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            model = AutoModel.from_pretrained(source).to(self.device)
+            model.eval()
+            self.tokenizer, self.model = tokenizer, model
+
+    def encode(self, texts: List[str], is_query: bool = False) -> np.ndarray:
+        """
+        计算文本向量
+
+        Args:
+            texts: 文本列表
+            is_query: 是否为查询（查询文本前加检索指令）
+
+        Returns:
+            (len(texts), dim) 已归一化的float32向量
+        """
+        self._load()
+        if is_query:
+            texts = [f"Instruct: {self.QUERY_INSTRUCTION}\nQuery:{text}" for text in texts]
+        outputs = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer(
+                texts[start:start + self.batch_size], padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="pt",
+            ).to(self.device)
+            with torch.no_grad():
+                hidden = self.model(**batch).last_hidden_state
+            # 左侧填充时最后一个位置即末位token
+            outputs.append(hidden[:, -1, :self.dim].float().cpu().numpy())
+        vectors = np.concatenate(outputs) if outputs else np.zeros((0, self.dim), dtype=np.float32)
+        return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+
+def embedding_text(row: Dict[str, Any], fields: List[str]) -> str:
+    """拼接记录的文本字段作为嵌入输入"""
+    parts = [str(row[field]).strip() for field in fields if row.get(field)]
+    return "\n".join(part for part in parts if part)[:MAX_TEXT_CHARS]
+
+
+CHANGE_FEED_CONSUMER = "semantic_index"
+
+
+class SemanticIndexer:
+    """增量建立语义索引"""
+
+    def __init__(
+        self,
+        index: Optional[VectorIndex] = None,
+        embedder: Optional[Any] = None,
+        tables: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            index: 可写的向量索引，默认打开或创建 SEMANTIC_INDEX_DIR
+            embedder: 提供 encode(texts) 与 dim、model_name 的嵌入模型，默认为 Qwen3TextEmbedder
+            tables: 需要建索引的表，默认为 SCORED_TABLES 中的全部表
+            batch_size: 每次从单表读取并嵌入的记录数
+        """
+        self.embedder = embedder or Qwen3TextEmbedder()
+        self.index = index or VectorIndex(
+            settings.SEMANTIC_INDEX_DIR, dim=self.embedder.dim, model=self.embedder.model_name, writable=True
+        )
+        self.tables = tables or list(SCORED_TABLES)
+        unknown = [t for t in self.tables if t not in SCORED_TABLES]
+        if unknown:
+            raise ValueError(f"不支持的表: {unknown}")
+        self.batch_size = max(1, batch_size or settings.SEMANTIC_INDEXER_BATCH_SIZE)
+
+    def _quote(self, name: str) -> str:
+        return f'`{name}`' if get_dialect_name() == "mysql" else f'"{name}"'
+
+    async def _fetch_batch(self, table: str, last_add_ts: int, last_id: int) -> List[Dict[str, Any]]:
+        """读取水位线之后的一批新记录"""
+        columns = ", ".join(self._quote(c) for c in ["id", "add_ts", *SCORED_TABLES[table]])
+        query = (
+            f"SELECT {columns} FROM {self._quote(table)} "
+            f"WHERE add_ts > :last_add_ts OR (add_ts = :last_add_ts AND id > :last_id) "
+            f"ORDER BY add_ts, id LIMIT :limit"
+        )
+        return await fetch_all(query, {"last_add_ts": last_add_ts, "last_id": last_id, "limit": self.batch_size})
+
+    async def index_table(self, table: str) -> int:
+        """把单张表水位线之后的全部记录写入索引，返回新增的向量数"""
+        last_add_ts, last_id = self.index.watermark(table)
+        total = 0
+        while True:
+            rows = await self._fetch_batch(table, last_add_ts, last_id)
+            if not rows:
+                break
+            total += self._embed_rows(table, rows)
+            last_add_ts, last_id = int(rows[-1]["add_ts"] or 0), int(rows[-1]["id"])
+            self.index.commit({table: (last_add_ts, last_id)})
+            if len(rows) < self.batch_size:
+                break
+        return total
+
+    def _embed_rows(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        """嵌入一批记录并追加到索引（未提交），返回新增的向量数"""
+        texts = [(row, embedding_text(row, SCORED_TABLES[table])) for row in rows]
+        texts = [(row, text) for row, text in texts if text]
+        if texts:
+            vectors = self.embedder.encode([text for _, text in texts])
+            self.index.add(table, [int(row["id"]) for row, _ in texts], vectors)
+        return len(texts)
+
+    async def index_changes(self) -> Dict[str, int]:
+        """
+        消费变更流中新插入的记录
+
+        变更流位置以清单中的 crawl_outbox 水位线为准，与向量一同提交；
+        crawl_outbox_cursor 中的游标随后更新，用于查看积压和清理变更表。
+
+        Returns:
+            表名 -> 本次新增的向量数
+        """
+        tables = [t for t in self.tables if t in CRAWLED_TABLES]
+        counts = dict.fromkeys(tables, 0)
+        feed = ChangeFeed(CHANGE_FEED_CONSUMER, tables=tables, ops=[OP_INSERT], batch_size=self.batch_size)
+        _, position = self.index.watermark(OUTBOX_TABLE)
+        while True:
+            batch = await feed.read(position)
+            if not batch.scanned:
+                break
+            for table, ids in batch.changes.items():
+                columns = ", ".join(self._quote(c) for c in ["id", *SCORED_TABLES[table]])
+                condition, params = id_in_clause(self._quote("id"), ids)
+                rows = await fetch_all(f"SELECT {columns} FROM {self._quote(table)} WHERE {condition}", params)
+                counts[table] += self._embed_rows(table, rows)
+            position = batch.last_id
+            self.index.commit({OUTBOX_TABLE: (0, position)})
+            await feed.checkpoint(position)
+            if batch.scanned < feed.batch_size:
+                break
+        return counts
+
+    async def run_once(self) -> Dict[str, int]:
+        """
+        对所有表执行一轮增量建索引
+
+        Returns:
+            表名 -> 本轮新增的向量数
+        """
+        counts = {}
+        scanned_tables = self.tables
+        if settings.CHANGE_FEED_ENABLED:
+            scanned_tables = [t for t in self.tables if t not in CRAWLED_TABLES]
+            try:
+                counts.update(await self.index_changes())
+            except Exception as e:
+                logger.exception(f"语义索引更新失败 (变更流): {e}")
+                counts.update({t: 0 for t in self.tables if t in CRAWLED_TABLES})
+        for table in scanned_tables:
+            try:
+                counts[table] = await self.index_table(table)
+            except Exception as e:
+                logger.exception(f"语义索引更新失败 ({table}): {e}")
+                counts[table] = 0
+        added = sum(counts.values())
+        if added:
+            logger.info(f"本轮语义索引新增 {added} 条，共 {self.index.count} 条: { {t: c for t, c in counts.items() if c} }")
+        return counts
+
+    async def run_forever(self, interval: Optional[float] = None):
+        """按固定间隔持续增量建索引"""
+        interval = interval if interval is not None else settings.SEMANTIC_INDEXER_INTERVAL
+        logger.info(f"语义索引服务已启动，轮询间隔 {interval} 秒，监控 {len(self.tables)} 张表")
+        while True:
+            await self.run_once()
+            await asyncio.sleep(interval)
+
+
+_shared_lock = threading.Lock()
+_shared_index: Optional[VectorIndex] = None
+_shared_embedder: Optional[Qwen3TextEmbedder] = None
+
+
+def get_semantic_index() -> Optional[VectorIndex]:
+    """进程内共享的只读语义索引，索引尚未建立时返回None"""
+    global _shared_index
+    with _shared_lock:
+        path = settings.SEMANTIC_INDEX_DIR
+        if _shared_index is None or _shared_index.path != path:
+            _shared_index = VectorIndex(path) if VectorIndex.exists(path) else None
+        return _shared_index
+
+
+def get_text_embedder() -> Qwen3TextEmbedder:
+    """进程内共享的查询嵌入模型（首次编码时加载）"""
+    global _shared_embedder
+    with _shared_lock:
+        if _shared_embedder is None:
+            _shared_embedder = Qwen3TextEmbedder()
+        return _shared_embedder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量建立语义向量索引")
+    parser.add_argument("--once", action="store_true", help="处理完当前积压后退出")
+    parser.add_argument("--interval", type=float, default=None, help="轮询间隔（秒）")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批嵌入的记录数")
+    parser.add_argument("--tables", nargs="*", default=None, help="只处理指定的表")
+    args = parser.parse_args()
+
+    indexer = SemanticIndexer(tables=args.tables, batch_size=args.batch_size)
+    if args.once:
+        asyncio.run(indexer.run_once())
+    else:
+        asyncio.run(indexer.run_forever(args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@
 
 import os
 import sys
+import threading
 from typing import List, Dict, Any, Optional, Union
 from dataclasses import dataclass
 import re
@@ -27,10 +28,37 @@ except ImportError:
     AutoModelForSequenceClassification = None  # type: ignore
     TRANSFORMERS_AVAILABLE = False
 
+try:
+    import onnxruntime as ort
+
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ort = None  # type: ignore
+    ONNXRUNTIME_AVAILABLE = False
+
+from InsightEngine.utils.config import settings
+from InsightEngine.tools.sentiment_cache import SentimentCache, CachedSentiment
+
 
 # INFO：若想跳过情感分析，可手动切换此开关为False
 SENTIMENT_ANALYSIS_ENABLED = True
 
+# 批量推理时每个mini-batch的文本数量
+DEFAULT_BATCH_SIZE = 32
+
+# 使用的情感分析模型，同时作为情感缓存键的一部分
+MODEL_NAME = "tabularisai/multilingual-sentiment-analysis"
+
+# ONNX后端启用前用于与PyTorch结果对比的样例文本
+PARITY_CHECK_TEXTS = [
+    "今天天气真好，心情特别棒！",
+    "服务态度太差了，很失望",
+    "这部电影还行吧，没有想象中那么好",
+    "I absolutely love this product!",
+    "The customer service was disappointing.",
+    "价格一般，质量也一般。",
+]
+
 
 def _describe_missing_dependencies() -> str:
     missing = []
@@ -82,13 +110,35 @@ class WeiboMultilingualSentimentAnalyzer:
     封装WeiboMultilingualSentiment模型，为AI Agent提供情感分析功能
     """
 
-    def __init__(self):
-        """初始化情感分析器"""
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        cache: Optional[SentimentCache] = None,
+        backend: str = "torch",
+        onnx_threads: int = 0,
+    ):
+        """
+        初始化情感分析器
+
+        Args:
+            batch_size: 批量推理时每个mini-batch的文本数量
+            cache: 情感分析结果缓存，为空则不缓存
+            backend: 推理后端，"torch" 或 "onnx"（int8动态量化，适合无GPU主机）
+            onnx_threads: ONNX Runtime算子内线程数，0表示由运行时自动决定
+        """
         self.model = None
         self.tokenizer = None
         self.device = None
+        self.batch_size = max(1, batch_size)
+        self.model_id = MODEL_NAME
+        self.cache = cache
+        self.backend = backend.lower()
+        self.onnx_threads = max(0, onnx_threads)
+        self.onnx_session = None
         self.is_initialized = False
         self.is_disabled = False
+        # 并行研究时多个线程共用同一个分析器，模型加载与推理需要串行化
+        self._lock = threading.RLock()
         self.disable_reason: Optional[str] = None
 
         # 情感标签映射（5级分类）
@@ -124,6 +174,7 @@ class WeiboMultilingualSentimentAnalyzer:
             self.model = None
             self.tokenizer = None
             self.device = None
+            self.onnx_session = None
             self.is_initialized = False
 
     def enable(self) -> bool:
@@ -162,6 +213,11 @@ class WeiboMultilingualSentimentAnalyzer:
         Returns:
             是否初始化成功
         """
+        with self._lock:
+            return self._initialize()
+
+    def _initialize(self) -> bool:
+        """加载模型和分词器（调用方需持有self._lock）"""
         if self.is_disabled:
             reason = self.disable_reason or "情感分析功能已禁用"
             print(f"情感分析功能已禁用，跳过模型加载：{reason}")
@@ -183,7 +239,7 @@ class WeiboMultilingualSentimentAnalyzer:
             assert AutoModelForSequenceClassification is not None
 
             # 使用多语言情感分析模型
-            model_name = "tabularisai/multilingual-sentiment-analysis"
+            model_name = MODEL_NAME
             local_model_path = os.path.join(weibo_sentiment_path, "model")
 
             # 检查本地是否已有模型
@@ -218,6 +274,9 @@ class WeiboMultilingualSentimentAnalyzer:
             self.is_initialized = True
             self.enable()
 
+            if self.backend == "onnx":
+                self._init_onnx_backend(local_model_path)
+
             device_type = getattr(self.device, "type", str(self.device))
             if device_type == "cuda":
                 print("检测到可用 GPU，已优先使用 CUDA 进行推理。")
@@ -226,6 +285,8 @@ class WeiboMultilingualSentimentAnalyzer:
             else:
                 print("未检测到 GPU，自动使用 CPU 进行推理。")
 
+            if self.onnx_session is not None:
+                print("已启用 ONNX Runtime int8 量化后端。")
             print(f"模型加载成功! 使用设备: {self.device}")
             print("支持语言: 中文、英文、西班牙文、阿拉伯文、日文、韩文等22种语言")
             print("情感等级: 非常负面、负面、中性、正面、非常正面")
@@ -304,44 +365,18 @@ class WeiboMultilingualSentimentAnalyzer:
                     error_message="输入文本为空或无效内容",
                     analysis_performed=False,
                 )
-            assert self.tokenizer is not None
-            # 分词编码
-            inputs = self.tokenizer(
-                processed_text,
-                max_length=512,
-                padding=True,
-                truncation=True,
-                return_tensors="pt",
-            )
-
-            # 转移到设备
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-            # 预测
-            assert torch is not None
-            assert self.model is not None
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                probabilities = torch.softmax(logits, dim=1)
-                prediction = int(torch.argmax(probabilities, dim=1).item())
-
-            # 构建结果
-            confidence = probabilities[0][prediction].item()
-            label = self.sentiment_map[prediction]
-
-            # 构建概率分布字典
-            prob_dist = {}
-            for label_name, prob in zip(self.sentiment_map.values(), probabilities[0]):
-                prob_dist[label_name] = prob.item()
-
-            return SentimentResult(
-                text=text,
-                sentiment_label=label,
-                confidence=confidence,
-                probability_distribution=prob_dist,
-                success=True,
-            )
+            if self.cache is not None:
+                cache_key = self.cache.make_key(processed_text, self.model_id)
+                cached = self.cache.get_many([cache_key]).get(cache_key)
+                if cached is not None:
+                    return self._result_from_cache(text, cached)
+
+            # 预测并构建结果
+            probabilities = self._predict_probabilities([processed_text])[0]
+            result = self._build_result(text, probabilities)
+            if self.cache is not None:
+                self.cache.set_many({cache_key: self._cache_entry(result)})
+            return result
 
         except Exception as e:
             return SentimentResult(
@@ -354,15 +389,252 @@ class WeiboMultilingualSentimentAnalyzer:
                 analysis_performed=False,
             )
 
+    def _build_result(self, text: str, probabilities: List[float]) -> SentimentResult:
+        """根据单条文本的概率分布构建SentimentResult"""
+        prediction = max(range(len(probabilities)), key=lambda i: probabilities[i])
+        prob_dist = {
+            label_name: prob
+            for label_name, prob in zip(self.sentiment_map.values(), probabilities)
+        }
+        return SentimentResult(
+            text=text,
+            sentiment_label=self.sentiment_map[prediction],
+            confidence=probabilities[prediction],
+            probability_distribution=prob_dist,
+            success=True,
+        )
+
+    @staticmethod
+    def _result_from_cache(text: str, cached: CachedSentiment) -> SentimentResult:
+        """由缓存记录构建SentimentResult"""
+        return SentimentResult(
+            text=text,
+            sentiment_label=cached.sentiment_label,
+            confidence=cached.confidence,
+            probability_distribution=dict(cached.probability_distribution),
+            success=True,
+        )
+
+    @staticmethod
+    def _cache_entry(result: SentimentResult) -> CachedSentiment:
+        """由SentimentResult构建缓存记录"""
+        return CachedSentiment(
+            sentiment_label=result.sentiment_label,
+            confidence=result.confidence,
+            probability_distribution=dict(result.probability_distribution),
+        )
+
+    def _predict_probabilities(self, processed_texts: List[str]) -> List[List[float]]:
+        """
+        对一个mini-batch执行一次前向推理
+
+        Args:
+            processed_texts: 预处理后的文本列表
+
+        Returns:
+            每条文本的概率分布列表
+        """
+        with self._lock:
+            if self.onnx_session is not None:
+                return self._predict_probabilities_onnx(processed_texts)
+            return self._predict_probabilities_torch(processed_texts)
+
+    def _predict_probabilities_torch(self, processed_texts: List[str]) -> List[List[float]]:
+        """使用PyTorch模型推理"""
+        assert torch is not None
+        assert self.tokenizer is not None
+        assert self.model is not None
+        # padding=True 只填充到该批次内最长文本的长度（动态padding）
+        inputs = self.tokenizer(
+            processed_texts,
+            max_length=512,
+            padding=True,
+            truncation=True,
+            return_tensors="pt",
+        )
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            logits = self.model(**inputs).logits
+            probabilities = torch.softmax(logits, dim=1)
+        # 整个批次只做一次设备同步
+        return probabilities.cpu().tolist()
+
+    def _predict_probabilities_onnx(self, processed_texts: List[str]) -> List[List[float]]:
+        """使用ONNX Runtime量化模型推理"""
+        import numpy as np
+
+        assert self.tokenizer is not None
+        assert self.onnx_session is not None
+        inputs = self.tokenizer(
+            processed_texts,
+            max_length=512,
+            padding=True,
+            truncation=True,
+            return_tensors="np",
+        )
+        input_names = {i.name for i in self.onnx_session.get_inputs()}
+        feed = {k: v.astype(np.int64) for k, v in inputs.items() if k in input_names}
+        logits = self.onnx_session.run(None, feed)[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp / exp.sum(axis=1, keepdims=True)).tolist()
+
+    def _export_onnx_model(self, onnx_dir: str) -> str:
+        """
+        将PyTorch模型导出为ONNX并做int8动态量化（只在首次使用时执行）
+
+        Args:
+            onnx_dir: ONNX模型保存目录
+
+        Returns:
+            量化后模型文件路径
+        """
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        fp32_path = os.path.join(onnx_dir, "model.onnx")
+        int8_path = os.path.join(onnx_dir, "model.int8.onnx")
+        if os.path.exists(int8_path):
+            return int8_path
+
+        assert torch is not None
+        assert self.tokenizer is not None
+        assert self.model is not None
+        os.makedirs(onnx_dir, exist_ok=True)
+
+        if not os.path.exists(fp32_path):
+            print("正在导出ONNX模型...")
+            sample = self.tokenizer(
+                PARITY_CHECK_TEXTS[:2], padding=True, truncation=True, return_tensors="pt"
+            )
+            input_names = list(sample.keys())
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            dynamic_axes["logits"] = {0: "batch"}
+            # 导出在CPU上进行，避免设备相关算子进入计算图
+            cpu_model = self.model.to("cpu")
+            with torch.no_grad():
+                torch.onnx.export(
+                    cpu_model,
+                    tuple(sample[name] for name in input_names),
+                    fp32_path,
+                    input_names=input_names,
+                    output_names=["logits"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=14,
+                )
+            self.model.to(self.device)
+
+        print("正在对ONNX模型进行int8动态量化...")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"量化模型已保存到: {int8_path}")
+        return int8_path
+
+    def _init_onnx_backend(self, local_model_path: str) -> bool:
+        """
+        启用ONNX Runtime int8后端，失败或精度对比不通过时保留PyTorch后端
+
+        Args:
+            local_model_path: 本地模型目录
+
+        Returns:
+            是否成功启用ONNX后端
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            print("缺少依赖: onnxruntime，继续使用 PyTorch 后端。")
+            return False
+
+        try:
+            assert ort is not None
+            model_path = self._export_onnx_model(os.path.join(local_model_path, "onnx"))
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.inter_op_num_threads = 1
+            if self.onnx_threads:
+                options.intra_op_num_threads = self.onnx_threads
+            self.onnx_session = ort.InferenceSession(
+                model_path, sess_options=options, providers=["CPUExecutionProvider"]
+            )
+
+            parity = self.check_onnx_parity()
+            print(
+                f"ONNX与PyTorch结果对比: 标签一致率 {parity['label_agreement']:.2%}，"
+                f"最大概率差 {parity['max_abs_diff']:.4f}"
+            )
+            if not parity["passed"]:
+                print("ONNX量化模型与PyTorch结果差异过大，继续使用 PyTorch 后端。")
+                self.onnx_session = None
+                return False
+        except Exception as e:
+            print(f"ONNX后端初始化失败，继续使用 PyTorch 后端: {e}")
+            self.onnx_session = None
+            return False
+
+        # 量化结果与fp32存在细微差异，缓存键需区分后端
+        self.model_id = f"{MODEL_NAME}:onnx-int8"
+        # 对比完成后释放PyTorch模型，降低常驻内存
+        self.model = None
+        if torch is not None and getattr(self.device, "type", "") == "cuda":
+            torch.cuda.empty_cache()
+        return True
+
+    def check_onnx_parity(
+        self,
+        texts: Optional[List[str]] = None,
+        min_label_agreement: float = 1.0,
+        max_prob_diff: float = 0.1,
+    ) -> Dict[str, Any]:
+        """
+        对比ONNX量化模型与PyTorch模型在样例文本上的输出
+
+        Args:
+            texts: 用于对比的文本，默认使用内置样例
+            min_label_agreement: 通过检查所需的最低标签一致率
+            max_prob_diff: 通过检查允许的最大概率差
+
+        Returns:
+            包含标签一致率、最大概率差和是否通过的字典
+        """
+        if self.onnx_session is None or self.model is None:
+            raise RuntimeError("需要同时加载ONNX会话与PyTorch模型才能进行对比")
+
+        processed = [self._preprocess_text(t) for t in (texts or PARITY_CHECK_TEXTS)]
+        processed = [t for t in processed if t]
+        torch_probs = self._predict_probabilities_torch(processed)
+        onnx_probs = self._predict_probabilities_onnx(processed)
+
+        agreements = 0
+        max_abs_diff = 0.0
+        for expected, actual in zip(torch_probs, onnx_probs):
+            if expected.index(max(expected)) == actual.index(max(actual)):
+                agreements += 1
+            max_abs_diff = max(
+                max_abs_diff, max(abs(e - a) for e, a in zip(expected, actual))
+            )
+
+        label_agreement = agreements / len(processed) if processed else 1.0
+        return {
+            "samples": len(processed),
+            "label_agreement": label_agreement,
+            "max_abs_diff": max_abs_diff,
+            "passed": label_agreement >= min_label_agreement and max_abs_diff <= max_prob_diff,
+        }
+
     def analyze_batch(
-        self, texts: List[str], show_progress: bool = True
+        self,
+        texts: List[str],
+        show_progress: bool = True,
+        batch_size: Optional[int] = None,
     ) -> BatchSentimentResult:
         """
         批量情感分析
 
+        文本按长度排序后分成mini-batch推理（长度分桶），每个批次只填充到批内最大长度，
+        以减少padding带来的无效计算。
+
         Args:
             texts: 文本列表
             show_progress: 是否显示进度
+            batch_size: 每个mini-batch的文本数量，默认使用实例配置
 
         Returns:
             BatchSentimentResult对象
@@ -399,17 +671,71 @@ class WeiboMultilingualSentimentAnalyzer:
                 analysis_performed=False,
             )
 
-        results = []
-        success_count = 0
-        total_confidence = 0.0
+        batch_size = max(1, batch_size or self.batch_size)
+        results: List[Optional[SentimentResult]] = [None] * len(texts)
+        pending = []
 
         for i, text in enumerate(texts):
-            if show_progress and len(texts) > 1:
-                print(f"处理进度: {i + 1}/{len(texts)}")
+            processed_text = self._preprocess_text(text)
+            if processed_text:
+                pending.append((i, processed_text))
+            else:
+                results[i] = SentimentResult(
+                    text=text,
+                    sentiment_label="输入错误",
+                    confidence=0.0,
+                    probability_distribution={},
+                    success=False,
+                    error_message="输入文本为空或无效内容",
+                    analysis_performed=False,
+                )
 
-            result = self.analyze_single_text(text)
-            results.append(result)
+        # 先批量查询缓存，只对未命中的文本执行推理
+        cache_keys: Dict[int, str] = {}
+        if self.cache is not None and pending:
+            cache_keys = {
+                index: self.cache.make_key(processed_text, self.model_id)
+                for index, processed_text in pending
+            }
+            cached = self.cache.get_many(cache_keys.values())
+            if cached:
+                remaining = []
+                for index, processed_text in pending:
+                    entry = cached.get(cache_keys[index])
+                    if entry is not None:
+                        results[index] = self._result_from_cache(texts[index], entry)
+                    else:
+                        remaining.append((index, processed_text))
+                if show_progress:
+                    print(f"情感缓存命中: {len(pending) - len(remaining)}/{len(pending)}")
+                pending = remaining
+
+        # 按长度分桶，使同一批次内的文本长度接近
+        pending.sort(key=lambda item: len(item[1]))
+        total_batches = (len(pending) + batch_size - 1) // batch_size
+
+        for batch_no, start in enumerate(range(0, len(pending), batch_size), 1):
+            batch = pending[start:start + batch_size]
+            if show_progress and total_batches > 1:
+                print(f"处理进度: 批次 {batch_no}/{total_batches}（{start + len(batch)}/{len(pending)}）")
+
+            try:
+                batch_probabilities = self._predict_probabilities([t for _, t in batch])
+                new_entries = {}
+                for (index, _), probabilities in zip(batch, batch_probabilities):
+                    results[index] = self._build_result(texts[index], probabilities)
+                    if index in cache_keys:
+                        new_entries[cache_keys[index]] = self._cache_entry(results[index])
+                if self.cache is not None:
+                    self.cache.set_many(new_entries)
+            except Exception as e:
+                print(f"批量推理失败，改为逐条分析: {e}")
+                for index, _ in batch:
+                    results[index] = self.analyze_single_text(texts[index])
 
+        success_count = 0
+        total_confidence = 0.0
+        for result in results:
             if result.success:
                 success_count += 1
                 total_confidence += result.confidence
@@ -518,38 +844,71 @@ class WeiboMultilingualSentimentAnalyzer:
                 }
             }
 
-        if self.is_disabled:
-            return self._build_passthrough_analysis(
-                original_data=original_data,
-                reason=self.disable_reason or "情感分析模型不可用",
-                texts=texts_to_analyze,
-            )
+        # 后台打分服务已写入的预计算情感直接使用，只对其余文本运行模型
+        precomputed: Dict[int, SentimentResult] = {}
+        for i, item in enumerate(original_data):
+            stored_label = item.get("sentiment_label")
+            stored_confidence = item.get("sentiment_confidence")
+            if stored_label and stored_confidence is not None:
+                precomputed[i] = SentimentResult(
+                    text=texts_to_analyze[i],
+                    sentiment_label=stored_label,
+                    confidence=float(stored_confidence),
+                    probability_distribution={},
+                    success=True,
+                )
 
-        # 执行批量情感分析
-        print(f"正在对{len(texts_to_analyze)}条内容进行情感分析...")
-        batch_result = self.analyze_batch(texts_to_analyze, show_progress=True)
+        if not precomputed:
+            if self.is_disabled:
+                return self._build_passthrough_analysis(
+                    original_data=original_data,
+                    reason=self.disable_reason or "情感分析模型不可用",
+                    texts=texts_to_analyze,
+                )
+
+            # 执行批量情感分析
+            print(f"正在对{len(texts_to_analyze)}条内容进行情感分析...")
+            batch_result = self.analyze_batch(texts_to_analyze, show_progress=True)
 
-        if not batch_result.analysis_performed:
-            reason = self.disable_reason or "情感分析功能不可用"
-            if batch_result.results:
-                candidate_error = next(
-                    (r.error_message for r in batch_result.results if r.error_message),
-                    None,
+            if not batch_result.analysis_performed:
+                reason = self.disable_reason or "情感分析功能不可用"
+                if batch_result.results:
+                    candidate_error = next(
+                        (r.error_message for r in batch_result.results if r.error_message),
+                        None,
+                    )
+                    if candidate_error:
+                        reason = candidate_error
+                return self._build_passthrough_analysis(
+                    original_data=original_data,
+                    reason=reason,
+                    texts=texts_to_analyze,
+                    results=batch_result.results,
                 )
-                if candidate_error:
-                    reason = candidate_error
-            return self._build_passthrough_analysis(
-                original_data=original_data,
-                reason=reason,
-                texts=texts_to_analyze,
-                results=batch_result.results,
-            )
+            results = batch_result.results
+        else:
+            pending = [i for i in range(len(texts_to_analyze)) if i not in precomputed]
+            print(f"使用预计算情感结果 {len(precomputed)}/{len(texts_to_analyze)} 条")
+            if pending:
+                print(f"正在对其余{len(pending)}条内容进行情感分析...")
+                pending_result = self.analyze_batch(
+                    [texts_to_analyze[i] for i in pending], show_progress=True
+                )
+                precomputed.update(zip(pending, pending_result.results))
+            results = [precomputed[i] for i in range(len(texts_to_analyze))]
+
+        success_count = sum(1 for r in results if r.success)
+        average_confidence = (
+            sum(r.confidence for r in results if r.success) / success_count
+            if success_count > 0
+            else 0.0
+        )
 
         # 统计情感分布
         sentiment_distribution = {}
         high_confidence_results = []
 
-        for result, original_item in zip(batch_result.results, original_data):
+        for result, original_item in zip(results, original_data):
             if result.success:
                 # 统计情感分布
                 sentiment = result.sentiment_label
@@ -571,7 +930,7 @@ class WeiboMultilingualSentimentAnalyzer:
                     )
 
         # 生成情感分析摘要
-        total_analyzed = batch_result.success_count
+        total_analyzed = success_count
         if total_analyzed > 0:
             dominant_sentiment = max(sentiment_distribution.items(), key=lambda x: x[1])
             sentiment_summary = f"共分析{total_analyzed}条内容，主要情感倾向为'{dominant_sentiment[0]}'({dominant_sentiment[1]}条，占{dominant_sentiment[1] / total_analyzed * 100:.1f}%)"
@@ -581,8 +940,8 @@ class WeiboMultilingualSentimentAnalyzer:
         return {
             "sentiment_analysis": {
                 "total_analyzed": total_analyzed,
-                "success_rate": f"{batch_result.success_count}/{batch_result.total_processed}",
-                "average_confidence": round(batch_result.average_confidence, 4),
+                "success_rate": f"{success_count}/{len(results)}",
+                "average_confidence": round(average_confidence, 4),
                 "sentiment_distribution": sentiment_distribution,
                 "high_confidence_results": high_confidence_results,  # 返回所有高置信度结果，不做限制
                 "summary": sentiment_summary,
@@ -597,7 +956,7 @@ class WeiboMultilingualSentimentAnalyzer:
             模型信息字典
         """
         return {
-            "model_name": "tabularisai/multilingual-sentiment-analysis",
+            "model_name": self.model_id,
             "supported_languages": [
                 "中文",
                 "英文",
@@ -625,11 +984,27 @@ class WeiboMultilingualSentimentAnalyzer:
             "sentiment_levels": list(self.sentiment_map.values()),
             "is_initialized": self.is_initialized,
             "device": str(self.device) if self.device else "未设置",
+            "backend": "onnx-int8" if self.onnx_session is not None else "torch",
+            "cache": self.get_cache_stats(),
         }
 
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """获取情感缓存命中统计，未启用缓存时返回None"""
+        return self.cache.get_stats() if self.cache is not None else None
+
 
 # 创建全局实例（延迟初始化）
-multilingual_sentiment_analyzer = WeiboMultilingualSentimentAnalyzer()
+multilingual_sentiment_analyzer = WeiboMultilingualSentimentAnalyzer(
+    batch_size=settings.SENTIMENT_BATCH_SIZE,
+    backend=settings.SENTIMENT_BACKEND,
+    onnx_threads=settings.SENTIMENT_ONNX_THREADS,
+    cache=SentimentCache(
+        max_entries=settings.SENTIMENT_CACHE_MAX_ENTRIES,
+        sqlite_path=settings.SENTIMENT_CACHE_SQLITE_PATH,
+    )
+    if settings.SENTIMENT_CACHE_ENABLED
+    else None,
+)
 
 
 def enable_sentiment_analysis() -> bool:
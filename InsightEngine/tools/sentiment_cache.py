@@ -0,0 +1,83 @@
+"""
+情感分析结果缓存
+热门评论、转发在多次搜索中反复出现，缓存其情感分析结果以避免重复推理：
+
+- 缓存键: 预处理后文本 + 模型标识 的SHA-256
+- 存储: 进程内LRU，可选SQLite持久化（跨会话复用），见 utils/persistent_cache.py
+- 查询: 支持批量查询，SQLite分块使用 IN (...) 一次读取
+"""
+
+import hashlib
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Optional
+
+# 添加utils目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(os.path.dirname(current_dir))
+utils_dir = os.path.join(root_dir, 'utils')
+if utils_dir not in sys.path:
+    sys.path.append(utils_dir)
+
+from persistent_cache import PersistentCache
+
+
+@dataclass
+class CachedSentiment:
+    """缓存的单条情感分析结果"""
+
+    sentiment_label: str
+    confidence: float
+    probability_distribution: Dict[str, float]
+
+
+class SentimentCache(PersistentCache):
+    """情感分析结果缓存（内存LRU + 可选SQLite）"""
+
+    table_name = "sentiment_cache"
+    label = "情感缓存"
+
+    def __init__(self, max_entries: int = 10000, sqlite_path: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 内存中保留的最大条目数
+            sqlite_path: SQLite缓存文件路径，为空则只使用内存缓存
+        """
+        super().__init__(max_entries=max_entries, sqlite_path=sqlite_path)
+
+    @staticmethod
+    def make_key(processed_text: str, model_id: str) -> str:
+        """根据预处理后的文本和模型标识计算缓存键"""
+        raw = f"{model_id}\x00{processed_text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def encode(self, value: CachedSentiment) -> str:
+        return json.dumps(asdict(value), ensure_ascii=False)
+
+    def decode(self, payload: str) -> CachedSentiment:
+        return CachedSentiment(**json.loads(payload))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CachedSentiment]:
+        """
+        批量读取缓存
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            命中的 键 -> CachedSentiment 映射
+        """
+        return super().get_many(keys)
+
+    def set_many(self, entries: Dict[str, CachedSentiment]):
+        """
+        批量写入缓存
+
+        Args:
+            entries: 键 -> CachedSentiment 映射
+        """
+        super().set_many(entries)
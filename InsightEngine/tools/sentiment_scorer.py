@@ -0,0 +1,324 @@
+"""
+入库时情感打分服务
+按 (add_ts, id) 水位线追踪MediaCrawler内容表和评论表中的新记录，使用现有的
+情感分析器批量打分，并将结果写入 content_sentiment 表。
+
+开启 CHANGE_FEED_ENABLED 后改为消费 crawl_outbox 变更流（见 change_feed），只读取新插入的记录。
+
+开启 SENTIMENT_PRECOMPUTED_ENABLED 后，MediaCrawlerDB 返回的结果会附带预计算的情感，
+研究流程中的情感分析直接汇总这些结果，不再实时运行模型。
+
+用法:
+    python -m InsightEngine.tools.sentiment_scorer            # 持续运行
+    python -m InsightEngine.tools.sentiment_scorer --once     # 处理完当前积压后退出
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from InsightEngine.utils.config import settings
+from InsightEngine.utils.db import execute, fetch_all, get_dialect_name
+from InsightEngine.tools.change_feed import OP_INSERT, ChangeBatch, ChangeFeed, id_in_clause
+from InsightEngine.tools.sentiment_analyzer import (
+    WeiboMultilingualSentimentAnalyzer,
+    multilingual_sentiment_analyzer,
+)
+
+
+# 需要打分的表及其文本字段（按优先级排列，与MediaCrawlerDB中 title_or_content 的取值顺序一致）
+SCORED_TABLES: Dict[str, List[str]] = {
+    'bilibili_video': ['title', 'desc'],
+    'bilibili_video_comment': ['content'],
+    'douyin_aweme': ['title', 'desc'],
+    'douyin_aweme_comment': ['content'],
+    'kuaishou_video': ['title', 'desc'],
+    'kuaishou_video_comment': ['content'],
+    'weibo_note': ['content'],
+    'weibo_note_comment': ['content'],
+    'xhs_note': ['title', 'desc'],
+    'xhs_note_comment': ['content'],
+    'zhihu_content': ['title', 'desc', 'content_text'],
+    'zhihu_comment': ['content'],
+    'tieba_note': ['title', 'desc'],
+    'tieba_comment': ['content'],
+    'daily_news': ['title'],
+}
+
+# 由MediaCrawler写入、变更会记录到 crawl_outbox 的表（daily_news 由MindSpider写入，始终按水位线读取）
+CRAWLED_TABLES: List[str] = [t for t in SCORED_TABLES if t != 'daily_news']
+
+SENTIMENT_TABLE = "content_sentiment"
+STATE_TABLE = "sentiment_scorer_state"
+CHANGE_FEED_CONSUMER = "sentiment_scorer"
+
+
+class SentimentScoringError(RuntimeError):
+    """一批变更中有记录打分失败，变更流游标不应越过这批变更"""
+
+
+def extract_text(row: Dict[str, Any], fields: List[str]) -> str:
+    """按字段优先级取第一个非空文本"""
+    for field in fields:
+        value = row.get(field)
+        if value:
+            return str(value)
+    return ""
+
+
+class SentimentScorer:
+    """后台情感打分服务"""
+
+    def __init__(
+        self,
+        analyzer: Optional[WeiboMultilingualSentimentAnalyzer] = None,
+        tables: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+    ):
+        """
+        初始化打分服务
+
+        Args:
+            analyzer: 情感分析器，默认使用全局实例
+            tables: 需要打分的表，默认为 SCORED_TABLES 中的全部表
+            batch_size: 每次从单表读取并打分的记录数
+        """
+        self.analyzer = analyzer or multilingual_sentiment_analyzer
+        self.tables = tables or list(SCORED_TABLES)
+        unknown = [t for t in self.tables if t not in SCORED_TABLES]
+        if unknown:
+            raise ValueError(f"不支持的表: {unknown}")
+        self.batch_size = max(1, batch_size or settings.SENTIMENT_SCORER_BATCH_SIZE)
+        self.dialect = get_dialect_name()
+        # (表名, 记录ID) -> 连续打分失败次数
+        self._attempts: Dict[Tuple[str, int], int] = {}
+
+    def _quote(self, name: str) -> str:
+        """根据数据库方言包装标识符"""
+        return f'`{name}`' if self.dialect == "mysql" else f'"{name}"'
+
+    def _upsert_sql(self, table: str, columns: List[str], key_columns: List[str]) -> str:
+        """生成按方言区分的 INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE 语句"""
+        column_sql = ", ".join(self._quote(c) for c in columns)
+        values_sql = ", ".join(f":{c}" for c in columns)
+        update_columns = [c for c in columns if c not in key_columns and c != "add_ts"]
+        if self.dialect in ("postgresql", "sqlite"):
+            updates = ", ".join(f"{self._quote(c)} = EXCLUDED.{self._quote(c)}" for c in update_columns)
+            conflict = ", ".join(self._quote(c) for c in key_columns)
+            return f"INSERT INTO {self._quote(table)} ({column_sql}) VALUES ({values_sql}) ON CONFLICT ({conflict}) DO UPDATE SET {updates}"
+        updates = ", ".join(f"{self._quote(c)} = VALUES({self._quote(c)})" for c in update_columns)
+        return f"INSERT INTO {self._quote(table)} ({column_sql}) VALUES ({values_sql}) ON DUPLICATE KEY UPDATE {updates}"
+
+    async def _load_state(self) -> Dict[str, Tuple[int, int]]:
+        """读取各表已处理到的水位线"""
+        rows = await fetch_all(
+            f"SELECT source_table, last_add_ts, last_id FROM {self._quote(STATE_TABLE)}"
+        )
+        return {row["source_table"]: (int(row["last_add_ts"]), int(row["last_id"])) for row in rows}
+
+    async def _fetch_batch(self, table: str, last_add_ts: int, last_id: int) -> List[Dict[str, Any]]:
+        """读取水位线之后的一批新记录"""
+        columns = ", ".join(self._quote(c) for c in ["id", "add_ts", *SCORED_TABLES[table]])
+        query = (
+            f"SELECT {columns} FROM {self._quote(table)} "
+            f"WHERE add_ts > :last_add_ts OR (add_ts = :last_add_ts AND id > :last_id) "
+            f"ORDER BY add_ts, id LIMIT :limit"
+        )
+        return await fetch_all(query, {"last_add_ts": last_add_ts, "last_id": last_id, "limit": self.batch_size})
+
+    async def _score_rows(self, table: str, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        对一批记录打分并写入结果
+
+        Returns:
+            (成功打分的数量, 从第一条起连续处理完成的记录数)；第一条打分失败的记录及其之后的记录需要重试。
+            失败次数达到 SENTIMENT_SCORER_MAX_ATTEMPTS 的记录视为已处理（跳过）
+        """
+        scored_rows = [(index, row, extract_text(row, SCORED_TABLES[table])) for index, row in enumerate(rows)]
+        scored_rows = [(index, row, text) for index, row, text in scored_rows if text.strip()]
+
+        now_ms = int(time.time() * 1000)
+        records = []
+        done = len(rows)
+        if scored_rows:
+            batch_result = self.analyzer.analyze_batch([text for _, _, text in scored_rows], show_progress=False)
+            for (index, row, _), result in zip(scored_rows, batch_result.results):
+                key = (table, int(row["id"]))
+                if not result.success:
+                    attempts = self._attempts.get(key, 0) + 1
+                    if attempts >= settings.SENTIMENT_SCORER_MAX_ATTEMPTS:
+                        self._attempts.pop(key, None)
+                        logger.warning(f"{table} 的记录 {key[1]} 已连续 {attempts} 次打分失败，跳过: {result.error_message}")
+                    else:
+                        self._attempts[key] = attempts
+                        done = min(done, index)
+                    continue
+                self._attempts.pop(key, None)
+                records.append({
+                    "source_table": table,
+                    "source_id": int(row["id"]),
+                    "model_id": self.analyzer.model_id,
+                    "sentiment_label": result.sentiment_label,
+                    "confidence": float(result.confidence),
+                    "add_ts": now_ms,
+                    "last_modify_ts": now_ms,
+                })
+
+        if records:
+            await execute(
+                self._upsert_sql(SENTIMENT_TABLE, list(records[0]), ["source_table", "source_id"]),
+                records,
+            )
+        return len(records), done
+
+    async def _store(self, table: str, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        对一批记录打分，写入结果并把水位线推进到最后一条连续处理完成的记录
+
+        Returns:
+            (成功打分的数量, 从第一条起连续处理完成的记录数)
+        """
+        scored, done = await self._score_rows(table, rows)
+        if done:
+            now_ms = int(time.time() * 1000)
+            last_row = rows[done - 1]
+            await execute(
+                self._upsert_sql(STATE_TABLE, ["source_table", "last_add_ts", "last_id", "last_modify_ts"], ["source_table"]),
+                {
+                    "source_table": table,
+                    "last_add_ts": int(last_row["add_ts"] or 0),
+                    "last_id": int(last_row["id"]),
+                    "last_modify_ts": now_ms,
+                },
+            )
+        return scored, done
+
+    async def score_table(self, table: str, state: Tuple[int, int] = (0, 0)) -> int:
+        """
+        处理单张表水位线之后的全部积压记录；遇到打分失败的记录时停止，下一轮从该记录重试
+
+        Args:
+            table: 表名
+            state: 已处理到的 (add_ts, id)
+
+        Returns:
+            本次成功打分的记录数
+        """
+        last_add_ts, last_id = state
+        total = 0
+        while True:
+            rows = await self._fetch_batch(table, last_add_ts, last_id)
+            if not rows:
+                break
+            scored, done = await self._store(table, rows)
+            total += scored
+            if done < len(rows):
+                logger.warning(f"{table} 的记录 {rows[done]['id']} 打分失败，水位线停在其之前，下一轮重试")
+                break
+            last_add_ts, last_id = int(rows[-1]["add_ts"] or 0), int(rows[-1]["id"])
+            if len(rows) < self.batch_size:
+                break
+        return total
+
+    async def score_changes(self) -> Dict[str, int]:
+        """
+        消费变更流中新插入的记录并打分
+
+        Returns:
+            表名 -> 本次成功打分的记录数
+        """
+        tables = [t for t in self.tables if t in CRAWLED_TABLES]
+        counts = dict.fromkeys(tables, 0)
+
+        async def handle(batch: ChangeBatch):
+            failed = []
+            for table, ids in batch.changes.items():
+                columns = ", ".join(self._quote(c) for c in ["id", "add_ts", *SCORED_TABLES[table]])
+                condition, params = id_in_clause(self._quote("id"), ids)
+                rows = await fetch_all(f"SELECT {columns} FROM {self._quote(table)} WHERE {condition}", params)
+                if rows:
+                    scored, done = await self._score_rows(table, rows)
+                    counts[table] += scored
+                    if done < len(rows):
+                        failed.append(table)
+            if failed:
+                # 不推进游标，下一轮重新读取这批变更；已成功的记录重复打分时按唯一键覆盖
+                raise SentimentScoringError(f"变更流中 {failed} 的部分记录打分失败，游标停在变更 {batch.last_id} 之前")
+            return []
+
+        feed = ChangeFeed(CHANGE_FEED_CONSUMER, tables=tables, ops=[OP_INSERT], batch_size=self.batch_size)
+        try:
+            await feed.drain(handle)
+        except SentimentScoringError as e:
+            logger.warning(f"{e}，下一轮重试")
+        return counts
+
+    async def run_once(self) -> Dict[str, int]:
+        """
+        对所有表执行一轮打分
+
+        Returns:
+            表名 -> 本轮成功打分的记录数
+        """
+        if not self.analyzer.is_initialized:
+            if self.analyzer.is_disabled:
+                # 模型加载失败时分析器会被禁用，重新启用后再次尝试加载
+                self.analyzer.enable()
+            if not self.analyzer.initialize():
+                raise RuntimeError(f"情感分析模型不可用: {self.analyzer.disable_reason}")
+
+        counts = {}
+        scanned_tables = self.tables
+        if settings.CHANGE_FEED_ENABLED:
+            scanned_tables = [t for t in self.tables if t not in CRAWLED_TABLES]
+            try:
+                counts.update(await self.score_changes())
+            except Exception as e:
+                logger.exception(f"情感打分失败 (变更流): {e}")
+                counts.update({t: 0 for t in self.tables if t in CRAWLED_TABLES})
+
+        state = await self._load_state()
+        for table in scanned_tables:
+            try:
+                counts[table] = await self.score_table(table, state.get(table, (0, 0)))
+            except Exception as e:
+                logger.exception(f"情感打分失败 ({table}): {e}")
+                counts[table] = 0
+        scored = sum(counts.values())
+        if scored:
+            logger.info(f"本轮情感打分完成，共 {scored} 条: { {t: c for t, c in counts.items() if c} }")
+        return counts
+
+    async def run_forever(self, interval: Optional[float] = None):
+        """按固定间隔持续打分"""
+        interval = interval if interval is not None else settings.SENTIMENT_SCORER_INTERVAL
+        logger.info(f"情感打分服务已启动，轮询间隔 {interval} 秒，监控 {len(self.tables)} 张表")
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                # 模型下载失败等临时错误不应使常驻服务退出，下一轮重试
+                logger.exception(f"本轮情感打分失败，{interval} 秒后重试: {e}")
+            await asyncio.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入库时情感打分服务")
+    parser.add_argument("--once", action="store_true", help="处理完当前积压后退出")
+    parser.add_argument("--interval", type=float, default=None, help="轮询间隔（秒）")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批打分的记录数")
+    parser.add_argument("--tables", nargs="*", default=None, help="只处理指定的表")
+    args = parser.parse_args()
+
+    scorer = SentimentScorer(tables=args.tables, batch_size=args.batch_size)
+    if args.once:
+        asyncio.run(scorer.run_once())
+    else:
+        asyncio.run(scorer.run_forever(args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""
+话题趋势汇总服务
+按 (add_ts, id) 水位线追踪MediaCrawler内容表和评论表中的新记录，按小时和天两个粒度
+汇总每个 (来源关键词, 平台, 内容类型) 的条数与互动量，写入 topic_rollup 表；
+同时追踪 content_sentiment 表，把后台情感打分的结果计入对应时间桶的情感分布。
+
+MediaCrawlerDB.get_topic_trend 直接读取汇总表，用一次索引查询得到话题的时间序列。
+
+- 评论表没有来源关键词，使用所属内容的 source_keyword
+- 时间桶按发布时间（缺失时按入库时间）划分，以本地时间的整点/零点为起点
+- 互动量取入库时的快照，之后爬虫更新的互动数据不会回写汇总表
+- 每批记录的汇总增量与水位线在同一个事务中写入，中断后重跑不会重复计数
+- 开启 CHANGE_FEED_ENABLED 后，内容表和评论表改为消费 crawl_outbox 变更流中新插入的记录（见 change_feed），
+  汇总增量与变更流游标同样在一个事务中写入
+
+用法:
+    python -m InsightEngine.tools.topic_rollup            # 持续运行
+    python -m InsightEngine.tools.topic_rollup --once     # 处理完当前积压后退出
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from InsightEngine.utils.config import settings
+from InsightEngine.utils.db import execute_transaction, fetch_all, get_dialect_name
+from InsightEngine.tools.change_feed import OP_INSERT, ChangeBatch, ChangeFeed, id_in_clause
+
+__all__ = [
+    "ROLLUP_TABLE",
+    "ROLLUP_SOURCES",
+    "GRANULARITIES",
+    "TopicRollupService",
+    "bucket_start",
+]
+
+ROLLUP_TABLE = "topic_rollup"
+STATE_TABLE = "topic_rollup_state"
+SENTIMENT_TABLE = "content_sentiment"
+CHANGE_FEED_CONSUMER = "topic_rollup"
+
+# 汇总粒度 -> 时间桶长度（秒）
+GRANULARITIES: Dict[str, int] = {"hour": 3600, "day": 86400}
+
+# 汇总的表：平台、内容类型，评论表另有 (所属内容表, 关联字段)
+ROLLUP_SOURCES: Dict[str, Dict[str, Any]] = {
+    'bilibili_video': {'platform': 'bilibili', 'type': 'video'},
+    'bilibili_video_comment': {'platform': 'bilibili', 'type': 'comment', 'parent': ('bilibili_video', 'video_id')},
+    'douyin_aweme': {'platform': 'douyin', 'type': 'video'},
+    'douyin_aweme_comment': {'platform': 'douyin', 'type': 'comment', 'parent': ('douyin_aweme', 'aweme_id')},
+    'kuaishou_video': {'platform': 'kuaishou', 'type': 'video'},
+    'kuaishou_video_comment': {'platform': 'kuaishou', 'type': 'comment', 'parent': ('kuaishou_video', 'video_id')},
+    'weibo_note': {'platform': 'weibo', 'type': 'note'},
+    'weibo_note_comment': {'platform': 'weibo', 'type': 'comment', 'parent': ('weibo_note', 'note_id')},
+    'xhs_note': {'platform': 'xhs', 'type': 'note'},
+    'xhs_note_comment': {'platform': 'xhs', 'type': 'comment', 'parent': ('xhs_note', 'note_id')},
+    'zhihu_content': {'platform': 'zhihu', 'type': 'content'},
+    'zhihu_comment': {'platform': 'zhihu', 'type': 'comment', 'parent': ('zhihu_content', 'content_id')},
+    'tieba_note': {'platform': 'tieba', 'type': 'note'},
+    'tieba_comment': {'platform': 'tieba', 'type': 'comment', 'parent': ('tieba_note', 'note_id')},
+}
+
+# 与 MediaCrawlerDB._extract_engagement 相同的字段映射
+ENGAGEMENT_COLUMNS: Dict[str, List[str]] = {
+    'likes': ['liked_count', 'like_count', 'voteup_count', 'comment_like_count'],
+    'comments': ['video_comment', 'comments_count', 'comment_count', 'total_replay_num', 'sub_comment_count'],
+    'shares': ['video_share_count', 'shared_count', 'share_count', 'total_forwards'],
+    'views': ['video_play_count', 'viewd_count'],
+}
+
+# 情感分析器的5级标签 -> 汇总表中的情感列
+SENTIMENT_COLUMNS: Dict[str, str] = {
+    '非常负面': 'sentiment_negative',
+    '负面': 'sentiment_negative',
+    '中性': 'sentiment_neutral',
+    '正面': 'sentiment_positive',
+    '非常正面': 'sentiment_positive',
+}
+
+METRIC_COLUMNS = ['item_count', *ENGAGEMENT_COLUMNS, 'sentiment_positive', 'sentiment_neutral', 'sentiment_negative']
+KEY_COLUMNS = ['granularity', 'bucket_ts', 'source_keyword', 'platform', 'content_type']
+
+BucketKey = Tuple[str, int, str, str, str]
+
+
+def bucket_start(ts: int, granularity: str) -> int:
+    """时间戳所在时间桶的起点（本地时间整点/零点）"""
+    moment = datetime.fromtimestamp(ts)
+    if granularity == "day":
+        moment = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        moment = moment.replace(minute=0, second=0, microsecond=0)
+    return int(moment.timestamp())
+
+
+def _event_ts(row: Dict[str, Any]) -> Optional[int]:
+    """记录的发布时间（秒），依次尝试各平台的时间字段，最后使用入库时间"""
+    for value in (row.get('create_time'), row.get('time'), row.get('created_time'), row.get('publish_time'), row.get('create_date_time')):
+        if not value:
+            continue
+        try:
+            if isinstance(value, datetime):
+                return int(value.timestamp())
+            if isinstance(value, date):
+                return int(datetime.combine(value, datetime.min.time()).timestamp())
+            if isinstance(value, (int, float)) or str(value).isdigit():
+                number = float(value)
+                return int(number / 1000 if number > 1_000_000_000_000 else number)
+            return int(datetime.fromisoformat(str(value).split('+')[0].strip()).timestamp())
+        except (ValueError, TypeError, OverflowError, OSError):
+            continue
+    add_ts = row.get('add_ts')
+    return int(add_ts) // 1000 if add_ts else None
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+class TopicRollupService:
+    """后台话题趋势汇总服务"""
+
+    def __init__(self, tables: Optional[List[str]] = None, batch_size: Optional[int] = None, include_sentiment: bool = True):
+        """
+        初始化汇总服务
+
+        Args:
+            tables: 需要汇总的表，默认为 ROLLUP_SOURCES 中的全部表
+            batch_size: 每次从单表读取并汇总的记录数
+            include_sentiment: 是否汇总 content_sentiment 表中的预计算情感
+        """
+        self.tables = tables or list(ROLLUP_SOURCES)
+        unknown = [t for t in self.tables if t not in ROLLUP_SOURCES]
+        if unknown:
+            raise ValueError(f"不支持的表: {unknown}")
+        self.batch_size = max(1, batch_size or settings.TOPIC_ROLLUP_BATCH_SIZE)
+        self.include_sentiment = include_sentiment
+        self.dialect = get_dialect_name()
+
+    def _quote(self, name: str) -> str:
+        """根据数据库方言包装标识符"""
+        return f'`{name}`' if self.dialect == "mysql" else f'"{name}"'
+
+    def _increment_sql(self) -> str:
+        """生成按方言区分的累加式 upsert 语句"""
+        q = self._quote
+        columns = [*KEY_COLUMNS, *METRIC_COLUMNS, 'add_ts', 'last_modify_ts']
+        column_sql = ", ".join(q(c) for c in columns)
+        values_sql = ", ".join(f":{c}" for c in columns)
+        insert = f"INSERT INTO {q(ROLLUP_TABLE)} ({column_sql}) VALUES ({values_sql})"
+        if self.dialect in ("postgresql", "sqlite"):
+            updates = ", ".join(f"{q(c)} = {q(ROLLUP_TABLE)}.{q(c)} + EXCLUDED.{q(c)}" for c in METRIC_COLUMNS)
+            conflict = ", ".join(q(c) for c in KEY_COLUMNS)
+            return f"{insert} ON CONFLICT ({conflict}) DO UPDATE SET {updates}, {q('last_modify_ts')} = EXCLUDED.{q('last_modify_ts')}"
+        updates = ", ".join(f"{q(c)} = {q(c)} + VALUES({q(c)})" for c in METRIC_COLUMNS)
+        return f"{insert} ON DUPLICATE KEY UPDATE {updates}, {q('last_modify_ts')} = VALUES({q('last_modify_ts')})"
+
+    def _state_sql(self) -> str:
+        q = self._quote
+        columns = ", ".join(q(c) for c in ["source_table", "last_add_ts", "last_id", "last_modify_ts"])
+        insert = f"INSERT INTO {q(STATE_TABLE)} ({columns}) VALUES (:source_table, :last_add_ts, :last_id, :last_modify_ts)"
+        updated = ["last_add_ts", "last_id", "last_modify_ts"]
+        if self.dialect in ("postgresql", "sqlite"):
+            updates = ", ".join(f"{q(c)} = EXCLUDED.{q(c)}" for c in updated)
+            return f"{insert} ON CONFLICT ({q('source_table')}) DO UPDATE SET {updates}"
+        updates = ", ".join(f"{q(c)} = VALUES({q(c)})" for c in updated)
+        return f"{insert} ON DUPLICATE KEY UPDATE {updates}"
+
+    async def _load_state(self) -> Dict[str, Tuple[int, int]]:
+        """读取各表已汇总到的水位线"""
+        rows = await fetch_all(f"SELECT source_table, last_add_ts, last_id FROM {self._quote(STATE_TABLE)}")
+        return {row["source_table"]: (int(row["last_add_ts"]), int(row["last_id"])) for row in rows}
+
+    def _select_sql(self, table: str, where: str) -> str:
+        """读取记录的SQL；评论表附带所属内容的 source_keyword"""
+        q = self._quote
+        parent = ROLLUP_SOURCES[table].get('parent')
+        if not parent:
+            return f"SELECT * FROM {q(table)} c WHERE {where}"
+        parent_table, join_column = parent
+        keyword = (f"(SELECT p.{q('source_keyword')} FROM {q(parent_table)} p "
+                   f"WHERE p.{q(join_column)} = c.{q(join_column)} LIMIT 1)")
+        return f"SELECT c.*, {keyword} AS parent_keyword FROM {q(table)} c WHERE {where}"
+
+    def _bucket_keys(self, table: str, row: Dict[str, Any]) -> List[BucketKey]:
+        """记录所属的各粒度时间桶"""
+        ts = _event_ts(row)
+        if ts is None:
+            return []
+        config = ROLLUP_SOURCES[table]
+        keyword = (row.get('parent_keyword') if 'parent' in config else row.get('source_keyword')) or ''
+        return [(granularity, bucket_start(ts, granularity), keyword, config['platform'], config['type'])
+                for granularity in GRANULARITIES]
+
+    @staticmethod
+    def _add(deltas: Dict[BucketKey, Dict[str, int]], keys: List[BucketKey], values: Dict[str, int]):
+        for key in keys:
+            bucket = deltas.setdefault(key, dict.fromkeys(METRIC_COLUMNS, 0))
+            for column, value in values.items():
+                bucket[column] += value
+
+    def _content_deltas(
+        self, table: str, rows: List[Dict[str, Any]], deltas: Optional[Dict[BucketKey, Dict[str, int]]] = None
+    ) -> Dict[BucketKey, Dict[str, int]]:
+        """新内容/评论记录的条数与互动量增量（传入 deltas 时累加到其中）"""
+        deltas = {} if deltas is None else deltas
+        for row in rows:
+            values = {'item_count': 1}
+            for metric, columns in ENGAGEMENT_COLUMNS.items():
+                column = next((c for c in columns if row.get(c) is not None), None)
+                values[metric] = _to_int(row[column]) if column else 0
+            self._add(deltas, self._bucket_keys(table, row), values)
+        return deltas
+
+    async def _sentiment_deltas(self, sentiment_rows: List[Dict[str, Any]]) -> Dict[BucketKey, Dict[str, int]]:
+        """新情感打分结果的情感分布增量（需要读取来源记录确定时间桶）"""
+        ids_by_table: Dict[str, List[int]] = {}
+        for row in sentiment_rows:
+            if row['source_table'] in ROLLUP_SOURCES and row['sentiment_label'] in SENTIMENT_COLUMNS:
+                ids_by_table.setdefault(row['source_table'], []).append(int(row['source_id']))
+
+        keys_by_source: Dict[Tuple[str, int], List[BucketKey]] = {}
+        for table, ids in ids_by_table.items():
+            for start in range(0, len(ids), 1000):
+                chunk = ids[start:start + 1000]
+                params = {f"id_{i}": source_id for i, source_id in enumerate(chunk)}
+                placeholders = ", ".join(f":id_{i}" for i in range(len(chunk)))
+                for row in await fetch_all(self._select_sql(table, f"c.{self._quote('id')} IN ({placeholders})"), params):
+                    keys_by_source[(table, int(row['id']))] = self._bucket_keys(table, row)
+
+        deltas: Dict[BucketKey, Dict[str, int]] = {}
+        for row in sentiment_rows:
+            keys = keys_by_source.get((row['source_table'], int(row['source_id'])))
+            if keys:
+                self._add(deltas, keys, {SENTIMENT_COLUMNS[row['sentiment_label']]: 1})
+        return deltas
+
+    @staticmethod
+    def _delta_records(deltas: Dict[BucketKey, Dict[str, int]]) -> List[Dict[str, Any]]:
+        now_ms = int(time.time() * 1000)
+        return [
+            {**dict(zip(KEY_COLUMNS, key)), **values, 'add_ts': now_ms, 'last_modify_ts': now_ms}
+            for key, values in deltas.items()
+        ]
+
+    async def _commit(self, source: str, deltas: Dict[BucketKey, Dict[str, int]], last_row: Dict[str, Any]):
+        """在同一个事务中写入汇总增量并推进水位线"""
+        now_ms = int(time.time() * 1000)
+        records = self._delta_records(deltas)
+        state = {
+            "source_table": source,
+            "last_add_ts": int(last_row["add_ts"] or 0),
+            "last_id": int(last_row["id"]),
+            "last_modify_ts": now_ms,
+        }
+        await execute_transaction([(self._increment_sql(), records), (self._state_sql(), state)])
+
+    async def _process(self, source: str, state: Tuple[int, int]) -> int:
+        """
+        汇总单个来源水位线之后的全部积压记录
+
+        Args:
+            source: 来源表名（内容表、评论表或 content_sentiment）
+            state: 已汇总到的 (add_ts, id)
+
+        Returns:
+            本次汇总的记录数
+        """
+        last_add_ts, last_id = state
+        total = 0
+        where = "c.add_ts > :last_add_ts OR (c.add_ts = :last_add_ts AND c.id > :last_id)"
+        while True:
+            params = {"last_add_ts": last_add_ts, "last_id": last_id, "limit": self.batch_size}
+            if source == SENTIMENT_TABLE:
+                query = (f"SELECT c.id, c.add_ts, c.source_table, c.source_id, c.sentiment_label "
+                         f"FROM {self._quote(SENTIMENT_TABLE)} c WHERE {where} ORDER BY c.add_ts, c.id LIMIT :limit")
+                rows = await fetch_all(query, params)
+                deltas = await self._sentiment_deltas(rows) if rows else {}
+            else:
+                rows = await fetch_all(f"{self._select_sql(source, where)} ORDER BY c.add_ts, c.id LIMIT :limit", params)
+                deltas = self._content_deltas(source, rows)
+            if not rows:
+                break
+            await self._commit(source, deltas, rows[-1])
+            total += len(rows)
+            last_add_ts, last_id = int(rows[-1]["add_ts"] or 0), int(rows[-1]["id"])
+            if len(rows) < self.batch_size:
+                break
+        return total
+
+    async def rollup_changes(self) -> Dict[str, int]:
+        """
+        消费变更流中新插入的内容和评论记录
+
+        Returns:
+            表名 -> 本次汇总的记录数
+        """
+        counts = dict.fromkeys(self.tables, 0)
+
+        async def handle(batch: ChangeBatch):
+            deltas: Dict[BucketKey, Dict[str, int]] = {}
+            for table, ids in batch.changes.items():
+                condition, params = id_in_clause(f"c.{self._quote('id')}", ids)
+                rows = await fetch_all(self._select_sql(table, condition), params)
+                self._content_deltas(table, rows, deltas)
+                counts[table] += len(rows)
+            return [(self._increment_sql(), self._delta_records(deltas))]
+
+        feed = ChangeFeed(CHANGE_FEED_CONSUMER, tables=self.tables, ops=[OP_INSERT], batch_size=self.batch_size)
+        await feed.drain(handle)
+        return counts
+
+    async def run_once(self) -> Dict[str, int]:
+        """
+        对所有来源执行一轮汇总
+
+        Returns:
+            来源表名 -> 本轮汇总的记录数
+        """
+        counts = {}
+        sources = list(self.tables)
+        if settings.CHANGE_FEED_ENABLED:
+            sources = []
+            try:
+                counts.update(await self.rollup_changes())
+            except Exception as e:
+                logger.exception(f"趋势汇总失败 (变更流): {e}")
+                counts.update(dict.fromkeys(self.tables, 0))
+        state = await self._load_state()
+        sources += [SENTIMENT_TABLE] if self.include_sentiment else []
+        for source in sources:
+            try:
+                counts[source] = await self._process(source, state.get(source, (0, 0)))
+            except Exception as e:
+                logger.exception(f"趋势汇总失败 ({source}): {e}")
+                counts[source] = 0
+        processed = sum(counts.values())
+        if processed:
+            logger.info(f"本轮趋势汇总完成，共 {processed} 条: { {t: c for t, c in counts.items() if c} }")
+        return counts
+
+    async def run_forever(self, interval: Optional[float] = None):
+        """按固定间隔持续汇总"""
+        interval = interval if interval is not None else settings.TOPIC_ROLLUP_INTERVAL
+        logger.info(f"趋势汇总服务已启动，轮询间隔 {interval} 秒，监控 {len(self.tables)} 张表")
+        while True:
+            await self.run_once()
+            await asyncio.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="话题趋势汇总服务")
+    parser.add_argument("--once", action="store_true", help="处理完当前积压后退出")
+    parser.add_argument("--interval", type=float, default=None, help="轮询间隔（秒）")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批汇总的记录数")
+    parser.add_argument("--tables", nargs="*", default=None, help="只处理指定的表")
+    parser.add_argument("--no-sentiment", action="store_true", help="不汇总预计算情感")
+    args = parser.parse_args()
+
+    service = TopicRollupService(tables=args.tables, batch_size=args.batch_size, include_sentiment=not args.no_sentiment)
+    if args.once:
+        asyncio.run(service.run_once())
+    else:
+        asyncio.run(service.run_forever(args.interval))
+
+
+if __name__ == "__main__":
+    main()
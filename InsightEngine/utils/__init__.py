@@ -9,7 +9,16 @@ from .text_processing import (
     remove_reasoning_from_output,
     extract_clean_response,
     update_state_with_search_results,
-    format_search_results_for_prompt
+    format_search_results_for_prompt,
+    estimate_tokens,
+    pack_results_to_token_budget,
+    to_prompt_json
+)
+from .ranking import rank_results
+from .near_duplicate import (
+    shingles,
+    cluster_near_duplicates,
+    collapse_near_duplicates
 )
 
 __all__ = [
@@ -19,4 +28,11 @@ __all__ = [
     "extract_clean_response",
     "update_state_with_search_results",
     "format_search_results_for_prompt",
+    "estimate_tokens",
+    "pack_results_to_token_budget",
+    "to_prompt_json",
+    "shingles",
+    "cluster_near_duplicates",
+    "collapse_near_duplicates",
+    "rank_results",
 ]
@@ -1,7 +1,15 @@
 """
 通用数据库工具（异步）
 
-此模块提供基于 SQLAlchemy 2.x 异步引擎的数据库访问封装，支持 MySQL 与 PostgreSQL。
+此模块提供基于 SQLAlchemy 2.x 异步引擎的数据库访问封装，支持 MySQL、PostgreSQL 与 SQLite。
+DB_DIALECT 为 sqlite 时，DB_NAME 为数据库文件路径（相对路径以项目根目录为基准）。
+设置 DB_READ_REPLICA_URL 后，fetch_all(..., replica=True) 的查询（MediaCrawlerDB 的搜索）走只读副本，
+其余读写仍走主库；连接池大小由 DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT 控制，
+每次取连接的等待时间记入 db.pool_wait 阶段耗时。
+
+所有查询都在一个专用的数据库事件循环线程中执行：异步引擎的连接池绑定在事件循环上，
+若按调用方的事件循环分别建引擎，并行研究时每个工作线程都会有自己的连接池，且线程结束后从不释放。
+统一在一个事件循环中执行后，每个数据库（主库、只读副本）只有一个引擎，连接池设置即整个进程的上限。
 数据模型定义位置：
 - 无（本模块仅提供连接与查询工具，不定义数据模型）
 """
@@ -9,20 +17,58 @@
 from __future__ import annotations
 from urllib.parse import quote_plus
 import asyncio
+import atexit
 import os
-from typing import Any, Dict, Iterable, List, Optional, Union
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
 
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy import text
 from InsightEngine.utils.config import settings
 
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# 添加utils目录到Python路径
+utils_dir = str(PROJECT_ROOT / "utils")
+if utils_dir not in sys.path:
+    sys.path.append(utils_dir)
+
+from run_metrics import increment, observe
+
 __all__ = [
     "get_async_engine",
+    "run_sync",
+    "get_dialect_name",
+    "sqlite_database_path",
     "fetch_all",
+    "execute",
+    "execute_transaction",
 ]
 
 
-_engine: Optional[AsyncEngine] = None
+T = TypeVar("T")
+
+# 数据库事件循环（后台守护线程）及其中的引擎，按 (角色, 连接URL) 缓存
+_db_loop: Optional[asyncio.AbstractEventLoop] = None
+_db_loop_lock = threading.Lock()
+_engines: Dict[Tuple[str, str], AsyncEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def sqlite_database_path(db_name: Optional[str] = None) -> str:
+    """SQLite数据库文件的绝对路径（未指定扩展名时补充 .db）"""
+    path = Path(db_name or settings.DB_NAME or "bettafish")
+    if not path.suffix:
+        path = path.with_suffix(".db")
+    if not path.is_absolute():
+        path = PROJECT_ROOT / path
+    return str(path)
 
 
 def _build_database_url() -> str:
@@ -38,6 +84,10 @@ def _build_database_url() -> str:
 
     password = quote_plus(password)
 
+    if dialect == "sqlite":
+        # SQLite 使用 aiosqlite 驱动，DB_NAME 为数据库文件路径
+        return f"sqlite+aiosqlite:///{sqlite_database_path(db_name)}"
+
     if dialect in ("postgresql", "postgres"):
         # PostgreSQL 使用 asyncpg 驱动
         return f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{db_name}"
@@ -46,27 +96,170 @@ def _build_database_url() -> str:
     return f"mysql+aiomysql://{user}:{password}@{host}:{port}/{db_name}"
 
 
-def get_async_engine() -> AsyncEngine:
-    global _engine
-    if _engine is None:
-        database_url: str = _build_database_url()
-        _engine = create_async_engine(
-            database_url,
-            pool_pre_ping=True,
-            pool_recycle=1800,
-        )
-    return _engine
+def get_dialect_name() -> str:
+    """实际连接的数据库方言（mysql / postgresql / sqlite），DATABASE_URL 优先于 DB_DIALECT"""
+    return make_url(_build_database_url()).get_backend_name()
+
+
+def _create_engine(database_url: str) -> AsyncEngine:
+    connect_args: Dict[str, Any] = {}
+    pool_args: Dict[str, Any] = {}
+    if make_url(database_url).get_backend_name() == "sqlite":
+        # 爬虫写入时SQLite会短暂加锁，读取方等待而不是立即报错；
+        # aiosqlite 不复用连接（每个连接占一个线程），连接池参数不适用
+        connect_args["timeout"] = 30
+    else:
+        pool_args = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        }
+    return create_async_engine(
+        database_url,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        connect_args=connect_args,
+        **pool_args,
+    )
+
+
+def _engine_role(replica: bool) -> str:
+    return "replica" if replica and settings.DB_READ_REPLICA_URL else "primary"
+
+
+def get_async_engine(replica: bool = False) -> AsyncEngine:
+    """
+    获取异步引擎（只能在数据库事件循环中使用，fetch_all / execute 等函数会自动切换过去）
+
+    Args:
+        replica: 是否使用只读副本；未设置 DB_READ_REPLICA_URL 时返回主库引擎
+    """
+    role = _engine_role(replica)
+    database_url = settings.DB_READ_REPLICA_URL if role == "replica" else _build_database_url()
+    with _engines_lock:
+        engine = _engines.get((role, database_url))
+        if engine is None:
+            engine = _create_engine(database_url)
+            _engines[(role, database_url)] = engine
+        return engine
+
+
+def _get_db_loop() -> asyncio.AbstractEventLoop:
+    """获取（首次调用时启动）数据库事件循环"""
+    global _db_loop
+    with _db_loop_lock:
+        if _db_loop is None or _db_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="insight-db", daemon=True).start()
+            _db_loop = loop
+        return _db_loop
+
+
+async def _on_db_loop(coro: Awaitable[T]) -> T:
+    """在数据库事件循环中执行协程并等待结果；调用方的上下文变量（如运行指标）随之传递"""
+    loop = _get_db_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
 
 
-async def fetch_all(query: str, params: Optional[Union[Iterable[Any], Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+def run_sync(coro: Awaitable[T]) -> T:
+    """在同步代码（如并行研究的工作线程）中执行数据库协程，调用方不需要自己的事件循环"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_db_loop()).result()
+
+
+def _shutdown():
+    """进程退出时关闭连接池中的连接并停止数据库事件循环"""
+    loop = _db_loop
+    if loop is None or loop.is_closed():
+        return
+
+    async def dispose_all():
+        for engine in list(_engines.values()):
+            await engine.dispose()
+
+    try:
+        asyncio.run_coroutine_threadsafe(dispose_all(), loop).result(timeout=5)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(_shutdown)
+
+
+@asynccontextmanager
+async def _connect(replica: bool = False, begin: bool = False) -> AsyncIterator[AsyncConnection]:
+    """从连接池取连接（begin 为 True 时开启事务），记录取连接的等待时间与连接池耗尽超时次数"""
+    role = _engine_role(replica)
+    conn = get_async_engine(replica=replica).connect()
+    start = time.perf_counter()
+    try:
+        await conn.start()
+    except PoolTimeoutError:
+        increment("db.pool_timeouts", role=role)
+        raise
+    finally:
+        observe("db.pool_wait", time.perf_counter() - start, role=role)
+    try:
+        if begin:
+            async with conn.begin():
+                yield conn
+        else:
+            yield conn
+    finally:
+        await conn.close()
+
+
+async def fetch_all(
+    query: str,
+    params: Optional[Union[Iterable[Any], Dict[str, Any]]] = None,
+    replica: bool = False,
+) -> List[Dict[str, Any]]:
     """
     执行只读查询并返回字典列表。
+
+    replica 为 True 时在设置了 DB_READ_REPLICA_URL 的情况下走只读副本；依赖自身刚写入数据的
+    后台服务（水位线、变更流游标）应保持默认，读主库。
     """
-    engine: AsyncEngine = get_async_engine()
-    async with engine.connect() as conn:
-        result = await conn.execute(text(query), params or {})
-        rows = result.mappings().all()
-        # 将 RowMapping 转换为普通字典
-        return [dict(row) for row in rows]
+    async def run() -> List[Dict[str, Any]]:
+        async with _connect(replica=replica) as conn:
+            result = await conn.execute(text(query), params or {})
+            rows = result.mappings().all()
+            # 将 RowMapping 转换为普通字典
+            return [dict(row) for row in rows]
 
+    return await _on_db_loop(run())
+
+
+async def execute(query: str, params: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None) -> int:
+    """
+    在一个事务中执行写入语句；params 为列表时批量执行。返回受影响的行数。
+    """
+    async def run() -> int:
+        async with _connect(begin=True) as conn:
+            result = await conn.execute(text(query), params or {})
+            return result.rowcount
+
+    return await _on_db_loop(run())
+
+
+async def execute_transaction(statements: List[tuple]) -> None:
+    """
+    在同一个事务中依次执行多条写入语句，任意一条失败时全部回滚。
+
+    Args:
+        statements: (SQL, 参数) 列表；参数为列表时批量执行，为空列表的语句跳过
+    """
+    async def run() -> None:
+        async with _connect(begin=True) as conn:
+            for query, params in statements:
+                if isinstance(params, list) and not params:
+                    continue
+                await conn.execute(text(query), params or {})
 
+    await _on_db_loop(run())
@@ -0,0 +1,177 @@
+"""
+近似重复内容检测
+基于jieba分词shingle的MinHash签名，合并转发、搬运文案和刷屏评论等近似重复的搜索结果。
+
+- 特征: 相邻词组成的2-gram shingle集合（去除链接、@提及、话题符号和标点）
+- 查找: MinHash签名按LSH分段分桶，只比较同桶候选，整体为线性时间
+- 判定: 候选对按shingle集合的Jaccard相似度校验，达到阈值即视为近似重复
+- 合并: 每个簇保留互动量最高的一条作为代表，累加全簇互动数据并记录重复条数
+
+社交媒体短文本的特征很少，SimHash在增删一个词时翻转的位数波动较大，因此这里使用MinHash。
+"""
+
+import dataclasses
+import hashlib
+import random
+import re
+from typing import Any, Dict, FrozenSet, List, Sequence
+
+try:
+    import jieba
+
+    JIEBA_AVAILABLE = True
+except ImportError:
+    jieba = None  # type: ignore
+    JIEBA_AVAILABLE = False
+
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.7
+
+# LSH参数：32个哈希分为16段、每段2行，相似度约0.25以上的文本对即可成为候选
+_NUM_PERM = 32
+_BANDS = 16
+_ROWS = _NUM_PERM // _BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20250825)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(_NUM_PERM)
+]
+
+_NOISE_PATTERN = re.compile(r"https?://\S+|@[\w\-]+|#|\[[^\]]{1,8}\]")
+_TOKEN_PATTERN = re.compile(r"\w")
+
+
+def tokenize(text: str) -> List[str]:
+    """分词并去除标点、空白；没有jieba时退化为按字切分"""
+    text = _NOISE_PATTERN.sub(" ", text.lower())
+    tokens = jieba.lcut(text) if JIEBA_AVAILABLE else list(text)
+    return [t for t in (tok.strip() for tok in tokens) if t and _TOKEN_PATTERN.search(t)]
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    """
+    由相邻词构造2-gram shingle集合；少于两个词时直接使用单词
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        shingle集合
+    """
+    tokens = tokenize(text or "")
+    if len(tokens) < 2:
+        return frozenset(tokens)
+    return frozenset(f"{a}\x00{b}" for a, b in zip(tokens, tokens[1:]))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """两个shingle集合的Jaccard相似度"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _hash64(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(features: FrozenSet[str]) -> List[int]:
+    """
+    计算shingle集合的MinHash签名
+
+    Args:
+        features: shingle集合
+
+    Returns:
+        长度为_NUM_PERM的签名
+    """
+    hashes = [_hash64(f) for f in features]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def _engagement_total(result: Any) -> int:
+    return sum(v for v in (getattr(result, "engagement", None) or {}).values() if isinstance(v, (int, float)))
+
+
+def cluster_near_duplicates(texts: Sequence[str], threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> List[List[int]]:
+    """
+    将文本按近似重复聚类
+
+    Args:
+        texts: 文本列表
+        threshold: 判定为近似重复的最低Jaccard相似度
+
+    Returns:
+        簇列表，每个簇为按原始顺序排列的下标列表，簇按首个元素的位置排序
+    """
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    feature_sets: Dict[int, FrozenSet[str]] = {}
+    exact: Dict[FrozenSet[str], int] = {}
+    # 每个桶只保存互不相似的簇代表，新文本并入某个代表后不再入桶，
+    # 大量转发落入同一个桶时比较次数与簇数而不是文本数成正比
+    buckets: Dict[tuple, List[int]] = {}
+    for i, text in enumerate(texts):
+        features = shingles(text)
+        if not features:
+            continue
+        # 特征完全相同（如原样转发）直接并入，不再进入分桶比较
+        if features in exact:
+            parent[find(i)] = find(exact[features])
+            continue
+        exact[features] = i
+        feature_sets[i] = features
+
+        signature = minhash(features)
+        for band in range(_BANDS):
+            bucket = buckets.setdefault((band, *signature[band * _ROWS:(band + 1) * _ROWS]), [])
+            merged = False
+            for j in bucket:
+                if find(i) == find(j):
+                    merged = True
+                elif jaccard(features, feature_sets[j]) >= threshold:
+                    parent[find(i)] = find(j)
+                    merged = True
+            if not merged:
+                bucket.append(i)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(texts)):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def collapse_near_duplicates(results: List[Any], threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> List[Any]:
+    """
+    合并近似重复的搜索结果
+
+    每个簇保留互动量最高的一条，其engagement为全簇之和，duplicate_count记录被合并的条数。
+
+    Args:
+        results: QueryResult列表
+        threshold: 判定为近似重复的最低Jaccard相似度
+
+    Returns:
+        合并后的结果列表，保持各簇首次出现的顺序
+    """
+    clusters = cluster_near_duplicates([r.title_or_content or "" for r in results], threshold)
+    collapsed = []
+    for members in clusters:
+        if len(members) == 1:
+            collapsed.append(results[members[0]])
+            continue
+        representative = max((results[i] for i in members), key=_engagement_total)
+        engagement: Dict[str, int] = {}
+        for i in members:
+            for key, value in (results[i].engagement or {}).items():
+                engagement[key] = engagement.get(key, 0) + value
+        duplicate_count = sum(getattr(results[i], "duplicate_count", 0) + 1 for i in members) - 1
+        collapsed.append(dataclasses.replace(representative, engagement=engagement, duplicate_count=duplicate_count))
+    return collapsed
@@ -0,0 +1,109 @@
+"""
+搜索结果本地排序
+在情感分析和截断到 MAX_SEARCH_RESULTS_FOR_LLM 之前，对去重后的搜索结果重新排序：
+
+    score = w_bm25 * BM25相关度 + w_engagement * 互动热度 + w_recency * 时效性
+
+- BM25: 基于jieba分词，查询词为原始查询与优化后的关键词，按本批结果最大值归一化
+- 互动热度: log(1 + 互动总数)，按本批结果最大值归一化
+- 时效性: 按半衰期指数衰减，无发布时间的结果记为0
+"""
+
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from .near_duplicate import tokenize
+
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def bm25_scores(documents: Sequence[List[str]], query_tokens: Sequence[str]) -> List[float]:
+    """
+    计算每篇文档相对查询的BM25分数
+
+    Args:
+        documents: 分词后的文档列表
+        query_tokens: 分词后的查询
+
+    Returns:
+        与documents顺序一致的分数列表
+    """
+    n = len(documents)
+    if n == 0:
+        return []
+    query_terms = set(query_tokens)
+    avg_len = sum(len(doc) for doc in documents) / n or 1.0
+    doc_freq = Counter(term for doc in documents for term in set(doc) if term in query_terms)
+
+    scores = []
+    for doc in documents:
+        tf = Counter(t for t in doc if t in query_terms)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / avg_len)
+        score = 0.0
+        for term, freq in tf.items():
+            idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * freq * (BM25_K1 + 1) / (freq + norm)
+        scores.append(score)
+    return scores
+
+
+def _engagement_total(result: Any) -> float:
+    return float(sum(v for v in (getattr(result, "engagement", None) or {}).values() if isinstance(v, (int, float))))
+
+
+def _recency(publish_time: Optional[datetime], now: datetime, half_life_days: float) -> float:
+    if not publish_time or half_life_days <= 0:
+        return 0.0
+    if publish_time.tzinfo is not None:
+        publish_time = publish_time.replace(tzinfo=None)
+    age_days = max((now - publish_time).total_seconds() / 86400, 0.0)
+    return 0.5 ** (age_days / half_life_days)
+
+
+def _normalize(values: List[float]) -> List[float]:
+    top = max(values, default=0.0)
+    return [v / top for v in values] if top > 0 else [0.0 for _ in values]
+
+
+def rank_results(
+    results: List[Any],
+    query: str,
+    keywords: Optional[Sequence[str]] = None,
+    bm25_weight: float = 0.6,
+    engagement_weight: float = 0.25,
+    recency_weight: float = 0.15,
+    half_life_days: float = 7.0,
+    now: Optional[datetime] = None,
+) -> List[Any]:
+    """
+    按BM25相关度、互动热度和时效性的加权和对搜索结果降序排序
+
+    Args:
+        results: QueryResult列表
+        query: 原始查询
+        keywords: 优化后的关键词
+        bm25_weight: BM25相关度权重
+        engagement_weight: 互动热度权重
+        recency_weight: 时效性权重
+        half_life_days: 时效性半衰期（天）
+        now: 当前时间，默认为系统时间
+
+    Returns:
+        排序后的新列表；每个结果的relevance_score被设置为综合得分
+    """
+    if not results:
+        return []
+    now = now or datetime.now()
+    query_tokens = tokenize(" ".join([query, *(keywords or [])]))
+    relevance = _normalize(bm25_scores([tokenize(r.title_or_content or "") for r in results], query_tokens))
+    engagement = _normalize([math.log1p(_engagement_total(r)) for r in results])
+    recency = [_recency(getattr(r, "publish_time", None), now, half_life_days) for r in results]
+
+    for result, rel, eng, rec in zip(results, relevance, engagement, recency):
+        result.relevance_score = bm25_weight * rel + engagement_weight * eng + recency_weight * rec
+    # sorted是稳定排序，同分结果保持原有顺序
+    return sorted(results, key=lambda r: r.relevance_score, reverse=True)
@@ -3,13 +3,16 @@ Deep Search Agent主类
 整合所有模块，实现完整的深度搜索流程
 """
 
+import contextvars
+import hashlib
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 from loguru import logger
-from .llms import LLMClient
+from .llms import LLMClient, LLMResponseCache
 from .nodes import (
     ReportStructureNode,
     FirstSearchNode, 
@@ -18,7 +21,9 @@ from .nodes import (
     ReflectionSummaryNode,
     ReportFormattingNode
 )
-from .state import State
+from .state import State, StateJournal
+# utils目录已由 .llms 加入 sys.path
+from run_metrics import RunMetrics, metrics_run, span, increment, start_prometheus_server
 from .tools import BochaMultimodalSearch, BochaResponse
 from .utils import settings, Settings, format_search_results_for_prompt
 
@@ -26,6 +31,12 @@ from .utils import settings, Settings, format_search_results_for_prompt
 class DeepSearchAgent:
     """Deep Search Agent主类"""
     
+    # 当前研究的检查点日志，仅在research()中按配置创建
+    _journal: Optional[StateJournal] = None
+    
+    # 当前研究的耗时与用量统计，仅在research()中创建
+    _run_metrics: Optional[RunMetrics] = None
+    
     def __init__(self, config: Optional[Settings] = None):
         """
         初始化Deep Search Agent
@@ -39,7 +50,10 @@ class DeepSearchAgent:
         self.llm_client = self._initialize_llm()
         
         # 初始化搜索工具集
-        self.search_agency = BochaMultimodalSearch(api_key=(self.config.BOCHA_API_KEY or self.config.BOCHA_WEB_SEARCH_API_KEY))
+        self.search_agency = BochaMultimodalSearch(
+            api_key=(self.config.BOCHA_API_KEY or self.config.BOCHA_WEB_SEARCH_API_KEY),
+            requests_per_minute=self.config.SEARCH_REQUESTS_PER_MINUTE,
+        )
         
         # 初始化节点
         self._initialize_nodes()
@@ -50,6 +64,9 @@ class DeepSearchAgent:
         # 确保输出目录存在
         os.makedirs(self.config.OUTPUT_DIR, exist_ok=True)
         
+        # 可选的Prometheus指标端点（进程内只启动一次）
+        start_prometheus_server(self.config.METRICS_PROMETHEUS_PORT)
+        
         logger.info(f"Meida Agent已初始化")
         logger.info(f"使用LLM: {self.llm_client.get_model_info()}")
         logger.info(f"搜索工具集: BochaMultimodalSearch (支持5种多模态搜索工具)")
@@ -60,6 +77,22 @@ class DeepSearchAgent:
             api_key=(self.config.MEDIA_ENGINE_API_KEY or self.config.MINDSPIDER_API_KEY),
             model_name=(self.config.MEDIA_ENGINE_MODEL_NAME or self.config.MINDSPIDER_MODEL_NAME),
             base_url=(self.config.MEDIA_ENGINE_BASE_URL or self.config.MINDSPIDER_BASE_URL),
+            max_concurrency=self.config.LLM_MAX_CONCURRENT_REQUESTS,
+            requests_per_minute=self.config.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=self.config.LLM_TOKENS_PER_MINUTE,
+            cache=self._initialize_llm_cache(),
+            cache_nodes=[node.strip() for node in self.config.LLM_CACHE_NODES.split(",") if node.strip()],
+            stream_include_usage=self.config.LLM_STREAM_INCLUDE_USAGE,
+        )
+    
+    def _initialize_llm_cache(self) -> Optional["LLMResponseCache"]:
+        """按配置创建LLM响应缓存，未启用时返回None"""
+        if not self.config.LLM_CACHE_ENABLED or LLMResponseCache is None:
+            return None
+        return LLMResponseCache(
+            ttl_seconds=self.config.LLM_CACHE_TTL,
+            max_entries=self.config.LLM_CACHE_MAX_ENTRIES,
+            sqlite_path=self.config.LLM_CACHE_SQLITE_PATH,
         )
     
     def _initialize_nodes(self):
@@ -130,13 +163,19 @@ class DeepSearchAgent:
             logger.info(f"  ⚠️  未知的搜索工具: {tool_name}，使用默认综合搜索")
             return self.search_agency.comprehensive_search(query)
     
-    def research(self, query: str, save_report: bool = True) -> str:
+    def research(self, query: str, save_report: bool = True, resume: bool = False,
+                 progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
         """
         执行深度研究
         
+        开启 CHECKPOINT_ENABLED 时，每次节点修改状态后都会写入检查点日志；
+        resume=True 时从同一查询的日志恢复，已完成的搜索与总结不会重新计算。
+        
         Args:
             query: 研究查询
             save_report: 是否保存报告到文件
+            resume: 是否从上次中断处继续
+            progress_callback: 段落进度回调 (已完成数, 总数)，在调用线程中执行
             
         Returns:
             最终报告内容
@@ -145,31 +184,86 @@ class DeepSearchAgent:
         logger.info(f"开始深度研究: {query}")
         logger.info(f"{'='*60}")
         
-        try:
-            # Step 1: 生成报告结构
-            self._generate_report_structure(query)
-            
-            # Step 2: 处理每个段落
-            self._process_paragraphs()
-            
-            # Step 3: 生成最终报告
-            final_report = self._generate_final_report()
-            
-            # Step 4: 保存报告
-            if save_report:
-                self._save_report(final_report)
-            
-            logger.info(f"\n{'='*60}")
-            logger.info("深度研究完成！")
-            logger.info(f"{'='*60}")
-            
-            return final_report
-            
-        except Exception as e:
-            import traceback
-            error_traceback = traceback.format_exc()
-            logger.error(f"研究过程中发生错误: {str(e)} \n错误堆栈: {error_traceback}")
-            raise e
+        self.llm_client.reset_cache_stats()
+        self.llm_client.reset_usage_stats()
+        
+        with metrics_run(query) as run_metrics:
+            self._run_metrics = run_metrics
+            try:
+                resumed = self._start_checkpoint(query, resume)
+                
+                # Step 1: 生成报告结构
+                if not resumed:
+                    with span("agent.report_structure"):
+                        self._generate_report_structure(query)
+                
+                # Step 2: 处理每个段落
+                with span("agent.paragraphs"):
+                    self._process_paragraphs(progress_callback)
+                
+                # Step 3: 生成最终报告
+                if self.state.is_completed and self.state.final_report:
+                    logger.info("检查点中已有最终报告，跳过生成")
+                    final_report = self.state.final_report
+                else:
+                    with span("agent.final_report"):
+                        final_report = self._generate_final_report()
+                
+                # Step 4: 保存报告
+                if save_report:
+                    self._save_report(final_report)
+                
+                logger.info(f"\n{'='*60}")
+                logger.info("深度研究完成！")
+                logger.info(f"{'='*60}")
+                
+                return final_report
+                
+            except Exception as e:
+                import traceback
+                error_traceback = traceback.format_exc()
+                logger.error(f"研究过程中发生错误: {str(e)} \n错误堆栈: {error_traceback}")
+                raise e
+    
+    def _checkpoint_path(self, query: str) -> str:
+        """同一查询的检查点日志路径"""
+        query_safe = "".join(c for c in query if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        query_safe = query_safe.replace(' ', '_')[:30]
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.config.OUTPUT_DIR, "checkpoints", f"{query_safe}_{digest}.jsonl")
+    
+    def _start_checkpoint(self, query: str, resume: bool) -> bool:
+        """
+        准备检查点日志
+        
+        Returns:
+            是否已从日志恢复出报告结构（恢复后跳过结构生成）
+        """
+        if not self.config.CHECKPOINT_ENABLED:
+            self._journal = None
+            return False
+        
+        self._journal = StateJournal(self._checkpoint_path(query))
+        if resume:
+            state = self._journal.load()
+            if state is not None and state.query == query and state.paragraphs:
+                self.state = state
+                completed = state.get_completed_paragraphs_count()
+                logger.info(
+                    f"从检查点恢复研究: {self._journal.path}，"
+                    f"已完成 {completed}/{len(state.paragraphs)} 个段落"
+                )
+                return True
+            logger.info("未找到可用的检查点，从头开始研究")
+        
+        self.state = State()
+        self._journal.reset()
+        return False
+    
+    def _checkpoint_paragraph(self, paragraph_index: int):
+        """段落研究状态变化后写入检查点"""
+        if self._journal is not None:
+            self._journal.record_paragraph(self.state, paragraph_index)
     
     def _generate_report_structure(self, query: str):
         """生成报告结构"""
@@ -185,26 +279,73 @@ class DeepSearchAgent:
         for i, paragraph in enumerate(self.state.paragraphs, 1):
             _message += f"\n  {i}. {paragraph.title}"
         logger.info(_message)
+        
+        if self._journal is not None:
+            self._journal.record_structure(self.state)
     
-    def _process_paragraphs(self):
-        """处理所有段落"""
-        total_paragraphs = len(self.state.paragraphs)
+    def _process_paragraphs(self, progress_callback: Optional[Callable[[int, int], None]] = None):
+        """
+        处理所有段落
         
-        for i in range(total_paragraphs):
-            logger.info(f"\n[步骤 2.{i+1}] 处理段落: {self.state.paragraphs[i].title}")
-            logger.info("-" * 50)
-            
-            # 初始搜索和总结
-            self._initial_search_and_summary(i)
-            
-            # 反思循环
-            self._reflection_loop(i)
-            
-            # 标记段落完成
-            self.state.paragraphs[i].research.mark_completed()
-            
-            progress = (i + 1) / total_paragraphs * 100
-            logger.info(f"段落处理完成 ({progress:.1f}%)")
+        段落之间相互独立，最多 MAX_CONCURRENT_PARAGRAPHS 个段落在线程池中并行研究。
+        
+        Args:
+            progress_callback: 每完成一个段落时在调用线程中回调 (已完成数, 段落总数)
+        """
+        total_paragraphs = len(self.state.paragraphs)
+        # 从检查点恢复时跳过已完成的段落
+        pending = [i for i, paragraph in enumerate(self.state.paragraphs) if not paragraph.research.is_completed]
+        done = total_paragraphs - len(pending)
+        if done:
+            logger.info(f"跳过已完成的 {done} 个段落")
+        
+        max_workers = max(1, min(self.config.MAX_CONCURRENT_PARAGRAPHS, len(pending)))
+        if max_workers == 1:
+            for completed, i in enumerate(pending, done + 1):
+                self._process_paragraph(i)
+                self._report_paragraph_progress(completed, total_paragraphs, progress_callback)
+            return
+        
+        logger.info(f"并行研究 {len(pending)} 个段落，最大并发数 {max_workers}")
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="paragraph") as executor:
+            # 复制上下文使工作线程中的耗时计入本次研究
+            futures = [executor.submit(contextvars.copy_context().run, self._process_paragraph, i) for i in pending]
+            try:
+                for completed, future in enumerate(as_completed(futures), done + 1):
+                    future.result()
+                    self._report_paragraph_progress(completed, total_paragraphs, progress_callback)
+            except Exception:
+                # 与串行模式一致：任一段落失败即中止研究，取消尚未开始的段落
+                for future in futures:
+                    future.cancel()
+                raise
+    
+    def _process_paragraph(self, paragraph_index: int):
+        """处理单个段落；只修改该段落自己的研究状态，可在工作线程中并行执行"""
+        paragraph = self.state.paragraphs[paragraph_index]
+        logger.info(f"\n[步骤 2.{paragraph_index + 1}] 处理段落: {paragraph.title}")
+        logger.info("-" * 50)
+        
+        # 初始搜索和总结（从检查点恢复且已有总结时跳过）
+        if not paragraph.research.latest_summary:
+            with span("agent.initial_search_and_summary"):
+                self._initial_search_and_summary(paragraph_index)
+        
+        # 反思循环
+        with span("agent.reflection_loop"):
+            self._reflection_loop(paragraph_index)
+        
+        # 标记段落完成
+        paragraph.research.mark_completed()
+        self._checkpoint_paragraph(paragraph_index)
+        logger.info(f"段落处理完成: {paragraph.title}")
+    
+    @staticmethod
+    def _report_paragraph_progress(completed: int, total: int, progress_callback: Optional[Callable[[int, int], None]]):
+        progress = completed / total * 100
+        logger.info(f"段落进度: {completed}/{total} ({progress:.1f}%)")
+        if progress_callback:
+            progress_callback(completed, total)
     
     def _initial_search_and_summary(self, paragraph_index: int):
         """执行初始搜索和总结"""
@@ -236,7 +377,8 @@ class DeepSearchAgent:
             # 这些工具支持max_results参数
             search_kwargs["max_results"] = 10
         
-        search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
+        with span("search.tool", tool=search_tool):
+            search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
         
         # 转换为兼容格式
         search_results = []
@@ -272,7 +414,7 @@ class DeepSearchAgent:
             "content": paragraph.content,
             "search_query": search_query,
             "search_results": format_search_results_for_prompt(
-                search_results, self.config.SEARCH_CONTENT_MAX_LENGTH
+                search_results, self.config.SEARCH_CONTENT_MAX_LENGTH, self.config.FIRST_SUMMARY_TOKEN_BUDGET
             )
         }
         
@@ -280,6 +422,7 @@ class DeepSearchAgent:
         self.state = self.first_summary_node.mutate_state(
             summary_input, self.state, paragraph_index
         )
+        self._checkpoint_paragraph(paragraph_index)
         
         logger.info("  - 初始总结完成")
     
@@ -287,8 +430,13 @@ class DeepSearchAgent:
         """执行反思循环"""
         paragraph = self.state.paragraphs[paragraph_index]
         
-        for reflection_i in range(self.config.MAX_REFLECTIONS):
+        # 从检查点恢复时，已提前结束的段落不再反思，其余从已完成的轮次之后继续
+        if any(stats.get("early_exit") for stats in paragraph.research.novelty_stats):
+            return
+        
+        for reflection_i in range(paragraph.research.reflection_iteration, self.config.MAX_REFLECTIONS):
             logger.info(f"  - 反思 {reflection_i + 1}/{self.config.MAX_REFLECTIONS}...")
+            increment("agent.reflection_rounds")
             
             # 准备反思输入
             reflection_input = {
@@ -314,7 +462,8 @@ class DeepSearchAgent:
                 # 这些工具支持max_results参数
                 search_kwargs["max_results"] = 10
             
-            search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
+            with span("search.tool", tool=search_tool):
+                search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
             
             # 转换为兼容格式
             search_results = []
@@ -340,16 +489,33 @@ class DeepSearchAgent:
             else:
                 logger.info("    未找到反思搜索结果")
             
+            # 统计本轮带来的新内容（按URL或内容哈希与该段落已使用的结果比对）
+            new_count = paragraph.research.count_new_results(search_results)
+            novelty_stats = paragraph.research.record_novelty(
+                reflection_i + 1,
+                len(search_results),
+                new_count,
+                early_exit=self._should_stop_reflecting(search_results, new_count)
+            )
+            
             # 更新搜索历史
             paragraph.research.add_search_results(search_query, search_results)
             
+            if novelty_stats["early_exit"]:
+                logger.info(
+                    f"    反思搜索新内容 {new_count}/{len(search_results)} 条，"
+                    f"低于阈值 {self.config.REFLECTION_NOVELTY_THRESHOLD:.0%}，提前结束反思"
+                )
+                self._checkpoint_paragraph(paragraph_index)
+                break
+            
             # 生成反思总结
             reflection_summary_input = {
                 "title": paragraph.title,
                 "content": paragraph.content,
                 "search_query": search_query,
                 "search_results": format_search_results_for_prompt(
-                    search_results, self.config.SEARCH_CONTENT_MAX_LENGTH
+                    search_results, self.config.SEARCH_CONTENT_MAX_LENGTH, self.config.REFLECTION_SUMMARY_TOKEN_BUDGET
                 ),
                 "paragraph_latest_state": paragraph.research.latest_summary
             }
@@ -358,9 +524,18 @@ class DeepSearchAgent:
             self.state = self.reflection_summary_node.mutate_state(
                 reflection_summary_input, self.state, paragraph_index
             )
+            self._checkpoint_paragraph(paragraph_index)
             
             logger.info(f"    反思 {reflection_i + 1} 完成")
     
+    def _should_stop_reflecting(self, search_results: List[Dict[str, Any]], new_count: int) -> bool:
+        """本轮反思搜索的新内容占比低于 REFLECTION_NOVELTY_THRESHOLD 时停止反思，0表示不提前结束"""
+        threshold = self.config.REFLECTION_NOVELTY_THRESHOLD
+        if threshold <= 0:
+            return False
+        novelty = new_count / len(search_results) if search_results else 0.0
+        return novelty < threshold
+    
     def _generate_final_report(self) -> str:
         """生成最终报告"""
         logger.info(f"\n[步骤 3] 生成最终报告...")
@@ -384,7 +559,11 @@ class DeepSearchAgent:
         
         # 更新状态
         self.state.final_report = final_report
+        self.state.metadata["llm_cache"] = self.llm_client.get_cache_stats()
+        self.state.metadata["llm_usage"] = self.llm_client.get_usage_stats()
         self.state.mark_completed()
+        if self._journal is not None:
+            self._journal.record_final_report(self.state)
         
         logger.info("最终报告生成完成")
         return final_report
@@ -405,6 +584,12 @@ class DeepSearchAgent:
         
         logger.info(f"报告已保存到: {filepath}")
         
+        # 保存本次研究的耗时与用量摘要
+        if self._run_metrics is not None:
+            metrics_filepath = os.path.join(self.config.OUTPUT_DIR, f"metrics_{query_safe}_{timestamp}.json")
+            self._run_metrics.save(metrics_filepath)
+            logger.info(f"耗时统计已保存到: {metrics_filepath}")
+        
         # 保存状态（如果配置允许）
         if self.config.SAVE_INTERMEDIATE_STATES:
             state_filename = f"state_{query_safe}_{timestamp}.json"
@@ -4,5 +4,6 @@
 """
 
 from .state import State, Paragraph, Research, Search
+from .journal import StateJournal
 
-__all__ = ["State", "Paragraph", "Research", "Search"]
+__all__ = ["State", "Paragraph", "Research", "Search", "StateJournal"]
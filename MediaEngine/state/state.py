@@ -4,20 +4,50 @@ Deep Search Agent状态管理
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
+import hashlib
 import json
 from datetime import datetime
 
 
-@dataclass
+def result_fingerprint(url: str, content: str) -> str:
+    """搜索结果指纹：优先使用URL，没有URL时使用规范化内容的哈希"""
+    if url and url.strip():
+        return f"url:{url.strip()}"
+    normalized = " ".join((content or "").split())
+    return "sha1:" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
 class Search:
-    """单个搜索结果的状态"""
-    query: str = ""                    # 搜索查询
-    url: str = ""                      # 搜索结果的链接
-    title: str = ""                    # 搜索结果标题
-    content: str = ""                  # 搜索返回的内容
-    score: Optional[float] = None      # 相关度评分
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    """单个搜索结果的状态（长研究中实例很多，使用__slots__减少内存占用）"""
+    
+    __slots__ = ("query", "url", "title", "content", "score", "timestamp")
+    
+    def __init__(
+        self,
+        query: str = "",                   # 搜索查询
+        url: str = "",                     # 搜索结果的链接
+        title: str = "",                   # 搜索结果标题
+        content: str = "",                 # 搜索返回的内容
+        score: Optional[float] = None,     # 相关度评分
+        timestamp: Optional[str] = None
+    ):
+        self.query = query
+        self.url = url
+        self.title = title
+        self.content = content
+        self.score = score
+        self.timestamp = timestamp or datetime.now().isoformat()
+    
+    def __repr__(self) -> str:
+        return f"Search(query={self.query!r}, url={self.url!r}, title={self.title!r})"
+    
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Search):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+    
+    __hash__ = None
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -30,6 +60,10 @@ class Search:
             "timestamp": self.timestamp
         }
     
+    def fingerprint(self) -> str:
+        """获取结果指纹，用于判断后续搜索是否带来新内容"""
+        return result_fingerprint(self.url, self.content)
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Search":
         """从字典创建Search对象"""
@@ -39,21 +73,108 @@ class Search:
             title=data.get("title", ""),
             content=data.get("content", ""),
             score=data.get("score"),
-            timestamp=data.get("timestamp", datetime.now().isoformat())
+            timestamp=data.get("timestamp")
         )
 
 
-@dataclass
 class Research:
-    """段落研究过程的状态"""
-    search_history: List[Search] = field(default_factory=list)     # 搜索记录列表
-    latest_summary: str = ""                                       # 当前段落的最新总结
-    reflection_iteration: int = 0                                  # 反思迭代次数
-    is_completed: bool = False                                     # 是否完成研究
+    """
+    段落研究过程的状态
+    
+    搜索记录可以延迟加载：从检查点日志恢复时只读取总结等轻量字段，
+    首次访问 search_history 或 seen_fingerprints 时才解析对应的搜索记录。
+    """
+    
+    __slots__ = (
+        "_search_history", "_pending_loaders", "_pending_count", "_seen_fingerprints",
+        "latest_summary", "reflection_iteration", "is_completed", "novelty_stats"
+    )
+    
+    def __init__(
+        self,
+        search_history: Optional[List[Search]] = None,        # 搜索记录列表
+        latest_summary: str = "",                             # 当前段落的最新总结
+        reflection_iteration: int = 0,                        # 反思迭代次数
+        is_completed: bool = False,                           # 是否完成研究
+        novelty_stats: Optional[List[Dict[str, Any]]] = None  # 每轮反思搜索的新内容统计
+    ):
+        self._search_history: List[Search] = list(search_history or [])
+        self._pending_loaders: List[Callable[[], List[Search]]] = []
+        self._pending_count = 0
+        self._seen_fingerprints: Optional[Set[str]] = None  # 已使用结果的指纹（不序列化，按需构建）
+        self.latest_summary = latest_summary
+        self.reflection_iteration = reflection_iteration
+        self.is_completed = is_completed
+        self.novelty_stats = list(novelty_stats or [])
+    
+    def __repr__(self) -> str:
+        return (
+            f"Research(searches={self.get_search_count()}, reflection_iteration={self.reflection_iteration}, "
+            f"is_completed={self.is_completed})"
+        )
+    
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Research):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+    
+    __hash__ = None
+    
+    def add_lazy_searches(self, loader: Callable[[], List[Search]], count: int):
+        """
+        登记尚未解析的搜索记录，首次访问search_history时按登记顺序加载
+        
+        只能在添加新的搜索记录之前调用（即从检查点恢复时）。
+        
+        Args:
+            loader: 返回这批搜索记录的函数
+            count: 这批记录的条数
+        """
+        self._pending_loaders.append(loader)
+        self._pending_count += count
+    
+    def _load_pending(self):
+        if not self._pending_loaders:
+            return
+        loaders, self._pending_loaders = self._pending_loaders, []
+        self._pending_count = 0
+        loaded = [search for loader in loaders for search in loader()]
+        # 延迟加载的记录来自日志，总是排在恢复后新增的记录之前
+        self._search_history[:0] = loaded
+        if self._seen_fingerprints is not None:
+            self._seen_fingerprints.update(search.fingerprint() for search in loaded)
+    
+    @property
+    def search_history(self) -> List[Search]:
+        """搜索记录列表"""
+        self._load_pending()
+        return self._search_history
+    
+    @search_history.setter
+    def search_history(self, searches: List[Search]):
+        self._search_history = list(searches)
+        self._pending_loaders = []
+        self._pending_count = 0
+        self._seen_fingerprints = None
+    
+    @property
+    def seen_fingerprints(self) -> Set[str]:
+        """已使用结果的指纹"""
+        if self._seen_fingerprints is None:
+            self._seen_fingerprints = {search.fingerprint() for search in self.search_history}
+        return self._seen_fingerprints
+    
+    def searches_since(self, count: int) -> List[Search]:
+        """获取第count条之后新增的搜索记录，不触发延迟加载"""
+        if count >= self._pending_count:
+            return self._search_history[count - self._pending_count:]
+        return self.search_history[count:]
     
     def add_search(self, search: Search):
         """添加搜索记录"""
-        self.search_history.append(search)
+        self._search_history.append(search)
+        if self._seen_fingerprints is not None:
+            self._seen_fingerprints.add(search.fingerprint())
     
     def add_search_results(self, query: str, results: List[Dict[str, Any]]):
         """批量添加搜索结果"""
@@ -67,9 +188,40 @@ class Research:
             )
             self.add_search(search)
     
+    def count_new_results(self, results: List[Dict[str, Any]]) -> int:
+        """统计一批搜索结果中此前未使用过的结果数（批内重复只计一次）"""
+        fingerprints = {
+            result_fingerprint(result.get("url", ""), result.get("content", ""))
+            for result in results
+        }
+        return len(fingerprints - self.seen_fingerprints)
+    
+    def record_novelty(self, reflection: int, total_results: int, new_results: int, early_exit: bool) -> Dict[str, Any]:
+        """
+        记录一轮反思搜索的新内容统计
+        
+        Args:
+            reflection: 反思轮次（从1开始）
+            total_results: 本轮搜索结果数
+            new_results: 其中此前未使用过的结果数
+            early_exit: 是否因新内容不足而提前结束反思
+            
+        Returns:
+            本轮统计
+        """
+        stats = {
+            "reflection": reflection,
+            "total_results": total_results,
+            "new_results": new_results,
+            "novelty": (new_results / total_results) if total_results else 0.0,
+            "early_exit": early_exit
+        }
+        self.novelty_stats.append(stats)
+        return stats
+    
     def get_search_count(self) -> int:
-        """获取搜索次数"""
-        return len(self.search_history)
+        """获取搜索次数（不触发延迟加载）"""
+        return len(self._search_history) + self._pending_count
     
     def increment_reflection(self):
         """增加反思次数"""
@@ -85,7 +237,8 @@ class Research:
             "search_history": [search.to_dict() for search in self.search_history],
             "latest_summary": self.latest_summary,
             "reflection_iteration": self.reflection_iteration,
-            "is_completed": self.is_completed
+            "is_completed": self.is_completed,
+            "novelty_stats": self.novelty_stats
         }
     
     @classmethod
@@ -96,7 +249,8 @@ class Research:
             search_history=search_history,
             latest_summary=data.get("latest_summary", ""),
             reflection_iteration=data.get("reflection_iteration", 0),
-            is_completed=data.get("is_completed", False)
+            is_completed=data.get("is_completed", False),
+            novelty_stats=data.get("novelty_stats", [])
         )
 
 
@@ -147,6 +301,7 @@ class State:
     paragraphs: List[Paragraph] = field(default_factory=list)     # 段落列表
     final_report: str = ""                                         # 最终报告内容
     is_completed: bool = False                                     # 是否完成
+    metadata: Dict[str, Any] = field(default_factory=dict)        # 运行元数据（如LLM响应缓存命中统计）
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
     
@@ -216,12 +371,15 @@ class State:
             "paragraphs": [p.to_dict() for p in self.paragraphs],
             "final_report": self.final_report,
             "is_completed": self.is_completed,
+            "metadata": self.metadata,
             "created_at": self.created_at,
             "updated_at": self.updated_at
         }
     
-    def to_json(self, indent: int = 2) -> str:
-        """转换为JSON字符串"""
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """转换为JSON字符串（默认紧凑格式，传入indent时缩进便于阅读）"""
+        if indent is None:
+            return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
         return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
     
     @classmethod
@@ -235,6 +393,7 @@ class State:
             paragraphs=paragraphs,
             final_report=data.get("final_report", ""),
             is_completed=data.get("is_completed", False),
+            metadata=data.get("metadata", {}),
             created_at=data.get("created_at", datetime.now().isoformat()),
             updated_at=data.get("updated_at", datetime.now().isoformat())
         )
@@ -41,7 +41,8 @@ utils_dir = os.path.join(root_dir, 'utils')
 if utils_dir not in sys.path:
     sys.path.append(utils_dir)
 
-from retry_helper import with_graceful_retry, SEARCH_API_RETRY_CONFIG
+from retry_helper import with_graceful_retry, get_provider_guard, SEARCH_API_RETRY_CONFIG
+from run_metrics import span
 
 # --- 1. 数据结构定义 ---
 from dataclasses import dataclass, field
@@ -96,11 +97,12 @@ class BochaMultimodalSearch:
 
     BOCHA_BASE_URL = settings.BOCHA_BASE_URL or "https://api.bochaai.com/v1/ai-search"
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, requests_per_minute: int = 0):
         """
         初始化客户端。
         Args:
             api_key: Bocha API密钥，若不提供则从环境变量 BOCHA_API_KEY 读取。
+            requests_per_minute: 进程内所有Bocha客户端共享的每分钟请求数上限，0表示不限制。
         """
         if api_key is None:
             api_key = settings.BOCHA_WEB_SEARCH_API_KEY
@@ -112,6 +114,7 @@ class BochaMultimodalSearch:
             'Content-Type': 'application/json',
             'Accept': '*/*'
         }
+        self.guard = get_provider_guard("bocha", requests_per_minute)
 
     def _parse_search_response(self, response_dict: Dict[str, Any], query: str) -> BochaResponse:
         """从API的原始字典响应中解析出结构化的BochaResponse对象"""
@@ -171,7 +174,8 @@ class BochaMultimodalSearch:
         return final_response
 
 
-    @with_graceful_retry(SEARCH_API_RETRY_CONFIG, default_return=BochaResponse(query="搜索失败"))
+    @with_graceful_retry(SEARCH_API_RETRY_CONFIG, default_return=BochaResponse(query="搜索失败"),
+                         guard=lambda self, *args, **kwargs: self.guard)
     def _search_internal(self, **kwargs) -> BochaResponse:
         """内部通用的搜索执行器，所有工具最终都调用此方法"""
         query = kwargs.get("query", "Unknown Query")
@@ -181,7 +185,8 @@ class BochaMultimodalSearch:
         payload.update(kwargs)
 
         try:
-            response = requests.post(self.BOCHA_BASE_URL, headers=self._headers, json=payload, timeout=30)
+            with span("search.api", provider="bocha"):
+                response = requests.post(self.BOCHA_BASE_URL, headers=self._headers, json=payload, timeout=30)
             response.raise_for_status()  # 如果HTTP状态码是4xx或5xx，则抛出异常
 
             response_dict = response.json()
@@ -42,7 +42,23 @@ class Settings(BaseSettings):
     SEARCH_TIMEOUT: int = Field(240, description="搜索超时（秒）")
     SEARCH_CONTENT_MAX_LENGTH: int = Field(20000, description="用于提示的最长内容长度")
     MAX_REFLECTIONS: int = Field(2, description="最大反思轮数")
+    REFLECTION_NOVELTY_THRESHOLD: float = Field(0.2, description="反思搜索新内容占比低于该值时提前结束反思（跳过本轮总结），0表示总是执行MAX_REFLECTIONS轮")
     MAX_PARAGRAPHS: int = Field(5, description="最大段落数")
+    MAX_CONCURRENT_PARAGRAPHS: int = Field(3, description="并行研究的最大段落数，1表示逐段串行处理")
+    FIRST_SUMMARY_TOKEN_BUDGET: int = Field(30000, description="首次总结提示词中搜索结果部分的token预算（本地估算），0表示不限制")
+    REFLECTION_SUMMARY_TOKEN_BUDGET: int = Field(30000, description="反思总结提示词中搜索结果部分的token预算（本地估算），0表示不限制")
+    LLM_MAX_CONCURRENT_REQUESTS: int = Field(4, description="同一LLM服务商（BaseUrl）的最大并发请求数，0表示不限制")
+    LLM_REQUESTS_PER_MINUTE: int = Field(0, description="同一LLM服务商与模型在进程内共享的每分钟请求数上限，0表示不限制")
+    LLM_TOKENS_PER_MINUTE: int = Field(0, description="同一LLM服务商与模型在进程内共享的每分钟token数上限（本地估算），0表示不限制")
+    SEARCH_REQUESTS_PER_MINUTE: int = Field(0, description="Tavily/Bocha等搜索API在进程内共享的每分钟请求数上限，0表示不限制")
+    LLM_CACHE_ENABLED: bool = Field(False, description="是否缓存LLM响应（按模型、提示词与采样参数，忽略时间前缀）")
+    LLM_CACHE_TTL: float = Field(86400.0, description="LLM响应缓存有效期（秒），0表示永不过期")
+    LLM_CACHE_MAX_ENTRIES: int = Field(512, description="LLM响应内存缓存最大条目数")
+    LLM_CACHE_SQLITE_PATH: Optional[str] = Field("llm_cache/llm_responses.db", description="LLM响应SQLite缓存文件路径，为空则只使用内存缓存")
+    LLM_CACHE_NODES: str = Field("ReportStructureNode,FirstSearchNode,ReflectionNode", description="启用LLM响应缓存的节点名，逗号分隔")
+    LLM_STREAM_INCLUDE_USAGE: bool = Field(True, description="流式请求时要求服务商返回用量（stream_options.include_usage），用于统计前缀缓存命中；服务商不支持时关闭")
+    CHECKPOINT_ENABLED: bool = Field(True, description="研究过程中是否写入检查点日志（OUTPUT_DIR/checkpoints），用于research(query, resume=True)断点续跑")
+    METRICS_PROMETHEUS_PORT: int = Field(0, description="Prometheus指标端点（/metrics）监听端口，导出各阶段耗时与token用量汇总；0表示不启动")
     
     MINDSPIDER_API_KEY: Optional[str] = Field(None, description="MindSpider API密钥")
     MINDSPIDER_BASE_URL: Optional[str] = Field("https://api.deepseek.com", description="MindSpider LLM接口BaseUrl")
@@ -27,6 +27,16 @@ mysql_db_config = {
 }
 
 
+# 每次入库插入/更新时向 crawl_outbox 追加一条变更记录
+ENABLE_CRAWL_OUTBOX = False
+
+# connection pool config (mysql / postgresql)
+DB_POOL_SIZE = 5  # connections kept open in the pool
+DB_MAX_OVERFLOW = 10  # extra connections allowed when the pool is exhausted
+DB_POOL_TIMEOUT = 30  # seconds to wait for a free connection before raising
+DB_POOL_WAIT_WARN_SECONDS = 1.0  # log a warning when a checkout waits longer than this
+
+
 # redis config
 REDIS_DB_HOST = "127.0.0.1"  # your redis host
 REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
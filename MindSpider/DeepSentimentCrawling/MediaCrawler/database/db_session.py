@@ -1,13 +1,20 @@
+import time
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from contextlib import asynccontextmanager
 from .models import Base
+from .outbox import OutboxSession
 import config
 from config.db_config import mysql_db_config, sqlite_db_config, postgresql_db_config
+from tools import utils
 
 # Keep a cache of engines
 _engines = {}
+# Keep a cache of session factories, one per engine
+_session_factories = {}
+# Connection checkout wait per db_type: [count, total seconds, max seconds]
+_pool_wait_stats = {}
 
 
 async def create_database_if_not_exists(db_type: str):
@@ -54,11 +61,60 @@ def get_async_engine(db_type: str = None):
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
 
-    engine = create_async_engine(db_url, echo=False)
+    pool_kwargs = {}
+    if db_type != "sqlite":
+        # Bound the crawler's share of server connections; InsightEngine reads from the same database
+        pool_kwargs = {
+            "pool_size": config.DB_POOL_SIZE,
+            "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_timeout": config.DB_POOL_TIMEOUT,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+        }
+    engine = create_async_engine(db_url, echo=False, **pool_kwargs)
     _engines[db_type] = engine
     return engine
 
 
+def get_session_factory(db_type: str = None):
+    """Return the cached AsyncSession factory bound to the engine of db_type"""
+    if db_type is None:
+        db_type = config.SAVE_DATA_OPTION
+    factory = _session_factories.get(db_type)
+    if factory is None:
+        engine = get_async_engine(db_type)
+        if not engine:
+            return None
+        # With the outbox enabled, every insert/update flushed by a store also appends a crawl_outbox record
+        sync_session_class = OutboxSession if config.ENABLE_CRAWL_OUTBOX else Session
+        factory = sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False, sync_session_class=sync_session_class
+        )
+        _session_factories[db_type] = factory
+    return factory
+
+
+def _record_pool_wait(db_type: str, seconds: float):
+    stats = _pool_wait_stats.setdefault(db_type, [0, 0.0, 0.0])
+    stats[0] += 1
+    stats[1] += seconds
+    stats[2] = max(stats[2], seconds)
+    if seconds >= config.DB_POOL_WAIT_WARN_SECONDS:
+        pool = _engines[db_type].pool
+        status = pool.status() if hasattr(pool, "status") else ""
+        utils.logger.warning(
+            f"[get_session] waited {seconds:.2f}s for a {db_type} connection, pool may be saturated: {status}"
+        )
+
+
+def get_pool_wait_stats() -> dict:
+    """Connection checkout wait per db_type: count, average and max seconds"""
+    return {
+        db_type: {"count": count, "avg_seconds": total / count if count else 0.0, "max_seconds": longest}
+        for db_type, (count, total, longest) in _pool_wait_stats.items()
+    }
+
+
 async def create_tables(db_type: str = None):
     if db_type is None:
         db_type = config.SAVE_DATA_OPTION
@@ -71,13 +127,17 @@ async def create_tables(db_type: str = None):
 
 @asynccontextmanager
 async def get_session() -> AsyncSession:
-    engine = get_async_engine(config.SAVE_DATA_OPTION)
-    if not engine:
+    db_type = config.SAVE_DATA_OPTION
+    AsyncSessionFactory = get_session_factory(db_type)
+    if AsyncSessionFactory is None:
         yield None
         return
-    AsyncSessionFactory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
     session = AsyncSessionFactory()
     try:
+        # Check out the connection up front so the pool wait can be measured
+        start = time.perf_counter()
+        await session.connection()
+        _record_pool_wait(db_type, time.perf_counter() - start)
         yield session
         await session.commit()
     except Exception as e:
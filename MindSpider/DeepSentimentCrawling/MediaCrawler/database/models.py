@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, Text, String, BigInteger
+from sqlalchemy import create_engine, Column, Integer, Text, String, BigInteger, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -431,4 +431,16 @@ class ZhihuCreator(Base):
     column_count = Column(Integer, default=0)
     get_voteup_count = Column(Integer, default=0)
     add_ts = Column(BigInteger)
-    last_modify_ts = Column(BigInteger)
\ No newline at end of file
+    last_modify_ts = Column(BigInteger)
+
+class CrawlOutbox(Base):
+    """Change-data-capture outbox: one row per inserted/updated crawled row, written in the same transaction"""
+    __tablename__ = 'crawl_outbox'
+    __table_args__ = (
+        Index('idx_crawl_outbox_ts', 'ts'),
+    )
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    source_table = Column(String(64), nullable=False)
+    source_id = Column(BigInteger, nullable=False)
+    op = Column(String(8), nullable=False)
+    ts = Column(BigInteger, nullable=False)
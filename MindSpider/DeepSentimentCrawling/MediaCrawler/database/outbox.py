@@ -0,0 +1,91 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Change-data-capture outbox for the DB store implementations.
+
+Sessions created from OutboxSession append one crawl_outbox row
+(source_table, source_id, op, ts) for every crawled row inserted or updated by a
+flush, and for every row matched by a bulk ``update(Model)`` statement executed
+through the session (as the XHS store does). The outbox rows are written on the same connection, so they commit or roll
+back together with the data. Downstream indexers read the outbox in id order
+instead of scanning the crawled tables.
+"""
+
+import time
+from typing import Dict, List
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from .models import CrawlOutbox
+
+OP_INSERT = "insert"
+OP_UPDATE = "update"
+
+
+class OutboxSession(Session):
+    """Session class whose flushes also record changes in crawl_outbox"""
+
+
+def _outbox_record(obj, op: str, ts: int) -> Dict:
+    return {"source_table": obj.__table__.name, "source_id": obj.id, "op": op, "ts": ts}
+
+
+@event.listens_for(OutboxSession, "after_flush")
+def _record_changes(session: Session, flush_context):
+    """
+    Collect the rows written by this flush.
+
+    Inside after_flush, session.new and session.dirty still describe the flushed
+    objects and new objects already have their autoincrement ids.
+    """
+    ts = int(time.time() * 1000)
+    records: List[Dict] = []
+    for obj in session.new:
+        if not isinstance(obj, CrawlOutbox) and getattr(obj, "id", None) is not None:
+            records.append(_outbox_record(obj, OP_INSERT, ts))
+    for obj in session.dirty:
+        if isinstance(obj, CrawlOutbox) or getattr(obj, "id", None) is None:
+            continue
+        if session.is_modified(obj, include_collections=False):
+            records.append(_outbox_record(obj, OP_UPDATE, ts))
+    if records:
+        session.connection().execute(insert(CrawlOutbox.__table__), records)
+
+
+@event.listens_for(OutboxSession, "do_orm_execute")
+def _record_bulk_updates(orm_execute_state: ORMExecuteState):
+    """
+    Record rows changed by ``session.execute(update(Model)...)``.
+
+    Bulk updates bypass the unit of work, so after_flush never sees them. The ids
+    matched by the statement's WHERE clause are selected on the same connection
+    before the update runs; unlike flushes, unchanged values are not filtered out.
+    """
+    if not orm_execute_state.is_update:
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is CrawlOutbox or "id" not in mapper.local_table.c:
+        return None
+    statement = orm_execute_state.statement
+    id_query = select(mapper.local_table.c.id)
+    if statement.whereclause is not None:
+        id_query = id_query.where(statement.whereclause)
+    connection = orm_execute_state.session.connection()
+    ids = connection.execute(id_query).scalars().all()
+    result = orm_execute_state.invoke_statement()
+    if ids:
+        ts = int(time.time() * 1000)
+        connection.execute(insert(CrawlOutbox.__table__), [
+            {"source_table": mapper.local_table.name, "source_id": source_id, "op": OP_UPDATE, "ts": ts}
+            for source_id in ids
+        ])
+    return result
@@ -581,6 +581,20 @@ CREATE TABLE `zhihu_creator` (
     UNIQUE KEY `idx_zhihu_creator_user_id` (`user_id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='知乎创作者';
 
+-- ----------------------------
+-- Table structure for crawl_outbox
+-- ----------------------------
+DROP TABLE IF EXISTS `crawl_outbox`;
+CREATE TABLE `crawl_outbox` (
+    `id` bigint NOT NULL AUTO_INCREMENT COMMENT '自增ID（变更顺序）',
+    `source_table` varchar(64) NOT NULL COMMENT '变更的表名',
+    `source_id` bigint NOT NULL COMMENT '变更记录的自增ID',
+    `op` varchar(8) NOT NULL COMMENT '操作类型 insert/update',
+    `ts` bigint NOT NULL COMMENT '变更时间戳（毫秒）',
+    PRIMARY KEY (`id`),
+    KEY `idx_crawl_outbox_ts` (`ts`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='爬虫入库变更表';
+
 
 -- add column `like_count` to douyin_aweme_comment
 alter table douyin_aweme_comment add column `like_count` varchar(255) NOT NULL DEFAULT '0' COMMENT '点赞数';
@@ -23,7 +23,7 @@ try:
 except ImportError:
     raise ImportError("无法导入config.py配置文件")
 
-from config import settings
+from config import settings, sqlite_database_path
 from loguru import logger
 
 class KeywordManager:
@@ -38,7 +38,9 @@ class KeywordManager:
         """连接数据库"""
         try:
             dialect = (settings.DB_DIALECT or "mysql").lower()
-            if dialect in ("postgresql", "postgres"):
+            if dialect == "sqlite":
+                url = f"sqlite:///{sqlite_database_path()}"
+            elif dialect in ("postgresql", "postgres"):
                 url = f"postgresql+psycopg://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
             else:
                 url = f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}?charset={settings.DB_CHARSET}"
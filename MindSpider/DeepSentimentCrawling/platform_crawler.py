@@ -39,12 +39,25 @@ class PlatformCrawler:
         
         logger.info(f"初始化平台爬虫管理器，MediaCrawler路径: {self.mediacrawler_path}")
     
+    @staticmethod
+    def _save_data_option() -> str:
+        """按MindSpider的数据库类型确定MediaCrawler的 SAVE_DATA_OPTION（db 表示MySQL）"""
+        db_dialect = (config.settings.DB_DIALECT or "mysql").lower()
+        if db_dialect in ("postgresql", "postgres"):
+            return "postgresql"
+        if db_dialect == "sqlite":
+            return "sqlite"
+        return "db"
+    
     def configure_mediacrawler_db(self):
-        """配置MediaCrawler使用我们的数据库（MySQL或PostgreSQL）"""
+        """配置MediaCrawler使用我们的数据库（MySQL、PostgreSQL或SQLite）"""
         try:
             # 判断数据库类型
             db_dialect = (config.settings.DB_DIALECT or "mysql").lower()
             is_postgresql = db_dialect in ("postgresql", "postgres")
+            is_sqlite = db_dialect == "sqlite"
+            # SQLite 与 MindSpider 共用同一个数据库文件，InsightEngine 的全文索引随爬虫写入同步
+            sqlite_db_path = config.sqlite_database_path() if is_sqlite else None
             
             # 修改MediaCrawler的数据库配置
             db_config_path = self.mediacrawler_path / "config" / "db_config.py"
@@ -89,6 +102,15 @@ mysql_db_config = {{
     "db_name": MYSQL_DB_NAME,
 }}
 
+# 每次入库插入/更新时向 crawl_outbox 追加一条变更记录
+ENABLE_CRAWL_OUTBOX = {bool(config.settings.CRAWL_OUTBOX_ENABLED)}
+
+# 连接池配置（MySQL/PostgreSQL），限制爬虫占用的数据库连接数
+DB_POOL_SIZE = {int(config.settings.CRAWLER_DB_POOL_SIZE)}
+DB_MAX_OVERFLOW = {int(config.settings.CRAWLER_DB_MAX_OVERFLOW)}
+DB_POOL_TIMEOUT = {float(config.settings.CRAWLER_DB_POOL_TIMEOUT)}
+DB_POOL_WAIT_WARN_SECONDS = 1.0
+
 
 # redis config
 REDIS_DB_HOST = "127.0.0.1"  # your redis host
@@ -100,8 +122,8 @@ REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
 CACHE_TYPE_REDIS = "redis"
 CACHE_TYPE_MEMORY = "memory"
 
-# sqlite config
-SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "sqlite_tables.db")
+# sqlite config - 如果DB_DIALECT是sqlite则使用MindSpider的数据库文件
+SQLITE_DB_PATH = {repr(sqlite_db_path) if is_sqlite else 'os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "sqlite_tables.db")'}
 
 sqlite_db_config = {{
     "db_path": SQLITE_DB_PATH
@@ -128,7 +150,7 @@ postgresql_db_config = {{
             with open(db_config_path, 'w', encoding='utf-8') as f:
                 f.write(new_config)
             
-            db_type = "PostgreSQL" if is_postgresql else "MySQL"
+            db_type = "PostgreSQL" if is_postgresql else "SQLite" if is_sqlite else "MySQL"
             logger.info(f"已配置MediaCrawler使用MindSpider {db_type}数据库")
             return True
             
@@ -152,9 +174,7 @@ postgresql_db_config = {{
         """
         try:
             # 判断数据库类型，确定 SAVE_DATA_OPTION
-            db_dialect = (config.settings.DB_DIALECT or "mysql").lower()
-            is_postgresql = db_dialect in ("postgresql", "postgres")
-            save_data_option = "postgresql" if is_postgresql else "db"
+            save_data_option = self._save_data_option()
             
             base_config_path = self.mediacrawler_path / "config" / "base_config.py"
             
@@ -236,9 +256,7 @@ postgresql_db_config = {{
                 return {"success": False, "error": "基础配置创建失败"}
             
             # 判断数据库类型，确定 save_data_option
-            db_dialect = (config.settings.DB_DIALECT or "mysql").lower()
-            is_postgresql = db_dialect in ("postgresql", "postgres")
-            save_data_option = "postgresql" if is_postgresql else "db"
+            save_data_option = self._save_data_option()
             
             # 构建命令
             cmd = [
@@ -14,14 +14,18 @@ CWD_ENV: Path = Path.cwd() / ".env"
 ENV_FILE: str = str(CWD_ENV if CWD_ENV.exists() else (PROJECT_ROOT / ".env"))
 
 class Settings(BaseSettings):
-    """全局配置管理，优先从环境变量和.env加载。支持MySQL/PostgreSQL统一数据库参数命名。"""
-    DB_DIALECT: str = Field("mysql", description="数据库类型，支持'mysql'或'postgresql'")
+    """全局配置管理，优先从环境变量和.env加载。支持MySQL/PostgreSQL/SQLite统一数据库参数命名。"""
+    DB_DIALECT: str = Field("mysql", description="数据库类型，支持'mysql'、'postgresql'或'sqlite'（sqlite时DB_NAME为数据库文件路径）")
     DB_HOST: str = Field("your_host", description="数据库主机名或IP地址")
     DB_PORT: int = Field(3306, description="数据库端口号")
     DB_USER: str = Field("your_username", description="数据库用户名")
     DB_PASSWORD: str = Field("your_password", description="数据库密码")
     DB_NAME: str = Field("mindspider", description="数据库名称")
     DB_CHARSET: str = Field("utf8mb4", description="数据库字符集")
+    CRAWLER_DB_POOL_SIZE: int = Field(5, description="MediaCrawler入库连接池常驻连接数（MySQL/PostgreSQL）")
+    CRAWLER_DB_MAX_OVERFLOW: int = Field(10, description="MediaCrawler入库连接池在常驻连接用尽时允许额外创建的连接数")
+    CRAWLER_DB_POOL_TIMEOUT: float = Field(30.0, description="MediaCrawler等待空闲连接的超时时间（秒）")
+    CRAWL_OUTBOX_ENABLED: bool = Field(False, description="爬虫入库时是否把每次插入/更新写入 crawl_outbox 变更表，供下游索引服务按变更流增量读取")
     MINDSPIDER_API_KEY: Optional[str] = Field(None, description="MINDSPIDER API密钥")
     MINDSPIDER_BASE_URL: Optional[str] = Field("https://api.deepseek.com", description="MINDSPIDER API基础URL，推荐deepseek-chat模型使用https://api.deepseek.com")
     MINDSPIDER_MODEL_NAME: Optional[str] = Field("deepseek-chat", description="MINDSPIDER API模型名称, 推荐deepseek-chat")
@@ -33,3 +37,13 @@ class Settings(BaseSettings):
         extra = "allow"
 
 settings = Settings()
+
+
+def sqlite_database_path(db_name: Optional[str] = None) -> str:
+    """SQLite数据库文件的绝对路径：相对路径以项目根目录为基准，未指定扩展名时补充 .db"""
+    path = Path(db_name or settings.DB_NAME or "mindspider")
+    if not path.suffix:
+        path = path.with_suffix(".db")
+    if not path.is_absolute():
+        path = PROJECT_ROOT / path
+    return str(path)
@@ -16,7 +16,7 @@ import pymysql
 from pymysql.cursors import DictCursor
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy import inspect, text
-from config import settings
+from config import settings, sqlite_database_path
 from loguru import logger
 from urllib.parse import quote_plus
 
@@ -53,6 +53,9 @@ class MindSpider:
             'DB_HOST', 'DB_PORT', 'DB_USER', 'DB_PASSWORD', 'DB_NAME', 'DB_CHARSET',
             'MINDSPIDER_API_KEY', 'MINDSPIDER_BASE_URL', 'MINDSPIDER_MODEL_NAME'
         ]
+        if (settings.DB_DIALECT or "").lower() == "sqlite":
+            # SQLite 只需要数据库文件路径
+            required_configs = [name for name in required_configs if name not in ('DB_HOST', 'DB_PORT', 'DB_USER', 'DB_PASSWORD', 'DB_CHARSET')]
         
         missing_configs = []
         for config_name in required_configs:
@@ -73,6 +76,8 @@ class MindSpider:
         
         def build_async_url() -> str:
             dialect = (settings.DB_DIALECT or "mysql").lower()
+            if dialect == "sqlite":
+                return f"sqlite+aiosqlite:///{sqlite_database_path()}"
             if dialect == "postgresql":
                 return f"postgresql+asyncpg://{settings.DB_USER}:{quote_plus(settings.DB_PASSWORD)}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
             # 默认使用 mysql 异步驱动 asyncmy
@@ -104,6 +109,8 @@ class MindSpider:
         
         def build_async_url() -> str:
             dialect = (settings.DB_DIALECT or "mysql").lower()
+            if dialect == "sqlite":
+                return f"sqlite+aiosqlite:///{sqlite_database_path()}"
             if dialect == "postgresql":
                 return f"postgresql+asyncpg://{settings.DB_USER}:{quote_plus(settings.DB_PASSWORD)}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
             return (
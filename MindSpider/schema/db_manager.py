@@ -25,7 +25,7 @@ except ImportError:
     logger.error("错误: 无法导入config.py配置文件")
     sys.exit(1)
 
-from config import settings
+from config import settings, sqlite_database_path
 
 class DatabaseManager:
     def __init__(self):
@@ -36,7 +36,9 @@ class DatabaseManager:
         """连接数据库"""
         try:
             dialect = (settings.DB_DIALECT or "mysql").lower()
-            if dialect in ("postgresql", "postgres"):
+            if dialect == "sqlite":
+                url = f"sqlite:///{sqlite_database_path()}"
+            elif dialect in ("postgresql", "postgres"):
                 url = f"postgresql+psycopg://{settings.DB_USER}:{quote_plus(settings.DB_PASSWORD)}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
             else:
                 url = f"mysql+pymysql://{settings.DB_USER}:{quote_plus(settings.DB_PASSWORD)}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}?charset={settings.DB_CHARSET}"
@@ -2,7 +2,8 @@
 MindSpider 数据库初始化（SQLAlchemy 2.x 异步引擎）
 
 此脚本创建 MindSpider 扩展表（与 MediaCrawler 原始表分离）。
-支持 MySQL 与 PostgreSQL，需已有可连接的数据库实例。
+支持 MySQL 与 PostgreSQL（需已有可连接的数据库实例），以及 SQLite（DB_NAME 为数据库文件路径，
+同时为内容与评论表创建 FTS5 全文索引，见 sqlite_fts.py）。
 
 数据模型定义位置：
 - MindSpider/schema/models_sa.py
@@ -16,6 +17,7 @@ from typing import Optional
 from urllib.parse import quote_plus
 from loguru import logger
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import text
 
@@ -24,6 +26,7 @@ from models_sa import Base
 # 导入 models_bigdata 以确保所有表类被注册到 Base.metadata
 # models_bigdata 现在也使用 models_sa 的 Base，所以所有表都在同一个 metadata 中
 import models_bigdata  # noqa: F401  # 导入以注册所有表类
+from sqlite_fts import create_fts_indexes
 import sys
 from pathlib import Path
 
@@ -31,7 +34,7 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-from config import settings
+from config import settings, sqlite_database_path
 
 def _env(key: str, default: Optional[str] = None) -> Optional[str]:
     v = os.getenv(key)
@@ -45,6 +48,8 @@ def _build_database_url() -> str:
         return database_url
 
     dialect = (settings.DB_DIALECT or "mysql").lower()
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite:///{sqlite_database_path()}"
     host = settings.DB_HOST or "localhost"
     port = str(settings.DB_PORT or ("3306" if dialect == "mysql" else "5432"))
     user = settings.DB_USER or "root"
@@ -92,19 +97,28 @@ async def _create_views_if_needed(engine_dialect: str):
     from sqlalchemy.ext.asyncio import AsyncEngine
     engine: AsyncEngine = create_async_engine(_build_database_url())
     async with engine.begin() as conn:
-        await conn.execute(text(v_topic_crawling_stats))
-        await conn.execute(text(v_daily_summary))
+        for view_sql in (v_topic_crawling_stats, v_daily_summary):
+            if engine_dialect == "sqlite":
+                # SQLite 不支持 CREATE OR REPLACE VIEW
+                view_name = view_sql.split()[4]
+                await conn.execute(text(f"DROP VIEW IF EXISTS {view_name}"))
+                view_sql = view_sql.replace("CREATE OR REPLACE VIEW", "CREATE VIEW", 1)
+            await conn.execute(text(view_sql))
     await engine.dispose()
 
 
 async def main() -> None:
     database_url = _build_database_url()
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database:
+        os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
     engine = create_async_engine(database_url, pool_pre_ping=True, pool_recycle=1800)
 
     # 由于 models_bigdata 和 models_sa 现在共享同一个 Base，所有表都在同一个 metadata 中
     # 只需创建一次，SQLAlchemy 会自动处理表之间的依赖关系
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_fts_indexes)
 
     # 保持原有视图创建和释放逻辑
     dialect_name = engine.url.get_backend_name()
@@ -105,6 +105,92 @@ CREATE TABLE `crawling_tasks` (
     FOREIGN KEY (`topic_id`) REFERENCES `daily_topics`(`topic_id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='爬取任务表';
 
+-- ----------------------------
+-- Table structure for content_sentiment
+-- 内容情感表：存储后台情感打分服务对内容和评论的预计算情感结果
+-- ----------------------------
+DROP TABLE IF EXISTS `content_sentiment`;
+CREATE TABLE `content_sentiment` (
+    `id` int NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `source_table` varchar(64) NOT NULL COMMENT '来源表名',
+    `source_id` bigint NOT NULL COMMENT '来源表中的记录ID',
+    `model_id` varchar(128) NOT NULL COMMENT '打分所用的模型标识',
+    `sentiment_label` varchar(16) NOT NULL COMMENT '情感标签',
+    `confidence` float NOT NULL COMMENT '置信度',
+    `add_ts` bigint NOT NULL COMMENT '记录添加时间戳',
+    `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `uq_content_sentiment_source` (`source_table`, `source_id`),
+    KEY `idx_content_sentiment_label` (`sentiment_label`),
+    KEY `idx_content_sentiment_add_ts` (`add_ts`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='内容情感预计算表';
+
+-- ----------------------------
+-- Table structure for sentiment_scorer_state
+-- 情感打分进度表：记录每张来源表已处理到的 (add_ts, id) 水位线
+-- ----------------------------
+DROP TABLE IF EXISTS `sentiment_scorer_state`;
+CREATE TABLE `sentiment_scorer_state` (
+    `source_table` varchar(64) NOT NULL COMMENT '来源表名',
+    `last_add_ts` bigint NOT NULL DEFAULT 0 COMMENT '已处理的最大add_ts',
+    `last_id` bigint NOT NULL DEFAULT 0 COMMENT '相同add_ts下已处理的最大ID',
+    `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
+    PRIMARY KEY (`source_table`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='情感打分进度表';
+
+-- ----------------------------
+-- Table structure for topic_rollup
+-- 话题趋势汇总表：按小时/天汇总每个 (来源关键词, 平台, 内容类型) 的数量、互动量与预计算情感分布
+-- ----------------------------
+DROP TABLE IF EXISTS `topic_rollup`;
+CREATE TABLE `topic_rollup` (
+    `id` int NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `granularity` varchar(8) NOT NULL COMMENT '汇总粒度：hour/day',
+    `bucket_ts` bigint NOT NULL COMMENT '时间桶起点（秒级时间戳，本地时间）',
+    `source_keyword` varchar(255) NOT NULL DEFAULT '' COMMENT '来源关键词',
+    `platform` varchar(32) NOT NULL COMMENT '平台',
+    `content_type` varchar(16) NOT NULL COMMENT '内容类型',
+    `item_count` bigint NOT NULL DEFAULT 0 COMMENT '内容/评论数',
+    `likes` bigint NOT NULL DEFAULT 0 COMMENT '点赞数合计',
+    `comments` bigint NOT NULL DEFAULT 0 COMMENT '评论数合计',
+    `shares` bigint NOT NULL DEFAULT 0 COMMENT '分享/转发数合计',
+    `views` bigint NOT NULL DEFAULT 0 COMMENT '播放/浏览数合计',
+    `sentiment_positive` bigint NOT NULL DEFAULT 0 COMMENT '正面（含非常正面）条数',
+    `sentiment_neutral` bigint NOT NULL DEFAULT 0 COMMENT '中性条数',
+    `sentiment_negative` bigint NOT NULL DEFAULT 0 COMMENT '负面（含非常负面）条数',
+    `add_ts` bigint NOT NULL COMMENT '记录添加时间戳',
+    `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `uq_topic_rollup_bucket` (`granularity`, `bucket_ts`, `source_keyword`, `platform`, `content_type`),
+    KEY `idx_topic_rollup_keyword` (`source_keyword`, `granularity`, `bucket_ts`),
+    KEY `idx_topic_rollup_bucket` (`granularity`, `bucket_ts`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='话题趋势汇总表';
+
+-- ----------------------------
+-- Table structure for topic_rollup_state
+-- 趋势汇总进度表：记录每张来源表（及 content_sentiment）已汇总到的 (add_ts, id) 水位线
+-- ----------------------------
+DROP TABLE IF EXISTS `topic_rollup_state`;
+CREATE TABLE `topic_rollup_state` (
+    `source_table` varchar(64) NOT NULL COMMENT '来源表名',
+    `last_add_ts` bigint NOT NULL DEFAULT 0 COMMENT '已汇总的最大add_ts',
+    `last_id` bigint NOT NULL DEFAULT 0 COMMENT '相同add_ts下已汇总的最大ID',
+    `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
+    PRIMARY KEY (`source_table`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='趋势汇总进度表';
+
+-- ----------------------------
+-- Table structure for crawl_outbox_cursor
+-- 变更流消费进度表：记录每个下游服务已处理到的 crawl_outbox 自增ID
+-- ----------------------------
+DROP TABLE IF EXISTS `crawl_outbox_cursor`;
+CREATE TABLE `crawl_outbox_cursor` (
+    `consumer` varchar(64) NOT NULL COMMENT '消费者名称',
+    `last_id` bigint NOT NULL DEFAULT 0 COMMENT '已处理的最大变更ID',
+    `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
+    PRIMARY KEY (`consumer`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='变更流消费进度表';
+
 -- ===============================
 -- MediaCrawler表结构扩展字段
 -- ===============================
@@ -21,6 +21,10 @@ __all__ = [
     "DailyTopic",
     "TopicNewsRelation",
     "CrawlingTask",
+    "ContentSentiment",
+    "SentimentScorerState",
+    "TopicRollup",
+    "TopicRollupState",
 ]
 
 
@@ -124,3 +128,71 @@ class CrawlingTask(Base):
     last_modify_ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
 
 
+class ContentSentiment(Base):
+    __tablename__ = "content_sentiment"
+    __table_args__ = (
+        UniqueConstraint("source_table", "source_id", name="uq_content_sentiment_source"),
+        Index("idx_content_sentiment_label", "sentiment_label"),
+        Index("idx_content_sentiment_add_ts", "add_ts"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    source_table: Mapped[str] = mapped_column(String(64), nullable=False)
+    source_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    model_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    sentiment_label: Mapped[str] = mapped_column(String(16), nullable=False)
+    confidence: Mapped[float] = mapped_column(Float, nullable=False)
+    add_ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    last_modify_ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class SentimentScorerState(Base):
+    __tablename__ = "sentiment_scorer_state"
+
+    source_table: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_add_ts: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_modify_ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class TopicRollup(Base):
+    __tablename__ = "topic_rollup"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_ts", "source_keyword", "platform", "content_type", name="uq_topic_rollup_bucket"),
+        Index("idx_topic_rollup_keyword", "source_keyword", "granularity", "bucket_ts"),
+        Index("idx_topic_rollup_bucket", "granularity", "bucket_ts"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    granularity: Mapped[str] = mapped_column(String(8), nullable=False)
+    bucket_ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    source_keyword: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    platform: Mapped[str] = mapped_column(String(32), nullable=False)
+    content_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    item_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    likes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    comments: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    shares: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    views: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sentiment_positive: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sentiment_neutral: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sentiment_negative: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    add_ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    last_modify_ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class TopicRollupState(Base):
+    __tablename__ = "topic_rollup_state"
+
+    source_table: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_add_ts: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_modify_ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class CrawlOutboxCursor(Base):
+    __tablename__ = "crawl_outbox_cursor"
+
+    consumer: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_modify_ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
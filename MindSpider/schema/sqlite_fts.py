@@ -0,0 +1,133 @@
+"""
+SQLite FTS5 全文索引
+
+DB_DIALECT 为 sqlite 时，InsightEngine 的话题搜索原本对每张表的文本字段做 LIKE '%话题%'，
+只能逐行扫描。此模块为这些表建立外部内容（external content）FTS5 虚拟表 {表名}_fts：
+- 使用 trigram 分词器，中文无需分词即可做子串匹配（话题需不少于3个字符）
+- 不重复保存文本，rowid 即源表的 id
+- 由 INSERT / UPDATE / DELETE 触发器与源表同步，爬虫写入后即可检索
+
+索引字段与 InsightEngine/tools/search.py 中各表的搜索字段一致。
+需要 SQLite >= 3.34（trigram 分词器）。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+from loguru import logger
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+__all__ = [
+    "FTS_TABLES",
+    "fts_table_name",
+    "fts_supported",
+    "create_fts_indexes",
+    "drop_fts_indexes",
+]
+
+# 表名 -> 建立全文索引的字段
+FTS_TABLES: Dict[str, List[str]] = {
+    "bilibili_video": ["title", "desc", "source_keyword"],
+    "douyin_aweme": ["title", "desc", "source_keyword"],
+    "kuaishou_video": ["title", "desc", "source_keyword"],
+    "weibo_note": ["content", "source_keyword"],
+    "xhs_note": ["title", "desc", "tag_list", "source_keyword"],
+    "zhihu_content": ["title", "desc", "content_text", "source_keyword"],
+    "tieba_note": ["title", "desc", "source_keyword"],
+    "daily_news": ["title"],
+    "bilibili_video_comment": ["content"],
+    "douyin_aweme_comment": ["content"],
+    "kuaishou_video_comment": ["content"],
+    "weibo_note_comment": ["content"],
+    "xhs_note_comment": ["content"],
+    "zhihu_comment": ["content"],
+    "tieba_comment": ["content"],
+}
+
+
+def fts_table_name(table: str) -> str:
+    return f"{table}_fts"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def fts_supported(connection: Connection) -> bool:
+    """当前 SQLite 是否支持 FTS5 与 trigram 分词器"""
+    try:
+        connection.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS temp.__fts_probe USING fts5(x, tokenize='trigram')"))
+        connection.execute(text("DROP TABLE temp.__fts_probe"))
+        return True
+    except OperationalError:
+        return False
+
+
+def _create_statements(table: str, columns: Sequence[str]) -> List[str]:
+    fts = fts_table_name(table)
+    cols = ", ".join(_quote(c) for c in columns)
+    new_values = ", ".join(f"new.{_quote(c)}" for c in columns)
+    old_values = ", ".join(f"old.{_quote(c)}" for c in columns)
+    delete_old = (f"INSERT INTO {_quote(fts)}({_quote(fts)}, rowid, {cols}) "
+                  f"VALUES('delete', old.{_quote('id')}, {old_values});")
+    insert_new = f"INSERT INTO {_quote(fts)}(rowid, {cols}) VALUES (new.{_quote('id')}, {new_values});"
+    return [
+        (f"CREATE VIRTUAL TABLE {_quote(fts)} USING fts5({cols}, "
+         f"content={_quote(table)}, content_rowid='id', tokenize='trigram')"),
+        f"CREATE TRIGGER IF NOT EXISTS {_quote(fts + '_ai')} AFTER INSERT ON {_quote(table)} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {_quote(fts + '_ad')} AFTER DELETE ON {_quote(table)} BEGIN {delete_old} END",
+        (f"CREATE TRIGGER IF NOT EXISTS {_quote(fts + '_au')} AFTER UPDATE OF {cols} ON {_quote(table)} "
+         f"BEGIN {delete_old} {insert_new} END"),
+    ]
+
+
+def create_fts_indexes(connection: Connection, tables: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    为已存在的数据表创建 FTS5 索引与同步触发器（已存在的索引跳过），
+    新建的索引会从源表重建，以包含建索引前已写入的数据。
+
+    Args:
+        connection: SQLite 同步连接（异步引擎中通过 conn.run_sync 调用）
+        tables: 要建立索引的表，默认 FTS_TABLES 中的全部表
+
+    Returns:
+        本次新建索引的表名列表
+    """
+    if connection.dialect.name != "sqlite":
+        return []
+    if not fts_supported(connection):
+        logger.warning("当前SQLite不支持FTS5 trigram分词器（需要3.34及以上版本），话题搜索将使用LIKE")
+        return []
+
+    inspector = inspect(connection)
+    existing = set(inspector.get_table_names())
+    created = []
+    for table in tables or list(FTS_TABLES):
+        if table not in existing or fts_table_name(table) in existing:
+            continue
+        table_columns = {column["name"] for column in inspector.get_columns(table)}
+        columns = [c for c in FTS_TABLES.get(table, []) if c in table_columns]
+        if not columns or "id" not in table_columns:
+            continue
+        for statement in _create_statements(table, columns):
+            connection.execute(text(statement))
+        fts = fts_table_name(table)
+        connection.execute(text(f"INSERT INTO {_quote(fts)}({_quote(fts)}) VALUES('rebuild')"))
+        created.append(table)
+    if created:
+        logger.info(f"已创建FTS5全文索引: {', '.join(created)}")
+    return created
+
+
+def drop_fts_indexes(connection: Connection, tables: Optional[Sequence[str]] = None):
+    """删除 FTS5 索引与同步触发器（重建源表前调用，避免索引指向已删除的数据）"""
+    if connection.dialect.name != "sqlite":
+        return
+    for table in tables or list(FTS_TABLES):
+        fts = fts_table_name(table)
+        for suffix in ("_ai", "_ad", "_au"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {_quote(fts + suffix)}"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {_quote(fts)}"))
@@ -0,0 +1,777 @@
+"""
+MindSpider 合成语料生成器
+
+按 MindSpider/schema 的表结构（models_bigdata / models_sa）批量生成各平台的合成内容与评论，
+用于在无法使用线上数据时，对 InsightEngine 的数据库查询工具（MediaCrawlerDB）做容量与性能测试。
+
+数据分布尽量贴近真实爬取结果：
+- 文本：常用词与合成词组成的词表按Zipf分布抽样，话题词同样按Zipf分布的流行度嵌入标题、正文与评论
+- 互动：按帕累托分布的"传播力"生成点赞/评论/分享/播放等，少数内容占据大部分互动，评论数也随之倾斜
+- 时间：越近的日期内容越多，并带有昼夜分布；时间字段沿用 MediaCrawler 入库时各平台的格式
+  （B站/抖音秒级时间戳，快手/小红书毫秒时间戳，微博带时区的日期字符串，知乎秒级时间戳字符串，贴吧分钟级日期字符串）
+
+支持 SQLite、MySQL 与 PostgreSQL（异步驱动 aiosqlite / aiomysql / asyncpg），同一种子与偏移量生成的数据完全一致，
+可以分多次追加到更大的规模。SQLite 下同时创建 FTS5 全文索引（sqlite_fts），由触发器随写入同步：
+
+    python MindSpider/schema/synthetic_corpus.py --url sqlite+aiosqlite:///corpus.db --posts 1000000 --comments-per-post 5
+    python MindSpider/schema/synthetic_corpus.py --url sqlite+aiosqlite:///corpus.db --posts 1000000 --offset 1000000
+
+数据模型定义位置：
+- MindSpider/schema/models_bigdata.py
+- MindSpider/schema/models_sa.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+# 以脚本或被其他模块导入时都能找到同目录下的模型
+schema_dir = Path(__file__).resolve().parent
+if str(schema_dir) not in sys.path:
+    sys.path.insert(0, str(schema_dir))
+
+from models_sa import Base
+import models_bigdata  # noqa: F401  # 导入以注册所有表类
+from sqlite_fts import create_fts_indexes, drop_fts_indexes
+
+__all__ = [
+    "PLATFORMS",
+    "TOPICS",
+    "SyntheticCorpus",
+    "generate_corpus",
+    "count_posts",
+]
+
+# 平台 -> (内容表, 评论表)
+PLATFORMS: Dict[str, Tuple[str, str]] = {
+    "bilibili": ("bilibili_video", "bilibili_video_comment"),
+    "douyin": ("douyin_aweme", "douyin_aweme_comment"),
+    "kuaishou": ("kuaishou_video", "kuaishou_video_comment"),
+    "weibo": ("weibo_note", "weibo_note_comment"),
+    "xhs": ("xhs_note", "xhs_note_comment"),
+    "zhihu": ("zhihu_content", "zhihu_comment"),
+    "tieba": ("tieba_note", "tieba_comment"),
+}
+
+# 话题词，按流行度从高到低排列（抽样权重服从Zipf分布）
+TOPICS: List[str] = [
+    "人工智能", "高考", "房价", "新能源汽车", "考研", "就业", "武汉大学", "世界杯",
+    "双十一", "春运", "食品安全", "航天", "芯片", "电影票房", "养老金", "延迟退休",
+    "减肥", "奶茶", "预制菜", "露营", "演唱会", "医保", "台风", "地铁",
+    "短视频", "直播带货", "电动车", "大模型", "天气", "旅游", "外卖", "租房",
+    "留学", "考公", "体育", "篮球", "马拉松", "宠物", "猫咪", "咖啡",
+    "手机", "游戏", "动漫", "综艺", "电视剧", "教育", "幼儿园", "环保",
+    "垃圾分类", "乡村振兴", "非遗", "博物馆", "熊猫", "樱花", "火锅", "烧烤",
+    "光伏", "储能", "无人机", "机器人",
+]
+
+# 常用词，大致按频率从高到低排列，排在词表最前面
+COMMON_WORDS: List[str] = [
+    "的", "了", "是", "我", "你", "在", "也", "就", "都", "和",
+    "这个", "不", "有", "人", "我们", "他们", "真的", "没有", "什么", "还是",
+    "一个", "现在", "已经", "可以", "觉得", "感觉", "因为", "所以", "但是", "如果",
+    "今天", "大家", "自己", "知道", "时候", "问题", "应该", "还有", "就是", "这样",
+    "哈哈哈", "确实", "支持", "希望", "喜欢", "不错", "厉害", "加油", "太", "好",
+    "为什么", "怎么", "其实", "一直", "以后", "而且", "或者", "只是", "还是", "非常",
+    "中国", "国家", "社会", "发展", "经济", "政策", "市场", "企业", "公司", "行业",
+    "价格", "消费", "质量", "服务", "用户", "平台", "视频", "评论", "官方", "回应",
+    "网友", "热搜", "话题", "新闻", "记者", "专家", "表示", "认为", "数据", "显示",
+    "城市", "学校", "学生", "老师", "孩子", "家长", "父母", "朋友", "同事", "老板",
+    "工作", "生活", "时间", "工资", "压力", "健康", "医院", "医生", "身体", "心情",
+    "安全", "事故", "调查", "通报", "处理", "结果", "影响", "变化", "情况", "事件",
+    "第一次", "最近", "明天", "昨天", "每天", "周末", "晚上", "早上", "年轻人", "打工人",
+    "体验", "推荐", "分享", "攻略", "测评", "吐槽", "避坑", "种草", "干货", "日常",
+    "离谱", "绝了", "破防", "无语", "心疼", "感动", "震惊", "羡慕", "期待", "点赞",
+]
+
+# 合成长尾词使用的常用汉字
+COMMON_CHARS = (
+    "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长知民样现分将外但身些与高意进把法此实回二理美点月明其种声全工己话儿者向情部正名定女问力机给等几很业最间新什打便位因重被走电四第门相次东政海口使教西再平真听世气信北少关并内加化由却代军产入先山五太水万市眼体别处总才场师书比住员九笑性通目华报立马命张活难神数件安表原车白应路期叫死常提感金何更反合放做系计或司利受光王果亲界及今京务制解各任至清物台象记边共风战干接它许八特觉望直服毛林题建南度统色字请交爱让认算论百吃义科怎元社术结六功指思非流每青管夫连远资队跟带花快条院变联言权往展该领传近留红治决周保达办运武半候七必城父强步完革深区即求品士转量空甚众技轻程告江语英基派满式李息写呢识极令黄德收脸钱党倒未持取设始版双历越史商千片容研像找友孩站广改议形委早房音火际则首单据导影失拿网香似斯专石若兵弟谁校读志飞观争究包组造落视济喜离虽坐集编宝谈府拉黑且随格尽剑讲布杀微怕母调局根曾准团段终乐切级克精哪官示冷域底"
+)
+
+# 各平台互动量级（点赞的基准值，其余指标按比例派生）
+ENGAGEMENT_BASE: Dict[str, int] = {
+    "bilibili": 300, "douyin": 800, "kuaishou": 500, "weibo": 150,
+    "xhs": 200, "zhihu": 60, "tieba": 10,
+}
+
+# 小时 -> 发帖活跃度（夜间低谷，午间与晚间高峰）
+HOURLY_ACTIVITY: List[int] = [
+    4, 2, 1, 1, 1, 1, 2, 4, 6, 7, 8, 9, 10, 9, 8, 8, 8, 8, 9, 10, 12, 13, 12, 8,
+]
+
+IP_LOCATIONS = ["北京", "上海", "广东", "浙江", "江苏", "四川", "湖北", "山东", "河南", "湖南", "福建", "陕西", "重庆", "天津", "海外"]
+NEWS_SOURCES = ["weibo", "zhihu", "baidu", "toutiao", "douyin", "bilibili-hot", "thepaper", "36kr"]
+PUNCTUATION = ["，", "，", "，", "。", "。", "！", "？", "…"]
+
+CHINA_TZ = timezone(timedelta(hours=8))
+PARETO_ALPHA = 1.5
+USERS_PER_PLATFORM = 5000
+# 单条内容最多生成的评论数（评论ID按 内容序号*1000+评论序号 分配）
+MAX_COMMENTS_PER_POST = 999
+
+
+def _zipf_cum_weights(size: int, exponent: float = 1.0, shift: float = 2.7) -> List[float]:
+    """Zipf-Mandelbrot 分布的累积权重，第r名的权重为 1/(r+shift)^exponent"""
+    return list(itertools.accumulate(1.0 / (rank + shift) ** exponent for rank in range(1, size + 1)))
+
+
+def build_vocabulary(size: int, seed: int = 0) -> List[str]:
+    """
+    构造按频率排列的词表：常用词在前，其后为由常用汉字随机组合的二至四字长尾词
+
+    Args:
+        size: 词表大小（不小于常用词数量）
+        seed: 随机种子
+    """
+    rng = random.Random(f"vocabulary:{seed}")
+    vocabulary = list(dict.fromkeys(COMMON_WORDS))
+    seen = set(vocabulary) | set(TOPICS)
+    while len(vocabulary) < size:
+        word = "".join(rng.choice(COMMON_CHARS) for _ in range(rng.choice((2, 2, 2, 3, 4))))
+        if word not in seen:
+            seen.add(word)
+            vocabulary.append(word)
+    return vocabulary
+
+
+class SyntheticCorpus:
+    """合成语料的行生成器（不涉及数据库，便于单独测试与复用）"""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        vocabulary_size: int = 20000,
+        days: int = 365,
+        end_time: Optional[datetime] = None,
+        comments_per_post: float = 5.0,
+    ):
+        """
+        Args:
+            seed: 随机种子，相同种子与偏移量生成相同的数据
+            vocabulary_size: 词表大小
+            days: 内容发布时间覆盖最近多少天
+            end_time: 时间范围的终点，默认为当前时间（取整到秒）
+            comments_per_post: 每条内容的平均评论数
+        """
+        self.seed = seed
+        self.days = max(1, days)
+        self.end_time = (end_time or datetime.now()).replace(microsecond=0)
+        self.comments_per_post = comments_per_post
+        self.vocabulary = build_vocabulary(vocabulary_size, seed)
+        self._word_weights = _zipf_cum_weights(len(self.vocabulary), exponent=1.15)
+        self._topic_weights = _zipf_cum_weights(len(TOPICS), exponent=1.1, shift=1.0)
+        self._user_weights = _zipf_cum_weights(USERS_PER_PLATFORM, exponent=0.8)
+        self._user_ranks = list(range(USERS_PER_PLATFORM))
+        self._users: Dict[Tuple[str, int], Tuple[str, str]] = {}
+        self._hours = list(range(24))
+        self._hour_weights = list(itertools.accumulate(HOURLY_ACTIVITY))
+        self._builders: Dict[str, Tuple[Callable, Callable]] = {
+            "bilibili": (self._bilibili_post, self._bilibili_comment),
+            "douyin": (self._douyin_post, self._douyin_comment),
+            "kuaishou": (self._kuaishou_post, self._kuaishou_comment),
+            "weibo": (self._weibo_post, self._weibo_comment),
+            "xhs": (self._xhs_post, self._xhs_comment),
+            "zhihu": (self._zhihu_post, self._zhihu_comment),
+            "tieba": (self._tieba_post, self._tieba_comment),
+        }
+
+    # ---------- 基础抽样 ----------
+
+    def _rng(self, *parts: Any) -> random.Random:
+        return random.Random(":".join(str(p) for p in (self.seed, *parts)))
+
+    def words(self, rng: random.Random, count: int) -> List[str]:
+        """按Zipf分布抽取词语"""
+        return rng.choices(self.vocabulary, cum_weights=self._word_weights, k=count)
+
+    def topic(self, rng: random.Random) -> str:
+        """按流行度抽取话题词"""
+        return rng.choices(TOPICS, cum_weights=self._topic_weights)[0]
+
+    def sentence(self, rng: random.Random, min_words: int, max_words: int, topic: Optional[str] = None,
+                 topic_probability: float = 1.0) -> str:
+        """生成一段文本，按概率在随机位置插入话题词，每隔几个词加入标点"""
+        words = self.words(rng, rng.randint(min_words, max_words))
+        if topic and rng.random() < topic_probability:
+            words.insert(rng.randint(0, len(words)), topic)
+        parts = []
+        for index, word in enumerate(words, 1):
+            parts.append(word)
+            if index < len(words) and rng.random() < 0.12:
+                parts.append(rng.choice(PUNCTUATION))
+        parts.append(rng.choice(("。", "！", "？", "", "~")))
+        return "".join(parts)
+
+    def user(self, rng: random.Random, platform: str) -> Tuple[str, str]:
+        """抽取 (用户ID, 昵称)，少数活跃用户贡献大部分内容"""
+        rank = rng.choices(self._user_ranks, cum_weights=self._user_weights)[0]
+        user = self._users.get((platform, rank))
+        if user is None:
+            user_rng = self._rng("user", platform, rank)
+            nickname = "".join(self.words(user_rng, 2))[:8] + (str(user_rng.randint(0, 9999)) if user_rng.random() < 0.5 else "")
+            user_id = str(10_000_000 + int(hashlib.md5(f"{platform}:{rank}".encode("utf-8")).hexdigest()[:8], 16) % 90_000_000)
+            user = self._users[(platform, rank)] = (user_id, nickname)
+        return user
+
+    def publish_time(self, rng: random.Random) -> datetime:
+        """发布时间：越近越多（指数分布的天数）并带昼夜活跃度"""
+        age = rng.expovariate(3.0 / self.days)
+        if age >= self.days:
+            age = rng.uniform(0, self.days)
+        day = (self.end_time - timedelta(days=int(age))).date()
+        hour = rng.choices(self._hours, cum_weights=self._hour_weights)[0]
+        moment = datetime(day.year, day.month, day.day, hour, rng.randrange(60), rng.randrange(60))
+        return moment if moment <= self.end_time else moment - timedelta(days=1)
+
+    def crawl_ts(self, rng: random.Random, after: datetime) -> Tuple[int, int]:
+        """(add_ts, last_modify_ts) 毫秒时间戳，晚于发布时间且不晚于时间范围终点"""
+        crawled = min(after + timedelta(hours=rng.expovariate(1 / 12)), self.end_time)
+        modified = min(crawled + timedelta(hours=rng.expovariate(1 / 24)), self.end_time)
+        return int(crawled.timestamp() * 1000), int(modified.timestamp() * 1000)
+
+    def virality(self, rng: random.Random) -> float:
+        """内容的传播力（帕累托分布，均值约为3）"""
+        return rng.paretovariate(PARETO_ALPHA)
+
+    def comment_count(self, rng: random.Random, virality: float) -> int:
+        """按传播力分配评论数，均值约为 comments_per_post"""
+        mean_virality = PARETO_ALPHA / (PARETO_ALPHA - 1)
+        expected = self.comments_per_post * virality / mean_virality
+        return min(MAX_COMMENTS_PER_POST, int(expected + rng.random()))
+
+    @staticmethod
+    def _scaled(rng: random.Random, base: float) -> int:
+        return int(base * rng.lognormvariate(0, 0.6))
+
+    # ---------- 行生成 ----------
+
+    def rows(self, platform: str, start: int, count: int):
+        """
+        生成平台的第 [start, start+count) 条内容及其评论
+
+        Yields:
+            (内容行, 评论行列表)
+        """
+        post_builder, comment_builder = self._builders[platform]
+        for index in range(start, start + count):
+            rng = self._rng(platform, index)
+            topic = self.topic(rng)
+            published = self.publish_time(rng)
+            virality = self.virality(rng)
+            post = post_builder(rng, index, topic, published, virality)
+            comments = []
+            for position in range(self.comment_count(rng, virality)):
+                commented = min(published + timedelta(hours=rng.expovariate(1 / 6)), self.end_time)
+                comments.append(comment_builder(rng, index, index * 1000 + position, topic, commented, post))
+            yield post, comments
+
+    def _common_post(self, rng: random.Random, platform: str, topic: str, published: datetime) -> Dict[str, Any]:
+        user_id, nickname = self.user(rng, platform)
+        add_ts, last_modify_ts = self.crawl_ts(rng, published)
+        return {
+            "user_id": user_id,
+            "nickname": nickname,
+            "avatar": f"https://avatar.example.com/{platform}/{user_id}.jpg",
+            "add_ts": add_ts,
+            "last_modify_ts": last_modify_ts,
+            "source_keyword": topic,
+        }
+
+    def _common_comment(self, rng: random.Random, platform: str, topic: str, commented: datetime) -> Tuple[Dict[str, Any], str]:
+        user_id, nickname = self.user(rng, platform)
+        add_ts, last_modify_ts = self.crawl_ts(rng, commented)
+        row = {
+            "user_id": user_id,
+            "nickname": nickname,
+            "avatar": f"https://avatar.example.com/{platform}/{user_id}.jpg",
+            "add_ts": add_ts,
+            "last_modify_ts": last_modify_ts,
+        }
+        return row, self.sentence(rng, 3, 30, topic, topic_probability=0.3)
+
+    def _bilibili_post(self, rng, index, topic, published, virality):
+        row = self._common_post(rng, "bilibili", topic, published)
+        likes = self._scaled(rng, virality * ENGAGEMENT_BASE["bilibili"])
+        video_id = 100_000_000 + index
+        row.update({
+            "user_id": int(row["user_id"]),
+            "video_id": video_id,
+            "video_url": f"https://www.bilibili.com/video/av{video_id}",
+            "video_type": "video",
+            "title": self.sentence(rng, 4, 12, topic, topic_probability=0.8),
+            "desc": self.sentence(rng, 10, 60, topic, topic_probability=0.4),
+            "create_time": int(published.timestamp()),
+            "liked_count": likes,
+            "disliked_count": "0",
+            "video_play_count": str(likes * rng.randint(15, 60)),
+            "video_favorite_count": str(self._scaled(rng, likes * 0.2)),
+            "video_share_count": str(self._scaled(rng, likes * 0.05)),
+            "video_coin_count": str(self._scaled(rng, likes * 0.3)),
+            "video_danmaku": str(self._scaled(rng, likes * 0.4)),
+            "video_comment": str(self._scaled(rng, likes * 0.1)),
+            "video_cover_url": f"https://i0.hdslb.com/bfs/archive/{video_id}.jpg",
+        })
+        return row
+
+    def _bilibili_comment(self, rng, index, comment_id, topic, commented, post):
+        row, content = self._common_comment(rng, "bilibili", topic, commented)
+        row.update({
+            "sex": rng.choice(("男", "女", "保密")),
+            "sign": "",
+            "comment_id": comment_id,
+            "video_id": post["video_id"],
+            "content": content,
+            "create_time": int(commented.timestamp()),
+            "sub_comment_count": str(self._scaled(rng, 0.5)),
+            "parent_comment_id": "0",
+            "like_count": str(self._scaled(rng, 3)),
+        })
+        return row
+
+    def _douyin_post(self, rng, index, topic, published, virality):
+        row = self._common_post(rng, "douyin", topic, published)
+        likes = self._scaled(rng, virality * ENGAGEMENT_BASE["douyin"])
+        aweme_id = 7_000_000_000_000_000_000 + index
+        row.update({
+            "sec_uid": f"MS4wLjABAAAA{row['user_id']}",
+            "short_user_id": row["user_id"][:8],
+            "user_unique_id": f"dy{row['user_id']}",
+            "user_signature": "",
+            "ip_location": rng.choice(IP_LOCATIONS),
+            "aweme_id": aweme_id,
+            "aweme_type": "0",
+            "title": self.sentence(rng, 4, 16, topic, topic_probability=0.8),
+            "desc": f"#{topic} " + self.sentence(rng, 5, 30),
+            "create_time": int(published.timestamp()),
+            "liked_count": str(likes),
+            "comment_count": str(self._scaled(rng, likes * 0.05)),
+            "share_count": str(self._scaled(rng, likes * 0.03)),
+            "collected_count": str(self._scaled(rng, likes * 0.08)),
+            "aweme_url": f"https://www.douyin.com/video/{aweme_id}",
+        })
+        return row
+
+    def _douyin_comment(self, rng, index, comment_id, topic, commented, post):
+        row, content = self._common_comment(rng, "douyin", topic, commented)
+        row.update({
+            "sec_uid": f"MS4wLjABAAAA{row['user_id']}",
+            "short_user_id": row["user_id"][:8],
+            "user_unique_id": f"dy{row['user_id']}",
+            "user_signature": "",
+            "ip_location": rng.choice(IP_LOCATIONS),
+            "comment_id": comment_id,
+            "aweme_id": post["aweme_id"],
+            "content": content,
+            "create_time": int(commented.timestamp()),
+            "sub_comment_count": str(self._scaled(rng, 0.5)),
+            "parent_comment_id": "0",
+            "like_count": str(self._scaled(rng, 5)),
+            "pictures": "",
+        })
+        return row
+
+    def _kuaishou_post(self, rng, index, topic, published, virality):
+        row = self._common_post(rng, "kuaishou", topic, published)
+        likes = self._scaled(rng, virality * ENGAGEMENT_BASE["kuaishou"])
+        video_id = f"3x{index:012d}"
+        row.update({
+            "video_id": video_id,
+            "video_type": "1",
+            "title": self.sentence(rng, 4, 16, topic, topic_probability=0.8),
+            "desc": self.sentence(rng, 5, 30, topic, topic_probability=0.3),
+            "create_time": int(published.timestamp() * 1000),
+            "liked_count": str(likes),
+            "viewd_count": str(likes * rng.randint(20, 80)),
+            "video_url": f"https://www.kuaishou.com/short-video/{video_id}",
+        })
+        return row
+
+    def _kuaishou_comment(self, rng, index, comment_id, topic, commented, post):
+        row, content = self._common_comment(rng, "kuaishou", topic, commented)
+        row.update({
+            "comment_id": comment_id,
+            "video_id": post["video_id"],
+            "content": content,
+            "create_time": int(commented.timestamp() * 1000),
+            "sub_comment_count": str(self._scaled(rng, 0.5)),
+        })
+        return row
+
+    def _weibo_post(self, rng, index, topic, published, virality):
+        row = self._common_post(rng, "weibo", topic, published)
+        likes = self._scaled(rng, virality * ENGAGEMENT_BASE["weibo"])
+        note_id = 5_000_000_000_000_000 + index
+        row.update({
+            "gender": rng.choice(("m", "f")),
+            "profile_url": f"https://m.weibo.cn/u/{row['user_id']}",
+            "ip_location": rng.choice(IP_LOCATIONS),
+            "note_id": note_id,
+            "content": f"#{topic}# " + self.sentence(rng, 8, 70),
+            "create_time": int(published.timestamp()),
+            "create_date_time": str(published.replace(tzinfo=CHINA_TZ)),
+            "liked_count": str(likes),
+            "comments_count": str(self._scaled(rng, likes * 0.2)),
+            "shared_count": str(self._scaled(rng, likes * 0.1)),
+            "note_url": f"https://m.weibo.cn/detail/{note_id}",
+        })
+        return row
+
+    def _weibo_comment(self, rng, index, comment_id, topic, commented, post):
+        row, content = self._common_comment(rng, "weibo", topic, commented)
+        row.update({
+            "gender": rng.choice(("m", "f")),
+            "profile_url": f"https://m.weibo.cn/u/{row['user_id']}",
+            "ip_location": rng.choice(IP_LOCATIONS),
+            "comment_id": comment_id,
+            "note_id": post["note_id"],
+            "content": content,
+            "create_time": int(commented.timestamp()),
+            "create_date_time": str(commented.replace(tzinfo=CHINA_TZ)),
+            "comment_like_count": str(self._scaled(rng, 3)),
+            "sub_comment_count": str(self._scaled(rng, 0.5)),
+            "parent_comment_id": "0",
+        })
+        return row
+
+    def _xhs_post(self, rng, index, topic, published, virality):
+        row = self._common_post(rng, "xhs", topic, published)
+        likes = self._scaled(rng, virality * ENGAGEMENT_BASE["xhs"])
+        note_id = f"{index:024x}"
+        tags = [topic] + [self.topic(rng) for _ in range(rng.randint(0, 3))]
+        published_ms = int(published.timestamp() * 1000)
+        row.update({
+            "ip_location": rng.choice(IP_LOCATIONS),
+            "note_id": note_id,
+            "type": rng.choice(("normal", "normal", "video")),
+            "title": self.sentence(rng, 3, 10, topic, topic_probability=0.7),
+            "desc": self.sentence(rng, 20, 120, topic, topic_probability=0.5),
+            "time": published_ms,
+            "last_update_time": published_ms,
+            "liked_count": str(likes),
+            "collected_count": str(self._scaled(rng, likes * 0.4)),
+            "comment_count": str(self._scaled(rng, likes * 0.08)),
+            "share_count": str(self._scaled(rng, likes * 0.05)),
+            "image_list": "",
+            "tag_list": ",".join(dict.fromkeys(tags)),
+            "note_url": f"https://www.xiaohongshu.com/explore/{note_id}",
+        })
+        return row
+
+    def _xhs_comment(self, rng, index, comment_id, topic, commented, post):
+        row, content = self._common_comment(rng, "xhs", topic, commented)
+        row.update({
+            "ip_location": rng.choice(IP_LOCATIONS),
+            "comment_id": f"{comment_id:024x}",
+            "create_time": int(commented.timestamp() * 1000),
+            "note_id": post["note_id"],
+            "content": content,
+            "sub_comment_count": self._scaled(rng, 0.5),
+            "pictures": "",
+            "parent_comment_id": "",
+            "like_count": str(self._scaled(rng, 4)),
+        })
+        return row
+
+    def _zhihu_post(self, rng, index, topic, published, virality):
+        user_id, nickname = self.user(rng, "zhihu")
+        add_ts, last_modify_ts = self.crawl_ts(rng, published)
+        votes = self._scaled(rng, virality * ENGAGEMENT_BASE["zhihu"])
+        content_id = str(100_000_000 + index)
+        question_id = str(600_000_000 + index // 5)
+        content_text = self.sentence(rng, 40, 300, topic, topic_probability=0.6)
+        return {
+            "content_id": content_id,
+            "content_type": rng.choice(("answer", "answer", "answer", "article")),
+            "content_text": content_text,
+            "content_url": f"https://www.zhihu.com/question/{question_id}/answer/{content_id}",
+            "question_id": question_id,
+            "title": "如何看待" + self.sentence(rng, 2, 8, topic, topic_probability=0.9).rstrip("。！？~") + "？",
+            "desc": content_text[:60],
+            "created_time": str(int(published.timestamp())),
+            "updated_time": str(int(published.timestamp())),
+            "voteup_count": votes,
+            "comment_count": self._scaled(rng, votes * 0.15),
+            "source_keyword": topic,
+            "user_id": user_id,
+            "user_link": f"https://www.zhihu.com/people/{user_id}",
+            "user_nickname": nickname,
+            "user_avatar": f"https://avatar.example.com/zhihu/{user_id}.jpg",
+            "user_url_token": user_id,
+            "add_ts": add_ts,
+            "last_modify_ts": last_modify_ts,
+        }
+
+    def _zhihu_comment(self, rng, index, comment_id, topic, commented, post):
+        user_id, nickname = self.user(rng, "zhihu")
+        add_ts, last_modify_ts = self.crawl_ts(rng, commented)
+        return {
+            "comment_id": str(comment_id),
+            "parent_comment_id": "",
+            "content": self.sentence(rng, 3, 30, topic, topic_probability=0.3),
+            "publish_time": str(int(commented.timestamp())),
+            "ip_location": rng.choice(IP_LOCATIONS),
+            "sub_comment_count": self._scaled(rng, 0.5),
+            "like_count": self._scaled(rng, 3),
+            "dislike_count": 0,
+            "content_id": post["content_id"],
+            "content_type": post["content_type"],
+            "user_id": user_id,
+            "user_link": f"https://www.zhihu.com/people/{user_id}",
+            "user_nickname": nickname,
+            "user_avatar": f"https://avatar.example.com/zhihu/{user_id}.jpg",
+            "add_ts": add_ts,
+            "last_modify_ts": last_modify_ts,
+        }
+
+    def _tieba_post(self, rng, index, topic, published, virality):
+        user_id, nickname = self.user(rng, "tieba")
+        add_ts, last_modify_ts = self.crawl_ts(rng, published)
+        note_id = str(8_000_000_000 + index)
+        replies = self._scaled(rng, virality * ENGAGEMENT_BASE["tieba"])
+        return {
+            "note_id": note_id,
+            "title": self.sentence(rng, 3, 12, topic, topic_probability=0.8),
+            "desc": self.sentence(rng, 10, 80, topic, topic_probability=0.4),
+            "note_url": f"https://tieba.baidu.com/p/{note_id}",
+            "publish_time": published.strftime("%Y-%m-%d %H:%M"),
+            "user_link": f"https://tieba.baidu.com/home/main?id={user_id}",
+            "user_nickname": nickname,
+            "user_avatar": f"https://avatar.example.com/tieba/{user_id}.jpg",
+            "tieba_id": str(TOPICS.index(topic) + 1),
+            "tieba_name": f"{topic}吧",
+            "tieba_link": f"https://tieba.baidu.com/f?kw={topic}",
+            "total_replay_num": replies,
+            "total_replay_page": replies // 30 + 1,
+            "ip_location": rng.choice(IP_LOCATIONS),
+            "add_ts": add_ts,
+            "last_modify_ts": last_modify_ts,
+            "source_keyword": topic,
+        }
+
+    def _tieba_comment(self, rng, index, comment_id, topic, commented, post):
+        user_id, nickname = self.user(rng, "tieba")
+        add_ts, last_modify_ts = self.crawl_ts(rng, commented)
+        return {
+            "comment_id": str(comment_id),
+            "parent_comment_id": "",
+            "content": self.sentence(rng, 3, 30, topic, topic_probability=0.3),
+            "user_link": f"https://tieba.baidu.com/home/main?id={user_id}",
+            "user_nickname": nickname,
+            "user_avatar": f"https://avatar.example.com/tieba/{user_id}.jpg",
+            "tieba_id": post["tieba_id"],
+            "tieba_name": post["tieba_name"],
+            "tieba_link": post["tieba_link"],
+            "publish_time": commented.strftime("%Y-%m-%d %H:%M"),
+            "ip_location": rng.choice(IP_LOCATIONS),
+            "sub_comment_count": self._scaled(rng, 0.5),
+            "note_id": post["note_id"],
+            "note_url": post["note_url"],
+            "add_ts": add_ts,
+            "last_modify_ts": last_modify_ts,
+        }
+
+    def news_rows(self, per_day: int):
+        """生成时间范围内每天的热榜新闻（daily_news）"""
+        start_day = self.end_time.date() - timedelta(days=self.days - 1)
+        for offset in range(self.days):
+            day = start_day + timedelta(days=offset)
+            rng = self._rng("news", day.isoformat())
+            for rank in range(1, per_day + 1):
+                source = rng.choice(NEWS_SOURCES)
+                crawled = datetime(day.year, day.month, day.day, rng.randrange(24), rng.randrange(60))
+                crawl_ms = int(min(crawled, self.end_time).timestamp() * 1000)
+                yield {
+                    "news_id": f"syn-{day:%Y%m%d}-{rank:04d}",
+                    "source_platform": source,
+                    "title": self.sentence(rng, 4, 14, self.topic(rng), topic_probability=0.9)[:500],
+                    "url": f"https://news.example.com/{source}/{day:%Y%m%d}/{rank}",
+                    "description": self.sentence(rng, 10, 40),
+                    "extra_info": None,
+                    "crawl_date": day,
+                    "rank_position": rank,
+                    "add_ts": crawl_ms,
+                    "last_modify_ts": crawl_ms,
+                }
+
+
+def _tables(platforms: Sequence[str], include_news: bool) -> List[Any]:
+    names = [name for platform in platforms for name in PLATFORMS[platform]]
+    if include_news:
+        names.append("daily_news")
+    return [Base.metadata.tables[name] for name in names]
+
+
+async def _insert(engine: AsyncEngine, table, rows: List[Dict[str, Any]]):
+    if rows:
+        async with engine.begin() as conn:
+            await conn.execute(table.insert(), rows)
+
+
+def _create_engine(database_url: str) -> AsyncEngine:
+    engine = create_async_engine(database_url)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine.sync_engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, connection_record):
+            # 批量写入合成数据不需要逐事务落盘
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.close()
+    return engine
+
+
+async def count_posts(database_url: str, platforms: Optional[Sequence[str]] = None) -> int:
+    """
+    已有的合成内容条数（各平台内容表中的最小行数，表不存在时为0），用于在已有语料上继续追加
+    """
+    engine = _create_engine(database_url)
+    try:
+        counts = []
+        async with engine.connect() as conn:
+            existing = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+            for platform in platforms or list(PLATFORMS):
+                table = Base.metadata.tables[PLATFORMS[platform][0]]
+                if table.name not in existing:
+                    return 0
+                counts.append((await conn.execute(select(func.count()).select_from(table))).scalar_one())
+        return min(counts) if counts else 0
+    finally:
+        await engine.dispose()
+
+
+async def generate_corpus(
+    database_url: str,
+    posts_per_platform: int,
+    comments_per_post: float = 5.0,
+    platforms: Optional[Sequence[str]] = None,
+    offset: int = 0,
+    seed: int = 42,
+    days: int = 365,
+    end_time: Optional[datetime] = None,
+    news_per_day: int = 20,
+    batch_size: int = 2000,
+    reset: bool = False,
+) -> Dict[str, int]:
+    """
+    生成合成语料并写入数据库（缺少的表会自动创建）
+
+    Args:
+        database_url: SQLAlchemy异步连接URL，如 sqlite+aiosqlite:///corpus.db
+        posts_per_platform: 本次为每个平台生成的内容条数
+        comments_per_post: 每条内容的平均评论数（按传播力倾斜分配）
+        platforms: 生成的平台，默认为全部七个平台
+        offset: 内容序号起点；追加到已有语料时传入已有条数，保证ID不重复且数据可复现
+        seed: 随机种子
+        days: 发布时间覆盖最近多少天
+        end_time: 时间范围终点，默认为当前时间；追加时应与首次生成保持一致
+        news_per_day: 每天的热榜新闻条数（仅在 offset 为0时生成）
+        batch_size: 每次批量插入的行数
+        reset: 先删除并重建涉及的表
+
+    Returns:
+        表名 -> 本次写入的行数
+    """
+    platforms = list(platforms or PLATFORMS)
+    unknown = [p for p in platforms if p not in PLATFORMS]
+    if unknown:
+        raise ValueError(f"未知的平台: {unknown}")
+
+    corpus = SyntheticCorpus(seed=seed, days=days, end_time=end_time, comments_per_post=comments_per_post)
+    engine = _create_engine(database_url)
+    written: Dict[str, int] = {}
+    try:
+        tables = _tables(platforms, include_news=news_per_day > 0 and offset == 0)
+        async with engine.begin() as conn:
+            if reset:
+                names = [table.name for table in tables]
+                await conn.run_sync(lambda sync_conn: drop_fts_indexes(sync_conn, names))
+                await conn.run_sync(lambda sync_conn: Base.metadata.drop_all(sync_conn, tables=tables))
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(create_fts_indexes)
+
+        for platform in platforms:
+            content_table, comment_table = (Base.metadata.tables[name] for name in PLATFORMS[platform])
+            posts, comments = [], []
+            written[content_table.name] = written[comment_table.name] = 0
+            started = time.perf_counter()
+            for post, post_comments in corpus.rows(platform, offset, posts_per_platform):
+                posts.append(post)
+                comments.extend(post_comments)
+                if len(posts) >= batch_size:
+                    await _insert(engine, content_table, posts)
+                    written[content_table.name] += len(posts)
+                    posts = []
+                if len(comments) >= batch_size:
+                    await _insert(engine, comment_table, comments)
+                    written[comment_table.name] += len(comments)
+                    comments = []
+            await _insert(engine, content_table, posts)
+            await _insert(engine, comment_table, comments)
+            written[content_table.name] += len(posts)
+            written[comment_table.name] += len(comments)
+            logger.info(
+                f"[synthetic_corpus] {platform}: 内容 {written[content_table.name]} 条, "
+                f"评论 {written[comment_table.name]} 条, 耗时 {time.perf_counter() - started:.1f}s"
+            )
+
+        if news_per_day > 0 and offset == 0:
+            news_table = Base.metadata.tables["daily_news"]
+            news = list(corpus.news_rows(news_per_day))
+            for start in range(0, len(news), batch_size):
+                await _insert(engine, news_table, news[start:start + batch_size])
+            written[news_table.name] = len(news)
+    finally:
+        await engine.dispose()
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="为 MindSpider 表生成合成的舆情内容与评论")
+    parser.add_argument("--url", help="SQLAlchemy异步连接URL，默认使用 MindSpider 配置中的数据库")
+    parser.add_argument("--posts", type=int, required=True, help="每个平台生成的内容条数")
+    parser.add_argument("--comments-per-post", type=float, default=5.0, help="每条内容的平均评论数")
+    parser.add_argument("--platforms", default=",".join(PLATFORMS), help="逗号分隔的平台列表")
+    parser.add_argument("--offset", type=int, default=None, help="内容序号起点，默认接在已有语料之后")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--days", type=int, default=365, help="发布时间覆盖最近多少天")
+    parser.add_argument("--end-date", help="时间范围终点 YYYY-MM-DD（默认当前时间）；追加数据时应与首次生成一致")
+    parser.add_argument("--news-per-day", type=int, default=20, help="每天的热榜新闻条数")
+    parser.add_argument("--batch-size", type=int, default=2000, help="每次批量插入的行数")
+    parser.add_argument("--reset", action="store_true", help="先删除并重建涉及的表（会清空已有数据）")
+    args = parser.parse_args(argv)
+
+    database_url = args.url
+    if not database_url:
+        from init_database import _build_database_url
+        database_url = _build_database_url()
+    platforms = [p.strip() for p in args.platforms.split(",") if p.strip()]
+    end_time = datetime.strptime(args.end_date, "%Y-%m-%d") + timedelta(days=1, seconds=-1) if args.end_date else None
+
+    offset = args.offset
+    if offset is None:
+        offset = 0 if args.reset else asyncio.run(count_posts(database_url, platforms))
+    written = asyncio.run(generate_corpus(
+        database_url, args.posts, comments_per_post=args.comments_per_post, platforms=platforms,
+        offset=offset, seed=args.seed, days=args.days, end_time=end_time,
+        news_per_day=args.news_per_day, batch_size=args.batch_size, reset=args.reset,
+    ))
+    logger.info(f"[synthetic_corpus] 生成完成（内容序号起点 {offset}）: {written}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,6 @@
 LLM module for the Query Engine.
 """
 
-from .base import LLMClient
+from .base import LLMClient, LLMResponseCache
 
-__all__ = ["LLMClient"]
+__all__ = ["LLMClient", "LLMResponseCache"]
@@ -16,7 +16,8 @@ from ..utils.text_processing import (
     clean_json_tags,
     extract_clean_response,
     fix_incomplete_json,
-    format_search_results_for_prompt
+    format_search_results_for_prompt,
+    to_prompt_json
 )
 
 # 导入论坛读取工具
@@ -90,12 +91,12 @@ class FirstSummaryNode(StateMutationNode):
                     logger.exception(f"读取HOST发言失败: {str(e)}")
             
             # 转换为JSON字符串
-            message = json.dumps(data, ensure_ascii=False)
+            message = to_prompt_json(data)
             
-            # 如果有HOST发言，添加到消息前面作为参考
+            # 如果有HOST发言，添加到消息末尾作为参考（发言随论坛变化，放在末尾以保持前缀稳定）
             if FORUM_READER_AVAILABLE and 'host_speech' in data and data['host_speech']:
                 formatted_host = format_host_speech_for_prompt(data['host_speech'])
-                message = formatted_host + "\n" + message
+                message = message + "\n" + formatted_host
             
             logger.info("正在生成首次段落总结")
             
@@ -103,6 +104,7 @@ class FirstSummaryNode(StateMutationNode):
             response = self.llm_client.stream_invoke_to_string(
                 SYSTEM_PROMPT_FIRST_SUMMARY,
                 message,
+                cache_node=self.node_name,
             )
             
             # 处理响应
@@ -258,12 +260,12 @@ class ReflectionSummaryNode(StateMutationNode):
                     logger.exception(f"读取HOST发言失败: {str(e)}")
             
             # 转换为JSON字符串
-            message = json.dumps(data, ensure_ascii=False)
+            message = to_prompt_json(data)
             
-            # 如果有HOST发言，添加到消息前面作为参考
+            # 如果有HOST发言，添加到消息末尾作为参考（发言随论坛变化，放在末尾以保持前缀稳定）
             if FORUM_READER_AVAILABLE and 'host_speech' in data and data['host_speech']:
                 formatted_host = format_host_speech_for_prompt(data['host_speech'])
-                message = formatted_host + "\n" + message
+                message = message + "\n" + formatted_host
             
             logger.info("正在生成反思总结")
             
@@ -271,6 +273,7 @@ class ReflectionSummaryNode(StateMutationNode):
             response = self.llm_client.stream_invoke_to_string(
                 SYSTEM_PROMPT_REFLECTION_SUMMARY,
                 message,
+                cache_node=self.node_name,
             )
             
             # 处理响应
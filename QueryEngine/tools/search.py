@@ -32,7 +32,8 @@ utils_dir = os.path.join(root_dir, 'utils')
 if utils_dir not in sys.path:
     sys.path.append(utils_dir)
 
-from retry_helper import with_graceful_retry, SEARCH_API_RETRY_CONFIG
+from retry_helper import with_graceful_retry, get_provider_guard, SEARCH_API_RETRY_CONFIG
+from run_metrics import span
 from dataclasses import dataclass, field
 
 # 运行前请确保已安装Tavily库: pip install tavily-python
@@ -80,25 +81,29 @@ class TavilyNewsAgency:
     每个公共方法都设计为供 AI Agent 独立调用的工具。
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, requests_per_minute: int = 0):
         """
         初始化客户端。
         Args:
             api_key: Tavily API密钥，若不提供则从环境变量 TAVILY_API_KEY 读取。
+            requests_per_minute: 进程内所有Tavily客户端共享的每分钟请求数上限，0表示不限制。
         """
         if api_key is None:
             api_key = os.getenv("TAVILY_API_KEY")
             if not api_key:
                 raise ValueError("Tavily API Key未找到！请设置TAVILY_API_KEY环境变量或在初始化时提供")
         self._client = TavilyClient(api_key=api_key)
+        self.guard = get_provider_guard("tavily", requests_per_minute)
 
-    @with_graceful_retry(SEARCH_API_RETRY_CONFIG, default_return=TavilyResponse(query="搜索失败"))
+    @with_graceful_retry(SEARCH_API_RETRY_CONFIG, default_return=TavilyResponse(query="搜索失败"),
+                         guard=lambda self, *args, **kwargs: self.guard)
     def _search_internal(self, **kwargs) -> TavilyResponse:
         """内部通用的搜索执行器，所有工具最终都调用此方法"""
         try:
             kwargs['topic'] = 'general'
             api_params = {k: v for k, v in kwargs.items() if v is not None}
-            response_dict = self._client.search(**api_params)
+            with span("search.api", provider="tavily"):
+                response_dict = self._client.search(**api_params)
             
             search_results = [
                 SearchResult(
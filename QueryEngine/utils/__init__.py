@@ -9,7 +9,10 @@ from .text_processing import (
     remove_reasoning_from_output,
     extract_clean_response,
     update_state_with_search_results,
-    format_search_results_for_prompt
+    format_search_results_for_prompt,
+    estimate_tokens,
+    pack_results_to_token_budget,
+    to_prompt_json
 )
 
 from .config import Settings
@@ -21,5 +24,8 @@ __all__ = [
     "extract_clean_response",
     "update_state_with_search_results",
     "format_search_results_for_prompt",
+    "estimate_tokens",
+    "pack_results_to_token_budget",
+    "to_prompt_json",
     "Settings",
 ]
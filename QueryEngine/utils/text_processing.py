@@ -3,10 +3,12 @@
 用于清理LLM输出、解析JSON等
 """
 
+import math
 import re
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Sequence
 from json.decoder import JSONDecodeError
+from loguru import logger
 
 
 def clean_json_tags(text: str) -> str:
@@ -286,13 +288,15 @@ def truncate_content(content: str, max_length: int = 20000) -> str:
 
 
 def format_search_results_for_prompt(search_results: List[Dict[str, Any]], 
-                                   max_length: int = 20000) -> List[str]:
+                                   max_length: int = 20000,
+                                   token_budget: int = 0) -> List[str]:
     """
     格式化搜索结果用于提示词
     
     Args:
-        search_results: 搜索结果列表
+        search_results: 搜索结果列表（按重要性降序）
         max_length: 每个结果的最大长度
+        token_budget: 全部结果的token预算，0表示不限制
         
     Returns:
         格式化后的内容列表
@@ -305,4 +309,130 @@ def format_search_results_for_prompt(search_results: List[Dict[str, Any]],
             truncated_content = truncate_content(content, max_length)
             formatted_results.append(truncated_content)
     
-    return formatted_results
+    if token_budget <= 0:
+        return formatted_results
+    
+    original_tokens = sum(estimate_tokens(result) for result in formatted_results)
+    packed_results = pack_results_to_token_budget(formatted_results, token_budget)
+    packed_tokens = sum(estimate_tokens(result) for result in packed_results)
+    logger.info(
+        f"  - 搜索结果提示词: {len(packed_results)}/{len(formatted_results)} 条，"
+        f"约 {packed_tokens} tokens（原始约 {original_tokens}，预算 {token_budget}）"
+    )
+    return packed_results
+
+
+# 中日韩文字及全角符号，按每字约1个token估算
+_CJK_PATTERN = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    本地快速估算文本的token数（不依赖具体模型的分词器）
+    
+    中日韩文字及全角符号按每字1个token计，其余字符按每4个字符1个token计。
+    
+    Args:
+        text: 输入文本
+        
+    Returns:
+        估算的token数
+    """
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    return cjk_count + math.ceil((len(text) - cjk_count) / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    按估算的token数截断文本尾部
+    
+    Args:
+        text: 输入文本
+        max_tokens: 最大token数
+        
+    Returns:
+        截断后的文本（发生截断时以"..."结尾）
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # 以1/4个token为单位累计，预留1个token给省略号
+    budget = max(max_tokens - 1, 0) * 4
+    used = 0
+    for i, char in enumerate(text):
+        used += 4 if _CJK_PATTERN.match(char) else 1
+        if used > budget:
+            return text[:i] + "..."
+    return text
+
+
+def pack_results_to_token_budget(formatted_results: List[str], token_budget: int,
+                                 min_tokens_per_result: int = 128) -> List[str]:
+    """
+    将已按重要性排序的搜索结果装入token预算
+    
+    全部结果装得下时原样返回；否则在预算不足以给每条结果至少 min_tokens_per_result 时，
+    先丢弃排名靠后的结果；
+    剩余预算按公平份额分配：不超过份额的短结果完整保留，超出份额的长结果从尾部截断，
+    短结果省下的预算由其余结果均分。
+    
+    Args:
+        formatted_results: 格式化后的结果文本，按重要性降序
+        token_budget: token预算，0表示不限制
+        min_tokens_per_result: 每条保留结果至少分到的token数
+        
+    Returns:
+        装入预算后的结果文本
+    """
+    if token_budget <= 0 or not formatted_results:
+        return formatted_results
+    
+    sizes = [estimate_tokens(result) for result in formatted_results]
+    if sum(sizes) <= token_budget:
+        return formatted_results
+    
+    max_count = max(1, token_budget // max(1, min_tokens_per_result))
+    results = formatted_results[:max_count]
+    sizes = sizes[:max_count]
+    if sum(sizes) <= token_budget:
+        return results
+    
+    # 从最短的结果开始分配，每条最多分到剩余预算的平均值
+    caps = [0] * len(results)
+    remaining = token_budget
+    by_size = sorted(range(len(results)), key=lambda i: sizes[i])
+    for position, index in enumerate(by_size):
+        share = remaining // (len(by_size) - position)
+        caps[index] = min(sizes[index], share)
+        remaining -= caps[index]
+    
+    return [
+        result if sizes[i] <= caps[i] else truncate_to_tokens(result, caps[i])
+        for i, result in enumerate(results)
+    ]
+
+
+# 随调用变化的输入字段，序列化时排在静态字段之后
+VOLATILE_PROMPT_FIELDS = ("paragraph_latest_state", "search_query", "search_results", "host_speech")
+
+
+def to_prompt_json(data: Any, volatile_keys: Sequence[str] = VOLATILE_PROMPT_FIELDS) -> str:
+    """
+    将节点输入序列化为紧凑JSON，静态字段在前、易变字段在后
+    
+    服务商的提示词前缀缓存按字节匹配，把段落标题、预期内容等静态字段放在前面，
+    同一段落的多次调用（如多轮反思）可以复用系统提示词之后的更长前缀。
+    
+    Args:
+        data: 节点输入（字典或列表）
+        volatile_keys: 需要移到末尾的字段，按给定顺序排列
+        
+    Returns:
+        JSON字符串
+    """
+    if isinstance(data, dict):
+        ordered = {key: value for key, value in data.items() if key not in volatile_keys}
+        ordered.update((key, data[key]) for key in volatile_keys if key in data)
+        data = ordered
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
@@ -46,18 +46,18 @@ class HTMLGenerationNode(StateMutationNode):
         logger.info("开始生成HTML报告...")
         
         try:
-            # 准备LLM输入数据
+            # 准备LLM输入数据（模板内容在多次运行间不变，放在最前面，便于命中服务商的提示词前缀缓存）
             llm_input = {
+                "selected_template": input_data.get('selected_template', ''),
                 "query": input_data.get('query', ''),
                 "query_engine_report": input_data.get('query_engine_report', ''),
                 "media_engine_report": input_data.get('media_engine_report', ''),
                 "insight_engine_report": input_data.get('insight_engine_report', ''),
-                "forum_logs": input_data.get('forum_logs', ''),
-                "selected_template": input_data.get('selected_template', '')
+                "forum_logs": input_data.get('forum_logs', '')
             }
             
-            # 转换为JSON格式传递给LLM
-            message = json.dumps(llm_input, ensure_ascii=False, indent=2)
+            # 转换为紧凑JSON格式传递给LLM
+            message = json.dumps(llm_input, ensure_ascii=False, separators=(",", ":"))
             
             # 调用LLM生成HTML
             response = self.llm_client.stream_invoke_to_string(SYSTEM_PROMPT_HTML_GENERATION, message)
@@ -103,15 +103,16 @@ class TemplateSelectionNode(BaseNode):
                 forum_content = forum_logs
             forum_summary += forum_content
         
-        user_message = f"""查询内容: {query}
+        # 模板列表在多次运行间不变，放在最前面，便于命中服务商的提示词前缀缓存
+        user_message = f"""可用模板:
+{template_list}
+
+查询内容: {query}
 
 报告数量: {len(reports)} 个分析引擎报告
 论坛日志: {'有' if forum_logs else '无'}
 {reports_summary}{forum_summary}
 
-可用模板:
-{template_list}
-
 请根据查询内容、报告内容和论坛日志的具体情况，选择最合适的模板。"""
         
         # 调用LLM
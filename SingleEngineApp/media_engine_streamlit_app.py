@@ -51,11 +51,13 @@ def main():
         query_params = st.query_params
         auto_query = query_params.get('query', '')
         auto_search = query_params.get('auto_search', 'false').lower() == 'true'
+        auto_resume = query_params.get('resume', 'false').lower() == 'true'
     except AttributeError:
         # 兼容旧版本
         query_params = st.experimental_get_query_params()
         auto_query = query_params.get('query', [''])[0]
         auto_search = query_params.get('auto_search', ['false'])[0].lower() == 'true'
+        auto_resume = query_params.get('resume', ['false'])[0].lower() == 'true'
 
     # ----- 配置被硬编码 -----
     # 强制使用 Gemini
@@ -79,6 +81,13 @@ def main():
         label_visibility="hidden"
     )
 
+    # 断点续跑：从同一查询的检查点日志恢复，已完成的搜索与总结不会重新计算
+    resume = st.checkbox(
+        "从上次中断处继续",
+        value=auto_resume,
+        help="读取该查询上次运行写入的检查点日志，跳过已完成的段落"
+    )
+
     # 自动搜索逻辑
     start_research = False
     query = auto_query
@@ -122,11 +131,11 @@ def main():
         )
 
         # 执行研究
-        execute_research(query, config)
+        execute_research(query, config, resume)
 
 
-def execute_research(query: str, config: Settings):
-    """执行研究"""
+def execute_research(query: str, config: Settings, resume: bool = False):
+    """执行研究（经由 agent.research，以便写入检查点日志和运行指标）"""
     try:
         # 创建进度条
         progress_bar = st.progress(0)
@@ -139,38 +148,19 @@ def execute_research(query: str, config: Settings):
 
         progress_bar.progress(10)
 
-        # 生成报告结构
-        status_text.text("正在生成报告结构...")
-        agent._generate_report_structure(query)
-        progress_bar.progress(20)
-
-        # 处理段落
-        total_paragraphs = len(agent.state.paragraphs)
-        for i in range(total_paragraphs):
-            status_text.text(f"正在处理段落 {i + 1}/{total_paragraphs}: {agent.state.paragraphs[i].title}")
-
-            # 初始搜索和总结
-            agent._initial_search_and_summary(i)
-            progress_value = 20 + (i + 0.5) / total_paragraphs * 60
-            progress_bar.progress(int(progress_value))
-
-            # 反思循环
-            agent._reflection_loop(i)
-            agent.state.paragraphs[i].research.mark_completed()
-
-            progress_value = 20 + (i + 1) / total_paragraphs * 60
-            progress_bar.progress(int(progress_value))
-
-        # 生成最终报告
-        status_text.text("正在生成最终报告...")
-        logger.info("正在生成最终报告...")
-        final_report = agent._generate_final_report()
-        progress_bar.progress(90)
-
-        # 保存报告
-        status_text.text("正在保存报告...")
-        logger.info("正在保存报告...")
-        agent._save_report(final_report)
+        # 生成报告结构、并行处理段落、生成并保存最终报告
+        # 进度回调在当前线程中执行，可直接更新页面组件
+        status_text.text("正在从检查点恢复..." if resume else "正在生成报告结构...")
+
+        def on_paragraph_done(completed: int, total: int):
+            if completed < total:
+                status_text.text(f"已完成段落 {completed}/{total}")
+            else:
+                status_text.text("正在生成最终报告...")
+            progress_bar.progress(int(20 + completed / total * 70))
+
+        final_report = agent.research(query, save_report=True, resume=resume,
+                                      progress_callback=on_paragraph_done)
         progress_bar.progress(100)
 
         status_text.text("研究完成！")
@@ -0,0 +1,18 @@
+"""
+pytest公共配置
+
+导入InsightEngine包时会创建全局关键词优化器，需要一个占位密钥；在收集任何测试模块之前设置，
+并重新加载配置使其生效。
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("KEYWORD_OPTIMIZER_API_KEY", "test-key")
+import config
+config.reload_settings()
@@ -0,0 +1,114 @@
+"""
+测试LLMClient的异步调用
+
+覆盖：
+1. ainvoke 返回与同步 invoke 相同的解析结果
+2. astream_invoke 逐块返回流式内容
+3. 同一服务商的异步并发请求数受 max_concurrency 限制
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.llms import LLMClient
+
+BASE_URL = "https://llm.example.test/v1"
+
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    }
+
+
+def _stream_body(pieces) -> bytes:
+    lines = []
+    for piece in pieces:
+        chunk = {
+            "id": "chatcmpl-test",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "test-model",
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+        }
+        lines.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+class TestAsyncLLMClient:
+    """测试异步LLM调用"""
+
+    def setup_method(self):
+        """创建指向本地模拟服务的客户端"""
+        self.llm = LLMClient(api_key="test-key", model_name="test-model", base_url=BASE_URL, max_concurrency=2)
+        self.active = 0
+        self.peak = 0
+
+    async def _handler(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        if payload.get("stream"):
+            return httpx.Response(200, content=_stream_body(["舆情", "分析"]), headers={"content-type": "text/event-stream"})
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        return httpx.Response(200, json=_completion(f"  {payload['messages'][0]['content']}  "))
+
+    def _install_async_client(self):
+        transport = httpx.MockTransport(self._handler)
+        self.llm._async_clients[asyncio.get_running_loop()] = AsyncOpenAI(
+            api_key="test-key", base_url=BASE_URL, max_retries=0, http_client=httpx.AsyncClient(transport=transport)
+        )
+
+    def test_ainvoke_matches_sync(self):
+        """测试异步调用与同步调用解析结果一致"""
+        self.llm.client = OpenAI(
+            api_key="test-key",
+            base_url=BASE_URL,
+            max_retries=0,
+            http_client=httpx.Client(transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, json=_completion("  系统  "))
+            )),
+        )
+
+        async def run():
+            self._install_async_client()
+            return await self.llm.ainvoke("系统", "用户")
+
+        assert asyncio.run(run()) == self.llm.invoke("系统", "用户") == "系统"
+
+    def test_astream_invoke(self):
+        """测试异步流式调用"""
+        async def run():
+            self._install_async_client()
+            pieces = [piece async for piece in self.llm.astream_invoke("系统", "用户")]
+            full = await self.llm.astream_invoke_to_string("系统", "用户")
+            return pieces, full
+
+        pieces, full = asyncio.run(run())
+        assert pieces == ["舆情", "分析"]
+        assert full == "舆情分析"
+
+    def test_concurrency_limit(self):
+        """测试同一服务商的并发请求不超过max_concurrency"""
+        async def run():
+            self._install_async_client()
+            return await asyncio.gather(*(self.llm.ainvoke(f"请求{i}", "") for i in range(6)))
+
+        results = asyncio.run(run())
+        assert results == [f"请求{i}" for i in range(6)]
+        assert self.peak == 2
@@ -0,0 +1,125 @@
+"""
+测试外部调用的录制与回放
+
+覆盖：
+1. 录制LLM流式响应后，回放时不访问服务也得到相同结果，且匹配不受当前时间影响
+2. 请求变化时按同一接口的录制顺序回退，没有录制记录时抛出CassetteMiss
+3. requests请求（Tavily、博查）的回放与密钥字段的剔除
+4. 数据库查询方法的录制与回放（保留datetime、Decimal类型）
+"""
+
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import httpx
+import pytest
+import requests
+from openai import OpenAI
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+
+from cassette import Cassette, CassetteMiss, CassetteSession, request_key
+from InsightEngine.llms import LLMClient
+
+BASE_URL = "https://llm.example.test/v1"
+
+SSE_BODY = (
+    'data: {"id":"c","object":"chat.completion.chunk","created":0,"model":"m",'
+    '"choices":[{"index":0,"delta":{"content":"录制"},"finish_reason":null}]}\n\n'
+    'data: {"id":"c","object":"chat.completion.chunk","created":0,"model":"m",'
+    '"choices":[{"index":0,"delta":{"content":"的回答"},"finish_reason":"stop"}]}\n\n'
+    "data: [DONE]\n\n"
+)
+
+
+class FakeDB:
+    """代替MediaCrawlerDB的查询类"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _execute_query(self, query, params=None):
+        self.calls += 1
+        return [{"id": 1, "create_time": datetime(2025, 1, 2, 3, 4, 5), "score": Decimal("1.50")}]
+
+
+class TestCassette:
+    """测试磁带的录制与回放"""
+
+    def setup_method(self):
+        """创建指向本地模拟服务的LLM客户端，并记录实际请求次数"""
+        self.requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=SSE_BODY.encode("utf-8"))
+
+        self.llm = LLMClient(api_key="secret-key", model_name="m", base_url=BASE_URL)
+        self.llm.client = OpenAI(
+            api_key="secret-key", base_url=BASE_URL, max_retries=0,
+            http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        )
+
+    def test_stream_record_and_replay(self, tmp_path):
+        """测试流式响应录制后离线回放"""
+        path = str(tmp_path / "run.jsonl")
+        with CassetteSession(Cassette(path), mode="record"):
+            assert self.llm.stream_invoke_to_string("系统", "问题") == "录制的回答"
+        assert len(self.requests) == 1
+        assert "secret-key" not in Path(path).read_text(encoding="utf-8")
+
+        cassette = Cassette(path)
+        with CassetteSession(cassette, mode="replay"):
+            assert self.llm.stream_invoke_to_string("系统", "问题") == "录制的回答"
+        assert len(self.requests) == 1
+        assert cassette.stats["hits"] == 1
+
+    def test_fallback_and_miss(self, tmp_path):
+        """测试提示词变化时按接口回退，未录制的接口抛出CassetteMiss"""
+        path = str(tmp_path / "run.jsonl")
+        with CassetteSession(Cassette(path), mode="record"):
+            self.llm.stream_invoke_to_string("系统", "问题")
+
+        cassette = Cassette(path)
+        with CassetteSession(cassette, mode="replay"):
+            assert self.llm.stream_invoke_to_string("系统", "改写后的问题") == "录制的回答"
+            with pytest.raises(CassetteMiss):
+                httpx.Client().get("https://llm.example.test/v1/models")
+        assert cassette.stats["fallbacks"] == 1
+
+    def test_requests_replay(self, tmp_path):
+        """测试requests请求按请求体回放，api_key不参与匹配"""
+        cassette = Cassette(str(tmp_path / "search.jsonl"))
+        target = "POST /search"
+        cassette.record(
+            target, request_key(target, {"query": "武汉大学"}), {"query": "武汉大学", "api_key": "tvly"},
+            {"status": 200, "headers": [["content-type", "application/json"]], "body": '{"results": [{"title": "标题"}]}'},
+            0.2,
+        )
+        assert '"tvly"' not in Path(cassette.path).read_text(encoding="utf-8")
+
+        with CassetteSession(cassette, mode="replay"):
+            response = requests.post("https://api.tavily.com/search", json={"query": "武汉大学", "api_key": "other"})
+        assert response.json() == {"results": [{"title": "标题"}]}
+        assert cassette.stats["hits"] == 1
+
+    def test_patch_method(self, tmp_path):
+        """测试数据库查询方法的录制与回放"""
+        path = str(tmp_path / "db.jsonl")
+        db = FakeDB()
+        with CassetteSession(Cassette(path), mode="record") as session:
+            session.patch_method(FakeDB, "_execute_query")
+            recorded = db._execute_query("SELECT 1", (1,))
+
+        with CassetteSession(Cassette(path), mode="replay") as session:
+            session.patch_method(FakeDB, "_execute_query")
+            assert db._execute_query("SELECT 1", (1,)) == recorded
+        assert db.calls == 1
+        # 离开上下文后恢复原方法
+        db._execute_query("SELECT 1", (1,))
+        assert db.calls == 2
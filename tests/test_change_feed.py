@@ -0,0 +1,183 @@
+"""
+测试爬虫入库变更表与变更流消费
+
+覆盖：
+1. MediaCrawler 的入库会话在同一事务中记录插入与真实发生的更新（包括小红书存储使用的批量 update 语句），回滚时一并撤销
+2. 变更流按ID分批读取、合并重复变更、在未满足安全延迟的变更处截断，并保存消费者游标
+3. 趋势汇总与语义索引服务开启 CHANGE_FEED_ENABLED 后只处理变更流中新插入的记录
+"""
+
+import asyncio
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+sys.path.insert(0, str(project_root / "MindSpider" / "schema"))
+# MediaCrawler 的 database 包（放在末尾，避免遮蔽同名模块）
+sys.path.append(str(project_root / "MindSpider" / "DeepSentimentCrawling" / "MediaCrawler"))
+
+from database.models import Base as CrawlerBase, CrawlOutbox, WeiboNote, XhsNote
+from database.outbox import OutboxSession
+from synthetic_corpus import generate_corpus
+from InsightEngine.tools.change_feed import ChangeFeed, OP_INSERT, consumer_lag
+from InsightEngine.tools.semantic_index import SemanticIndexer
+from InsightEngine.tools.topic_rollup import TopicRollupService
+from InsightEngine.utils.config import settings
+
+
+class HashingEmbedder:
+    """按字符二元组哈希的确定性嵌入，代替需要下载的Qwen3模型"""
+
+    model_name = "hashing-bigram"
+    dim = 32
+
+    def encode(self, texts, is_query=False):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for i in range(max(1, len(text) - 1)):
+                digest = hashlib.md5(text[i:i + 2].encode("utf-8")).digest()
+                vectors[row, digest[0] % self.dim] += 1.0
+        return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+
+class TestCrawlOutbox:
+    """测试入库会话写入变更表"""
+
+    def test_session_records_changes(self, tmp_path):
+        """测试插入、更新、无变化的更新与回滚"""
+
+        async def scenario():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'crawler.db'}")
+            async with engine.begin() as conn:
+                await conn.run_sync(CrawlerBase.metadata.create_all)
+            factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, sync_session_class=OutboxSession)
+
+            async with factory() as session:
+                session.add_all([WeiboNote(note_id="n1", content="a", liked_count="1"),
+                                 WeiboNote(note_id="n2", content="b", liked_count="2")])
+                await session.commit()
+            async with factory() as session:
+                note = (await session.execute(select(WeiboNote).where(WeiboNote.note_id == "n1"))).scalar_one()
+                note.liked_count = "5"
+                other = (await session.execute(select(WeiboNote).where(WeiboNote.note_id == "n2"))).scalar_one()
+                other.liked_count = "2"  # 值未变化，不记录
+                await session.commit()
+            async with factory() as session:
+                session.add(WeiboNote(note_id="n3", content="c"))
+                await session.flush()
+                await session.rollback()
+
+            async with factory() as session:
+                rows = (await session.execute(select(CrawlOutbox).order_by(CrawlOutbox.id))).scalars().all()
+                notes = {n.note_id: n.id for n in (await session.execute(select(WeiboNote))).scalars()}
+            await engine.dispose()
+            return [(r.source_table, r.source_id, r.op) for r in rows], notes
+
+        records, notes = asyncio.run(scenario())
+        assert sorted(records[:2]) == [("weibo_note", notes["n1"], "insert"), ("weibo_note", notes["n2"], "insert")]
+        assert records[2:] == [("weibo_note", notes["n1"], "update")]
+        assert "n3" not in notes
+
+    def test_bulk_update_recorded(self, tmp_path):
+        """测试小红书存储的 update(XhsNote) 语句也写入变更表"""
+
+        async def scenario():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'crawler.db'}")
+            async with engine.begin() as conn:
+                await conn.run_sync(CrawlerBase.metadata.create_all)
+            factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, sync_session_class=OutboxSession)
+
+            async with factory() as session:
+                session.add_all([XhsNote(note_id="x1", liked_count="1"), XhsNote(note_id="x2", liked_count="2")])
+                await session.commit()
+            async with factory() as session:
+                # 与 XhsDbStoreImplement.update_content 相同的写法
+                await session.execute(update(XhsNote).where(XhsNote.note_id == "x2").values(liked_count="9"))
+                await session.execute(update(XhsNote).where(XhsNote.note_id == "missing").values(liked_count="9"))
+                await session.commit()
+            async with factory() as session:
+                await session.execute(update(XhsNote).where(XhsNote.note_id == "x1").values(liked_count="7"))
+                await session.rollback()
+
+            async with factory() as session:
+                rows = (await session.execute(select(CrawlOutbox).order_by(CrawlOutbox.id))).scalars().all()
+                notes = {n.note_id: (n.id, n.liked_count) for n in (await session.execute(select(XhsNote))).scalars()}
+            await engine.dispose()
+            return [(r.source_table, r.source_id, r.op) for r in rows], notes
+
+        records, notes = asyncio.run(scenario())
+        assert records[2:] == [("xhs_note", notes["x2"][0], "update")]
+        assert notes["x1"][1] == "1" and notes["x2"][1] == "9"
+
+
+class TestChangeFeed:
+    """测试变更流读取与消费"""
+
+    def test_feed_and_consumers(self, tmp_path, monkeypatch):
+        """测试分批读取与游标，以及汇总和语义索引只处理新插入的记录"""
+        db_path = tmp_path / "corpus.db"
+        url = f"sqlite+aiosqlite:///{db_path}"
+        asyncio.run(generate_corpus(url, 30, comments_per_post=2, platforms=["weibo", "bilibili"], days=5, news_per_day=0))
+        monkeypatch.setenv("DATABASE_URL", url)
+        monkeypatch.setattr(settings, "CHANGE_FEED_ENABLED", True)
+        monkeypatch.setattr(settings, "CHANGE_FEED_SAFETY_LAG", 60.0)
+        monkeypatch.setattr(settings, "SEMANTIC_INDEX_DIR", str(tmp_path / "index"))
+
+        old_ts = int((time.time() - 3600) * 1000)
+        engine = create_engine(f"sqlite:///{db_path}")
+        with engine.begin() as conn:
+            note_ids = list(conn.execute(text("SELECT id FROM weibo_note ORDER BY id LIMIT 6")).scalars())
+            video_ids = list(conn.execute(text("SELECT id FROM bilibili_video ORDER BY id LIMIT 2")).scalars())
+            changes = [("weibo_note", i, "insert", old_ts) for i in note_ids[:4]]
+            changes += [("weibo_note", note_ids[0], "update", old_ts), ("weibo_note", note_ids[4], "update", old_ts)]
+            changes += [("bilibili_video", i, "insert", old_ts) for i in video_ids]
+            # 未满足安全延迟的变更之后的记录也暂不读取
+            changes += [("weibo_note", note_ids[5], "insert", int(time.time() * 1000)), ("bilibili_video", 999, "insert", old_ts)]
+            conn.execute(text("INSERT INTO crawl_outbox (source_table, source_id, op, ts) VALUES (:t, :i, :o, :ts)"),
+                         [{"t": t, "i": i, "o": o, "ts": ts} for t, i, o, ts in changes])
+        engine.dispose()
+
+        feed = ChangeFeed("test", tables=["weibo_note"], ops=[OP_INSERT], batch_size=3)
+        first = asyncio.run(feed.read(0))
+        assert (first.scanned, first.last_id, first.changes) == (3, 3, {"weibo_note": note_ids[:3]})
+        second = asyncio.run(feed.read(first.last_id))
+        # 重复的插入与更新合并，只有更新的记录被过滤
+        assert (second.scanned, second.last_id, second.changes) == (3, 6, {"weibo_note": [note_ids[3]]})
+
+        handled = []
+
+        async def handle(batch):
+            handled.append(batch.changes)
+            return []
+
+        assert asyncio.run(feed.drain(handle)) == 4
+        assert asyncio.run(feed.position()) == 8
+        assert asyncio.run(feed.drain(handle)) == 0 and len(handled) == 2
+
+        service = TopicRollupService(tables=["weibo_note", "bilibili_video"], batch_size=4, include_sentiment=False)
+        assert asyncio.run(service.run_once()) == {"weibo_note": 4, "bilibili_video": 2}
+        assert asyncio.run(service.run_once()) == {"weibo_note": 0, "bilibili_video": 0}
+        engine = create_engine(f"sqlite:///{db_path}")
+        with engine.begin() as conn:
+            day_total = conn.execute(text("SELECT SUM(item_count) FROM topic_rollup WHERE granularity = 'day'")).scalar()
+        engine.dispose()
+        assert day_total == 6
+
+        indexer = SemanticIndexer(embedder=HashingEmbedder(), tables=["weibo_note", "bilibili_video"], batch_size=4)
+        assert asyncio.run(indexer.run_once()) == {"weibo_note": 4, "bilibili_video": 2}
+        assert indexer.index.count == 6 and indexer.index.watermark("crawl_outbox") == (0, 8)
+        assert asyncio.run(indexer.run_once()) == {"weibo_note": 0, "bilibili_video": 0}
+
+        lag = asyncio.run(consumer_lag())
+        assert {name: state["last_id"] for name, state in lag.items()} == {"test": 8, "topic_rollup": 8, "semantic_index": 8}
+        assert all(state["pending"] == 2 for state in lag.values())
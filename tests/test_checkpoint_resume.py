@@ -0,0 +1,151 @@
+"""
+测试研究检查点日志与断点续跑
+
+覆盖：
+1. 日志只写增量，重放后得到与原状态一致的研究进度
+2. 搜索记录在首次访问时才从日志解析
+3. 末尾不完整的记录被忽略
+4. resume时跳过已完成的段落和已有总结的初始搜索
+5. research()入口转发进度回调，并写入检查点日志与耗时统计
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.agent import DeepSearchAgent
+from InsightEngine.state import State, StateJournal
+from InsightEngine.utils.config import Settings
+
+QUERY = "武汉大学舆情"
+
+
+def _build_state() -> State:
+    state = State(query=QUERY, report_title="报告")
+    state.add_paragraph("背景", "事件经过")
+    state.add_paragraph("观点", "网民态度")
+    return state
+
+
+class TestStateJournal:
+    """测试检查点日志的写入与重放"""
+
+    def setup_method(self):
+        """准备写入了结构的日志"""
+        self.state = _build_state()
+
+    def test_incremental_replay(self, tmp_path):
+        """测试段落增量与最终报告重放"""
+        journal = StateJournal(str(tmp_path / "run.jsonl"))
+        journal.reset()
+        journal.record_structure(self.state)
+
+        research = self.state.paragraphs[0].research
+        research.add_search_results("q1", [{"url": "u1", "content": "A"}])
+        research.latest_summary = "总结1"
+        journal.record_paragraph(self.state, 0)
+        research.add_search_results("q2", [{"url": "u2", "content": "B"}])
+        research.latest_summary = "总结2"
+        research.increment_reflection()
+        research.mark_completed()
+        journal.record_paragraph(self.state, 0)
+        self.state.final_report = "最终报告"
+        journal.record_final_report(self.state)
+
+        lines = Path(journal.path).read_text(encoding="utf-8").splitlines()
+        assert [line.split(" ", 1)[0] for line in lines] == [
+            "structure", "searches", "paragraph", "searches", "paragraph", "final_report"
+        ]
+        assert '"u1"' not in lines[3]
+
+        restored = StateJournal(journal.path).load()
+        assert restored.query == QUERY
+        restored_research = restored.paragraphs[0].research
+        assert restored_research.get_search_count() == 2
+        assert restored_research._search_history == []
+        assert [s.url for s in restored_research.search_history] == ["u1", "u2"]
+        assert restored_research == research
+        assert restored.paragraphs[0].is_completed()
+        assert restored.paragraphs[0].research.reflection_iteration == 1
+        assert restored.is_completed and restored.final_report == "最终报告"
+
+    def test_truncated_tail_ignored(self, tmp_path):
+        """测试进程中断留下的半行记录不影响重放"""
+        journal = StateJournal(str(tmp_path / "run.jsonl"))
+        journal.reset()
+        journal.record_structure(self.state)
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('paragraph 120 {"index":0,"latest_')
+
+        restored = journal.load()
+        assert len(restored.paragraphs) == 2
+        assert restored.paragraphs[0].research.latest_summary == ""
+
+
+class TestResume:
+    """测试DeepSearchAgent从检查点继续研究"""
+
+    def setup_method(self):
+        """构造不连接LLM和数据库的Agent，记录实际执行的步骤"""
+        self.agent = DeepSearchAgent.__new__(DeepSearchAgent)
+        self.calls = []
+        self.agent._initial_search_and_summary = lambda index: self.calls.append(("initial", index))
+        self.agent._reflection_loop = lambda index: self.calls.append(("reflection", index))
+        self.agent._prepare_initial_searches = lambda executor=None: {}
+
+    def test_resume_skips_finished_work(self, tmp_path):
+        """测试已完成段落不再处理，已有总结的段落只继续反思"""
+        self.agent.config = Settings(OUTPUT_DIR=str(tmp_path), MAX_CONCURRENT_PARAGRAPHS=1)
+        journal = StateJournal(self.agent._checkpoint_path(QUERY))
+        journal.reset()
+        state = _build_state()
+        journal.record_structure(state)
+        state.paragraphs[0].research.latest_summary = "已完成"
+        state.paragraphs[0].research.mark_completed()
+        journal.record_paragraph(state, 0)
+        state.paragraphs[1].research.latest_summary = "初始总结"
+        journal.record_paragraph(state, 1)
+
+        assert self.agent._start_checkpoint(QUERY, resume=True)
+        progress = []
+        self.agent._process_paragraphs(lambda completed, total: progress.append((completed, total)))
+
+        assert self.calls == [("reflection", 1)]
+        assert progress == [(2, 2)]
+        assert all(p.is_completed() for p in journal.load().paragraphs)
+
+    def test_research_entry_writes_checkpoint_and_metrics(self, tmp_path):
+        """测试research()转发段落进度回调，并写入检查点日志与耗时统计（Streamlit应用经由此入口）"""
+        self.agent.config = Settings(OUTPUT_DIR=str(tmp_path), MAX_CONCURRENT_PARAGRAPHS=1)
+        self.agent.llm_client = SimpleNamespace(reset_cache_stats=lambda: None, reset_usage_stats=lambda: None)
+        self.agent._run_metrics = None
+
+        def generate_structure(query):
+            self.agent.state = _build_state()
+            self.agent._journal.record_structure(self.agent.state)
+
+        self.agent._generate_report_structure = generate_structure
+        self.agent._generate_final_report = lambda: "最终报告"
+        progress = []
+
+        report = self.agent.research(QUERY, resume=False,
+                                     progress_callback=lambda completed, total: progress.append((completed, total)))
+
+        assert report == "最终报告"
+        assert progress == [(1, 2), (2, 2)]
+        assert StateJournal(self.agent._checkpoint_path(QUERY)).exists()
+        assert list(tmp_path.glob("metrics_*.json"))
+
+    def test_fresh_run_resets_journal(self, tmp_path):
+        """测试不续跑时清空旧日志"""
+        self.agent.config = Settings(OUTPUT_DIR=str(tmp_path))
+        journal = StateJournal(self.agent._checkpoint_path(QUERY))
+        journal.reset()
+        journal.record_structure(_build_state())
+
+        assert not self.agent._start_checkpoint(QUERY, resume=False)
+        assert not journal.exists()
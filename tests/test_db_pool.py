@@ -0,0 +1,111 @@
+"""
+测试数据库连接池配置与只读副本路由
+
+覆盖：
+1. MySQL/PostgreSQL 引擎使用配置的连接池大小，SQLite 不传连接池参数
+2. 设置 DB_READ_REPLICA_URL 后搜索查询走副本，写入与默认读取走主库，并记录取连接的等待时间
+3. 不同线程、不同事件循环中的查询共用同一个引擎，连接池上限对整个进程生效
+"""
+
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+
+from run_metrics import metrics_run
+from InsightEngine.tools.search import MediaCrawlerDB
+from InsightEngine.utils import db
+from InsightEngine.utils.config import settings
+
+
+def make_marker_db(path: Path, value: str) -> str:
+    """创建只有一行标记值的SQLite数据库，返回异步连接URL"""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE marker (v TEXT)"))
+        conn.execute(text("INSERT INTO marker (v) VALUES (:v)"), {"v": value})
+    engine.dispose()
+    return f"sqlite+aiosqlite:///{path}"
+
+
+class TestPoolArguments:
+    """测试引擎的连接池参数"""
+
+    def test_pool_sizes_by_dialect(self, monkeypatch):
+        """测试服务端数据库使用配置的连接池大小"""
+        created = []
+        monkeypatch.setattr(db, "create_async_engine", lambda url, **kwargs: created.append((url, kwargs)))
+        monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+        monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 2)
+        monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 7.5)
+
+        db._create_engine("postgresql+asyncpg://u:p@localhost:5432/x")
+        db._create_engine("sqlite+aiosqlite:///data.db")
+        server_kwargs, sqlite_kwargs = created[0][1], created[1][1]
+        assert (server_kwargs["pool_size"], server_kwargs["max_overflow"], server_kwargs["pool_timeout"]) == (3, 2, 7.5)
+        assert "pool_size" not in sqlite_kwargs and sqlite_kwargs["connect_args"] == {"timeout": 30}
+
+
+class TestReadReplica:
+    """测试只读副本路由"""
+
+    def test_replica_routing_and_wait_metrics(self, tmp_path, monkeypatch):
+        """测试副本只承担搜索查询，未设置副本时回退主库"""
+        monkeypatch.setenv("DATABASE_URL", make_marker_db(tmp_path / "primary.db", "primary"))
+        monkeypatch.setattr(settings, "DB_READ_REPLICA_URL", make_marker_db(tmp_path / "replica.db", "replica"))
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", False)
+
+        async def scenario():
+            await db.execute("INSERT INTO marker (v) VALUES ('written')")
+            primary = await db.fetch_all("SELECT v FROM marker ORDER BY v")
+            replica = await db.fetch_all("SELECT v FROM marker ORDER BY v", replica=True)
+            return [r["v"] for r in primary], [r["v"] for r in replica]
+
+        with metrics_run("replica") as run:
+            primary, replica = asyncio.run(scenario())
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            try:
+                searched = MediaCrawlerDB()._execute_query("SELECT v FROM marker")
+            finally:
+                asyncio.get_event_loop().close()
+                asyncio.set_event_loop(None)
+
+        assert primary == ["primary", "written"] and replica == ["replica"]
+        assert [r["v"] for r in searched] == ["replica"]
+        waits = {stage["labels"]["role"]: stage["count"] for stage in run.summary()["stages"] if stage["stage"] == "db.pool_wait"}
+        assert waits == {"primary": 2, "replica": 2}
+
+        monkeypatch.setattr(settings, "DB_READ_REPLICA_URL", None)
+        fallback = asyncio.run(db.fetch_all("SELECT v FROM marker ORDER BY v", replica=True))
+        assert [r["v"] for r in fallback] == ["primary", "written"]
+
+
+class TestSharedEngine:
+    """测试引擎在线程之间共享"""
+
+    def test_one_engine_across_threads(self, tmp_path, monkeypatch):
+        """测试并行工作线程与各自的事件循环不会各建一个连接池"""
+        url = make_marker_db(tmp_path / "shared.db", "shared")
+        monkeypatch.setenv("DATABASE_URL", url)
+        monkeypatch.setattr(settings, "DB_READ_REPLICA_URL", None)
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", False)
+        created = []
+        create = db._create_engine
+        monkeypatch.setattr(db, "_create_engine", lambda database_url: created.append(database_url) or create(database_url))
+
+        def query(i):
+            if i % 2:
+                return MediaCrawlerDB()._execute_query("SELECT v FROM marker")
+            return asyncio.run(db.fetch_all("SELECT v FROM marker"))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(query, range(8)))
+        assert all([r["v"] for r in rows] == ["shared"] for rows in results)
+        assert created == [url]
@@ -0,0 +1,52 @@
+"""
+测试InsightEngine/tools/keyword_cache.py中的关键词优化结果缓存
+
+覆盖：
+1. 近似查询规范化为相同的键
+2. TTL过期
+3. SQLite持久化跨实例复用
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.tools.keyword_cache import KeywordCache
+
+
+class TestKeywordCache:
+    """测试KeywordCache的读写与过期"""
+
+    def setup_method(self):
+        """每个测试方法前的初始化"""
+        self.cache = KeywordCache(ttl_seconds=60)
+
+    def test_make_key_ignores_case_punctuation_and_order(self):
+        """测试大小写、标点和词序不影响缓存键"""
+        key_a = KeywordCache.make_key("武汉大学 AI，争议", "使用search_topic_globally工具进行查询")
+        key_b = KeywordCache.make_key("争议  ai 武汉大学", "使用search_topic_globally工具进行查询")
+        key_c = KeywordCache.make_key("武汉大学 AI 争议", "使用get_comments_for_topic工具进行查询")
+        assert key_a == key_b
+        assert key_a != key_c
+
+    def test_expired_entry_is_dropped(self):
+        """测试超过TTL的条目不再命中"""
+        self.cache.set("k", ["武大"], "理由")
+        assert self.cache.get("k")["keywords"] == ["武大"]
+
+        self.cache.ttl_seconds = 0.01
+        time.sleep(0.02)
+        assert self.cache.get("k") is None
+        assert self.cache.get_stats()["misses"] == 1
+
+    def test_sqlite_persistence(self, tmp_path):
+        """测试SQLite缓存可被新实例读取"""
+        db_path = str(tmp_path / "keyword_cache.db")
+        KeywordCache(sqlite_path=db_path).set("k", ["武大", "武汉大学"], "理由")
+
+        cached = KeywordCache(sqlite_path=db_path).get("k")
+        assert cached == {"keywords": ["武大", "武汉大学"], "reasoning": "理由"}
@@ -0,0 +1,95 @@
+"""
+测试LLM响应缓存
+
+覆盖：
+1. 缓存键忽略时间前缀、区分采样参数，过期条目不再命中
+2. SQLite持久化后跨实例命中
+3. 仅对启用的节点使用缓存，并按节点统计命中次数
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from openai import OpenAI
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+
+from llm_cache import LLMResponseCache
+from InsightEngine.llms import LLMClient
+
+BASE_URL = "https://llm.example.test/v1"
+
+
+class TestLLMResponseCache:
+    """测试缓存本身"""
+
+    def test_ttl_and_params(self):
+        """测试采样参数参与缓存键，过期条目视为未命中"""
+        cache = LLMResponseCache(ttl_seconds=0.05)
+        key = cache.make_key("m", "系统", "用户", {"temperature": 0})
+        assert key != cache.make_key("m", "系统", "用户", {"temperature": 1})
+        cache.set(key, "结果")
+        assert cache.get(key) == "结果"
+        time.sleep(0.06)
+        assert cache.get(key) is None
+
+    def test_sqlite_persistence(self, tmp_path):
+        """测试写入SQLite后新实例可直接命中"""
+        path = str(tmp_path / "llm.db")
+        key = LLMResponseCache.make_key("m", "系统", "用户")
+        LLMResponseCache(sqlite_path=path).set(key, "持久化结果")
+        assert LLMResponseCache(sqlite_path=path).get(key) == "持久化结果"
+
+
+class TestClientCache:
+    """测试LLMClient按节点使用缓存"""
+
+    def setup_method(self):
+        """创建指向本地模拟服务的客户端，并记录实际请求次数"""
+        self.requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return httpx.Response(200, json={
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "test-model",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "回答"}, "finish_reason": "stop"}],
+            })
+
+        self.llm = LLMClient(
+            api_key="test-key",
+            model_name="test-model",
+            base_url=BASE_URL,
+            cache=LLMResponseCache(),
+            cache_nodes=["ReportStructureNode"],
+        )
+        self.llm.client = OpenAI(
+            api_key="test-key", base_url=BASE_URL, max_retries=0,
+            http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        )
+
+    def test_enabled_node_hits(self):
+        """测试启用缓存的节点第二次调用不再请求服务"""
+        for _ in range(2):
+            assert self.llm.invoke("系统", "查询", cache_node="ReportStructureNode") == "回答"
+        assert len(self.requests) == 1
+        assert self.llm.get_cache_stats() == {
+            "enabled": True,
+            "hits": 1,
+            "misses": 1,
+            "nodes": {"ReportStructureNode": {"hits": 1, "misses": 1}},
+        }
+
+    def test_disabled_node_bypasses_cache(self):
+        """测试未启用缓存的节点每次都请求服务且不计入统计"""
+        for _ in range(2):
+            self.llm.invoke("系统", "查询", cache_node="FirstSummaryNode")
+        assert len(self.requests) == 2
+        assert self.llm.get_cache_stats()["nodes"] == {}
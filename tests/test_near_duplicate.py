@@ -0,0 +1,83 @@
+"""
+测试InsightEngine/utils/near_duplicate.py中的近似重复检测
+
+覆盖：
+1. 转发、加话题标签等近似文本的相似度
+2. 聚类与合并时的互动数据累加
+3. 分桶只与簇代表比较，大量转发时比较次数线性增长
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.tools.search import QueryResult
+from InsightEngine.utils import near_duplicate
+from InsightEngine.utils.near_duplicate import (
+    shingles,
+    jaccard,
+    cluster_near_duplicates,
+    collapse_near_duplicates,
+)
+
+ORIGINAL = "武汉大学今天发布通报，针对近期网络上关于图书馆事件的讨论作出回应，表示将依法依规处理，并持续关注后续进展。"
+REPOST = "#武汉大学# 武汉大学今天发布通报，针对近期网络上关于图书馆事件的讨论作出回应，表示将依法依规处理，并持续关注后续进展。 https://t.cn/abc"
+OTHER = "今年春节档电影票房再创新高，多部国产动画电影口碑爆棚，观众纷纷表示值得二刷。"
+
+
+def _result(text: str, likes: int) -> QueryResult:
+    return QueryResult(
+        platform="weibo",
+        content_type="note",
+        title_or_content=text,
+        publish_time=datetime(2025, 8, 25),
+        engagement={"likes": likes},
+        source_table="weibo_note",
+    )
+
+
+class TestNearDuplicate:
+    """测试MinHash近似重复检测"""
+
+    def test_repost_is_near_duplicate(self):
+        """测试带话题标签和链接的转发与原文高度相似，与无关内容相似度很低"""
+        assert jaccard(shingles(ORIGINAL), shingles(REPOST)) >= 0.7
+        assert jaccard(shingles(ORIGINAL), shingles(OTHER)) < 0.1
+
+    def test_cluster_keeps_first_occurrence_order(self):
+        """测试聚类结果按首次出现的位置排序，空文本单独成簇"""
+        clusters = cluster_near_duplicates([OTHER, ORIGINAL, "", REPOST])
+        assert clusters == [[0], [1, 3], [2]]
+
+    def test_collapse_aggregates_engagement(self):
+        """测试合并后保留互动量最高的代表，并累加互动数据与重复条数"""
+        results = [_result(ORIGINAL, 5), _result(OTHER, 1), _result(REPOST, 20), _result(ORIGINAL, 1)]
+        collapsed = collapse_near_duplicates(results)
+
+        assert len(collapsed) == 2
+        assert collapsed[0].title_or_content == REPOST
+        assert collapsed[0].engagement == {"likes": 26}
+        assert collapsed[0].duplicate_count == 2
+        assert collapsed[1].duplicate_count == 0
+
+    def test_bucket_compares_against_representative(self):
+        """测试大量转发落入同一个桶时只与簇代表比较，桶内查找次数随文本数线性增长"""
+        texts = [f"{ORIGINAL} 网友{k}号" for k in range(200)]
+        lookups = []
+
+        def count_lookups(frame, event, arg):
+            if event == "call" and frame.f_code.co_name == "find":
+                lookups.append(1)
+
+        sys.setprofile(count_lookups)
+        try:
+            clusters = cluster_near_duplicates(texts)
+        finally:
+            sys.setprofile(None)
+
+        assert clusters == [list(range(200))]
+        assert len(lookups) <= 4 * len(texts) * near_duplicate._BANDS
@@ -0,0 +1,129 @@
+"""
+测试段落并行研究调度与服务商并发限制
+
+覆盖：
+1. 段落按 MAX_CONCURRENT_PARAGRAPHS 并行处理，全部完成后才返回
+2. 各段落的首次搜索查询在同一线程池中并行生成，全部完成后只批量优化一次关键词
+3. 任一段落失败时异常向上抛出
+4. provider_slot 限制同一服务商的并发请求数
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+
+from retry_helper import provider_slot
+from InsightEngine import agent as agent_module
+from InsightEngine.agent import DeepSearchAgent
+from InsightEngine.state import State
+from InsightEngine.utils.config import Settings
+
+
+class _ConcurrencyProbe:
+    """记录同时执行的最大任务数"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def run(self, duration: float = 0.05):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(duration)
+        with self.lock:
+            self.active -= 1
+
+
+class TestParallelParagraphs:
+    """测试DeepSearchAgent的段落并行调度"""
+
+    def setup_method(self):
+        """构造不连接LLM和数据库的Agent"""
+        self.agent = DeepSearchAgent.__new__(DeepSearchAgent)
+        self.agent.config = Settings(MAX_CONCURRENT_PARAGRAPHS=3)
+        self.agent.state = State()
+        for i in range(5):
+            self.agent.state.add_paragraph(f"段落{i}", f"内容{i}")
+        self.agent._prepare_initial_searches = lambda executor=None: {}
+        self.probe = _ConcurrencyProbe()
+        self.agent._initial_search_and_summary = lambda index: self.probe.run()
+        self.agent._reflection_loop = lambda index: None
+
+    def test_paragraphs_run_concurrently(self):
+        """测试段落并行执行且并发数不超过配置"""
+        progress = []
+        self.agent._process_paragraphs(lambda completed, total: progress.append((completed, total)))
+        assert self.probe.peak == 3
+        assert all(p.research.is_completed for p in self.agent.state.paragraphs)
+        assert progress == [(i, 5) for i in range(1, 6)]
+
+    def test_serial_when_concurrency_is_one(self):
+        """测试并发数为1时逐段串行处理"""
+        self.agent.config = Settings(MAX_CONCURRENT_PARAGRAPHS=1)
+        self.agent._process_paragraphs()
+        assert self.probe.peak == 1
+        assert all(p.research.is_completed for p in self.agent.state.paragraphs)
+
+    def test_initial_searches_run_in_executor(self, monkeypatch):
+        """测试首次搜索查询并行生成，且关键词优化在全部完成后批量执行一次"""
+        del self.agent._prepare_initial_searches
+        self.agent.state.paragraphs[0].research.latest_summary = "已有总结"
+        finished, batches = [], []
+
+        def first_search(search_input):
+            self.probe.run()
+            finished.append(search_input["title"])
+            return {"search_query": search_input["title"], "search_tool": "search_topic_globally"}
+
+        def optimize_batch(queries):
+            batches.append((len(finished), [query for query, _ in queries]))
+
+        self.agent.first_search_node = SimpleNamespace(run=first_search)
+        monkeypatch.setattr(agent_module, "keyword_optimizer", SimpleNamespace(optimize_keywords_batch=optimize_batch))
+        self.agent._initial_search_and_summary = lambda index: self.agent._initial_search_outputs.pop(index, None)
+        self.agent._process_paragraphs()
+
+        assert self.probe.peak == 3
+        assert batches == [(4, [f"段落{i}" for i in range(1, 5)])]
+        assert self.agent._initial_search_outputs == {}
+
+    def test_paragraph_failure_propagates(self):
+        """测试段落失败时异常向上抛出"""
+        def fail_on_second(index):
+            if index == 1:
+                raise RuntimeError("boom")
+
+        self.agent._reflection_loop = fail_on_second
+        with pytest.raises(RuntimeError):
+            self.agent._process_paragraphs()
+        assert not self.agent.state.paragraphs[1].research.is_completed
+
+
+class TestProviderSlot:
+    """测试服务商并发限制"""
+
+    def test_limit_is_shared_per_provider(self):
+        """测试同一服务商的并发请求数不超过上限"""
+        probe = _ConcurrencyProbe()
+
+        def call():
+            with provider_slot("https://example.test/v1", 2):
+                probe.run(0.03)
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert probe.peak == 2
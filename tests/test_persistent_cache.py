@@ -0,0 +1,59 @@
+"""
+测试utils/persistent_cache.py中的缓存基类
+
+覆盖：
+1. 校验标记不一致的条目失效，并从SQLite中删除
+2. TTL过期与LRU淘汰
+3. 旧版本的SQLite表结构被重建
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+
+from persistent_cache import PersistentCache
+
+
+class TestPersistentCache:
+    """测试PersistentCache的失效、过期与持久化"""
+
+    def test_tag_mismatch_invalidates(self, tmp_path):
+        """测试校验标记变化后内存和SQLite中的条目都失效"""
+        db_path = str(tmp_path / "cache.db")
+        cache = PersistentCache(sqlite_path=db_path)
+        cache.set("k", {"v": 1}, tag="w1")
+
+        assert PersistentCache(sqlite_path=db_path).get("k", tag="w1") == {"v": 1}
+        assert cache.get("k", tag="w2") is None
+        assert PersistentCache(sqlite_path=db_path).get("k", tag="w1") is None
+        assert cache.get_stats()["misses"] == 1
+
+    def test_ttl_and_lru(self):
+        """测试过期条目不再命中，超过容量时淘汰最久未用的条目"""
+        cache = PersistentCache(max_entries=2, ttl_seconds=0.05)
+        cache.set_many({"a": 1, "b": 2})
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+
+        time.sleep(0.06)
+        assert cache.get("a") is None
+
+    def test_legacy_table_rebuilt(self, tmp_path):
+        """测试旧表结构的缓存文件被重建而不是读写失败"""
+        db_path = str(tmp_path / "cache.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)")
+        conn.commit()
+        conn.close()
+
+        cache = PersistentCache(sqlite_path=db_path)
+        cache.set("k", "v")
+        assert cache.get_stats()["persistent"]
+        assert PersistentCache(sqlite_path=db_path).get("k") == "v"
@@ -0,0 +1,198 @@
+"""
+测试入库时情感打分相关逻辑
+
+覆盖：
+1. 打分服务按字段优先级提取文本
+2. analyze_query_results 优先汇总预计算的情感结果
+3. 打分失败的记录不会被水位线或变更流游标越过，下一轮重试；连续失败达到上限后跳过
+4. 常驻服务在模型加载失败时记录错误并在下一轮重试
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "MindSpider" / "schema"))
+
+from synthetic_corpus import generate_corpus
+from InsightEngine.tools.change_feed import ChangeFeed
+from InsightEngine.tools.sentiment_analyzer import BatchSentimentResult, SentimentResult, WeiboMultilingualSentimentAnalyzer
+from InsightEngine.tools.sentiment_scorer import CHANGE_FEED_CONSUMER, SCORED_TABLES, SentimentScorer, extract_text
+from InsightEngine.utils.config import settings
+
+
+class FlakyAnalyzer:
+    """对指定文本返回失败结果的情感分析器"""
+
+    model_id = "flaky"
+    is_initialized = True
+
+    def __init__(self, failing_text):
+        self.failing_text = failing_text
+
+    def analyze_batch(self, texts, show_progress=True):
+        results = [
+            SentimentResult(text=t, sentiment_label="中性", confidence=0.0, probability_distribution={},
+                            success=False, error_message="模型推理失败")
+            if t == self.failing_text else
+            SentimentResult(text=t, sentiment_label="正面", confidence=0.9, probability_distribution={"正面": 0.9})
+            for t in texts
+        ]
+        success = sum(r.success for r in results)
+        return BatchSentimentResult(results=results, total_processed=len(results), success_count=success,
+                                    failed_count=len(results) - success, average_confidence=0.9)
+
+
+class TestPrecomputedSentiment:
+    """测试预计算情感的提取与汇总"""
+
+    def setup_method(self):
+        """每个测试方法前的初始化"""
+        self.analyzer = WeiboMultilingualSentimentAnalyzer(cache=None)
+        self.analyzer.disable("测试环境不加载模型")
+
+    def test_extract_text_follows_field_priority(self):
+        """测试标题为空时回退到描述字段"""
+        fields = SCORED_TABLES["bilibili_video"]
+        assert extract_text({"title": "", "desc": "视频简介"}, fields) == "视频简介"
+        assert extract_text({"title": "标题", "desc": "视频简介"}, fields) == "标题"
+        assert extract_text({"title": None}, fields) == ""
+
+    def test_aggregates_stored_sentiment_without_model(self):
+        """测试全部结果已有预计算情感时，模型禁用也能给出统计"""
+        query_results = [
+            {"content": "太好了", "sentiment_label": "正面", "sentiment_confidence": 0.9},
+            {"content": "一般般", "sentiment_label": "中性", "sentiment_confidence": 0.4},
+            {"content": "非常满意", "sentiment_label": "正面", "sentiment_confidence": 0.8},
+        ]
+        analysis = self.analyzer.analyze_query_results(query_results)["sentiment_analysis"]
+
+        assert analysis["total_analyzed"] == 3
+        assert analysis["sentiment_distribution"] == {"正面": 2, "中性": 1}
+        assert len(analysis["high_confidence_results"]) == 2
+
+    def test_missing_sentiment_counted_as_failed_when_model_disabled(self):
+        """测试部分结果缺少预计算情感且模型不可用时，只统计已有结果"""
+        query_results = [
+            {"content": "太好了", "sentiment_label": "正面", "sentiment_confidence": 0.9},
+            {"content": "还没打分"},
+        ]
+        analysis = self.analyzer.analyze_query_results(query_results)["sentiment_analysis"]
+
+        assert analysis["success_rate"] == "1/2"
+        assert analysis["sentiment_distribution"] == {"正面": 1}
+
+
+class TestScorerRetriesFailedRows:
+    """测试打分失败的记录会在下一轮重试"""
+
+    def setup_method(self):
+        """每个测试方法前的初始化"""
+        self.engine = None
+
+    def _prepare(self, tmp_path, monkeypatch):
+        """生成语料并返回按 (add_ts, id) 排序的微博记录"""
+        db_path = tmp_path / "corpus.db"
+        url = f"sqlite+aiosqlite:///{db_path}"
+        asyncio.run(generate_corpus(url, 6, comments_per_post=0, platforms=["weibo"], days=2, news_per_day=0))
+        monkeypatch.setenv("DATABASE_URL", url)
+        self.engine = create_engine(f"sqlite:///{db_path}")
+        with self.engine.begin() as conn:
+            return [dict(r._mapping) for r in conn.execute(text("SELECT id, content FROM weibo_note ORDER BY add_ts, id"))]
+
+    def _scored_ids(self):
+        with self.engine.begin() as conn:
+            return set(conn.execute(text("SELECT source_id FROM content_sentiment")).scalars())
+
+    def teardown_method(self):
+        if self.engine is not None:
+            self.engine.dispose()
+
+    def test_watermark_stops_before_failed_row(self, tmp_path, monkeypatch):
+        """测试水位线只推进到失败记录之前"""
+        monkeypatch.setattr(settings, "CHANGE_FEED_ENABLED", False)
+        notes = self._prepare(tmp_path, monkeypatch)
+        scorer = SentimentScorer(analyzer=FlakyAnalyzer(notes[2]["content"]), tables=["weibo_note"], batch_size=4)
+
+        assert asyncio.run(scorer.run_once()) == {"weibo_note": 3}
+        with self.engine.begin() as conn:
+            assert conn.execute(text("SELECT last_id FROM sentiment_scorer_state")).scalar() == notes[1]["id"]
+
+        scorer.analyzer.failing_text = None
+        assert asyncio.run(scorer.run_once()) == {"weibo_note": len(notes) - 2}
+        assert self._scored_ids() == {n["id"] for n in notes}
+
+    def test_change_feed_cursor_stays_on_failed_batch(self, tmp_path, monkeypatch):
+        """测试变更流批次中有记录失败时不推进游标"""
+        monkeypatch.setattr(settings, "CHANGE_FEED_ENABLED", True)
+        monkeypatch.setattr(settings, "CHANGE_FEED_SAFETY_LAG", 0.0)
+        notes = self._prepare(tmp_path, monkeypatch)
+        old_ts = int((time.time() - 60) * 1000)
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO crawl_outbox (source_table, source_id, op, ts) VALUES ('weibo_note', :i, 'insert', :ts)"),
+                         [{"i": n["id"], "ts": old_ts} for n in notes])
+        scorer = SentimentScorer(analyzer=FlakyAnalyzer(notes[4]["content"]), tables=["weibo_note"], batch_size=4)
+        feed = ChangeFeed(CHANGE_FEED_CONSUMER)
+
+        asyncio.run(scorer.run_once())
+        assert asyncio.run(feed.position()) == 4
+        assert notes[4]["id"] not in self._scored_ids()
+
+        scorer.analyzer.failing_text = None
+        asyncio.run(scorer.run_once())
+        assert asyncio.run(feed.position()) == len(notes)
+        assert self._scored_ids() == {n["id"] for n in notes}
+
+    def test_poison_row_skipped_after_max_attempts(self, tmp_path, monkeypatch):
+        """测试每次都失败的记录在达到重试上限后被跳过，水位线与游标继续前进"""
+        monkeypatch.setattr(settings, "SENTIMENT_SCORER_MAX_ATTEMPTS", 2)
+        monkeypatch.setattr(settings, "CHANGE_FEED_ENABLED", False)
+        notes = self._prepare(tmp_path, monkeypatch)
+        scorer = SentimentScorer(analyzer=FlakyAnalyzer(notes[2]["content"]), tables=["weibo_note"], batch_size=4)
+
+        assert asyncio.run(scorer.run_once()) == {"weibo_note": 3}
+        assert asyncio.run(scorer.run_once()) == {"weibo_note": len(notes) - 3}
+        with self.engine.begin() as conn:
+            assert conn.execute(text("SELECT last_id FROM sentiment_scorer_state")).scalar() == notes[-1]["id"]
+        assert self._scored_ids() == {n["id"] for n in notes} - {notes[2]["id"]}
+
+        monkeypatch.setattr(settings, "CHANGE_FEED_ENABLED", True)
+        monkeypatch.setattr(settings, "CHANGE_FEED_SAFETY_LAG", 0.0)
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO crawl_outbox (source_table, source_id, op, ts) VALUES ('weibo_note', :i, 'insert', :ts)"),
+                         [{"i": n["id"], "ts": int((time.time() - 60) * 1000)} for n in notes])
+        feed = ChangeFeed(CHANGE_FEED_CONSUMER)
+        # 第一批包含失败的记录，第一轮不推进游标，第二轮跳过该记录
+        asyncio.run(scorer.run_once())
+        assert asyncio.run(feed.position()) == 0
+        asyncio.run(scorer.run_once())
+        assert asyncio.run(feed.position()) == len(notes)
+
+    def test_run_forever_survives_model_load_failure(self, monkeypatch):
+        """测试模型不可用时常驻服务不退出，下一轮重新启用并加载模型"""
+        analyzer = FlakyAnalyzer(None)
+        analyzer.is_initialized = False
+        analyzer.is_disabled = True
+        analyzer.disable_reason = "模型下载失败"
+        loads = []
+
+        def initialize():
+            loads.append(analyzer.is_disabled)
+            if len(loads) == 1:
+                return False
+            raise asyncio.CancelledError  # 第二轮加载时结束测试
+
+        analyzer.enable = lambda: setattr(analyzer, "is_disabled", False) or True
+        analyzer.initialize = initialize
+        scorer = SentimentScorer(analyzer=analyzer, tables=["weibo_note"])
+        try:
+            asyncio.run(scorer.run_forever(interval=0))
+        except asyncio.CancelledError:
+            pass
+        assert loads == [False, False]
@@ -0,0 +1,70 @@
+"""
+测试InsightEngine/utils/text_processing.py中按token预算打包搜索结果
+
+覆盖：
+1. 本地token估算
+2. 公平分配预算：短结果完整保留，长结果从尾部截断
+3. 预算不足时丢弃排名靠后的结果
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.utils.text_processing import (
+    estimate_tokens,
+    truncate_to_tokens,
+    pack_results_to_token_budget,
+    format_search_results_for_prompt,
+)
+
+
+class TestPromptPacker:
+    """测试token预算打包"""
+
+    def test_estimate_tokens(self):
+        """测试中文按字计、其他字符按每4个字符计"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("武汉大学") == 4
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("武大abcd") == 3
+
+    def test_truncate_to_tokens(self):
+        """测试截断后不超过预算"""
+        text = "舆情" * 500
+        truncated = truncate_to_tokens(text, 100)
+        assert truncated.endswith("...")
+        assert estimate_tokens(truncated) <= 100
+        assert truncate_to_tokens("短文本", 100) == "短文本"
+
+    def test_fair_share(self):
+        """测试短结果完整保留，长结果平分剩余预算"""
+        short = "短" * 100
+        long_a = "长" * 5000
+        long_b = "久" * 5000
+        packed = pack_results_to_token_budget([long_a, short, long_b], 1000)
+        assert packed[1] == short
+        assert sum(estimate_tokens(r) for r in packed) <= 1000
+        assert abs(estimate_tokens(packed[0]) - estimate_tokens(packed[2])) <= 1
+
+    def test_drops_lowest_ranked_results(self):
+        """测试预算不足时按排名保留前面的结果"""
+        results = [f"结果{i}" + "内容" * 200 for i in range(10)]
+        packed = pack_results_to_token_budget(results, 512, min_tokens_per_result=128)
+        assert len(packed) == 4
+        assert packed[0].startswith("结果0")
+
+    def test_many_small_results_fit(self):
+        """测试结果条数超过 预算/每条最少token 但总量装得下时全部保留"""
+        results = [f"短评{i}" for i in range(300)]
+        assert pack_results_to_token_budget(results, 30000) == results
+
+    def test_no_budget_keeps_everything(self):
+        """测试预算为0时与原有行为一致"""
+        search_results = [{"content": "内容" * 1000}, {"content": "其他"}]
+        assert format_search_results_for_prompt(search_results, 20000) == ["内容" * 1000, "其他"]
+        packed = format_search_results_for_prompt(search_results, 20000, token_budget=300)
+        assert sum(estimate_tokens(r) for r in packed) <= 300
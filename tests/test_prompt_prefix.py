@@ -0,0 +1,75 @@
+"""
+测试有利于提示词前缀缓存的消息组装
+
+覆盖：
+1. 节点输入序列化为紧凑JSON，易变字段排在静态字段之后
+2. 时间信息位于用户消息末尾
+3. 从不同服务商的用量字段读取前缀缓存命中token数并累计
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.llms import LLMClient
+from InsightEngine.utils import to_prompt_json
+
+
+class TestPromptAssembly:
+    """测试提示词组装顺序"""
+
+    def test_volatile_fields_last(self):
+        """测试易变字段移到末尾且不含多余空白"""
+        data = {
+            "search_results": ["r"],
+            "title": "标题",
+            "paragraph_latest_state": "当前总结",
+            "content": "预期内容",
+            "search_query": "查询",
+        }
+        assert to_prompt_json(data) == (
+            '{"title":"标题","content":"预期内容","paragraph_latest_state":"当前总结",'
+            '"search_query":"查询","search_results":["r"]}'
+        )
+
+    def test_time_note_at_end(self):
+        """测试用户消息以调用方内容开头，时间信息在末尾"""
+        messages = LLMClient._build_messages("系统", "段落输入")
+        assert messages[0] == {"role": "system", "content": "系统"}
+        assert messages[1]["content"].startswith("段落输入\n\n今天的实际时间是")
+
+
+class TestUsageReport:
+    """测试用量统计"""
+
+    def setup_method(self):
+        """创建不发起请求的客户端"""
+        self.llm = LLMClient(api_key="test-key", model_name="test-model", base_url="https://llm.example.test/v1")
+
+    def test_cached_tokens_by_provider(self):
+        """测试OpenAI/Qwen、DeepSeek、Kimi三种用量格式"""
+        openai_usage = SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=64))
+        deepseek_usage = SimpleNamespace(prompt_cache_hit_tokens=128)
+        kimi_usage = SimpleNamespace(cached_tokens=256)
+        assert LLMClient._cached_prompt_tokens(openai_usage) == 64
+        assert LLMClient._cached_prompt_tokens(deepseek_usage) == 128
+        assert LLMClient._cached_prompt_tokens(kimi_usage) == 256
+        assert LLMClient._cached_prompt_tokens(SimpleNamespace()) == 0
+
+    def test_usage_totals(self):
+        """测试按调用累计用量，没有usage的流式分块不计入"""
+        usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=200, prompt_cache_hit_tokens=800)
+        self.llm._record_usage(SimpleNamespace(usage=usage))
+        self.llm._record_usage(SimpleNamespace(usage=None))
+        assert self.llm.get_usage_stats() == {
+            "calls": 1,
+            "prompt_tokens": 1000,
+            "cached_prompt_tokens": 800,
+            "completion_tokens": 200,
+        }
+        self.llm.reset_usage_stats()
+        assert self.llm.get_usage_stats()["calls"] == 0
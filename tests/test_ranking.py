@@ -0,0 +1,61 @@
+"""
+测试InsightEngine/utils/ranking.py中的搜索结果本地排序
+
+覆盖：
+1. BM25对包含查询词的文档打分更高
+2. 综合排序中相关度、互动与时效性的作用
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.tools.search import QueryResult
+from InsightEngine.utils.ranking import bm25_scores, rank_results
+
+NOW = datetime(2025, 8, 25, 12, 0, 0)
+
+
+def _result(text: str, likes: int = 0, days_ago: float = 1.0) -> QueryResult:
+    return QueryResult(
+        platform="weibo",
+        content_type="note",
+        title_or_content=text,
+        publish_time=NOW - timedelta(days=days_ago),
+        engagement={"likes": likes},
+        source_table="weibo_note",
+    )
+
+
+class TestRanking:
+    """测试BM25与综合排序"""
+
+    def test_bm25_prefers_matching_documents(self):
+        """测试包含查询词的文档得分高于不相关文档"""
+        docs = [["武汉大学", "图书馆", "通报"], ["春节", "电影", "票房"]]
+        scores = bm25_scores(docs, ["武汉大学", "通报"])
+        assert scores[0] > 0
+        assert scores[1] == 0
+
+    def test_relevant_result_ranked_first(self):
+        """测试相关内容排在无关的高互动内容之前"""
+        results = [
+            _result("今年春节档电影票房再创新高", likes=100000),
+            _result("武汉大学就图书馆事件发布通报", likes=10),
+        ]
+        ranked = rank_results(results, "武汉大学 图书馆", ["武大", "图书馆事件"], now=NOW)
+        assert ranked[0].title_or_content.startswith("武汉大学")
+        assert ranked[0].relevance_score >= ranked[1].relevance_score
+
+    def test_recency_breaks_ties(self):
+        """测试相关度与互动相同时，较新的内容排在前面"""
+        results = [
+            _result("武汉大学发布通报", likes=10, days_ago=30),
+            _result("武汉大学发布通报", likes=10, days_ago=1),
+        ]
+        ranked = rank_results(results, "武汉大学", now=NOW)
+        assert ranked[0].publish_time == NOW - timedelta(days=1)
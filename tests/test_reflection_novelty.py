@@ -0,0 +1,79 @@
+"""
+测试反思循环的新内容统计与提前结束
+
+覆盖：
+1. 按URL或内容哈希识别已使用过的搜索结果
+2. 新内容统计的记录与序列化
+3. 新内容占比低于阈值时停止反思
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.agent import DeepSearchAgent
+from InsightEngine.state import State
+from InsightEngine.state.state import Research
+from InsightEngine.utils.config import Settings
+
+FIRST_RESULTS = [
+    {"url": "https://example.com/a", "content": "A"},
+    {"url": "", "content": "武汉大学发布通报"},
+]
+
+
+class TestResearchNovelty:
+    """测试Research中的结果指纹与新内容统计"""
+
+    def setup_method(self):
+        """准备已有一轮搜索结果的段落研究状态"""
+        self.research = Research()
+        self.research.add_search_results("首次查询", FIRST_RESULTS)
+
+    def test_count_new_results(self):
+        """测试URL相同或内容相同（忽略空白差异）的结果不计为新内容"""
+        results = [
+            {"url": "https://example.com/a", "content": "A（更新）"},
+            {"url": "", "content": "武汉大学 发布通报"},
+            {"url": "", "content": "武汉大学发布通报"},
+            {"url": "https://example.com/b", "content": "B"},
+            {"url": "https://example.com/b", "content": "B"},
+        ]
+        assert self.research.count_new_results(results) == 2
+
+    def test_stats_survive_round_trip(self):
+        """测试统计随状态保存，指纹在加载时由搜索记录重建"""
+        self.research.record_novelty(1, 4, 1, early_exit=True)
+        state = State()
+        state.add_paragraph("段落", "内容")
+        state.paragraphs[0].research = self.research
+
+        restored = State.from_json(state.to_json()).paragraphs[0].research
+        assert restored.novelty_stats == [
+            {"reflection": 1, "total_results": 4, "new_results": 1, "novelty": 0.25, "early_exit": True}
+        ]
+        assert restored.count_new_results(FIRST_RESULTS) == 0
+
+
+class TestReflectionEarlyExit:
+    """测试反思提前结束的判定"""
+
+    def setup_method(self):
+        """构造不连接LLM和数据库的Agent"""
+        self.agent = DeepSearchAgent.__new__(DeepSearchAgent)
+        self.agent.config = Settings(REFLECTION_NOVELTY_THRESHOLD=0.3)
+
+    def test_threshold(self):
+        """测试新内容占比低于阈值或无结果时停止"""
+        results = [{"url": f"u{i}", "content": ""} for i in range(10)]
+        assert self.agent._should_stop_reflecting(results, 2)
+        assert not self.agent._should_stop_reflecting(results, 3)
+        assert self.agent._should_stop_reflecting([], 0)
+
+    def test_disabled(self):
+        """测试阈值为0时总是执行全部反思轮次"""
+        self.agent.config = Settings(REFLECTION_NOVELTY_THRESHOLD=0)
+        assert not self.agent._should_stop_reflecting([], 0)
@@ -0,0 +1,146 @@
+"""
+测试服务商限流、Retry-After退避与熔断
+
+覆盖：
+1. 从异常响应头解析 Retry-After / retry-after-ms
+2. 令牌桶超出配额时返回需要等待的时间
+3. 熔断器打开、半开试探与恢复
+4. 熔断期间优雅重试直接返回默认值
+5. 只有传输层错误与5xx/408计入熔断，解析错误不计入
+6. 429/4xx不计为成功，与5xx交替出现时熔断器仍会打开
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import openai
+import requests
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "utils"))
+
+from retry_helper import (
+    CircuitBreaker,
+    ProviderGuard,
+    RetryConfig,
+    TokenBucket,
+    compute_backoff,
+    get_retry_after,
+    with_graceful_retry,
+)
+
+
+class _HTTPError(Exception):
+    """携带响应的模拟HTTP异常"""
+
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class TestBackoff:
+    """测试Retry-After解析与退避计算"""
+
+    def test_retry_after(self):
+        """测试秒数、毫秒与无响应头的解析"""
+        assert get_retry_after(_HTTPError(429, {"retry-after": "3"})) == 3.0
+        assert get_retry_after(_HTTPError(429, {"retry-after-ms": "1500"})) == 1.5
+        assert get_retry_after(_HTTPError(500)) is None
+        assert get_retry_after(ValueError("no response")) is None
+
+    def test_compute_backoff(self):
+        """测试有Retry-After时优先使用，否则按抖动后的指数退避"""
+        config = RetryConfig(initial_delay=2, backoff_factor=2, max_delay=10)
+        assert 3.0 <= compute_backoff(config, 0, retry_after=3.0) <= 3.3
+        for attempt, delay in [(0, 2), (1, 4), (5, 10)]:
+            assert delay / 2 <= compute_backoff(config, attempt) <= delay
+        assert compute_backoff(RetryConfig(initial_delay=2, jitter=False), 1) == 4
+
+
+class TestTokenBucket:
+    """测试令牌桶"""
+
+    def test_wait_after_burst(self):
+        """测试用完突发容量后按速率排队"""
+        bucket = TokenBucket(per_minute=60)
+        assert bucket.reserve(60) == 0.0
+        assert 0.9 <= bucket.reserve(1) <= 1.0
+        assert 1.9 <= bucket.reserve(1) <= 2.0
+
+
+class TestCircuitBreaker:
+    """测试熔断器与熔断期间的优雅降级"""
+
+    def setup_method(self):
+        """创建冷却时间为0的熔断器，便于立即进入半开状态"""
+        self.breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0)
+
+    def test_open_half_open_close(self):
+        """测试连续失败后打开，半开时只放行一次试探，成功后关闭"""
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitBreaker.CLOSED
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitBreaker.OPEN
+
+        assert self.breaker.allow()
+        assert self.breaker.state == CircuitBreaker.HALF_OPEN
+        assert not self.breaker.allow()
+        self.breaker.record_success()
+        assert self.breaker.state == CircuitBreaker.CLOSED
+
+    def test_graceful_retry_skips_when_open(self):
+        """测试熔断后不再调用被装饰函数而是返回默认值"""
+        guard = ProviderGuard("test-search", failure_threshold=1, recovery_timeout=60)
+        calls = []
+
+        @with_graceful_retry(RetryConfig(max_retries=2, initial_delay=0), default_return="默认", guard=lambda: guard)
+        def search():
+            calls.append(1)
+            raise _HTTPError(503)
+
+        assert search() == "默认"
+        assert len(calls) == 1
+        assert search() == "默认"
+        assert len(calls) == 1
+
+    def test_only_transport_errors_count(self):
+        """测试解析错误和4xx不计入熔断，连接错误、超时与5xx计入"""
+        guard = ProviderGuard("test-llm", failure_threshold=1, recovery_timeout=60)
+        request = httpx.Request("POST", "https://example.test/v1")
+        ignored = [json.JSONDecodeError("bad", "", 0), ValueError("parse"), KeyError("choices"), _HTTPError(400), _HTTPError(429)]
+        for exc in ignored:
+            guard.record_result(exc)
+        assert guard.breaker.state == CircuitBreaker.CLOSED
+
+        counted = [
+            requests.exceptions.ConnectionError(),
+            requests.exceptions.ReadTimeout(),
+            httpx.ConnectTimeout("timeout", request=request),
+            openai.APIConnectionError(request=request),
+            openai.APITimeoutError(request=request),
+            _HTTPError(502),
+            _HTTPError(408),
+        ]
+        for exc in counted:
+            guard.breaker.record_success()
+            guard.record_result(exc)
+            assert guard.breaker.state == CircuitBreaker.OPEN, exc
+
+    def test_rejections_are_neutral(self):
+        """测试429/4xx既不清零失败计数也不关闭半开的熔断器，只有成功调用才会关闭"""
+        guard = ProviderGuard("test-neutral", failure_threshold=2, recovery_timeout=0)
+        for exc in [_HTTPError(503), _HTTPError(429), _HTTPError(400), _HTTPError(503)]:
+            guard.record_result(exc)
+        assert guard.breaker.state == CircuitBreaker.OPEN
+
+        assert guard.breaker.allow()
+        assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+        guard.record_result(_HTTPError(429))
+        assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+        assert guard.breaker.allow()
+        guard.record_result()
+        assert guard.breaker.state == CircuitBreaker.CLOSED
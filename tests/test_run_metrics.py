@@ -0,0 +1,99 @@
+"""
+测试运行耗时与用量统计
+
+覆盖：
+1. span在研究范围内同时计入本次研究与进程级汇总，线程池任务复制上下文后同样计入
+2. Prometheus文本格式导出
+3. LLMClient按节点记录生成耗时、首token耗时与token用量
+"""
+
+import contextvars
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+
+import run_metrics
+from run_metrics import RunMetrics, metrics_run, span, increment, render_prometheus
+from InsightEngine.llms import LLMClient
+
+
+def _stage(summary, name):
+    return [stage for stage in summary["stages"] if stage["stage"] == name]
+
+
+class TestRunMetrics:
+    """测试计时与导出"""
+
+    def test_span_scoped_to_run(self, tmp_path):
+        """测试研究范围外的耗时只计入汇总，工作线程的耗时计入本次研究"""
+        with span("test.outside"):
+            pass
+        with metrics_run("查询") as run:
+            with span("test.stage", tool="a"):
+                pass
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, increment, "test.rounds") for _ in range(3)]
+                for future in futures:
+                    future.result()
+        assert run_metrics.current_run() is None
+
+        summary = run.summary()
+        assert not _stage(summary, "test.outside")
+        assert _stage(summary, "test.stage")[0]["labels"] == {"tool": "a"}
+        assert summary["counters"] == [{"name": "test.rounds", "labels": {}, "value": 3}]
+        assert run_metrics.get_aggregate().summary()["name"] == "aggregate"
+
+        run.save(str(tmp_path / "metrics.json"))
+        assert (tmp_path / "metrics.json").exists()
+
+    def test_render_prometheus(self):
+        """测试阶段耗时导出为summary，计数导出为counter"""
+        metrics = RunMetrics()
+        metrics.observe("db.query", 0.5)
+        metrics.observe("db.query", 1.5)
+        metrics.increment("llm.prompt_tokens", 100, node='Report"Node')
+        text = render_prometheus(metrics)
+        assert 'bettafish_stage_seconds_count{stage="db.query"} 2' in text
+        assert 'bettafish_stage_seconds_sum{stage="db.query"} 2.000000' in text
+        assert 'bettafish_stage_seconds_max{stage="db.query"} 1.500000' in text
+        assert "# TYPE bettafish_llm_prompt_tokens_total counter" in text
+        assert 'bettafish_llm_prompt_tokens_total{node="Report\\"Node"} 100' in text
+
+
+class TestClientInstrumentation:
+    """测试LLMClient的耗时与用量统计"""
+
+    def setup_method(self):
+        """创建以模拟流式响应代替网络请求的客户端"""
+        self.llm = LLMClient(api_key="test-key", model_name="test-model", base_url="https://llm.example.test/v1")
+
+        def chunk(content, usage=None):
+            delta = SimpleNamespace(content=content)
+            return SimpleNamespace(choices=[SimpleNamespace(delta=delta)] if content else [], usage=usage)
+
+        usage = SimpleNamespace(prompt_tokens=50, completion_tokens=5, prompt_cache_hit_tokens=20)
+        create = lambda **request: iter([chunk("你好"), chunk("世界"), chunk(None, usage)])
+        self.llm.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    def test_stream_records_node_metrics(self):
+        """测试流式调用按节点记录首token、生成耗时与token计数"""
+        with metrics_run("查询") as run:
+            assert self.llm.stream_invoke_to_string("系统", "用户", cache_node="FirstSearchNode") == "你好世界"
+
+        summary = run.summary()
+        labels = {"model": "test-model", "node": "FirstSearchNode"}
+        assert _stage(summary, "llm.ttft")[0]["labels"] == labels
+        assert _stage(summary, "llm.generate")[0]["count"] == 1
+        counters = {item["name"]: item["value"] for item in summary["counters"] if item["labels"] == labels}
+        assert counters == {
+            "llm.requests": 1,
+            "llm.prompt_tokens": 50,
+            "llm.cached_prompt_tokens": 20,
+            "llm.completion_tokens": 5,
+        }
@@ -0,0 +1,132 @@
+"""
+测试InsightEngine/tools/search_cache.py中的查询结果缓存
+
+覆盖：
+1. 参数规范化后的缓存键
+2. 水位线前移后缓存失效
+3. LRU淘汰
+4. SQLite持久化跨实例复用
+5. 有子查询失败的工具结果不写入缓存
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.tools import search
+from InsightEngine.tools.search import DBResponse, MediaCrawlerDB, QueryResult
+from InsightEngine.tools.search_cache import SearchResultCache
+from InsightEngine.utils.config import settings
+
+
+def _make_response(text: str = "测试内容") -> DBResponse:
+    result = QueryResult(
+        platform="weibo",
+        content_type="note",
+        title_or_content=text,
+        publish_time=datetime(2025, 8, 25, 18, 2, 14),
+        engagement={"likes": 3},
+        source_table="weibo_note",
+    )
+    return DBResponse("search_topic_globally", {"topic": "武汉大学"}, results=[result], results_count=1)
+
+
+class TestSearchResultCache:
+    """测试SearchResultCache的读写与失效"""
+
+    def setup_method(self):
+        """每个测试方法前的初始化"""
+        self.cache = SearchResultCache(max_entries=2)
+        self.watermark = (("weibo_note", 100, 100),)
+
+    def test_make_key_normalizes_params(self):
+        """测试首尾空白和多余空格不影响缓存键，大小写不同的话题使用不同的键"""
+        key_a = SearchResultCache.make_key("search_topic_globally", {"topic": "  武汉大学  AI ", "limit_per_table": 50})
+        key_b = SearchResultCache.make_key("search_topic_globally", {"limit_per_table": 50, "topic": "武汉大学 AI"})
+        key_c = SearchResultCache.make_key("search_topic_by_date", {"topic": "武汉大学 AI", "limit_per_table": 50})
+        key_d = SearchResultCache.make_key("search_topic_globally", {"topic": "武汉大学 ai", "limit_per_table": 50})
+        assert key_a == key_b
+        assert key_a != key_c
+        # 数据库的 LIKE 匹配可能区分大小写
+        assert key_a != key_d
+
+    def test_hit_returns_copy(self):
+        """测试命中时返回副本，调用方修改不会污染缓存"""
+        key = self.cache.make_key("search_topic_globally", {"topic": "武汉大学"})
+        self.cache.set(key, self.watermark, _make_response())
+
+        cached = self.cache.get(key, self.watermark)
+        assert cached is not None
+        assert cached.results[0].title_or_content == "测试内容"
+
+        cached.parameters["sentiment_analysis"] = {}
+        assert "sentiment_analysis" not in self.cache.get(key, self.watermark).parameters
+        assert self.cache.get_stats()["hits"] == 2
+
+    def test_watermark_advance_invalidates(self):
+        """测试水位线前移后缓存失效"""
+        key = self.cache.make_key("search_topic_globally", {"topic": "武汉大学"})
+        self.cache.set(key, self.watermark, _make_response())
+
+        assert self.cache.get(key, (("weibo_note", 200, 200),)) is None
+        # 失效条目已被删除，旧水位线也不会再命中
+        assert self.cache.get(key, self.watermark) is None
+        assert self.cache.get_stats()["misses"] == 2
+
+    def test_lru_eviction(self):
+        """测试超过容量时淘汰最久未使用的条目"""
+        for name in ["a", "b"]:
+            self.cache.set(name, self.watermark, _make_response(name))
+        self.cache.get("a", self.watermark)
+        self.cache.set("c", self.watermark, _make_response("c"))
+
+        assert self.cache.get("b", self.watermark) is None
+        assert self.cache.get("a", self.watermark) is not None
+        assert self.cache.get("c", self.watermark) is not None
+
+    def test_sqlite_persistence(self, tmp_path):
+        """测试SQLite缓存可被新实例读取，并还原datetime字段"""
+        db_path = str(tmp_path / "search_cache.db")
+        key = SearchResultCache.make_key("search_topic_globally", {"topic": "武汉大学"})
+        SearchResultCache(sqlite_path=db_path).set(key, self.watermark, _make_response())
+
+        reloaded = SearchResultCache(sqlite_path=db_path).get(key, self.watermark)
+        assert reloaded is not None
+        assert reloaded.results[0].publish_time == datetime(2025, 8, 25, 18, 2, 14)
+        assert reloaded.results[0].engagement == {"likes": 3}
+
+
+class TestPartialFailureNotCached:
+    """测试单表查询失败时不缓存不完整的结果"""
+
+    def test_failed_table_is_requeried(self, monkeypatch):
+        """测试某张表查询失败后结果被标记，下次调用仍查询数据库"""
+        monkeypatch.setenv("DATABASE_URL", "mysql+aiomysql://u:p@localhost:3306/x")
+        monkeypatch.setattr(settings, "SENTIMENT_PRECOMPUTED_ENABLED", False)
+        calls = {"weibo_note": 0}
+
+        async def fake_fetch_all(query, params=None, replica=False):
+            if "AS tbl" in query:
+                # 水位线查询：各表返回固定水位线
+                return [{"tbl": part.split("'")[1], "max_add_ts": 1, "max_modify_ts": 1} for part in query.split(" UNION ALL ")]
+            if "FROM `weibo_note`" in query:
+                calls["weibo_note"] += 1
+                if calls["weibo_note"] == 1:
+                    raise TimeoutError("lock wait timeout")
+                return [{"id": 1, "content": "武汉大学樱花"}]
+            return []
+
+        monkeypatch.setattr(search, "fetch_all", fake_fetch_all)
+        db = MediaCrawlerDB(cache=SearchResultCache())
+
+        first = db.search_topic_globally("武汉大学")
+        assert first.failed_queries == 1 and first.results_count == 0
+        second = db.search_topic_globally("武汉大学")
+        assert calls["weibo_note"] == 2
+        assert second.failed_queries == 0 and second.results_count == 1
+        # 完整的结果正常缓存
+        assert db.search_topic_globally("武汉大学").results_count == 1 and calls["weibo_note"] == 2
@@ -0,0 +1,146 @@
+"""
+测试语义向量索引与语义话题搜索
+
+覆盖：
+1. int8 内存映射索引的追加、落盘、只读重新加载与增量刷新
+2. IVF 聚类训练后的近似检索与全量扫描结果一致
+3. 增量建索引服务按水位线读取新记录，search_topic_semantically 返回按相似度排序的结果
+"""
+
+import asyncio
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+sys.path.insert(0, str(project_root / "MindSpider" / "schema"))
+
+from synthetic_corpus import generate_corpus
+from InsightEngine.tools.search import MediaCrawlerDB
+from InsightEngine.tools.semantic_index import SemanticIndexer, VectorIndex
+from InsightEngine.utils.config import settings
+
+
+class HashingEmbedder:
+    """按字符二元组哈希的确定性嵌入，代替需要下载的Qwen3模型"""
+
+    model_name = "hashing-bigram"
+    dim = 64
+
+    def encode(self, texts, is_query=False):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for i in range(max(1, len(text) - 1)):
+                digest = hashlib.md5(text[i:i + 2].encode("utf-8")).digest()
+                vectors[row, digest[0] % self.dim] += 1.0 if digest[1] % 2 else -1.0
+        return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+
+def clustered_vectors(count, dim, clusters, seed):
+    """围绕若干中心生成的归一化向量"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, count)] + 0.3 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+class TestVectorIndex:
+    """测试向量索引的存储与检索"""
+
+    def test_add_persist_reload_and_refresh(self, tmp_path):
+        """测试未训练时的全量检索、重新加载与增量刷新"""
+        vectors = clustered_vectors(300, 32, 8, seed=1)
+        index = VectorIndex(str(tmp_path), dim=32, model="m", writable=True)
+        index.add("weibo_note", list(range(1, 201)), vectors[:200])
+        index.commit({"weibo_note": (1000, 200)})
+
+        reader = VectorIndex(str(tmp_path))
+        assert reader.count == 200 and reader.watermark("weibo_note") == (1000, 200)
+        hits = reader.search(vectors[17], 5)
+        assert hits[0][:2] == ("weibo_note", 18)
+        assert hits[0][2] == pytest.approx(1.0, abs=0.01)
+        assert [score for _, _, score in hits] == sorted((score for _, _, score in hits), reverse=True)
+
+        # 提交前写入的向量对读者不可见，提交后自动刷新
+        index.add("xhs_note_comment", list(range(1, 101)), vectors[200:])
+        assert reader.search(vectors[250], 1)[0][0] == "weibo_note"
+        index.commit({"xhs_note_comment": (1000, 100)})
+        assert reader.search(vectors[250], 1)[0][:2] == ("xhs_note_comment", 51)
+
+        with pytest.raises(ValueError):
+            VectorIndex(str(tmp_path), dim=64, model="m", writable=True)
+        with pytest.raises(FileNotFoundError):
+            VectorIndex(str(tmp_path / "missing"))
+
+    def test_ivf_recall(self, tmp_path):
+        """测试数据量达到阈值后训练聚类，近似检索召回接近全量扫描"""
+        vectors = clustered_vectors(6000, 32, 40, seed=2)
+        index = VectorIndex(str(tmp_path), dim=32, writable=True)
+        index.add("douyin_aweme", list(range(5000)), vectors[:5000])
+        index.commit()
+        assert index.manifest["trained_count"] == 5000 and index.centroids is not None
+        # 训练后追加的向量直接分配到最近的聚类
+        index.add("douyin_aweme", list(range(5000, 6000)), vectors[5000:])
+        index.commit()
+        assert index.manifest["trained_count"] == 5000
+
+        reader = VectorIndex(str(tmp_path))
+        queries = clustered_vectors(50, 32, 40, seed=2)
+        recalls = []
+        for query in queries:
+            exact = set(np.argsort(-(vectors @ query))[:10].tolist())
+            approx = {source_id for _, source_id, _ in reader.search(query, 10, nprobe=16)}
+            recalls.append(len(exact & approx) / 10)
+        assert np.mean(recalls) >= 0.9
+
+
+class TestSemanticSearch:
+    """测试增量建索引与语义话题搜索工具"""
+
+    def test_indexer_and_tool(self, tmp_path, monkeypatch):
+        """测试按水位线增量建索引，并用原文检索到对应记录"""
+        url = f"sqlite+aiosqlite:///{tmp_path / 'corpus.db'}"
+        asyncio.run(generate_corpus(url, 40, comments_per_post=2, platforms=["weibo", "bilibili"], days=10, news_per_day=2))
+        monkeypatch.setenv("DATABASE_URL", url)
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", False)
+        monkeypatch.setattr(settings, "SEMANTIC_INDEX_DIR", str(tmp_path / "index"))
+
+        embedder = HashingEmbedder()
+        tables = ["weibo_note", "weibo_note_comment", "bilibili_video", "daily_news"]
+        indexer = SemanticIndexer(embedder=embedder, tables=tables, batch_size=16)
+        counts = asyncio.run(indexer.run_once())
+        assert counts["weibo_note"] == 40 and counts["daily_news"] == 20 and counts["weibo_note_comment"] > 0
+        assert indexer.index.count == sum(counts.values())
+        assert asyncio.run(indexer.run_once()) == {table: 0 for table in tables}
+
+        # 爬虫新写入的记录 add_ts 晚于水位线
+        engine = create_engine(f"sqlite:///{tmp_path / 'corpus.db'}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                'INSERT INTO "weibo_note" (id, note_id, content, add_ts, last_modify_ts) '
+                "VALUES (999999, 'n999999', '珞珈山下樱花大道人山人海，门票预约一秒抢光', 9999999999999, 9999999999999)"
+            ))
+        engine.dispose()
+        assert asyncio.run(indexer.run_once())["weibo_note"] == 1
+
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        try:
+            response = MediaCrawlerDB(embedder=embedder).search_topic_semantically("珞珈山下樱花大道人山人海", limit=5)
+        finally:
+            asyncio.get_event_loop().close()
+            asyncio.set_event_loop(None)
+        assert response.error_message is None and response.results_count == 5
+        top = response.results[0]
+        assert (top.source_table, top.source_id, top.content_type) == ("weibo_note", 999999, "note")
+        scores = [result.relevance_score for result in response.results]
+        assert scores == sorted(scores, reverse=True) and scores[0] > scores[1]
+
+        monkeypatch.setattr(settings, "SEMANTIC_INDEX_DIR", str(tmp_path / "missing"))
+        assert MediaCrawlerDB(embedder=embedder).search_topic_semantically("话题").error_message
@@ -0,0 +1,91 @@
+"""
+测试情感分析器的长度分桶批量推理
+
+覆盖：
+1. 文本按长度排序后分批推理，每批只填充到批内最大长度，结果按输入顺序返回
+2. 某个批次推理失败时改为逐条分析，只有出错的文本标记为失败
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.tools.sentiment_analyzer import WeiboMultilingualSentimentAnalyzer
+
+# 出现该字符的批次推理时抛出异常
+_BAD_CHAR = "坏"
+
+
+class _CharTokenizer:
+    """按字符编码的分词器，动态padding到批内最长文本"""
+
+    def __call__(self, texts, max_length=512, padding=True, truncation=True, return_tensors="np"):
+        width = max(len(t) for t in texts)
+        input_ids = np.zeros((len(texts), width), dtype=np.int64)
+        attention_mask = np.zeros((len(texts), width), dtype=np.int64)
+        for row, text in enumerate(texts):
+            input_ids[row, :len(text)] = [ord(c) for c in text]
+            attention_mask[row, :len(text)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+class _LengthModel:
+    """以ONNX会话接口模拟的模型：预测类别为 文本长度 % 5，并记录每批的输入形状"""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+    def run(self, output_names, feed):
+        self.batches.append(feed["input_ids"].shape)
+        if (feed["input_ids"] == ord(_BAD_CHAR)).any():
+            raise RuntimeError("推理失败")
+        lengths = feed["attention_mask"].sum(axis=1)
+        logits = np.zeros((len(lengths), 5), dtype=np.float32)
+        logits[np.arange(len(lengths)), lengths % 5] = 5.0
+        return [logits]
+
+
+class TestLengthBucketedBatching:
+    """测试analyze_batch的分桶推理与逐条回退"""
+
+    def setup_method(self):
+        """用桩分词器和模型代替真实模型"""
+        self.model = _LengthModel()
+        self.analyzer = WeiboMultilingualSentimentAnalyzer(cache=None)
+        self.analyzer.is_disabled = False
+        self.analyzer.is_initialized = True
+        self.analyzer.tokenizer = _CharTokenizer()
+        self.analyzer.onnx_session = self.model
+
+    def test_results_follow_input_order(self):
+        """测试按长度分批推理后结果仍与输入一一对应"""
+        texts = ["很长很长的一条评论", "好", "一般般吧", "", "还行", "非常满意的体验"]
+        batch = self.analyzer.analyze_batch(texts, show_progress=False, batch_size=2)
+
+        assert [r.text for r in batch.results] == texts
+        expected = [self.analyzer.sentiment_map[len(t) % 5] for t in texts if t]
+        assert [r.sentiment_label for r in batch.results if r.success] == expected
+        assert batch.results[3].sentiment_label == "输入错误"
+        # 短文本与短文本同批，每批只填充到批内最长文本
+        assert self.model.batches == [(2, 2), (2, 7), (1, 9)]
+        assert (batch.success_count, batch.failed_count) == (5, 1)
+
+    def test_failed_batch_falls_back_to_single_texts(self):
+        """测试批次失败后逐条重试，只有出错的文本失败"""
+        texts = ["很好", "太坏了", "不错"]
+        batch = self.analyzer.analyze_batch(texts, show_progress=False, batch_size=3)
+
+        assert [r.success for r in batch.results] == [True, False, True]
+        assert batch.results[1].sentiment_label == "分析失败"
+        assert batch.results[0].sentiment_label == self.analyzer.sentiment_map[2]
+        # 一次批量推理，随后按长度顺序逐条推理
+        assert self.model.batches == [(3, 3), (1, 2), (1, 2), (1, 3)]
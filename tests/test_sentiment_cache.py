@@ -0,0 +1,81 @@
+"""
+测试InsightEngine/tools/sentiment_cache.py中的情感分析结果缓存
+
+覆盖：
+1. 缓存键区分模型标识
+2. 批量读写与命中统计
+3. SQLite持久化跨实例复用
+4. 分析器批量分析时优先使用缓存
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from InsightEngine.tools.sentiment_cache import SentimentCache, CachedSentiment
+from InsightEngine.tools.sentiment_analyzer import WeiboMultilingualSentimentAnalyzer
+
+
+def _entry(label: str = "正面", confidence: float = 0.9) -> CachedSentiment:
+    return CachedSentiment(label, confidence, {label: confidence})
+
+
+class TestSentimentCache:
+    """测试SentimentCache的批量读写"""
+
+    def setup_method(self):
+        """每个测试方法前的初始化"""
+        self.cache = SentimentCache(max_entries=10)
+
+    def test_make_key_includes_model_id(self):
+        """测试相同文本在不同模型下得到不同的键"""
+        assert SentimentCache.make_key("好评", "model-a") == SentimentCache.make_key("好评", "model-a")
+        assert SentimentCache.make_key("好评", "model-a") != SentimentCache.make_key("好评", "model-b")
+
+    def test_get_many_counts_hits_and_misses(self):
+        """测试批量查询只返回命中的键，并累计命中率"""
+        self.cache.set_many({"a": _entry(), "b": _entry("负面", 0.8)})
+
+        found = self.cache.get_many(["a", "b", "c"])
+        assert set(found) == {"a", "b"}
+        assert found["b"].sentiment_label == "负面"
+
+        stats = self.cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+
+    def test_sqlite_persistence(self, tmp_path):
+        """测试SQLite缓存可被新实例批量读取"""
+        db_path = str(tmp_path / "sentiment_cache.db")
+        SentimentCache(sqlite_path=db_path).set_many({"a": _entry()})
+
+        found = SentimentCache(sqlite_path=db_path).get_many(["a", "missing"])
+        assert list(found) == ["a"]
+        assert found["a"].probability_distribution == {"正面": 0.9}
+
+
+class TestAnalyzerWithCache:
+    """测试分析器在批量分析时使用缓存"""
+
+    def setup_method(self):
+        """每个测试方法前的初始化"""
+        self.cache = SentimentCache()
+        self.analyzer = WeiboMultilingualSentimentAnalyzer(cache=self.cache)
+        # 测试环境没有模型，模拟已初始化状态；全部命中缓存时不会触发推理
+        self.analyzer.is_disabled = False
+        self.analyzer.is_initialized = True
+
+    def test_batch_served_from_cache(self):
+        """测试已缓存文本直接返回结果，空文本仍标记为输入错误"""
+        key = self.cache.make_key("这家店 很好", self.analyzer.model_id)
+        self.cache.set_many({key: _entry()})
+
+        batch = self.analyzer.analyze_batch(["  这家店   很好 ", ""], show_progress=False)
+        assert batch.results[0].success
+        assert batch.results[0].sentiment_label == "正面"
+        assert batch.results[0].text == "  这家店   很好 "
+        assert batch.results[1].sentiment_label == "输入错误"
+        assert batch.success_count == 1
@@ -0,0 +1,134 @@
+"""
+测试 SQLite 后端与 FTS5 全文索引
+
+覆盖：
+1. DB_DIALECT 为 sqlite 时的连接URL与方言判断
+2. 建索引前已有的数据被重建进索引，触发器随插入、更新、删除同步
+3. MediaCrawlerDB 的全部查询工具在 SQLite 上可用，FTS5 与 LIKE 返回相同的结果
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+sys.path.insert(0, str(project_root / "MindSpider" / "schema"))
+
+from models_sa import Base
+from run_metrics import metrics_run
+from sqlite_fts import create_fts_indexes, drop_fts_indexes
+from synthetic_corpus import TOPICS, generate_corpus
+from InsightEngine.tools.search import MediaCrawlerDB
+from InsightEngine.utils import db
+from InsightEngine.utils.config import settings
+
+END_TIME = datetime(2025, 6, 30, 23, 59, 59)
+
+
+def run_with_loop(fn):
+    """在新的事件循环中运行同步查询工具"""
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    try:
+        return fn()
+    finally:
+        asyncio.get_event_loop().close()
+        asyncio.set_event_loop(None)
+
+
+class TestSqliteUrl:
+    """测试连接URL的构造"""
+
+    def test_sqlite_url_and_dialect(self, monkeypatch):
+        """测试相对路径以项目根目录为基准，并补充扩展名"""
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+        monkeypatch.setattr(settings, "DB_DIALECT", "sqlite")
+        monkeypatch.setattr(settings, "DB_NAME", "data/insight")
+        assert db._build_database_url() == f"sqlite+aiosqlite:///{project_root.resolve() / 'data' / 'insight.db'}"
+        assert db.get_dialect_name() == "sqlite"
+
+        monkeypatch.setenv("DATABASE_URL", "mysql+aiomysql://u:p@localhost:3306/x")
+        assert db.get_dialect_name() == "mysql"
+
+
+class TestFtsIndex:
+    """测试FTS5索引与源表的同步"""
+
+    def setup_method(self):
+        """创建只含一张评论表的内存数据库"""
+        self.engine = create_engine("sqlite://")
+        self.table = Base.metadata.tables["weibo_note_comment"]
+
+    def teardown_method(self):
+        self.engine.dispose()
+
+    def _match(self, conn, phrase):
+        return sorted(conn.execute(text(
+            "SELECT rowid FROM weibo_note_comment_fts WHERE weibo_note_comment_fts MATCH :q"
+        ), {"q": f'"{phrase}"'}).scalars())
+
+    def test_rebuild_and_triggers(self):
+        """测试已有数据的重建与增删改同步"""
+        with self.engine.begin() as conn:
+            self.table.create(conn)
+            conn.execute(self.table.insert(), [{"id": 1, "content": "武汉大学樱花开了"}])
+            assert create_fts_indexes(conn) == ["weibo_note_comment"]
+            # 再次调用时跳过已有索引
+            assert create_fts_indexes(conn) == []
+            assert self._match(conn, "武汉大学") == [1]
+
+            conn.execute(self.table.insert(), [{"id": 2, "content": "今天去武汉大学看樱花"}, {"id": 3, "content": "无关内容"}])
+            assert self._match(conn, "武汉大学") == [1, 2]
+
+            conn.execute(self.table.update().where(self.table.c.id == 1).values(content="珞珈山的秋天"))
+            assert self._match(conn, "武汉大学") == [2]
+            assert self._match(conn, "珞珈山") == [1]
+
+            conn.execute(self.table.delete().where(self.table.c.id == 2))
+            assert self._match(conn, "武汉大学") == []
+
+            drop_fts_indexes(conn, ["weibo_note_comment"])
+            conn.execute(self.table.insert(), [{"id": 4, "content": "删除索引后仍可写入"}])
+
+
+class TestSqliteSearch:
+    """测试查询工具在SQLite上的行为"""
+
+    def test_tools_with_fts_and_like(self, tmp_path, monkeypatch):
+        """测试全部工具无SQL错误，且FTS5与LIKE的匹配结果一致"""
+        url = f"sqlite+aiosqlite:///{tmp_path / 'corpus.db'}"
+        asyncio.run(generate_corpus(url, 200, comments_per_post=3, end_time=datetime.now(), days=30, news_per_day=5))
+        monkeypatch.setenv("DATABASE_URL", url)
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", False)
+        database = MediaCrawlerDB()
+        topic = next(t for t in TOPICS if len(t) >= 3)
+        start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        end_date = datetime.now().strftime("%Y-%m-%d")
+
+        def run_all():
+            return [
+                database.search_hot_content(time_period="year", limit=20),
+                database.search_topic_globally(topic, limit_per_table=1000),
+                database.search_topic_by_date(topic, start_date, end_date),
+                database.get_comments_for_topic(topic, limit=1000),
+                database.search_topic_on_platform("weibo", topic, start_date=start_date, end_date=end_date),
+                database.search_topic_globally(topic[:2], limit_per_table=5),
+            ]
+
+        with metrics_run("sqlite") as run:
+            with_fts = run_with_loop(run_all)
+        counters = {c["name"]: c["value"] for c in run.summary()["counters"]}
+        assert counters.get("db.errors", 0) == 0
+        assert all(response.error_message is None and response.results_count > 0 for response in with_fts)
+
+        monkeypatch.setattr(settings, "SQLITE_FTS_ENABLED", False)
+        with_like = run_with_loop(run_all)
+        for fts_response, like_response in zip(with_fts, with_like):
+            fts_ids = sorted((r.source_table, r.source_id) for r in fts_response.results)
+            like_ids = sorted((r.source_table, r.source_id) for r in like_response.results)
+            assert fts_ids == like_ids
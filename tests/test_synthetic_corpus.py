@@ -0,0 +1,99 @@
+"""
+测试合成语料生成器与基准测试依赖的查询路径
+
+覆盖：
+1. 相同种子与序号生成相同的数据，各平台时间字段沿用爬虫入库格式
+2. 词频与互动量呈长尾分布
+3. 写入SQLite、按偏移量追加，并由 MediaCrawlerDB 工具查询
+4. %s 位置参数转换为命名参数
+"""
+
+import asyncio
+import random
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+sys.path.insert(0, str(project_root / "MindSpider" / "schema"))
+
+from synthetic_corpus import PLATFORMS, TOPICS, SyntheticCorpus, count_posts, generate_corpus
+from InsightEngine.tools.search import MediaCrawlerDB
+from InsightEngine.utils.config import settings
+
+END_TIME = datetime(2025, 6, 30, 23, 59, 59)
+
+
+class TestSyntheticCorpus:
+    """测试合成数据的分布与格式"""
+
+    def setup_method(self):
+        """创建固定时间终点的生成器"""
+        self.corpus = SyntheticCorpus(seed=7, vocabulary_size=3000, days=90, end_time=END_TIME, comments_per_post=4)
+
+    def test_deterministic_with_platform_time_formats(self):
+        """测试可复现性与各平台的时间字段格式"""
+        first = list(self.corpus.rows("weibo", 10, 5))
+        again = list(SyntheticCorpus(seed=7, vocabulary_size=3000, days=90, end_time=END_TIME, comments_per_post=4).rows("weibo", 10, 5))
+        assert first == again
+
+        post = {platform: next(self.corpus.rows(platform, 0, 1))[0] for platform in PLATFORMS}
+        start, end = datetime(2025, 4, 1).timestamp(), END_TIME.timestamp()
+        assert start <= post["bilibili"]["create_time"] <= end
+        assert start <= post["douyin"]["create_time"] <= end
+        assert start * 1000 <= post["kuaishou"]["create_time"] <= end * 1000
+        assert start * 1000 <= post["xhs"]["time"] <= end * 1000
+        assert post["weibo"]["create_date_time"].endswith("+08:00")
+        assert post["zhihu"]["created_time"].isdigit()
+        assert datetime.strptime(post["tieba"]["publish_time"], "%Y-%m-%d %H:%M") <= END_TIME
+        assert all(row["source_keyword"] in TOPICS for row in post.values())
+
+    def test_long_tail_distributions(self):
+        """测试词频与点赞数的长尾分布"""
+        rows = [post for post, _ in self.corpus.rows("douyin", 0, 2000)]
+        likes = sorted((int(row["liked_count"]) for row in rows), reverse=True)
+        assert sum(likes[:200]) > 0.35 * sum(likes)
+
+        counts = Counter(self.corpus.words(random.Random(1), 20000))
+        vocabulary = self.corpus.vocabulary
+        assert counts[vocabulary[0]] > 20 * max(counts[word] for word in vocabulary[-100:])
+        topics = Counter(row["source_keyword"] for row in rows)
+        assert topics[TOPICS[0]] > topics[TOPICS[-1]]
+
+
+class TestCorpusDatabase:
+    """测试写入数据库并由查询工具读取"""
+
+    def test_generate_append_and_query(self, tmp_path, monkeypatch):
+        """测试生成、追加与全局话题搜索"""
+        url = f"sqlite+aiosqlite:///{tmp_path / 'corpus.db'}"
+        platforms = ["bilibili", "tieba"]
+        written = asyncio.run(generate_corpus(url, 30, comments_per_post=2, platforms=platforms,
+                                              end_time=END_TIME, news_per_day=2, days=10))
+        assert written["bilibili_video"] == 30 and written["daily_news"] == 20
+        asyncio.run(generate_corpus(url, 20, platforms=platforms, offset=30, end_time=END_TIME, days=10))
+        assert asyncio.run(count_posts(url, platforms)) == 50
+
+        monkeypatch.setenv("DATABASE_URL", url)
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", False)
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        try:
+            response = MediaCrawlerDB().search_topic_globally(TOPICS[0], limit_per_table=100)
+        finally:
+            asyncio.get_event_loop().close()
+            asyncio.set_event_loop(None)
+        tables = {result.source_table for result in response.results}
+        assert response.results_count > 0
+        assert "bilibili_video" in tables
+
+    def test_bind_positional_params(self):
+        """测试 %s 占位符转换为命名参数"""
+        query, params = MediaCrawlerDB._bind_positional_params(
+            "SELECT * FROM t WHERE a LIKE %s OR b LIKE %s LIMIT %s", ("%x%", "%y%", 5)
+        )
+        assert query == "SELECT * FROM t WHERE a LIKE :p0 OR b LIKE :p1 LIMIT :p2"
+        assert params == {"p0": "%x%", "p1": "%y%", "p2": 5}
@@ -0,0 +1,118 @@
+"""
+测试话题趋势汇总服务与 get_topic_trend 工具
+
+覆盖：
+1. 时间桶按本地整点/零点划分，各平台时间字段均可解析
+2. 增量汇总：条数与互动量和原始数据一致，重跑不重复计数，评论使用所属内容的关键词
+3. 预计算情感计入对应时间桶，get_topic_trend 返回按时间排列的数值序列
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "utils"))
+sys.path.insert(0, str(project_root / "MindSpider" / "schema"))
+
+from synthetic_corpus import TOPICS, generate_corpus
+from InsightEngine.tools.search import MediaCrawlerDB
+from InsightEngine.tools.topic_rollup import TopicRollupService, _event_ts, bucket_start
+from InsightEngine.utils.config import settings
+
+END_TIME = datetime(2025, 6, 30, 23, 59, 59)
+
+
+class TestBuckets:
+    """测试时间解析与分桶"""
+
+    def test_event_ts_and_buckets(self):
+        """测试秒、毫秒、字符串时间与入库时间回退"""
+        moment = datetime(2025, 6, 1, 13, 45, 10)
+        ts = int(moment.timestamp())
+        assert _event_ts({"create_time": ts}) == ts
+        assert _event_ts({"time": ts * 1000}) == ts
+        assert _event_ts({"created_time": str(ts)}) == ts
+        assert _event_ts({"create_date_time": "2025-06-01 13:45:10+08:00"}) == ts
+        assert _event_ts({"publish_time": "bad", "add_ts": ts * 1000}) == ts
+        assert bucket_start(ts, "hour") == int(datetime(2025, 6, 1, 13).timestamp())
+        assert bucket_start(ts, "day") == int(datetime(2025, 6, 1).timestamp())
+
+
+class TestTopicRollup:
+    """测试增量汇总与趋势查询"""
+
+    def test_incremental_rollup_and_trend(self, tmp_path, monkeypatch):
+        """测试汇总结果与原始数据一致，并由 get_topic_trend 读取"""
+        db_path = tmp_path / "corpus.db"
+        url = f"sqlite+aiosqlite:///{db_path}"
+        asyncio.run(generate_corpus(url, 60, comments_per_post=3, platforms=["weibo", "douyin"],
+                                    end_time=END_TIME, days=10, news_per_day=0))
+        monkeypatch.setenv("DATABASE_URL", url)
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", False)
+
+        service = TopicRollupService(tables=["weibo_note", "weibo_note_comment", "douyin_aweme"], batch_size=25)
+        counts = asyncio.run(service.run_once())
+        assert counts["weibo_note"] == 60 and counts["douyin_aweme"] == 60
+        assert asyncio.run(service.run_once()) == {source: 0 for source in counts}
+
+        engine = create_engine(f"sqlite:///{db_path}")
+        with engine.begin() as conn:
+            def rollup_sum(column, granularity, **where):
+                clauses = "".join(f" AND {key} = :{key}" for key in where)
+                return conn.execute(text(f"SELECT COALESCE(SUM({column}), 0) FROM topic_rollup WHERE granularity = :g{clauses}"),
+                                    {"g": granularity, **where}).scalar()
+
+            likes = sum(int(v) for v in conn.execute(text("SELECT liked_count FROM weibo_note")).scalars())
+            comment_total = conn.execute(text("SELECT COUNT(*) FROM weibo_note_comment")).scalar()
+            for granularity in ("hour", "day"):
+                assert rollup_sum("item_count", granularity, platform="weibo", content_type="note") == 60
+                assert rollup_sum("likes", granularity, platform="weibo", content_type="note") == likes
+                assert rollup_sum("item_count", granularity, content_type="comment") == comment_total
+            # 评论按所属内容的关键词归类
+            keyword_comments = conn.execute(text(
+                "SELECT COUNT(*) FROM weibo_note_comment c JOIN weibo_note p ON p.note_id = c.note_id WHERE p.source_keyword = :k"
+            ), {"k": TOPICS[0]}).scalar()
+            assert rollup_sum("item_count", "day", content_type="comment", source_keyword=TOPICS[0]) == keyword_comments
+
+            # 后台打分写入的情感随后计入同一时间桶
+            note_ids = list(conn.execute(text("SELECT id FROM weibo_note ORDER BY id LIMIT 3")).scalars())
+            conn.execute(text(
+                "INSERT INTO content_sentiment (source_table, source_id, model_id, sentiment_label, confidence, add_ts, last_modify_ts) "
+                "VALUES ('weibo_note', :id, 'm', :label, 0.9, 1, 1)"
+            ), [{"id": note_ids[0], "label": "非常正面"}, {"id": note_ids[1], "label": "负面"}, {"id": note_ids[2], "label": "中性"}])
+
+        counts = asyncio.run(service.run_once())
+        assert counts["content_sentiment"] == 3 and counts["weibo_note"] == 0
+        with engine.begin() as conn:
+            totals = conn.execute(text(
+                "SELECT SUM(sentiment_positive), SUM(sentiment_neutral), SUM(sentiment_negative) FROM topic_rollup WHERE granularity = 'day'"
+            )).one()
+        engine.dispose()
+        assert tuple(totals) == (1, 1, 1)
+
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        try:
+            database = MediaCrawlerDB()
+            start_date = (END_TIME - timedelta(days=15)).strftime("%Y-%m-%d")
+            end_date = END_TIME.strftime("%Y-%m-%d")
+            daily = database.get_topic_trend(TOPICS[0], "day", start_date, end_date, platform="weibo")
+            hourly = database.get_topic_trend(TOPICS[0], "hour", start_date, end_date)
+            invalid = database.get_topic_trend(TOPICS[0], "minute")
+        finally:
+            asyncio.get_event_loop().close()
+            asyncio.set_event_loop(None)
+
+        assert daily.error_message is None and daily.results_count > 0
+        times = [result.publish_time for result in daily.results]
+        assert times == sorted(times)
+        assert all(result.content_type == "trend" and result.platform == "weibo" for result in daily.results)
+        assert daily.results[0].title_or_content.startswith(times[0].strftime("%Y-%m-%d"))
+        hourly_posts = sum(result.engagement["posts"] for result in hourly.results)
+        assert hourly_posts >= sum(result.engagement["posts"] for result in daily.results)
+        assert invalid.error_message
@@ -0,0 +1,293 @@
+"""
+研究流程端到端基准测试
+对一组查询运行 DeepSearchAgent.research（Query/Media/Insight）与 ReportAgent.generate_report，
+统计每次运行的墙钟时间、CPU时间、峰值内存与各阶段耗时（utils/run_metrics）。
+
+外部调用通过 utils/cassette 录制与回放，回放时不需要网络、API密钥和数据库：
+
+    # 联网录制（每个查询一盘磁带）
+    python utils/benchmark_research.py record --queries queries.txt --engines query,media,insight,report
+
+    # 离线回放，按录制时的耗时模拟延迟，重复3次
+    python utils/benchmark_research.py replay --queries queries.txt --latency-scale 1.0 --repeat 3 --output bench.json
+
+默认关闭查询结果、关键词优化、情感分析与LLM响应缓存，使 --repeat 的每次运行都从冷状态开始；
+指定 --cache on 时沿用配置中的缓存设置（重复运行会命中前一次写入的缓存）。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# 添加项目根目录与utils目录到路径
+utils_dir = Path(__file__).resolve().parent
+project_root = utils_dir.parent
+for path in (str(project_root), str(utils_dir)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from loguru import logger
+
+from cassette import Cassette, CassetteSession
+from run_metrics import metrics_run
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENGINES = ("query", "media", "insight", "report")
+
+# 回放时缺失则填入占位值的配置项（引擎初始化时要求非空，回放不会真正使用）
+OFFLINE_PLACEHOLDERS = (
+    "QUERY_ENGINE_API_KEY",
+    "MEDIA_ENGINE_API_KEY",
+    "INSIGHT_ENGINE_API_KEY",
+    "REPORT_ENGINE_API_KEY",
+    "KEYWORD_OPTIMIZER_API_KEY",
+    "KEYWORD_OPTIMIZER_MODEL_NAME",
+    "TAVILY_API_KEY",
+    "BOCHA_WEB_SEARCH_API_KEY",
+)
+
+# --cache off 时关闭的结果缓存
+CACHE_SETTINGS = (
+    "SEARCH_CACHE_ENABLED",
+    "KEYWORD_CACHE_ENABLED",
+    "SENTIMENT_CACHE_ENABLED",
+    "LLM_CACHE_ENABLED",
+)
+
+
+def load_queries(args: argparse.Namespace) -> List[str]:
+    """读取查询列表（命令行参数与查询文件，文件中每行一个，#开头为注释）"""
+    queries = list(args.query or [])
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    return queries
+
+
+def cassette_path(cassette_dir: str, query: str) -> str:
+    """查询对应的磁带文件路径"""
+    query_safe = "".join(c for c in query if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    query_safe = query_safe.replace(' ', '_')[:30]
+    digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cassette_dir, f"{query_safe}_{digest}.jsonl")
+
+
+def fill_offline_credentials():
+    """回放时为未配置的密钥与模型名填入占位值"""
+    import config
+
+    config.reload_settings()
+    for name in OFFLINE_PLACEHOLDERS:
+        if not os.environ.get(name) and not getattr(config.settings, name, None):
+            os.environ[name] = "replay"
+    config.reload_settings()
+
+
+def configure_caches(enabled: bool) -> Dict[str, bool]:
+    """
+    设置结果缓存开关（需在导入引擎前调用，缓存实例在引擎初始化时按配置创建）
+
+    Args:
+        enabled: False时关闭所有结果缓存；True时保持配置不变
+
+    Returns:
+        各缓存开关的生效值，写入结果JSON
+    """
+    import config
+
+    if not enabled:
+        for name in CACHE_SETTINGS:
+            os.environ[name] = "false"
+    config.reload_settings()
+    return {name: bool(getattr(config.settings, name)) for name in CACHE_SETTINGS}
+
+
+def build_runners(engines: List[str], session: CassetteSession) -> Dict[str, Callable[[str, List[str]], str]]:
+    """
+    创建各引擎的运行函数
+
+    Returns:
+        引擎名 -> fn(查询, 已生成的子报告列表) -> 报告内容
+    """
+    runners = {}
+    if "query" in engines:
+        from QueryEngine import DeepSearchAgent, Settings
+        agent = DeepSearchAgent(Settings())
+        runners["query"] = lambda query, reports, agent=agent: agent.research(query, save_report=False)
+    if "media" in engines:
+        from MediaEngine import DeepSearchAgent, Settings
+        agent = DeepSearchAgent(Settings())
+        runners["media"] = lambda query, reports, agent=agent: agent.research(query, save_report=False)
+    if "insight" in engines:
+        from InsightEngine import DeepSearchAgent, Settings
+        from InsightEngine.tools.search import MediaCrawlerDB
+        session.patch_method(MediaCrawlerDB, "_execute_query")
+        agent = DeepSearchAgent(Settings())
+        runners["insight"] = lambda query, reports, agent=agent: agent.research(query, save_report=False)
+    if "report" in engines:
+        from ReportEngine import ReportAgent
+        from ReportEngine.utils.config import Settings
+        agent = ReportAgent(Settings())
+        runners["report"] = lambda query, reports, agent=agent: agent.generate_report(
+            query, reports, save_report=False
+        ).get("html_content", "")
+    return runners
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_query(query: str, engines: List[str], runners: Dict[str, Callable[[str, List[str]], str]],
+              session: CassetteSession, track_python_memory: bool) -> Dict[str, Any]:
+    """运行一个查询并返回本次的耗时与资源统计"""
+    session.cassette.rewind()
+    stats_before = dict(session.cassette.stats)
+    if track_python_memory:
+        tracemalloc.reset_peak()
+
+    reports: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with metrics_run(query) as run:
+        for engine in engines:
+            # ReportAgent按 Query、Media、Insight 的顺序接收子报告
+            sub_reports = [reports[name] for name in ("query", "media", "insight") if name in reports]
+            try:
+                reports[engine] = runners[engine](query, sub_reports)
+            except Exception as e:
+                logger.exception(f"[{engine}] 运行失败: {e}")
+                errors[engine] = f"{type(e).__name__}: {e}"
+
+    summary = run.summary()
+    result = {
+        "query": query,
+        "wall_seconds": round(time.perf_counter() - wall_start, 4),
+        "cpu_seconds": round(time.process_time() - cpu_start, 4),
+        "peak_rss_mb": _peak_rss_mb(),
+        "cassette": {k: v - stats_before.get(k, 0) for k, v in session.cassette.stats.items()},
+        "errors": errors,
+        "stages": summary["stages"],
+        "counters": summary["counters"],
+    }
+    if track_python_memory:
+        result["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+    return result
+
+
+def _print_run(result: Dict[str, Any], top: int):
+    line = (
+        f"{result['query'][:30]:<30} 墙钟 {result['wall_seconds']:>8.2f}s  CPU {result['cpu_seconds']:>8.2f}s  "
+        f"峰值RSS {result['peak_rss_mb']}MB  磁带 {result['cassette']}"
+    )
+    if "python_peak_mb" in result:
+        line += f"  Python峰值 {result['python_peak_mb']}MB"
+    print(line)
+    for stage in result["stages"][:top]:
+        labels = ",".join(f"{k}={v}" for k, v in stage["labels"].items())
+        name = f"{stage['stage']}{{{labels}}}" if labels else stage["stage"]
+        print(f"    {name:<60} {stage['count']:>5} 次  合计 {stage['total_seconds']:>8.3f}s  最大 {stage['max_seconds']:>7.3f}s")
+    for engine, error in result["errors"].items():
+        print(f"    [{engine}] 失败: {error}")
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """汇总多次运行的墙钟与CPU时间"""
+    walls = [r["wall_seconds"] for r in results]
+    cpus = [r["cpu_seconds"] for r in results]
+    if not walls:
+        return {}
+    return {
+        "runs": len(results),
+        "failed_runs": sum(1 for r in results if r["errors"]),
+        "wall_seconds_median": round(statistics.median(walls), 4),
+        "wall_seconds_max": round(max(walls), 4),
+        "cpu_seconds_median": round(statistics.median(cpus), 4),
+        "peak_rss_mb": max((r["peak_rss_mb"] or 0) for r in results) or None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="BettaFish 研究流程基准测试（录制/回放外部调用）")
+    parser.add_argument("mode", choices=CassetteSession.MODES, help="record: 联网运行并录制；replay: 离线回放")
+    parser.add_argument("--query", action="append", help="查询（可多次指定）")
+    parser.add_argument("--queries", help="查询文件，每行一个")
+    parser.add_argument("--engines", default="query,media,insight,report",
+                        help=f"逗号分隔的引擎列表，可选 {','.join(ENGINES)}；report使用同一次运行中其他引擎的报告")
+    parser.add_argument("--cassette-dir", default="benchmarks/cassettes", help="磁带目录")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="回放时按录制耗时的倍数模拟延迟")
+    parser.add_argument("--latency", type=float, default=0.0, help="回放时每次外部调用额外等待的秒数")
+    parser.add_argument("--repeat", type=int, default=1, help="回放时每个查询重复运行的次数")
+    parser.add_argument("--top", type=int, default=10, help="每次运行打印耗时最多的阶段数")
+    parser.add_argument("--cache", choices=("off", "on"), default="off",
+                        help="off: 关闭结果缓存，每次运行互不影响；on: 沿用配置，重复运行会命中缓存")
+    parser.add_argument("--tracemalloc", action="store_true", help="同时统计Python堆内存峰值（有额外开销）")
+    parser.add_argument("--output", help="将结果保存为JSON文件")
+    parser.add_argument("--quiet", action="store_true", help="只输出警告及以上级别的日志")
+    args = parser.parse_args(argv)
+
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        parser.error(f"未知的引擎: {','.join(unknown)}")
+    queries = load_queries(args)
+    if not queries:
+        parser.error("请通过 --query 或 --queries 指定至少一个查询")
+    if args.quiet:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+    if args.mode == "replay":
+        fill_offline_credentials()
+    cache_settings = configure_caches(args.cache == "on")
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    repeat = max(1, args.repeat) if args.mode == "replay" else 1
+    results = []
+    for query in queries:
+        cassette = Cassette(cassette_path(args.cassette_dir, query))
+        if args.mode == "record":
+            cassette.reset()
+        elif not len(cassette):
+            logger.error(f"查询没有录制的磁带，跳过: {query}（{cassette.path}）")
+            continue
+        with CassetteSession(cassette, args.mode, latency_scale=args.latency_scale, latency=args.latency) as session:
+            runners = build_runners(engines, session)
+            for _ in range(repeat):
+                result = run_query(query, engines, runners, session, args.tracemalloc)
+                results.append(result)
+                _print_run(result, args.top)
+
+    report = {
+        "mode": args.mode,
+        "engines": engines,
+        "cache": {"mode": args.cache, "settings": cache_settings},
+        "summary": summarize(results),
+        "runs": results,
+    }
+    print(json.dumps(report["summary"], ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.output}")
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
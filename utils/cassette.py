@@ -0,0 +1,401 @@
+"""
+外部调用录制与回放
+在无网络的机器上对研究流程做基准测试与回归测试：录制模式下把所有外部调用的响应写入磁带（cassette），
+回放模式下不访问网络与数据库，直接按磁带返回响应。
+
+- HTTP: 拦截 httpx（OpenAI兼容的LLM接口，含流式响应）与 requests（Tavily、博查）的请求
+- 数据库等同步方法: 通过 patch_method 指定（如 MediaCrawlerDB._execute_query），返回值需可序列化
+- 匹配: 请求按“方法 + 路径 + 规范化后的请求体”哈希匹配，规范化会去掉API密钥与LLMClient附加的当前时间；
+  精确匹配失败时按同一接口的录制顺序回退，提示词改动后仍可回放
+- 延迟: 回放时按 latency + latency_scale * 录制时的耗时 等待，0表示立即返回
+
+磁带为JSON Lines文件，每行一次调用，不保存请求头（凭据）。
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import wraps
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from loguru import logger
+
+try:
+    import requests
+    from requests.structures import CaseInsensitiveDict
+except ImportError:
+    requests = None
+
+# 参与匹配与写入磁带前去掉的请求字段
+SECRET_FIELDS = frozenset({"api_key", "apiKey"})
+
+# LLMClient在用户消息末尾附加的当前时间，每次运行都不同，不参与匹配
+_TIME_NOTE_PATTERN = re.compile(r"今天的实际时间是[^\n]*")
+
+# 响应体已解码，回放时不再适用的响应头
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection"})
+
+
+class CassetteMiss(Exception):
+    """回放时磁带中没有可用的录制记录"""
+    pass
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if k not in SECRET_FIELDS}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return _TIME_NOTE_PATTERN.sub("", value)
+    return value
+
+
+def encode_value(value: Any) -> Any:
+    """将返回值转换为可写入JSON的形式（datetime、Decimal、bytes等带类型标记）"""
+    if isinstance(value, dict):
+        return {str(k): encode_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$decimal": str(value)}
+    if isinstance(value, bytes):
+        return {"$bytes": base64.b64encode(value).decode("ascii")}
+    return value
+
+
+def decode_value(value: Any) -> Any:
+    """encode_value的逆操作"""
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    if isinstance(value, dict):
+        if len(value) == 1:
+            tag, raw = next(iter(value.items()))
+            if tag == "$datetime":
+                return datetime.fromisoformat(raw)
+            if tag == "$date":
+                return date.fromisoformat(raw)
+            if tag == "$decimal":
+                return Decimal(raw)
+            if tag == "$bytes":
+                return base64.b64decode(raw)
+        return {k: decode_value(v) for k, v in value.items()}
+    return value
+
+
+def _parse_body(body: Optional[bytes]) -> Any:
+    if not body:
+        return None
+    try:
+        return json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return body.decode("utf-8", errors="replace")
+
+
+def _dump_body(body: bytes) -> Dict[str, str]:
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(body).decode("ascii")}
+
+
+def _load_body(entry: Dict[str, Any]) -> bytes:
+    if "body_b64" in entry:
+        return base64.b64decode(entry["body_b64"])
+    return entry.get("body", "").encode("utf-8")
+
+
+def _response_headers(headers: Any) -> List[Tuple[str, str]]:
+    return [(k, v) for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS]
+
+
+def request_key(target: str, payload: Any) -> str:
+    """根据调用目标与规范化后的请求内容计算匹配键"""
+    raw = json.dumps([target, _normalize(payload)], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """一盘磁带：按匹配键与调用目标索引的录制记录（线程安全）"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 磁带文件路径，文件存在时加载已有记录
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_target: Dict[str, List[Dict[str, Any]]] = {}
+        self._key_cursors: Dict[str, int] = {}
+        self._target_cursors: Dict[str, int] = {}
+        self.stats = {"recorded": 0, "hits": 0, "fallbacks": 0, "misses": 0}
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+
+    def _index(self, entry: Dict[str, Any]):
+        self._by_key.setdefault(entry["key"], []).append(entry)
+        self._by_target.setdefault(entry["target"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._by_target.values())
+
+    def reset(self):
+        """清空磁带，重新录制"""
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            open(self.path, "w", encoding="utf-8").close()
+            self._by_key.clear()
+            self._by_target.clear()
+            self.rewind()
+
+    def rewind(self):
+        """回到磁带开头（重复回放同一查询前调用）"""
+        self._key_cursors.clear()
+        self._target_cursors.clear()
+
+    def record(self, target: str, key: str, request: Any, response: Dict[str, Any], elapsed: float):
+        """追加一条录制记录"""
+        entry = {"target": target, "key": key, "elapsed": round(elapsed, 4), "request": _normalize(request), **response}
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._index(entry)
+            self.stats["recorded"] += 1
+
+    @staticmethod
+    def _take(entries: List[Dict[str, Any]], cursors: Dict[str, int], name: str) -> Dict[str, Any]:
+        # 同一请求多次出现时按录制顺序返回，超出录制次数后重复最后一条
+        position = cursors.get(name, 0)
+        cursors[name] = position + 1
+        return entries[min(position, len(entries) - 1)]
+
+    def lookup(self, target: str, key: str) -> Dict[str, Any]:
+        """
+        查找回放记录
+
+        Raises:
+            CassetteMiss: 该调用目标没有任何录制记录
+        """
+        with self._lock:
+            entries = self._by_key.get(key)
+            if entries:
+                self.stats["hits"] += 1
+                return self._take(entries, self._key_cursors, key)
+            entries = self._by_target.get(target)
+            if entries:
+                self.stats["fallbacks"] += 1
+                logger.warning(f"磁带中没有完全匹配的请求，按录制顺序回退: {target}")
+                return self._take(entries, self._target_cursors, target)
+            self.stats["misses"] += 1
+        raise CassetteMiss(f"磁带 {self.path} 中没有 {target} 的录制记录")
+
+
+class CassetteSession:
+    """
+    在上下文范围内录制或回放外部调用
+
+    用法:
+        with CassetteSession(Cassette(path), mode="replay", latency_scale=1.0) as session:
+            session.patch_method(MediaCrawlerDB, "_execute_query")
+            agent.research(query)
+    """
+
+    MODES = ("record", "replay")
+
+    def __init__(self, cassette: Cassette, mode: str = "replay", latency_scale: float = 0.0, latency: float = 0.0):
+        """
+        Args:
+            cassette: 磁带
+            mode: record（真实调用并录制）或 replay（只从磁带返回）
+            latency_scale: 回放时按录制耗时的倍数等待
+            latency: 回放时每次调用额外等待的秒数
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"未知的磁带模式: {mode}")
+        self.cassette = cassette
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.latency = latency
+        self._originals: List[Tuple[Any, str, Any]] = []
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _delay(self, entry: Dict[str, Any]) -> float:
+        return max(0.0, self.latency + self.latency_scale * entry.get("elapsed", 0.0))
+
+    def _replace(self, owner: Any, name: str, replacement: Any):
+        self._originals.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, replacement)
+
+    def __enter__(self) -> "CassetteSession":
+        self._patch_httpx()
+        if requests is not None:
+            self._patch_requests()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        while self._originals:
+            owner, name, original = self._originals.pop()
+            setattr(owner, name, original)
+
+    # --- HTTP ---
+
+    @staticmethod
+    def _http_target(method: str, url: Any) -> str:
+        # 不含主机名：回放环境的BaseUrl与录制时不同也能匹配
+        return f"{method.upper()} {urlsplit(str(url)).path}"
+
+    def _lookup_http(self, method: str, url: Any, body: Optional[bytes]) -> Tuple[str, str, Any]:
+        target = self._http_target(method, url)
+        payload = _parse_body(body)
+        return target, request_key(target, payload), payload
+
+    def _record_http(self, target: str, key: str, payload: Any, status: int, headers: Any, body: bytes,
+                     elapsed: float) -> Dict[str, Any]:
+        response = {"status": status, "headers": _response_headers(headers), **_dump_body(body)}
+        self.cassette.record(target, key, payload, response, elapsed)
+        return response
+
+    @staticmethod
+    def _httpx_response(entry: Dict[str, Any], request: httpx.Request, elapsed: float) -> httpx.Response:
+        response = httpx.Response(
+            entry["status"], headers=entry.get("headers", []), content=_load_body(entry), request=request
+        )
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+    def _patch_httpx(self):
+        session = self
+        original_send = httpx.Client.send
+        original_async_send = httpx.AsyncClient.send
+
+        @wraps(original_send)
+        def send(client, request, **kwargs):
+            target, key, payload = session._lookup_http(request.method, request.url, request.read())
+            if session.replaying:
+                entry = session.cassette.lookup(target, key)
+                delay = session._delay(entry)
+                if delay:
+                    time.sleep(delay)
+                return session._httpx_response(entry, request, delay)
+
+            start = time.perf_counter()
+            response = original_send(client, request, **kwargs)
+            try:
+                body = response.read()
+            finally:
+                response.close()
+            elapsed = time.perf_counter() - start
+            entry = session._record_http(target, key, payload, response.status_code, response.headers, body, elapsed)
+            return session._httpx_response(entry, request, elapsed)
+
+        @wraps(original_async_send)
+        async def async_send(client, request, **kwargs):
+            target, key, payload = session._lookup_http(request.method, request.url, request.read())
+            if session.replaying:
+                entry = session.cassette.lookup(target, key)
+                delay = session._delay(entry)
+                if delay:
+                    await asyncio.sleep(delay)
+                return session._httpx_response(entry, request, delay)
+
+            start = time.perf_counter()
+            response = await original_async_send(client, request, **kwargs)
+            try:
+                body = await response.aread()
+            finally:
+                await response.aclose()
+            elapsed = time.perf_counter() - start
+            entry = session._record_http(target, key, payload, response.status_code, response.headers, body, elapsed)
+            return session._httpx_response(entry, request, elapsed)
+
+        self._replace(httpx.Client, "send", send)
+        self._replace(httpx.AsyncClient, "send", async_send)
+
+    def _patch_requests(self):
+        session = self
+        original_send = requests.Session.send
+
+        def build_response(entry: Dict[str, Any], request) -> "requests.Response":
+            response = requests.Response()
+            response.status_code = entry["status"]
+            response.headers = CaseInsensitiveDict(entry.get("headers", []))
+            response._content = _load_body(entry)
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+            response.url = request.url
+            response.request = request
+            return response
+
+        @wraps(original_send)
+        def send(http_session, request, **kwargs):
+            body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+            target, key, payload = session._lookup_http(request.method, request.url, body)
+            if session.replaying:
+                entry = session.cassette.lookup(target, key)
+                delay = session._delay(entry)
+                if delay:
+                    time.sleep(delay)
+                return build_response(entry, request)
+
+            start = time.perf_counter()
+            response = original_send(http_session, request, **kwargs)
+            elapsed = time.perf_counter() - start
+            session._record_http(target, key, payload, response.status_code, response.headers, response.content, elapsed)
+            return response
+
+        self._replace(requests.Session, "send", send)
+
+    # --- 其他同步调用 ---
+
+    def patch_method(self, owner: Any, name: str):
+        """
+        录制或回放一个同步方法（如数据库查询），匹配键由除self以外的参数计算
+
+        Args:
+            owner: 定义该方法的类
+            name: 方法名
+        """
+        session = self
+        original = owner.__dict__[name]
+        target = f"{owner.__name__}.{name}"
+
+        @wraps(original)
+        def wrapper(instance, *args, **kwargs):
+            payload = encode_value([list(args), kwargs])
+            key = request_key(target, payload)
+            if session.replaying:
+                entry = session.cassette.lookup(target, key)
+                delay = session._delay(entry)
+                if delay:
+                    time.sleep(delay)
+                return decode_value(entry["value"])
+
+            start = time.perf_counter()
+            result = original(instance, *args, **kwargs)
+            session.cassette.record(target, key, payload, {"value": encode_value(result)}, time.perf_counter() - start)
+            return result
+
+        self._replace(owner, name, wrapper)
@@ -0,0 +1,59 @@
+"""
+共享HTTP连接池
+为各引擎的LLM客户端提供进程内共享的httpx连接池，避免每个客户端各自建立连接。
+
+- 同步客户端: 进程内单例（httpx.Client 线程安全）
+- 异步客户端: 每个事件循环一个（连接绑定在创建它的事件循环上）
+- 已安装 h2 时启用 HTTP/2，同一服务商的并发请求复用一条连接
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 连接池上限（所有服务商合计）
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 60.0
+
+_sync_client: Optional[httpx.Client] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def get_sync_http_client() -> httpx.Client:
+    """获取进程内共享的同步HTTP客户端"""
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(http2=HTTP2_AVAILABLE, limits=_limits(), timeout=None)
+        return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """获取当前事件循环共享的异步HTTP客户端（需在协程中调用）"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=_limits(), timeout=None)
+            _async_clients[loop] = client
+        return client
@@ -0,0 +1,49 @@
+"""
+LLM响应缓存
+结构生成、搜索查询生成等节点在重试和重复运行同一查询时经常收到完全相同的提示词，
+按内容寻址缓存LLM响应以避免重复调用：
+
+- 缓存键: 模型名、系统提示词、用户提示词（不含LLMClient附加的当前时间前缀）与采样参数的哈希
+- 过期: 按TTL过期
+- 存储: 进程内LRU，可选SQLite持久化（跨会话复用），见 persistent_cache
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from persistent_cache import PersistentCache
+
+
+class LLMResponseCache(PersistentCache):
+    """LLM响应缓存（内存LRU + TTL + 可选SQLite）"""
+
+    table_name = "llm_response_cache"
+    label = "LLM响应缓存"
+
+    def __init__(self, ttl_seconds: float = 86400.0, max_entries: int = 512, sqlite_path: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            ttl_seconds: 缓存有效期（秒），0表示永不过期
+            max_entries: 内存中保留的最大条目数
+            sqlite_path: SQLite缓存文件路径，为空则只使用内存缓存
+        """
+        super().__init__(max_entries=max_entries, sqlite_path=sqlite_path, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def make_key(model_name: str, system_prompt: str, user_prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """根据模型、提示词和采样参数计算缓存键"""
+        raw = json.dumps(
+            [model_name, system_prompt or "", user_prompt or "", params or {}],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def encode(self, value: str) -> str:
+        return value
+
+    def decode(self, payload: str) -> str:
+        return payload
@@ -0,0 +1,239 @@
+"""
+带持久化的LRU缓存基类
+搜索结果、情感分析结果、关键词优化结果和LLM响应缓存共用的存储实现：
+
+- 存储: 进程内LRU，可选SQLite持久化（跨会话复用）
+- 过期: 可选TTL（ttl_seconds <= 0 表示永不过期）
+- 失效: 可选校验标记（如搜索缓存的数据水位线），读取时标记不一致的条目视为失效并删除
+- 查询: 支持批量查询，SQLite分块使用 IN (...) 一次读取
+
+子类只需指定表名、缓存键的计算方式以及值的编码/解码方式。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+
+# SQLite单条语句可绑定的参数数量有限，批量查询时分块
+_SQLITE_CHUNK_SIZE = 500
+
+_COLUMNS = ("key", "tag", "payload", "created_at")
+
+
+class PersistentCache:
+    """内存LRU + TTL + 可选SQLite 的键值缓存"""
+
+    # SQLite表名
+    table_name = "cache"
+    # 日志中的缓存名称
+    label = "缓存"
+
+    def __init__(self, max_entries: int = 256, sqlite_path: Optional[str] = None, ttl_seconds: float = 0.0):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 内存中保留的最大条目数
+            sqlite_path: SQLite缓存文件路径，为空则只使用内存缓存
+            ttl_seconds: 缓存有效期（秒），0表示永不过期
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.sqlite_path = sqlite_path
+        self._entries: "OrderedDict[str, Tuple[Optional[str], float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+        if sqlite_path:
+            self._open_sqlite(sqlite_path)
+
+    def _open_sqlite(self, sqlite_path: str):
+        """打开（必要时创建）SQLite缓存文件"""
+        try:
+            directory = os.path.dirname(os.path.abspath(sqlite_path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(sqlite_path, check_same_thread=False)
+            columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({self.table_name})")]
+            if columns and tuple(columns) != _COLUMNS:
+                # 旧版本的表结构，缓存内容可以丢弃
+                self._conn.execute(f"DROP TABLE {self.table_name}")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table_name} ("
+                "key TEXT PRIMARY KEY, tag TEXT, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"{self.label}SQLite初始化失败，仅使用内存缓存: {e}")
+            self._conn = None
+
+    def encode(self, value: Any) -> str:
+        """把缓存值编码为SQLite中保存的文本"""
+        return json.dumps(value, ensure_ascii=False)
+
+    def decode(self, payload: str) -> Any:
+        """从SQLite中的文本还原缓存值"""
+        return json.loads(payload)
+
+    def copy(self, value: Any) -> Any:
+        """写入和读出时复制缓存值，避免调用方修改缓存内容；默认不复制"""
+        return value
+
+    def _is_fresh(self, created_at: float) -> bool:
+        return self.ttl_seconds <= 0 or time.time() - created_at < self.ttl_seconds
+
+    def _is_valid(self, entry: Tuple[Optional[str], float, Any], tag: Optional[str]) -> bool:
+        return entry[0] == tag and self._is_fresh(entry[1])
+
+    def get(self, key: str, tag: Optional[str] = None) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+            tag: 校验标记，与写入时不一致的条目视为失效
+
+        Returns:
+            命中时返回缓存值，未命中、已过期或已失效返回None
+        """
+        return self.get_many([key], tag).get(key)
+
+    def get_many(self, keys: Iterable[str], tag: Optional[str] = None) -> Dict[str, Any]:
+        """
+        批量读取缓存
+
+        Args:
+            keys: 缓存键列表
+            tag: 校验标记，与写入时不一致的条目视为失效
+
+        Returns:
+            命中的 键 -> 缓存值 映射
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, Any] = {}
+        with self._lock:
+            missing = []
+            for key in unique_keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if self._is_valid(entry, tag):
+                        self._entries.move_to_end(key)
+                        found[key] = self.copy(entry[2])
+                        continue
+                    del self._entries[key]
+                missing.append(key)
+
+            if missing:
+                for key, entry in self._load_from_sqlite(missing, tag).items():
+                    self._put_memory(key, entry)
+                    found[key] = self.copy(entry[2])
+
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def set(self, key: str, value: Any, tag: Optional[str] = None):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            tag: 校验标记
+        """
+        self.set_many({key: value}, tag)
+
+    def set_many(self, entries: Dict[str, Any], tag: Optional[str] = None):
+        """
+        批量写入缓存
+
+        Args:
+            entries: 键 -> 缓存值 映射
+            tag: 校验标记
+        """
+        if not entries:
+            return
+        created_at = time.time()
+        stored = {key: (tag, created_at, self.copy(value)) for key, value in entries.items()}
+        with self._lock:
+            for key, entry in stored.items():
+                self._put_memory(key, entry)
+            self._save_to_sqlite(stored)
+
+    def _put_memory(self, key: str, entry: Tuple[Optional[str], float, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load_from_sqlite(self, keys: List[str], tag: Optional[str]) -> Dict[str, Tuple[Optional[str], float, Any]]:
+        if self._conn is None:
+            return {}
+        found = {}
+        stale = []
+        try:
+            for start in range(0, len(keys), _SQLITE_CHUNK_SIZE):
+                chunk = keys[start:start + _SQLITE_CHUNK_SIZE]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, tag, payload, created_at FROM {self.table_name} WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, row_tag, payload, created_at in rows:
+                    entry = (row_tag, created_at, payload)
+                    if self._is_valid(entry, tag):
+                        found[key] = (row_tag, created_at, self.decode(payload))
+                    else:
+                        stale.append(key)
+            for start in range(0, len(stale), _SQLITE_CHUNK_SIZE):
+                chunk = stale[start:start + _SQLITE_CHUNK_SIZE]
+                placeholders = ", ".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM {self.table_name} WHERE key IN ({placeholders})", chunk)
+            if stale:
+                self._conn.commit()
+        except (sqlite3.Error, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"读取{self.label}失败: {e}")
+        return found
+
+    def _save_to_sqlite(self, entries: Dict[str, Tuple[Optional[str], float, Any]]):
+        if self._conn is None:
+            return
+        try:
+            rows = [(key, tag, self.encode(value), created_at) for key, (tag, created_at, value) in entries.items()]
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table_name} (key, tag, payload, created_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"写入{self.label}失败: {e}")
+
+    def clear(self):
+        """清空内存与磁盘缓存"""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute(f"DELETE FROM {self.table_name}")
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"清空{self.label}失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "persistent": self._conn is not None,
+        }
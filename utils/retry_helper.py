@@ -1,11 +1,23 @@
 """
 重试机制工具模块
 提供通用的网络请求重试功能，增强系统健壮性
+
+- 重试: 指数退避 + 随机抖动，服务端返回 Retry-After 时按其等待
+- 限流: 按服务商（及模型）共享的令牌桶，支持每分钟请求数与每分钟token数
+- 熔断: 服务商连续失败达到阈值后快速失败，冷却后放行一次试探请求
 """
 
+import asyncio
+import email.utils
+import random
+import re
+import threading
 import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, AsyncIterator, Dict, Iterator, Optional
 import requests
 from loguru import logger
 
@@ -19,7 +31,8 @@ class RetryConfig:
         initial_delay: float = 1.0,
         backoff_factor: float = 2.0,
         max_delay: float = 60.0,
-        retry_on_exceptions: tuple = None
+        retry_on_exceptions: tuple = None,
+        jitter: bool = True
     ):
         """
         初始化重试配置
@@ -30,11 +43,13 @@ class RetryConfig:
             backoff_factor: 退避因子（每次重试延迟翻倍）
             max_delay: 最大延迟秒数
             retry_on_exceptions: 需要重试的异常类型元组
+            jitter: 是否对退避时间加随机抖动，避免多个调用方同时重试
         """
         self.max_retries = max_retries
         self.initial_delay = initial_delay
         self.backoff_factor = backoff_factor
         self.max_delay = max_delay
+        self.jitter = jitter
         
         # 默认需要重试的异常类型
         if retry_on_exceptions is None:
@@ -54,12 +69,321 @@ class RetryConfig:
 # 默认配置
 DEFAULT_RETRY_CONFIG = RetryConfig()
 
-def with_retry(config: RetryConfig = None):
+
+class CircuitOpenError(Exception):
+    """服务商熔断期间直接拒绝调用"""
+    pass
+
+
+def get_status_code(exc: BaseException) -> Optional[int]:
+    """从 openai / requests / httpx 等库的异常中取出HTTP状态码"""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def get_retry_after(exc: BaseException) -> Optional[float]:
+    """
+    从异常携带的响应头中解析 Retry-After（秒数或HTTP日期），以及 retry-after-ms
+    
+    Returns:
+        需要等待的秒数，没有该响应头时返回None
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            return max(float(retry_after_ms) / 1000, 0.0)
+        retry_after = headers.get("retry-after")
+        if not retry_after:
+            return None
+        if re.fullmatch(r"\s*\d+(\.\d+)?\s*", retry_after):
+            return max(float(retry_after), 0.0)
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# 计入熔断的传输层异常（连接失败、超时）；解析错误等调用方自身的异常不说明服务商故障
+TRANSPORT_ERRORS: tuple = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    ConnectionError,
+    TimeoutError,
+)
+try:
+    import httpx
+    TRANSPORT_ERRORS += (httpx.TimeoutException, httpx.NetworkError)
+except ImportError:
+    pass
+try:
+    import openai
+    TRANSPORT_ERRORS += (openai.APIConnectionError,)  # 包括 APITimeoutError
+except ImportError:
+    pass
+
+
+def _is_provider_failure(exc: BaseException) -> bool:
+    """连接错误、超时和5xx/408视为服务商故障；4xx（含429限流）和其他异常不计入熔断"""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    status = get_status_code(exc)
+    if status is not None:
+        return status >= 500 or status == 408
+    return isinstance(exc, TRANSPORT_ERRORS)
+
+
+def compute_backoff(config: RetryConfig, attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    计算第attempt次失败后的等待时间
+    
+    有 Retry-After 时按其等待（附加少量抖动以错开同时恢复的调用方）；
+    否则使用指数退避，开启抖动时在 [delay/2, delay] 内随机取值。
+    """
+    if retry_after is not None:
+        return retry_after + (random.uniform(0, min(1.0, retry_after * 0.1)) if config.jitter else 0.0)
+    delay = min(config.initial_delay * (config.backoff_factor ** attempt), config.max_delay)
+    if config.jitter:
+        delay = delay / 2 + random.uniform(0, delay / 2)
+    return delay
+
+
+class TokenBucket:
+    """
+    令牌桶（线程安全）
+    
+    采用预留方式：调用方先扣除令牌，再按返回的时间等待，余额可透支，
+    因此并发调用方会依次排队而不会同时醒来争抢。
+    """
+    
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            per_minute: 每分钟补充的令牌数
+            capacity: 桶容量（允许的突发量），默认为一分钟的配额
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else float(per_minute)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    def reserve(self, amount: float = 1.0) -> float:
+        """
+        预留amount个令牌
+        
+        Returns:
+            获得令牌前需要等待的秒数
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+    
+    def debit(self, amount: float):
+        """事后补扣令牌（如按响应中的实际用量），不等待"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，冷却后进入半开状态放行一次试探请求"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """是否允许发起调用"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+    
+    def record_neutral(self):
+        """既非成功也非服务端故障（如429、4xx参数错误）：不改变熔断状态，只释放半开试探名额"""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+    
+    def retry_in(self) -> float:
+        """熔断打开时距离下次试探的秒数"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(self.recovery_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+
+class ProviderGuard:
+    """
+    单个服务商（及模型）在进程内共享的调用预算：请求数/token数令牌桶 + 熔断器
+    
+    通过 get_provider_guard 获取，同一服务商的所有客户端共用一个实例。
+    """
+    
+    def __init__(
+        self,
+        key: str,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0
+    ):
+        """
+        Args:
+            key: 服务商标识
+            requests_per_minute: 每分钟请求数上限，0表示不限制
+            tokens_per_minute: 每分钟token数上限，0表示不限制
+            failure_threshold: 连续失败多少次后熔断
+            recovery_timeout: 熔断后多久放行试探请求（秒）
+        """
+        self.key = key
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def _reserve(self, tokens: int) -> float:
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"服务 {self.key} 连续失败已熔断，{self.breaker.retry_in():.0f} 秒后重试"
+            )
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket is not None and tokens > 0:
+            wait = max(wait, self.token_bucket.reserve(tokens))
+        with self._lock:
+            wait = max(wait, self._paused_until - time.monotonic())
+        return wait
+    
+    def acquire(self, tokens: int = 0):
+        """发起调用前获取配额，必要时阻塞等待；熔断时抛出CircuitOpenError"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"服务 {self.key} 限流，等待 {wait:.1f} 秒")
+            time.sleep(wait)
+    
+    async def aacquire(self, tokens: int = 0):
+        """acquire的异步版本，等待期间不阻塞事件循环"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"服务 {self.key} 限流，等待 {wait:.1f} 秒")
+            await asyncio.sleep(wait)
+    
+    def record_usage(self, tokens: int):
+        """按响应中的实际用量补扣token配额（如补成交的输出token）"""
+        if self.token_bucket is not None and tokens > 0:
+            self.token_bucket.debit(tokens)
+    
+    def pause(self, seconds: float):
+        """收到429等限流响应时，让该服务商的所有调用方一起暂停"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    
+    def record_result(self, exc: Optional[BaseException] = None):
+        """
+        记录一次调用结果，用于熔断判定与429暂停
+        
+        只有真正成功的调用才会清零失败计数；429和其他4xx说明服务仍可达但请求被拒，
+        不计为故障也不计为成功，避免与5xx交替出现时熔断器永远打不开。
+        """
+        if exc is None:
+            self.breaker.record_success()
+        elif _is_provider_failure(exc):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_neutral()
+        if exc is not None and get_status_code(exc) == 429:
+            self.pause(get_retry_after(exc) or 1.0)
+
+
+_provider_guards: Dict[str, ProviderGuard] = {}
+_provider_guards_lock = threading.Lock()
+
+
+def get_provider_guard(key: str, requests_per_minute: int = 0, tokens_per_minute: int = 0) -> ProviderGuard:
+    """
+    获取服务商共享的调用预算，首次获取时按给定限额创建，之后复用同一实例
+    
+    Args:
+        key: 服务商标识（如 "BaseUrl|模型名" 或 "tavily"）
+        requests_per_minute: 每分钟请求数上限，0表示不限制
+        tokens_per_minute: 每分钟token数上限，0表示不限制
+    
+    Returns:
+        该服务商的ProviderGuard
+    """
+    with _provider_guards_lock:
+        guard = _provider_guards.get(key)
+        if guard is None:
+            guard = ProviderGuard(key, requests_per_minute, tokens_per_minute)
+            _provider_guards[key] = guard
+        return guard
+
+
+def _resolve_guard(guard, cost, args, kwargs):
+    provider_guard = guard(*args, **kwargs) if guard else None
+    tokens = cost(*args, **kwargs) if (provider_guard is not None and cost) else 0
+    return provider_guard, tokens
+
+
+def _after_failure(provider_guard: Optional[ProviderGuard], exc: BaseException) -> Optional[float]:
+    if provider_guard is not None:
+        provider_guard.record_result(exc)
+    return get_retry_after(exc)
+
+
+def with_retry(config: RetryConfig = None, guard: Callable[..., Optional[ProviderGuard]] = None,
+               cost: Callable[..., int] = None):
     """
     重试装饰器
     
     Args:
         config: 重试配置，如果不提供则使用默认配置
+        guard: 可选，以被装饰函数的参数调用，返回共享的ProviderGuard（限流与熔断）
+        cost: 可选，以被装饰函数的参数调用，返回本次调用预计消耗的token数
     
     Returns:
         装饰器函数
@@ -71,16 +395,22 @@ def with_retry(config: RetryConfig = None):
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             last_exception = None
+            provider_guard, tokens = _resolve_guard(guard, cost, args, kwargs)
             
             for attempt in range(config.max_retries + 1):  # +1 因为第一次不算重试
+                if provider_guard is not None:
+                    provider_guard.acquire(tokens)
                 try:
                     result = func(*args, **kwargs)
+                    if provider_guard is not None:
+                        provider_guard.record_result()
                     if attempt > 0:
                         logger.info(f"函数 {func.__name__} 在第 {attempt + 1} 次尝试后成功")
                     return result
-                    
+                
                 except config.retry_on_exceptions as e:
                     last_exception = e
+                    retry_after = _after_failure(provider_guard, e)
                     
                     if attempt == config.max_retries:
                         # 最后一次尝试也失败了
@@ -89,10 +419,7 @@ def with_retry(config: RetryConfig = None):
                         raise e
                     
                     # 计算延迟时间
-                    delay = min(
-                        config.initial_delay * (config.backoff_factor ** attempt),
-                        config.max_delay
-                    )
+                    delay = compute_backoff(config, attempt, retry_after)
                     
                     logger.warning(f"函数 {func.__name__} 第 {attempt + 1} 次尝试失败: {str(e)}")
                     logger.info(f"将在 {delay:.1f} 秒后进行第 {attempt + 2} 次尝试...")
@@ -101,13 +428,71 @@ def with_retry(config: RetryConfig = None):
                 
                 except Exception as e:
                     # 不在重试列表中的异常，直接抛出
+                    if provider_guard is not None:
+                        provider_guard.record_result(e)
                     logger.error(f"函数 {func.__name__} 遇到不可重试的异常: {str(e)}")
                     raise e
             
             # 这里不应该到达，但作为安全网
             if last_exception:
                 raise last_exception
+        
+        return wrapper
+    return decorator
+
+def with_async_retry(config: RetryConfig = None, guard: Callable[..., Optional[ProviderGuard]] = None,
+                     cost: Callable[..., int] = None):
+    """
+    异步重试装饰器，行为与with_retry一致，等待期间不阻塞事件循环
+    
+    Args:
+        config: 重试配置，如果不提供则使用默认配置
+        guard: 可选，以被装饰函数的参数调用，返回共享的ProviderGuard（限流与熔断）
+        cost: 可选，以被装饰函数的参数调用，返回本次调用预计消耗的token数
+    
+    Returns:
+        装饰器函数
+    """
+    if config is None:
+        config = DEFAULT_RETRY_CONFIG
+    
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            provider_guard, tokens = _resolve_guard(guard, cost, args, kwargs)
             
+            for attempt in range(config.max_retries + 1):
+                if provider_guard is not None:
+                    await provider_guard.aacquire(tokens)
+                try:
+                    result = await func(*args, **kwargs)
+                    if provider_guard is not None:
+                        provider_guard.record_result()
+                    if attempt > 0:
+                        logger.info(f"函数 {func.__name__} 在第 {attempt + 1} 次尝试后成功")
+                    return result
+                
+                except config.retry_on_exceptions as e:
+                    retry_after = _after_failure(provider_guard, e)
+                    
+                    if attempt == config.max_retries:
+                        logger.error(f"函数 {func.__name__} 在 {config.max_retries + 1} 次尝试后仍然失败")
+                        logger.error(f"最终错误: {str(e)}")
+                        raise e
+                    
+                    delay = compute_backoff(config, attempt, retry_after)
+                    
+                    logger.warning(f"函数 {func.__name__} 第 {attempt + 1} 次尝试失败: {str(e)}")
+                    logger.info(f"将在 {delay:.1f} 秒后进行第 {attempt + 2} 次尝试...")
+                    
+                    await asyncio.sleep(delay)
+                
+                except Exception as e:
+                    if provider_guard is not None:
+                        provider_guard.record_result(e)
+                    logger.error(f"函数 {func.__name__} 遇到不可重试的异常: {str(e)}")
+                    raise e
+        
         return wrapper
     return decorator
 
@@ -138,7 +523,8 @@ class RetryableError(Exception):
     """自定义的可重试异常"""
     pass
 
-def with_graceful_retry(config: RetryConfig = None, default_return=None):
+def with_graceful_retry(config: RetryConfig = None, default_return=None,
+                        guard: Callable[..., Optional[ProviderGuard]] = None):
     """
     优雅重试装饰器 - 用于非关键API调用
     失败后不会抛出异常，而是返回默认值，保证系统继续运行
@@ -146,6 +532,7 @@ def with_graceful_retry(config: RetryConfig = None, default_return=None):
     Args:
         config: 重试配置，如果不提供则使用默认配置
         default_return: 所有重试失败后返回的默认值
+        guard: 可选，以被装饰函数的参数调用，返回共享的ProviderGuard（限流与熔断）
     
     Returns:
         装饰器函数
@@ -157,16 +544,27 @@ def with_graceful_retry(config: RetryConfig = None, default_return=None):
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             last_exception = None
+            provider_guard, _ = _resolve_guard(guard, None, args, kwargs)
             
             for attempt in range(config.max_retries + 1):  # +1 因为第一次不算重试
+                try:
+                    if provider_guard is not None:
+                        provider_guard.acquire()
+                except CircuitOpenError as e:
+                    # 熔断期间不再等待重试，直接返回默认值
+                    logger.warning(f"非关键API {func.__name__} 跳过调用: {str(e)}")
+                    return default_return
                 try:
                     result = func(*args, **kwargs)
+                    if provider_guard is not None:
+                        provider_guard.record_result()
                     if attempt > 0:
                         logger.info(f"非关键API {func.__name__} 在第 {attempt + 1} 次尝试后成功")
                     return result
-                    
+                
                 except config.retry_on_exceptions as e:
                     last_exception = e
+                    retry_after = _after_failure(provider_guard, e)
                     
                     if attempt == config.max_retries:
                         # 最后一次尝试也失败了，返回默认值而不抛出异常
@@ -176,10 +574,7 @@ def with_graceful_retry(config: RetryConfig = None, default_return=None):
                         return default_return
                     
                     # 计算延迟时间
-                    delay = min(
-                        config.initial_delay * (config.backoff_factor ** attempt),
-                        config.max_delay
-                    )
+                    delay = compute_backoff(config, attempt, retry_after)
                     
                     logger.warning(f"非关键API {func.__name__} 第 {attempt + 1} 次尝试失败: {str(e)}")
                     logger.info(f"将在 {delay:.1f} 秒后进行第 {attempt + 2} 次尝试...")
@@ -188,13 +583,15 @@ def with_graceful_retry(config: RetryConfig = None, default_return=None):
                 
                 except Exception as e:
                     # 不在重试列表中的异常，返回默认值
+                    if provider_guard is not None:
+                        provider_guard.record_result(e)
                     logger.warning(f"非关键API {func.__name__} 遇到不可重试的异常: {str(e)}")
                     logger.info(f"返回默认值以保证系统继续运行: {default_return}")
                     return default_return
             
             # 这里不应该到达，但作为安全网
             return default_return
-            
+        
         return wrapper
     return decorator
 
@@ -245,3 +642,72 @@ DB_RETRY_CONFIG = RetryConfig(
     backoff_factor=1.5,
     max_delay=10.0
 )
+
+# 按服务商共享的并发上限（同一进程内所有客户端共用）
+_provider_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_provider_semaphores_lock = threading.Lock()
+
+
+def get_provider_semaphore(provider_key: str, limit: int) -> threading.BoundedSemaphore:
+    """
+    获取指定服务商的并发信号量，首次获取时以limit创建，之后复用同一实例
+    
+    Args:
+        provider_key: 服务商标识（如API BaseUrl）
+        limit: 最大并发请求数
+    
+    Returns:
+        该服务商共享的信号量
+    """
+    with _provider_semaphores_lock:
+        semaphore = _provider_semaphores.get(provider_key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(max(1, limit))
+            _provider_semaphores[provider_key] = semaphore
+        return semaphore
+
+
+@contextmanager
+def provider_slot(provider_key: str, limit: int) -> Iterator[None]:
+    """
+    占用一个服务商并发名额，limit<=0 表示不限制
+    
+    Args:
+        provider_key: 服务商标识（如API BaseUrl）
+        limit: 最大并发请求数
+    """
+    if limit <= 0:
+        yield
+        return
+    semaphore = get_provider_semaphore(provider_key, limit)
+    with semaphore:
+        yield
+
+
+# 异步版本：asyncio.Semaphore 绑定事件循环，因此按事件循环分别维护
+_async_provider_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def async_provider_slot(provider_key: str, limit: int) -> AsyncIterator[None]:
+    """
+    在协程中占用一个服务商并发名额，limit<=0 表示不限制
+    
+    同一事件循环内的所有异步客户端共享名额；等待名额时不阻塞事件循环。
+    
+    Args:
+        provider_key: 服务商标识（如API BaseUrl）
+        limit: 最大并发请求数
+    """
+    if limit <= 0:
+        yield
+        return
+    loop = asyncio.get_running_loop()
+    with _provider_semaphores_lock:
+        semaphores = _async_provider_semaphores.setdefault(loop, {})
+        semaphore = semaphores.get(provider_key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, limit))
+            semaphores[provider_key] = semaphore
+    async with semaphore:
+        yield
@@ -0,0 +1,264 @@
+"""
+运行耗时与用量统计
+为一次研究的各个阶段（关键词优化、数据库查询、情感分析、LLM首token与生成、反思轮次等）计时，
+并累计token等计数：
+
+- span(name, **labels): 计时上下文，同时记入当前研究与进程级汇总
+- observe / increment: 直接记录一次耗时或累加计数
+- metrics_run(name): 标记一次研究的范围，结束后可用 summary() 得到本次的耗时摘要；
+  嵌套时内层的记录同时计入外层（如基准测试包住多次研究）
+- render_prometheus / start_prometheus_server: 以Prometheus文本格式导出进程级汇总
+
+当前研究通过 contextvars 传递，提交到线程池的任务需用 contextvars.copy_context().run 包装。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+PROMETHEUS_PREFIX = "bettafish"
+
+
+def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class RunMetrics:
+    """一组阶段耗时与计数（线程安全）"""
+
+    def __init__(self, name: str = "", parent: Optional["RunMetrics"] = None):
+        """
+        Args:
+            name: 名称（如研究查询），写入摘要
+            parent: 外层统计，通过模块级函数记录时一并计入
+        """
+        self.name = name
+        self.parent = parent
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        # (阶段名, 标签) -> [次数, 总耗时, 最大耗时]
+        self._stages: Dict[LabelKey, List[float]] = {}
+        # (计数名, 标签) -> 累计值
+        self._counters: Dict[LabelKey, float] = {}
+
+    def observe(self, name: str, seconds: float, **labels):
+        """记录一次阶段耗时"""
+        key = _key(name, labels)
+        with self._lock:
+            stats = self._stages.get(key)
+            if stats is None:
+                self._stages[key] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """累加计数"""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> Tuple[Dict[LabelKey, List[float]], Dict[LabelKey, float]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._stages.items()}, dict(self._counters)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        获取耗时摘要
+
+        Returns:
+            包含总耗时、各阶段（按总耗时降序）与计数的字典
+        """
+        stages, counters = self.snapshot()
+        stage_list = [
+            {
+                "stage": name,
+                "labels": dict(labels),
+                "count": int(count),
+                "total_seconds": round(total, 4),
+                "avg_seconds": round(total / count, 4) if count else 0.0,
+                "max_seconds": round(maximum, 4),
+            }
+            for (name, labels), (count, total, maximum) in stages.items()
+        ]
+        stage_list.sort(key=lambda item: item["total_seconds"], reverse=True)
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "wall_seconds": round(time.perf_counter() - self._start, 4),
+            "stages": stage_list,
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+        }
+
+    def save(self, path: str):
+        """将耗时摘要保存为JSON文件"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+
+# 进程级汇总，供Prometheus导出
+_aggregate = RunMetrics("aggregate")
+_current_run: ContextVar[Optional[RunMetrics]] = ContextVar("bettafish_current_run", default=None)
+
+
+def get_aggregate() -> RunMetrics:
+    """获取进程级汇总"""
+    return _aggregate
+
+
+def current_run() -> Optional[RunMetrics]:
+    """获取当前上下文中的研究统计，不在研究范围内时返回None"""
+    return _current_run.get()
+
+
+@contextmanager
+def metrics_run(name: str = "") -> Iterator[RunMetrics]:
+    """标记一次研究的统计范围，范围内的span/observe/increment都会记入返回的RunMetrics"""
+    run = RunMetrics(name, parent=_current_run.get())
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+def observe(name: str, seconds: float, **labels):
+    """记录一次阶段耗时（当前研究与进程级汇总）"""
+    _aggregate.observe(name, seconds, **labels)
+    run = _current_run.get()
+    while run is not None:
+        run.observe(name, seconds, **labels)
+        run = run.parent
+
+
+def increment(name: str, value: float = 1, **labels):
+    """累加计数（当前研究与进程级汇总）"""
+    if not value:
+        return
+    _aggregate.increment(name, value, **labels)
+    run = _current_run.get()
+    while run is not None:
+        run.increment(name, value, **labels)
+        run = run.parent
+
+
+@contextmanager
+def span(name: str, **labels) -> Iterator[None]:
+    """为代码块计时，异常退出时同样记录耗时"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], **extra: str) -> str:
+    items = sorted(extra.items()) + list(labels)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{_metric_name(k)}="{_escape_label_value(v)}"' for k, v in items) + "}"
+
+
+def render_prometheus(metrics: Optional[RunMetrics] = None) -> str:
+    """
+    以Prometheus文本格式导出统计
+
+    阶段耗时导出为 bettafish_stage_seconds（summary的 _count/_sum）与 bettafish_stage_seconds_max，
+    计数导出为 bettafish_<计数名>_total。
+    """
+    stages, counters = (metrics or _aggregate).snapshot()
+    lines = []
+    if stages:
+        stage_metric = f"{PROMETHEUS_PREFIX}_stage_seconds"
+        lines.append(f"# HELP {stage_metric} Time spent per research stage")
+        lines.append(f"# TYPE {stage_metric} summary")
+        for (name, labels), (count, total, _) in sorted(stages.items()):
+            label_text = _format_labels(labels, stage=name)
+            lines.append(f"{stage_metric}_count{label_text} {int(count)}")
+            lines.append(f"{stage_metric}_sum{label_text} {total:.6f}")
+        lines.append(f"# TYPE {stage_metric}_max gauge")
+        for (name, labels), (_, _, maximum) in sorted(stages.items()):
+            lines.append(f"{stage_metric}_max{_format_labels(labels, stage=name)} {maximum:.6f}")
+
+    declared = set()
+    for (name, labels), value in sorted(counters.items()):
+        metric = f"{PROMETHEUS_PREFIX}_{_metric_name(name)}_total"
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_servers: Dict[int, ThreadingHTTPServer] = {}
+_servers_lock = threading.Lock()
+
+
+def start_prometheus_server(port: int, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """
+    在后台线程启动 /metrics 端点（同一端口只启动一次）
+
+    Args:
+        port: 监听端口，0或负数表示不启动
+        host: 监听地址
+
+    Returns:
+        HTTP服务实例，未启动或启动失败时返回None
+    """
+    if port <= 0:
+        return None
+    with _servers_lock:
+        server = _servers.get(port)
+        if server is not None:
+            return server
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Prometheus指标端点启动失败（端口 {port}）: {e}")
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        _servers[port] = server
+        logger.info(f"Prometheus指标端点已启动: http://{host}:{port}/metrics")
+        return server